@@ -0,0 +1,229 @@
+"""Cached SSD detector output for field bounding boxes.
+
+The trained SSD model (``workspace/training_demo/exported-models/my_model``)
+locates invoice fields on the page. Running it costs a model load plus a full
+inference per image, and Streamlit reruns the script on every interaction, so
+the raw detector output is cached per image:
+
+- the key is the SHA-256 of the image bytes plus a tag of the exported model
+  (so re-exporting the model invalidates old entries);
+- entries hold every detection unfiltered (normalized boxes, classes, scores
+  and image size), so changing the score threshold never needs a rerun;
+- entries live in a small in-process LRU and on disk as ``.npz`` files under
+  ``DETECTION_CACHE_DIR`` (default ``app/cache/detections``).
+
+If TensorFlow or the exported model is unavailable, ``get_detections``
+returns ``None`` and callers fall back to their own layout.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from telemetry import incr, span
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DETECTOR_DIR = os.path.join(os.path.dirname(APP_DIR), "final_invoice_streamlit")
+DEFAULT_CACHE_DIR = os.path.join(APP_DIR, "cache", "detections")
+MEMORY_ENTRIES = 64
+
+# Detector class names mapped to the extracted field they locate
+FIELD_LABELS = {
+    "CompanyName": "CompanyName",
+    "CompanyAddress": "CompanyAddress",
+    "CustomerAddress": "CustomerAddress",
+    "Total": "TotalAmount",
+    "InvoiceNumber": "InvoiceNumber",
+    "Date": "Date",
+}
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_detector = None
+_model = None
+_model_tag = None
+_load_failed = False
+
+
+def image_hash(image_path):
+    """Return the SHA-256 hex digest of an image file's bytes."""
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as image_file:
+        for chunk in iter(lambda: image_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_detector():
+    """Import ``model_detector`` and load the SSD model once per process."""
+    global _detector, _model, _model_tag, _load_failed
+    if _model is not None or _load_failed:
+        return _model
+    with _lock:
+        if _model is not None or _load_failed:
+            return _model
+        try:
+            # model_detector lives with the detector-based Streamlit app
+            if DETECTOR_DIR not in sys.path:
+                sys.path.append(DETECTOR_DIR)
+            import model_detector
+            saved_model = os.path.join(model_detector.MODEL_PATH, "saved_model.pb")
+            if not os.path.exists(saved_model):
+                raise FileNotFoundError(saved_model)
+            model = model_detector.load_model()
+            if model is None:
+                raise RuntimeError("detector model failed to load")
+        except Exception:
+            _load_failed = True
+            return None
+        stat = os.stat(saved_model)
+        _model_tag = f"{stat.st_size:x}{int(stat.st_mtime):x}"
+        _detector = model_detector
+        _model = model
+        return _model
+
+
+def _cache_path(key):
+    cache_dir = os.getenv("DETECTION_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return os.path.join(cache_dir, key[:2], f"{key}.npz")
+
+
+def _remember(key, detections):
+    with _lock:
+        _memory[key] = detections
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def _read_disk(key):
+    path = _cache_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            return {
+                "height": int(data["size"][0]),
+                "width": int(data["size"][1]),
+                "boxes": data["boxes"],
+                "classes": data["classes"],
+                "scores": data["scores"],
+            }
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_disk(key, detections):
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as out:
+        np.savez(
+            out,
+            size=np.array([detections["height"], detections["width"]], dtype=np.int32),
+            boxes=np.asarray(detections["boxes"], dtype=np.float32),
+            classes=np.asarray(detections["classes"], dtype=np.int32),
+            scores=np.asarray(detections["scores"], dtype=np.float32),
+        )
+    os.replace(tmp_path, path)
+
+
+def get_detections(image_path, digest=None):
+    """Return the raw detector output for an image, running the model at most once.
+
+    Args:
+        image_path (str): Path to the invoice image.
+        digest (str): Precomputed ``image_hash`` of the file, if known.
+
+    Returns:
+        dict: ``height``, ``width``, ``boxes`` (N x 4 normalized ymin, xmin,
+            ymax, xmax), ``classes`` and ``scores``; ``None`` when the
+            detector is unavailable or inference failed.
+    """
+    digest = digest or image_hash(image_path)
+    # The model tag is only known after loading; probe memory and disk under
+    # the last known tag first so cache hits never import TensorFlow
+    if _model_tag is not None:
+        key = f"{digest}-{_model_tag}"
+        with _lock:
+            detections = _memory.get(key)
+            if detections is not None:
+                _memory.move_to_end(key)
+        if detections is not None:
+            incr("detection_cache_hits")
+            return detections
+
+    if _load_detector() is None:
+        return None
+    key = f"{digest}-{_model_tag}"
+    with span("detection_cache_read"):
+        detections = _read_disk(key)
+    if detections is not None:
+        incr("detection_cache_hits")
+        _remember(key, detections)
+        return detections
+
+    incr("detection_cache_misses")
+    try:
+        detections = _detector.run_detector(image_path, _model)
+    except Exception:
+        incr("detector_errors")
+        return None
+    _remember(key, detections)
+    try:
+        _write_disk(key, detections)
+    except OSError:
+        pass
+    return detections
+
+
+def field_boxes(image_path, extracted_data=None, min_score=0.5):
+    """Return one pixel box per extracted field located by the detector.
+
+    Args:
+        image_path (str): Path to the invoice image.
+        extracted_data (dict): Extracted invoice fields; when given, only
+            fields with a value get a box.
+        min_score (float): Minimum detection score.
+
+    Returns:
+        list: Box dicts (``label``, ``xmin``, ``ymin``, ``xmax``, ``ymax``,
+            ``score``) in pixels, best detection per field; ``None`` when
+            the detector is unavailable.
+    """
+    detections = get_detections(image_path)
+    if detections is None:
+        return None
+
+    scores = np.asarray(detections["scores"])
+    classes = np.asarray(detections["classes"])
+    boxes = np.asarray(detections["boxes"])
+    height, width = detections["height"], detections["width"]
+
+    # Highest-scoring detection per class above the threshold
+    keep = np.flatnonzero(scores >= min_score)
+    keep = keep[np.argsort(-scores[keep], kind="stable")]
+    _, first = np.unique(classes[keep], return_index=True)
+
+    keep = keep[np.sort(first)]
+    result = []
+    for index, name in zip(keep, _detector.label_names(classes[keep])):
+        label = FIELD_LABELS.get(name)
+        if label is None:
+            continue
+        if extracted_data is not None and extracted_data.get(label) in (None, ""):
+            continue
+        ymin, xmin, ymax, xmax = boxes[index]
+        result.append({
+            'label': label,
+            'xmin': int(xmin * width),
+            'ymin': int(ymin * height),
+            'xmax': int(xmax * width),
+            'ymax': int(ymax * height),
+            'score': float(scores[index])
+        })
+    return result
@@ -0,0 +1,270 @@
+"""Multi-invoice request packing for Gemini batch jobs.
+
+For small receipts the fixed per-request cost (prompt tokens, round trip)
+dominates, so batch jobs can pack several invoice images into one
+``generate_content`` call. The packed prompt asks for a JSON array with one
+object per image, keyed by its zero-based ``index``. The response is validated
+and split; any image whose entry is missing, duplicated or malformed is
+retried on its own with the regular single-invoice prompt.
+
+Usage:
+    python gemini_batch.py invoices/*.jpg --pack-size 4 --output results.jsonl
+"""
+
+import argparse
+import json
+import mimetypes
+import os
+import re
+import time
+
+from gemini_replay import check_replay_config, wrap_model
+from invoice_schema import (
+    GEMINI_MODEL,
+    INVOICE_FIELDS_SCHEMA,
+    INVOICE_KEYS,
+    INVOICE_PROMPT,
+    INVOICE_RULES,
+    convert_line_item_fields,
+    convert_monetary_fields,
+    parse_invoice_json,
+)
+from invoice_validation import validate_records
+from telemetry import incr, span
+
+DEFAULT_PACK_SIZE = 4
+
+PACKED_PROMPT = """
+You are given {count} invoice images, labelled "Image 0" to "Image {last}" in the order provided.
+Extract the following information from EACH invoice image:
+{schema}
+
+Return a JSON array with exactly {count} objects, one per image, and add an
+"index" field holding the image number, e.g. [{{"index": 0, ...}}, {{"index": 1, ...}}].
+
+Important:
+- Return ONLY the JSON array, nothing else
+- Never merge data from different images into one object
+{rules}
+"""
+
+
+class BatchStats:
+    """Counts API calls and outcomes for a batch run."""
+
+    def __init__(self):
+        self.invoices = 0
+        self.api_calls = 0
+        self.packed_calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.seconds = 0.0
+
+    @property
+    def invoices_per_call(self):
+        """Effective number of invoices extracted per API call."""
+        return self.invoices / self.api_calls if self.api_calls else 0.0
+
+    def as_dict(self):
+        return {
+            "invoices": self.invoices,
+            "api_calls": self.api_calls,
+            "packed_calls": self.packed_calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "seconds": round(self.seconds, 3),
+            "invoices_per_call": round(self.invoices_per_call, 2),
+        }
+
+
+def _image_part(image_path):
+    """Read an image file into a Gemini inline-data part."""
+    mime_type = mimetypes.guess_type(image_path)[0] or "image/jpeg"
+    with open(image_path, "rb") as image_file:
+        return {"mime_type": mime_type, "data": image_file.read()}
+
+
+def build_packed_request(parts):
+    """Build ``generate_content`` contents for several image parts.
+
+    Args:
+        parts (list): Inline-data image parts in index order.
+
+    Returns:
+        list: Prompt followed by alternating ``Image i:`` labels and images.
+    """
+    prompt = PACKED_PROMPT.format(
+        count=len(parts), last=len(parts) - 1,
+        schema=INVOICE_FIELDS_SCHEMA, rules=INVOICE_RULES
+    )
+    contents = [prompt]
+    for index, part in enumerate(parts):
+        contents.append(f"Image {index}:")
+        contents.append(part)
+    return contents
+
+
+def split_packed_response(text, count):
+    """Validate a packed response and split it into per-image results.
+
+    Args:
+        text (str): Raw model response text.
+        count (int): Number of images in the request.
+
+    Returns:
+        list: ``count`` entries, each a normalized invoice dict or ``None``
+            when the image needs to be retried individually.
+    """
+    results = [None] * count
+    json_match = re.search(r'\[[\s\S]*\]', text)
+    if not json_match:
+        return results
+    try:
+        items = json.loads(json_match.group(0))
+    except ValueError:
+        return results
+    if not isinstance(items, list):
+        return results
+
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("index", None)
+        if isinstance(index, str) and index.isdigit():
+            index = int(index)
+        # bool is an int subclass; "index": true must not mean image 1
+        if isinstance(index, bool) or not isinstance(index, int) or not 0 <= index < count:
+            continue
+        if index in seen:
+            # Ambiguous answer for this image; retry it on its own
+            results[index] = None
+            continue
+        seen.add(index)
+        if not any(key in item for key in INVOICE_KEYS):
+            continue
+        convert_monetary_fields(item)
+        convert_line_item_fields(item)
+        results[index] = item
+    return results
+
+
+def extract_single(model, part, stats):
+    """Extract one invoice with the regular single-image prompt."""
+    stats.api_calls += 1
+    incr("gemini_requests")
+    incr("bytes_sent", len(part["data"]) + len(INVOICE_PROMPT))
+    with span("gemini_request", bytes=len(part["data"])):
+        response = model.generate_content([INVOICE_PROMPT, part])
+    with span("json_parse"):
+        return parse_invoice_json(response.text)
+
+
+def extract_packed(model, parts, stats):
+    """Extract several invoices in one call, retrying failed items singly.
+
+    Args:
+        model: Gemini model (or replay wrapper).
+        parts (list): Inline-data image parts.
+        stats (BatchStats): Updated in place.
+
+    Returns:
+        list: One invoice dict (or ``None`` on failure) per part.
+    """
+    if len(parts) == 1:
+        results = [None]
+    else:
+        contents = build_packed_request(parts)
+        request_bytes = sum(len(part["data"]) for part in parts)
+        stats.api_calls += 1
+        stats.packed_calls += 1
+        incr("gemini_requests")
+        incr("gemini_packed_requests")
+        incr("bytes_sent", request_bytes + len(contents[0]))
+        try:
+            with span("gemini_packed_request", images=len(parts), bytes=request_bytes):
+                response = model.generate_content(contents)
+            with span("json_parse"):
+                results = split_packed_response(response.text, len(parts))
+        except Exception:
+            results = [None] * len(parts)
+
+    for index, part in enumerate(parts):
+        if results[index] is not None:
+            continue
+        if len(parts) > 1:
+            stats.retries += 1
+            incr("api_retries")
+        try:
+            results[index] = extract_single(model, part, stats)
+        except Exception:
+            stats.failures += 1
+    return results
+
+
+def extract_batch(image_paths, model, pack_size=DEFAULT_PACK_SIZE):
+    """Extract invoice data for many images using packed requests.
+
+    Args:
+        image_paths (list): Invoice image paths.
+        model: Gemini model (or replay wrapper).
+        pack_size (int): Maximum images per request; 1 disables packing.
+
+    Returns:
+        tuple: ``(results, stats)`` where ``results`` is aligned with
+            ``image_paths`` and ``stats`` is a ``BatchStats``.
+    """
+    stats = BatchStats()
+    results = []
+    start = time.perf_counter()
+    pack_size = max(1, pack_size)
+    for offset in range(0, len(image_paths), pack_size):
+        chunk = image_paths[offset:offset + pack_size]
+        with span("image_read"):
+            parts = [_image_part(path) for path in chunk]
+        results.extend(extract_packed(model, parts, stats))
+    stats.invoices = sum(result is not None for result in results)
+    stats.seconds = time.perf_counter() - start
+    return results, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract invoice data with packed Gemini requests")
+    parser.add_argument("images", nargs="+", help="Invoice image files")
+    parser.add_argument("--pack-size", type=int, default=DEFAULT_PACK_SIZE,
+                        help="Maximum invoices per API call (1 disables packing)")
+    parser.add_argument("--output", default=None, help="Write results as JSON Lines")
+    args = parser.parse_args()
+    try:
+        check_replay_config()
+    except ValueError as e:
+        parser.error(str(e))
+
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    model = wrap_model(genai.GenerativeModel(GEMINI_MODEL), GEMINI_MODEL)
+
+    results, stats = extract_batch(args.images, model, pack_size=args.pack_size)
+
+    extracted = [data for data in results if data is not None]
+    validation = validate_records(extracted)
+    validation.apply(extracted)
+    flags = iter(validation.flags)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            for path, data in zip(args.images, results):
+                out.write(json.dumps({
+                    "image": path,
+                    "data": data,
+                    "validation_flags": int(next(flags)) if data is not None else None,
+                }) + "\n")
+    for key, value in stats.as_dict().items():
+        print(f"{key}: {value}")
+    print(f"flagged: {int((validation.flags != 0).sum())}")
+    for message, count in validation.summary().items():
+        print(f"  {message}: {count}")
+
+
+if __name__ == "__main__":
+    main()
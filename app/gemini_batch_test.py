@@ -0,0 +1,160 @@
+"""Tests for gemini_batch."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from gemini_batch import (
+    BatchStats,
+    extract_batch,
+    extract_packed,
+    split_packed_response,
+)
+
+
+class _FakeResponse:
+
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModel:
+    """Answers packed requests with a fixed text and single requests by image."""
+
+    def __init__(self, packed_text=None, fail_single=()):
+        self.packed_text = packed_text
+        self.fail_single = fail_single
+        self.packed_calls = 0
+        self.single_requests = []
+
+    def generate_content(self, contents, **kwargs):
+        if len(contents) > 2:
+            self.packed_calls += 1
+            if self.packed_text is None:
+                raise RuntimeError("packed request failed")
+            return _FakeResponse(self.packed_text)
+        name = contents[1]["data"].decode()
+        self.single_requests.append(name)
+        if name in self.fail_single:
+            raise RuntimeError("single request failed")
+        return _FakeResponse(json.dumps({"InvoiceNumber": name}))
+
+
+def _parts(count):
+    return [{"mime_type": "image/jpeg", "data": f"inv{index}".encode()}
+            for index in range(count)]
+
+
+class SplitPackedResponseTest(unittest.TestCase):
+
+    def test_splits_by_index_and_converts_amounts(self):
+        text = "```json\n" + json.dumps([
+            {"index": 1, "InvoiceNumber": "B", "TotalAmount": "$1,234.50"},
+            {"index": "0", "InvoiceNumber": "A",
+             "LineItems": [{"Quantity": "2", "UnitPrice": "3.00"}]},
+        ]) + "\n```"
+        results = split_packed_response(text, 2)
+        self.assertEqual(results[0]["InvoiceNumber"], "A")
+        self.assertEqual(results[0]["LineItems"], [{"Quantity": 2.0, "UnitPrice": 3.0}])
+        self.assertEqual(results[1], {"InvoiceNumber": "B", "TotalAmount": 1234.5})
+
+    def test_rejects_bad_indices(self):
+        text = json.dumps([
+            {"index": True, "InvoiceNumber": "bool"},
+            {"index": 1, "InvoiceNumber": "B"},
+            {"index": -1, "InvoiceNumber": "negative"},
+            {"index": 3, "InvoiceNumber": "out of range"},
+            {"index": 1.0, "InvoiceNumber": "float"},
+            {"InvoiceNumber": "no index"},
+            {"index": 2, "InvoiceNumber": "C"},
+            {"index": 2, "InvoiceNumber": "C again"},
+            {"index": 0, "Comment": "no invoice fields"},
+            "not an object",
+        ])
+        results = split_packed_response(text, 3)
+        self.assertEqual(results, [None, {"InvoiceNumber": "B"}, None])
+
+    def test_unparsable_responses(self):
+        for text in ("", "no json here", "[{\"index\": 0,", '{"index": 0}'):
+            with self.subTest(text=text):
+                self.assertEqual(split_packed_response(text, 2), [None, None])
+
+
+class ExtractPackedTest(unittest.TestCase):
+
+    def test_packed_call_without_retries(self):
+        model = _FakeModel(json.dumps([{"index": i, "InvoiceNumber": f"p{i}"}
+                                       for i in range(3)]))
+        stats = BatchStats()
+        results = extract_packed(model, _parts(3), stats)
+        self.assertEqual([r["InvoiceNumber"] for r in results], ["p0", "p1", "p2"])
+        self.assertEqual(model.single_requests, [])
+        self.assertEqual((stats.api_calls, stats.packed_calls, stats.retries,
+                          stats.failures), (1, 1, 0, 0))
+
+    def test_failed_items_are_retried_singly(self):
+        model = _FakeModel(json.dumps([
+            {"index": True, "InvoiceNumber": "bool"},
+            {"index": 0, "InvoiceNumber": "p0"},
+            {"index": "1", "InvoiceNumber": "p1"},
+            {"index": 2, "InvoiceNumber": "p2"},
+            {"index": 2, "InvoiceNumber": "p2 again"},
+            {"index": 7, "InvoiceNumber": "p7"},
+            {"index": 4, "Comment": "no invoice fields"},
+        ]))
+        stats = BatchStats()
+        results = extract_packed(model, _parts(5), stats)
+        self.assertEqual([r["InvoiceNumber"] for r in results],
+                         ["p0", "p1", "inv2", "inv3", "inv4"])
+        self.assertEqual(model.single_requests, ["inv2", "inv3", "inv4"])
+        self.assertEqual((stats.api_calls, stats.packed_calls, stats.retries,
+                          stats.failures), (4, 1, 3, 0))
+
+    def test_unparsable_response_falls_back_to_single_requests(self):
+        for packed_text in ("Sorry, I cannot help with that.", None):
+            with self.subTest(packed_text=packed_text):
+                model = _FakeModel(packed_text, fail_single=("inv1",))
+                stats = BatchStats()
+                results = extract_packed(model, _parts(3), stats)
+                self.assertEqual(results, [{"InvoiceNumber": "inv0"}, None,
+                                           {"InvoiceNumber": "inv2"}])
+                self.assertEqual((stats.api_calls, stats.packed_calls, stats.retries,
+                                  stats.failures), (4, 1, 3, 1))
+
+    def test_single_part_is_not_packed(self):
+        model = _FakeModel()
+        stats = BatchStats()
+        self.assertEqual(extract_packed(model, _parts(1), stats),
+                         [{"InvoiceNumber": "inv0"}])
+        self.assertEqual(model.packed_calls, 0)
+        self.assertEqual((stats.api_calls, stats.retries), (1, 0))
+
+
+class ExtractBatchTest(unittest.TestCase):
+
+    def test_stats_count_invoices_per_call(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for index in range(5):
+                path = os.path.join(tmp, f"invoice_{index}.jpg")
+                with open(path, "wb") as image_file:
+                    image_file.write(f"inv{index}".encode())
+                paths.append(path)
+            # Each pack of two answers only its first image
+            model = _FakeModel(json.dumps([{"index": 0, "InvoiceNumber": "packed"}]))
+            results, stats = extract_batch(paths, model, pack_size=2)
+
+        self.assertEqual([r["InvoiceNumber"] for r in results],
+                         ["packed", "inv1", "packed", "inv3", "inv4"])
+        self.assertEqual(model.packed_calls, 2)
+        self.assertEqual(model.single_requests, ["inv1", "inv3", "inv4"])
+        self.assertEqual(stats.invoices, 5)
+        self.assertEqual(stats.api_calls, 5)
+        self.assertEqual(stats.retries, 2)
+        self.assertEqual(stats.invoices_per_call, 1.0)
+        self.assertEqual(stats.as_dict()["packed_calls"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,390 @@
+"""Record/replay layer for Gemini ``generate_content`` calls.
+
+Lets ``extract_invoice_data`` run offline and deterministically, for load
+testing without burning API quota or on build machines without network.
+
+Modes are selected with ``GEMINI_REPLAY_MODE``:
+
+- ``off`` (default): calls go straight to Gemini.
+- ``record``: calls go to Gemini; each request fingerprint, response text and
+  observed latency is stored in the archive.
+- ``replay``: responses are served from the archive and Gemini is never
+  contacted. Unknown requests raise ``ReplayMissError`` so the caller takes
+  its normal fallback path.
+
+The archive (``GEMINI_REPLAY_ARCHIVE``, default ``app/replay/gemini.db``) is a
+single SQLite file with zlib-compressed responses. Replay latency is set with
+``GEMINI_REPLAY_LATENCY``: ``none``, ``recorded`` (the latency observed while
+recording) or ``lognormal`` (sampled around the recorded median with spread
+``GEMINI_REPLAY_SIGMA``). Sampling is seeded per fingerprint so runs are
+repeatable.
+
+The configuration is checked once at startup with ``check_replay_config``.
+
+Run ``python gemini_replay.py --help`` for archive stats and a concurrent
+replay load test.
+"""
+
+import argparse
+import glob
+import hashlib
+import math
+import os
+import random
+import sqlite3
+import statistics
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from invoice_schema import GEMINI_MODEL, INVOICE_PROMPT
+from telemetry import incr, span
+
+MODES = ("off", "record", "replay")
+LATENCY_MODES = ("none", "recorded", "lognormal")
+DEFAULT_ARCHIVE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "replay", "gemini.db"
+)
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when a request is not in the archive."""
+
+
+class ReplayResponse:
+    """Minimal stand-in for a Gemini response; exposes ``text`` only."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+def fingerprint(model_name, contents):
+    """Return a stable hex digest identifying a ``generate_content`` request.
+
+    Args:
+        model_name (str): Gemini model name.
+        contents (list): Prompt parts as passed to ``generate_content``;
+            strings and ``{"mime_type", "data"}`` blobs are supported.
+
+    Returns:
+        str: SHA-256 hex digest of the model name and all parts.
+    """
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for part in contents:
+        if isinstance(part, dict):
+            digest.update(b"\x00blob:" + part.get("mime_type", "").encode("utf-8"))
+            data = part.get("data", b"")
+            digest.update(data if isinstance(data, bytes) else str(data).encode("utf-8"))
+        else:
+            digest.update(b"\x00text:" + str(part).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ReplayArchive:
+    """SQLite-backed store of request fingerprints and compressed responses.
+
+    Args:
+        path (str): Archive file; parent directories are created on demand.
+    """
+
+    def __init__(self, path=DEFAULT_ARCHIVE):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " response BLOB NOT NULL,"
+            " latency_ms REAL NOT NULL,"
+            " request_bytes INTEGER NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def put(self, key, model_name, text, latency_ms, request_bytes):
+        """Store (or overwrite) the response for ``key``."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, zlib.compress(text.encode("utf-8")),
+                 latency_ms, request_bytes, time.time())
+            )
+            self._conn.commit()
+
+    def get(self, key):
+        """Return ``(text, latency_ms)`` for ``key`` or ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, latency_ms FROM responses WHERE fingerprint = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8"), row[1]
+
+    def keys(self):
+        """Return all recorded fingerprints."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT fingerprint FROM responses")]
+
+    def latencies(self):
+        """Return all recorded latencies in milliseconds."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT latency_ms FROM responses")]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ReplayModel:
+    """Wraps a ``genai.GenerativeModel`` with record/replay behaviour.
+
+    Args:
+        model: The real Gemini model; may be ``None`` in replay mode.
+        model_name (str): Name used in request fingerprints.
+        archive (ReplayArchive): Archive to record into or replay from.
+        mode (str): One of ``MODES``.
+        latency (str): One of ``LATENCY_MODES``; only used in replay mode.
+        sigma (float): Log-space spread for ``lognormal`` latency.
+    """
+
+    def __init__(self, model, model_name, archive, mode="replay",
+                 latency="none", sigma=0.25):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        if latency not in LATENCY_MODES:
+            raise ValueError(f"Unknown replay latency mode: {latency}")
+        self.model = model
+        self.model_name = model_name
+        self.archive = archive
+        self.mode = mode
+        self.latency = latency
+        self.sigma = sigma
+
+    def _replay_delay(self, key, recorded_ms):
+        if self.latency == "recorded":
+            return recorded_ms / 1000.0
+        if self.latency == "lognormal":
+            rng = random.Random(key)
+            return rng.lognormvariate(math.log(max(recorded_ms, 1.0)), self.sigma) / 1000.0
+        return 0.0
+
+    def generate_content(self, contents, **kwargs):
+        """Record or replay a ``generate_content`` call."""
+        if self.mode == "off":
+            return self.model.generate_content(contents, **kwargs)
+
+        key = fingerprint(self.model_name, contents)
+        if self.mode == "replay":
+            with span("gemini_replay"):
+                entry = self.archive.get(key)
+                if entry is None:
+                    incr("replay_misses")
+                    raise ReplayMissError(f"No recorded response for request {key[:12]}")
+                text, recorded_ms = entry
+                incr("replay_hits")
+                delay = self._replay_delay(key, recorded_ms)
+                if delay:
+                    time.sleep(delay)
+            return ReplayResponse(text)
+
+        start = time.perf_counter()
+        response = self.model.generate_content(contents, **kwargs)
+        latency_ms = (time.perf_counter() - start) * 1000.0
+        request_bytes = sum(
+            len(part.get("data", b"")) if isinstance(part, dict) else len(str(part))
+            for part in contents
+        )
+        self.archive.put(key, self.model_name, response.text, latency_ms, request_bytes)
+        incr("replay_recorded")
+        return response
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def _get_archive(path):
+    with _archives_lock:
+        if path not in _archives:
+            _archives[path] = ReplayArchive(path)
+        return _archives[path]
+
+
+def replay_mode():
+    """Return the record/replay mode configured in the environment."""
+    return os.getenv("GEMINI_REPLAY_MODE", "off").lower()
+
+
+def check_replay_config():
+    """Validate the ``GEMINI_REPLAY_*`` environment.
+
+    Call once at startup so a typo fails loudly instead of raising inside
+    every request, where callers fall back silently.
+
+    Returns:
+        str: The configured mode.
+
+    Raises:
+        ValueError: On an unknown mode or latency mode, or a bad sigma.
+    """
+    mode = replay_mode()
+    if mode not in MODES:
+        raise ValueError(
+            f"GEMINI_REPLAY_MODE must be one of {', '.join(MODES)}, got {mode!r}"
+        )
+    latency = os.getenv("GEMINI_REPLAY_LATENCY", "none").lower()
+    if latency not in LATENCY_MODES:
+        raise ValueError(
+            f"GEMINI_REPLAY_LATENCY must be one of {', '.join(LATENCY_MODES)}, got {latency!r}"
+        )
+    try:
+        float(os.getenv("GEMINI_REPLAY_SIGMA", "0.25"))
+    except ValueError:
+        raise ValueError("GEMINI_REPLAY_SIGMA must be a number") from None
+    return mode
+
+
+def wrap_model(model, model_name):
+    """Wrap ``model`` according to the ``GEMINI_REPLAY_*`` environment.
+
+    Args:
+        model: A ``genai.GenerativeModel`` instance.
+        model_name (str): The model name it was created with.
+
+    Returns:
+        The model itself when replay is off, otherwise a ``ReplayModel``.
+    """
+    mode = replay_mode()
+    if mode == "off":
+        return model
+    return ReplayModel(
+        model,
+        model_name,
+        _get_archive(os.getenv("GEMINI_REPLAY_ARCHIVE", DEFAULT_ARCHIVE)),
+        mode=mode,
+        latency=os.getenv("GEMINI_REPLAY_LATENCY", "none").lower(),
+        sigma=float(os.getenv("GEMINI_REPLAY_SIGMA", "0.25"))
+    )
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def image_requests(paths, prompt, mime_type="image/jpeg"):
+    """Build ``generate_content`` contents for invoice images, as the app does.
+
+    Args:
+        paths (list): Image files.
+        prompt (str): Prompt sent with each image.
+        mime_type (str): MIME type sent with each image; the app always
+            sends ``image/jpeg``.
+
+    Returns:
+        list: One ``[prompt, {"mime_type", "data"}]`` request per image.
+    """
+    requests = []
+    for path in paths:
+        with open(path, "rb") as image_file:
+            requests.append([prompt, {"mime_type": mime_type, "data": image_file.read()}])
+    return requests
+
+
+def load_test(model, requests, count, workers, seed=0):
+    """Send requests through ``model.generate_content`` concurrently.
+
+    Each call goes through the full replay path (fingerprinting, archive
+    lookup, latency simulation and telemetry). The request mix is drawn from
+    ``requests`` with a seeded RNG so it is reproducible.
+
+    Args:
+        model (ReplayModel): Model in replay mode.
+        requests (list): Request contents to draw from.
+        count (int): Total number of calls.
+        workers (int): Concurrent worker threads.
+        seed (int): Seed for the request mix.
+
+    Returns:
+        dict: Call and miss counts, wall time, throughput and latency
+            percentiles of the answered calls.
+    """
+    if not requests:
+        raise ValueError("No requests to replay")
+    rng = random.Random(seed)
+    schedule = [rng.choice(requests) for _ in range(count)]
+
+    def _call(contents):
+        start = time.perf_counter()
+        try:
+            model.generate_content(contents)
+        except ReplayMissError:
+            return None
+        return (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_call, schedule))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for latency in results if latency is not None]
+    if not latencies:
+        raise ValueError(f"None of the requests are in archive {model.archive.path}")
+    return {
+        "requests": count,
+        "misses": count - len(latencies),
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(count / elapsed, 1) if elapsed else float("inf"),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or load-test a Gemini replay archive")
+    parser.add_argument("--archive", default=os.getenv("GEMINI_REPLAY_ARCHIVE", DEFAULT_ARCHIVE))
+    parser.add_argument("--images", nargs="+", default=[],
+                        help="Invoice images (or glob patterns) to replay with the app prompt")
+    parser.add_argument("--model", default=GEMINI_MODEL,
+                        help="Model name the requests were recorded with")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", choices=LATENCY_MODES, default="recorded")
+    parser.add_argument("--sigma", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stats", action="store_true",
+                        help="Print archive statistics instead of running a load test")
+    args = parser.parse_args()
+
+    archive = ReplayArchive(args.archive)
+    if args.stats:
+        latencies = archive.latencies()
+        print(f"Archive: {args.archive}")
+        print(f"Entries: {len(latencies)}")
+        if latencies:
+            print(f"Recorded latency median: {statistics.median(latencies):.1f} ms")
+            print(f"Recorded latency p95: {_percentile(latencies, 95):.1f} ms")
+        return
+
+    paths = sorted(path for pattern in args.images for path in glob.glob(pattern))
+    if not paths:
+        parser.error("--images is required for a load test (or pass --stats)")
+    model = ReplayModel(None, args.model, archive, mode="replay",
+                        latency=args.latency, sigma=args.sigma)
+    result = load_test(model, image_requests(paths, INVOICE_PROMPT),
+                       args.requests, args.workers, seed=args.seed)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
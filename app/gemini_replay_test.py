@@ -0,0 +1,89 @@
+"""Tests for gemini_replay."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from gemini_replay import (
+    ReplayArchive,
+    ReplayMissError,
+    ReplayModel,
+    check_replay_config,
+    image_requests,
+    load_test,
+)
+
+
+class _FakeResponse:
+
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModel:
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, contents, **kwargs):
+        self.calls += 1
+        return _FakeResponse(f"response {len(contents[1]['data'])}")
+
+
+class GeminiReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = ReplayArchive(os.path.join(self.tmp.name, "gemini.db"))
+        paths = []
+        for index in range(3):
+            path = os.path.join(self.tmp.name, f"invoice_{index}.jpg")
+            with open(path, "wb") as image_file:
+                image_file.write(b"x" * (index + 1))
+            paths.append(path)
+        self.requests = image_requests(paths, "prompt")
+
+    def tearDown(self):
+        self.archive.close()
+        self.tmp.cleanup()
+
+    def test_record_then_replay(self):
+        real = _FakeModel()
+        recorder = ReplayModel(real, "model", self.archive, mode="record")
+        for contents in self.requests[:2]:
+            recorder.generate_content(contents)
+        self.assertEqual(real.calls, 2)
+
+        replayer = ReplayModel(None, "model", self.archive, mode="replay")
+        self.assertEqual(replayer.generate_content(self.requests[1]).text, "response 2")
+        with self.assertRaises(ReplayMissError):
+            replayer.generate_content(self.requests[2])
+
+    def test_load_test_goes_through_generate_content(self):
+        recorder = ReplayModel(_FakeModel(), "model", self.archive, mode="record")
+        for contents in self.requests[:2]:
+            recorder.generate_content(contents)
+        replayer = ReplayModel(None, "model", self.archive, mode="replay")
+        with mock.patch.object(replayer, "generate_content",
+                               wraps=replayer.generate_content) as generate:
+            result = load_test(replayer, self.requests, 30, workers=4, seed=1)
+        self.assertEqual(generate.call_count, 30)
+        self.assertEqual(result["requests"], 30)
+        self.assertGreater(result["misses"], 0)
+        self.assertLess(result["misses"], 30)
+
+    def test_check_replay_config(self):
+        with mock.patch.dict(os.environ, {"GEMINI_REPLAY_MODE": "Replay"}):
+            self.assertEqual(check_replay_config(), "replay")
+        with mock.patch.dict(os.environ, {"GEMINI_REPLAY_MODE": "replya"}):
+            with self.assertRaisesRegex(ValueError, "GEMINI_REPLAY_MODE"):
+                check_replay_config()
+        with mock.patch.dict(os.environ, {"GEMINI_REPLAY_MODE": "replay",
+                                          "GEMINI_REPLAY_LATENCY": "slow"}):
+            with self.assertRaisesRegex(ValueError, "GEMINI_REPLAY_LATENCY"):
+                check_replay_config()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+"""Tests for invoice_schema."""
+
+import hashlib
+import unittest
+
+from invoice_schema import INVOICE_PROMPT, parse_invoice_json
+
+# SHA-256 of the single-invoice prompt. Replay archives are keyed by the
+# request, so changing the prompt invalidates every recorded response.
+INVOICE_PROMPT_SHA256 = "1f2ec73031dae0508f6b53f91fdeaf5d0478ce064f7b22138e0eaee535a4fe3d"
+
+
+class InvoiceSchemaTest(unittest.TestCase):
+
+    def test_prompt_is_unchanged(self):
+        self.assertEqual(
+            hashlib.sha256(INVOICE_PROMPT.encode("utf-8")).hexdigest(),
+            INVOICE_PROMPT_SHA256,
+        )
+
+    def test_parse_invoice_json(self):
+        data = parse_invoice_json(
+            'Here you go: {"Subtotal": "$1,200.50", "LineItems": '
+            '[{"Quantity": "2", "UnitPrice": "600.25", "TotalPrice": null}]}'
+        )
+        self.assertEqual(data["Subtotal"], 1200.5)
+        self.assertEqual(data["LineItems"][0],
+                         {"Quantity": 2.0, "UnitPrice": 600.25, "TotalPrice": None})
+        with self.assertRaises(ValueError):
+            parse_invoice_json("no json here")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,513 @@
+"""Vectorized validation and reconciliation of extracted invoice amounts.
+
+Extracted records are converted to columnar NumPy arrays so a whole batch is
+parsed and reconciled at once instead of mutating one dict at a time:
+
+- Amount strings are parsed with locale-aware separator detection
+  (``1,234.50``, ``1.234,50``, ``1 234,50``, ``1'234.50``), known currency
+  symbols and ISO codes (``CURRENCY_CODES``) are stripped, and accounting
+  negatives ``(12.00)`` are honoured. Anything else (other words, exponents,
+  misplaced separators such as ``12 to 15`` or ``12.5.3``) makes the value
+  invalid rather than being dropped.
+- Line item ``TotalPrice`` values are summed per invoice and reconciled
+  against ``Subtotal``; ``Subtotal + TaxAmount`` is reconciled against
+  ``TotalAmount``; each line's ``Quantity * UnitPrice`` against its
+  ``TotalPrice``. Comparisons use an absolute and a relative tolerance.
+- Every record gets a bitmask of error flags (see ``FLAG_NAMES``).
+
+Run ``python invoice_validation.py --benchmark 200000`` to measure batch
+throughput on synthetic records.
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+from itertools import chain, repeat
+
+import numpy as np
+
+AMOUNT_FIELDS = ("Subtotal", "TaxAmount", "TotalAmount")
+LINE_ITEM_FIELDS = ("Quantity", "UnitPrice", "TotalPrice")
+
+FLAG_SUBTOTAL_INVALID = 1 << 0
+FLAG_TAX_INVALID = 1 << 1
+FLAG_TOTAL_INVALID = 1 << 2
+FLAG_SUBTOTAL_MISSING = 1 << 3
+FLAG_TAX_MISSING = 1 << 4
+FLAG_TOTAL_MISSING = 1 << 5
+FLAG_LINE_ITEM_INVALID = 1 << 6
+FLAG_LINE_ITEM_MISMATCH = 1 << 7
+FLAG_LINE_SUM_MISMATCH = 1 << 8
+FLAG_TOTAL_MISMATCH = 1 << 9
+FLAG_NEGATIVE_AMOUNT = 1 << 10
+FLAG_CURRENCY_MISMATCH = 1 << 11
+
+FLAG_NAMES = {
+    FLAG_SUBTOTAL_INVALID: "Subtotal could not be parsed",
+    FLAG_TAX_INVALID: "TaxAmount could not be parsed",
+    FLAG_TOTAL_INVALID: "TotalAmount could not be parsed",
+    FLAG_SUBTOTAL_MISSING: "Subtotal is missing",
+    FLAG_TAX_MISSING: "TaxAmount is missing",
+    FLAG_TOTAL_MISSING: "TotalAmount is missing",
+    FLAG_LINE_ITEM_INVALID: "A line item amount could not be parsed",
+    FLAG_LINE_ITEM_MISMATCH: "A line item's Quantity x UnitPrice differs from its TotalPrice",
+    FLAG_LINE_SUM_MISMATCH: "Line items do not sum to Subtotal",
+    FLAG_TOTAL_MISMATCH: "Subtotal + TaxAmount does not equal TotalAmount",
+    FLAG_NEGATIVE_AMOUNT: "An invoice amount is negative",
+    FLAG_CURRENCY_MISMATCH: "Amounts use different currencies",
+}
+
+_FIELD_FLAGS = {
+    "Subtotal": (FLAG_SUBTOTAL_INVALID, FLAG_SUBTOTAL_MISSING),
+    "TaxAmount": (FLAG_TAX_INVALID, FLAG_TAX_MISSING),
+    "TotalAmount": (FLAG_TOTAL_INVALID, FLAG_TOTAL_MISSING),
+}
+
+CURRENCY_SYMBOLS = {
+    "$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR",
+    "₩": "KRW", "₽": "RUB", "₺": "TRY", "₱": "PHP", "₫": "VND",
+}
+CURRENCY_CODES = frozenset(CURRENCY_SYMBOLS.values()) | frozenset((
+    "AED", "AUD", "BRL", "CAD", "CHF", "CNY", "CZK", "DKK", "HKD", "HUF",
+    "IDR", "ILS", "MXN", "MYR", "NOK", "NZD", "PLN", "SAR", "SEK", "SGD",
+    "THB", "TWD", "ZAR",
+))
+NULL_TOKENS = frozenset(("", "null", "none", "n/a", "na", "-", "--"))
+
+_NUMBER_TYPES = (int, float)
+_JOIN = "\x00"
+
+# A single amount: optional currency marker and sign, accounting parentheses,
+# and either an ungrouped number or groups of three digits with one grouping
+# separator and a different decimal separator.
+_CURRENCY = "|".join(map(re.escape, sorted(CURRENCY_SYMBOLS) + sorted(CURRENCY_CODES)))
+_NUMBER = (r"(?:\d{1,3}(?P<group>[,. \u00a0\u202f'\u2019])\d{3}(?:(?P=group)\d{3})*"
+           r"(?:(?!(?P=group))[.,]\d+)?"
+           r"|\d+(?:[.,]\d*)?|[.,]\d+)")
+_AMOUNT_PATTERN = re.compile(
+    rf"\s*(?:(?:{_CURRENCY})\s*)?(?P<paren>\()?\s*(?:(?:{_CURRENCY})\s*)?[+-]?\s*"
+    rf"(?:(?:{_CURRENCY})\s*)?{_NUMBER}(?:\s*(?:{_CURRENCY}))?\s*(?(paren)\))"
+    rf"(?:\s*(?:{_CURRENCY}))?\s*")
+# Digits collapse to "9" so each distinct layout is matched only once.
+_SHAPE_TABLE = str.maketrans(string.digits, "9" * len(string.digits))
+
+# Characters removed before numeric conversion: currency symbols, letters,
+# grouping spaces/apostrophes and parentheses. Values are checked against
+# _AMOUNT_PATTERN first, so the only letters left are ISO codes.
+_STRIP_CHARS = ("".join(CURRENCY_SYMBOLS) + string.ascii_letters
+                + " \t\u00a0\u202f'\u2019()")
+_STRIP_TABLE = str.maketrans("", "", _STRIP_CHARS)
+# Stripping fused with separator normalization, one translate per column
+_DECIMAL_DOT_TABLE = str.maketrans("", "", _STRIP_CHARS + ",")
+_DECIMAL_COMMA_TABLE = str.maketrans({**dict.fromkeys(_STRIP_CHARS + "."), ",": "."})
+# Characters removed to leave only the currency marker ("$", "EUR", ...).
+_MARKER_TABLE = str.maketrans("", "", string.digits + ".,+-() \t\u00a0\u202f'\u2019")
+
+
+class _TextColumn:
+    """Strings of one column joined once so ``str.translate`` runs in C."""
+
+    def __init__(self, texts):
+        self.texts = texts
+        joined = _JOIN.join(texts)
+        # Fall back to per-value translation if a value contains the separator
+        self.joined = joined if joined.count(_JOIN) == len(texts) - 1 else None
+        self.probe = joined
+
+    def translate(self, table):
+        if self.joined is not None:
+            return self.joined.translate(table).split(_JOIN)
+        return [text.translate(table) for text in self.texts]
+
+    def __contains__(self, char):
+        return char in self.probe
+
+    def malformed(self):
+        """Return the positions of values that are not a single amount."""
+        shapes = self.translate(_SHAPE_TABLE)
+        bad = {shape for shape in set(shapes) if not _AMOUNT_PATTERN.fullmatch(shape)}
+        if not bad:
+            return frozenset()
+        return frozenset(position for position, shape in enumerate(shapes) if shape in bad)
+
+
+def _split_column(values):
+    """Separate a mixed column into numeric values and strings to parse.
+
+    Returns:
+        tuple: ``(amounts, invalid, text_index, texts)``.
+    """
+    count = len(values)
+    amounts = np.full(count, np.nan)
+    invalid = np.zeros(count, dtype=bool)
+    objects = np.fromiter(values, dtype=object, count=count)
+    kinds = np.fromiter(map(type, values), dtype=object, count=count)
+    text_index = np.flatnonzero(kinds == str)
+    number_index = np.flatnonzero((kinds == float) | (kinds == int))
+    if len(number_index):
+        amounts[number_index] = objects[number_index].astype(np.float64)
+    texts = objects[text_index].tolist()
+
+    handled = len(text_index) + len(number_index)
+    if handled < count and handled + np.count_nonzero(kinds == type(None)) < count:
+        # Rare types: subclasses of str/float, NumPy scalars, booleans, lists
+        for index, value in enumerate(values):
+            if value is None or type(value) is str or type(value) in _NUMBER_TYPES:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (str, int, float, np.number)):
+                invalid[index] = True
+            elif isinstance(value, str):
+                text_index = np.append(text_index, index)
+                texts.append(str(value))
+            else:
+                amounts[index] = value
+    return amounts, invalid, text_index, texts
+
+
+def _parse_one(cleaned, decimal):
+    """Scalar version of the separator rules in ``_parse_texts``."""
+    comma = cleaned.rfind(",")
+    dot = cleaned.rfind(".")
+    if decimal == "auto":
+        decimal_comma = comma >= 0 and (
+            dot < comma if dot >= 0
+            else cleaned.count(",") == 1 and len(cleaned) - comma - 1 != 3)
+    else:
+        decimal_comma = decimal == ","
+    if decimal_comma or (comma < 0 and cleaned.count(".") > 1):
+        cleaned = cleaned.replace(".", "")
+    return float(cleaned.replace(",", "." if decimal_comma else ""))
+
+
+def _parse_texts(texts, decimal, column=None):
+    """Vectorized locale-aware parsing of amount strings.
+
+    Values that do not match ``_AMOUNT_PATTERN`` are invalid (or missing for
+    ``NULL_TOKENS``). Stripping and separator normalization happen in one
+    ``str.translate`` over the joined column. When the column contains commas
+    in auto mode, NumPy string ops pick the decimal separator per value.
+    Values that still fail ``float`` fall back to ``_parse_one``.
+
+    Returns:
+        tuple: ``(parsed, invalid)`` arrays aligned with ``texts``.
+    """
+    if decimal not in ("auto", ".", ","):
+        raise ValueError(f"Unsupported decimal separator: {decimal!r}")
+    column = column or _TextColumn(texts)
+    cleaned = None
+    if decimal == ",":
+        normalized = column.translate(_DECIMAL_COMMA_TABLE)
+    else:
+        normalized = column.translate(_DECIMAL_DOT_TABLE)
+        if decimal == "auto" and "," in column:
+            cleaned = column.translate(_STRIP_TABLE)
+            chars = np.array(cleaned, dtype=str)
+            comma = np.char.rfind(chars, ",")
+            dot = np.char.rfind(chars, ".")
+            digits_after_comma = np.char.str_len(chars) - comma - 1
+            decimal_comma = (((comma >= 0) & (dot >= 0) & (comma > dot))
+                             | ((comma >= 0) & (dot < 0)
+                                & (np.char.count(chars, ",") == 1)
+                                & (digits_after_comma != 3)))
+            if decimal_comma.any():
+                comma_normalized = column.translate(_DECIMAL_COMMA_TABLE)
+                normalized = [
+                    comma_text if use_comma else dot_text
+                    for dot_text, comma_text, use_comma
+                    in zip(normalized, comma_normalized, decimal_comma.tolist())
+                ]
+
+    malformed = column.malformed()
+    if malformed:
+        for position in malformed:
+            normalized[position] = ""
+
+    invalid = np.zeros(len(texts), dtype=bool)
+    try:
+        parsed = np.fromiter(map(float, normalized), dtype=np.float64, count=len(texts))
+    except ValueError:
+        # Slow path only for columns with nulls, repeated dots or malformed values
+        cleaned = cleaned or column.translate(_STRIP_TABLE)
+        parsed = np.empty(len(texts))
+        for position, text in enumerate(normalized):
+            try:
+                parsed[position] = float(text)
+            except ValueError:
+                parsed[position] = np.nan
+                # Placeholders such as "n/a" or "--" survive stripping
+                if texts[position].strip().lower() in NULL_TOKENS:
+                    continue
+                if position in malformed or not cleaned[position]:
+                    invalid[position] = True
+                    continue
+                try:
+                    parsed[position] = _parse_one(cleaned[position], decimal)
+                except ValueError:
+                    invalid[position] = True
+
+    if "(" in column:
+        negative = [position for position, text in enumerate(texts)
+                    if "(" in text and ")" in text]
+        parsed[negative] = -np.abs(parsed[negative])
+    return parsed, invalid
+
+
+def parse_amounts(values, decimal="auto"):
+    """Parse a column of extracted amounts into floats.
+
+    Args:
+        values (sequence): Numbers, strings or ``None``.
+        decimal (str): ``"."`` or ``","`` to force the decimal separator, or
+            ``"auto"`` to infer it per value. In auto mode the right-most of
+            ``,``/``.`` is the decimal separator when both occur; a lone comma
+            is decimal unless followed by exactly three digits; repeated dots
+            are grouping separators.
+
+    Returns:
+        tuple: ``(amounts, invalid)`` where ``amounts`` is a float64 array
+            with NaN for missing/unparseable values and ``invalid`` is a
+            boolean array marking values that were present but unparseable.
+    """
+    amounts, invalid, text_index, texts = _split_column(values)
+    if texts:
+        parsed, text_invalid = _parse_texts(texts, decimal)
+        amounts[text_index] = parsed
+        invalid[text_index] = text_invalid
+    return amounts, invalid
+
+
+def _marker_code(marker):
+    for symbol, code in CURRENCY_SYMBOLS.items():
+        if symbol in marker:
+            return code
+    if marker in CURRENCY_CODES:
+        return marker
+    return None
+
+
+def _currency_codes(texts, column=None):
+    """Return the ISO code (or ``None``) mentioned in each string."""
+    markers = (column or _TextColumn(texts)).translate(_MARKER_TABLE)
+    lookup = {marker: _marker_code(marker) for marker in set(markers)}
+    return [lookup[marker] for marker in markers]
+
+
+def detect_currencies(values):
+    """Return the currency (ISO code) mentioned in each value, or ``None``."""
+    currencies = np.full(len(values), None, dtype=object)
+    text_index = [index for index, value in enumerate(values) if isinstance(value, str)]
+    if text_index:
+        currencies[text_index] = _currency_codes([values[index] for index in text_index])
+    return currencies
+
+
+def _close(actual, expected, abs_tol, rel_tol):
+    return np.abs(actual - expected) <= np.maximum(abs_tol, rel_tol * np.abs(expected))
+
+
+class ValidationResult:
+    """Columnar outcome of ``validate_records``.
+
+    Attributes:
+        amounts (dict): Field name -> float64 array of parsed amounts.
+        line_sums (np.ndarray): Sum of line item totals per record.
+        line_counts (np.ndarray): Number of line items per record.
+        flags (np.ndarray): uint16 error bitmask per record.
+        item_record (np.ndarray): Record index of each flattened line item.
+        item_amounts (dict): Line item field -> float64 array.
+    """
+
+    def __init__(self, amounts, line_sums, line_counts, flags, item_record, item_amounts):
+        self.amounts = amounts
+        self.line_sums = line_sums
+        self.line_counts = line_counts
+        self.flags = flags
+        self.item_record = item_record
+        self.item_amounts = item_amounts
+
+    @property
+    def valid(self):
+        """Boolean array, True for records without any flag."""
+        return self.flags == 0
+
+    def describe(self, index):
+        """Return human-readable messages for the flags of one record."""
+        value = int(self.flags[index])
+        return [message for flag, message in FLAG_NAMES.items() if value & flag]
+
+    def summary(self):
+        """Return ``{message: count}`` for every flag raised in the batch."""
+        return {
+            message: int(np.count_nonzero(self.flags & flag))
+            for flag, message in FLAG_NAMES.items()
+            if np.any(self.flags & flag)
+        }
+
+    def apply(self, records):
+        """Write parsed amounts back into ``records`` (in place).
+
+        Only values that parsed successfully are replaced; unparseable
+        strings are left untouched so they remain visible to the user.
+        """
+        for field, column in self.amounts.items():
+            for index in np.flatnonzero(~np.isnan(column)):
+                if field in records[index]:
+                    records[index][field] = float(column[index])
+        # Line items were flattened in record order, skipping non-dict entries
+        item_index = 0
+        for record in records:
+            for item in record.get("LineItems") or ():
+                if not isinstance(item, dict):
+                    continue
+                for field, column in self.item_amounts.items():
+                    if field in item and not np.isnan(column[item_index]):
+                        item[field] = float(column[item_index])
+                item_index += 1
+
+
+def validate_records(records, decimal="auto", abs_tol=0.01, rel_tol=0.001):
+    """Parse and reconcile the amounts of a batch of extracted invoices.
+
+    Args:
+        records (list): Extracted invoice dicts.
+        decimal (str): Decimal separator, see ``parse_amounts``.
+        abs_tol (float): Absolute tolerance for reconciliation checks.
+        rel_tol (float): Relative tolerance for reconciliation checks.
+
+    Returns:
+        ValidationResult: Parsed columns and per-record error flags.
+    """
+    count = len(records)
+    flags = np.zeros(count, dtype=np.uint16)
+
+    amounts = {}
+    # Small integer id per currency code (0 = none mentioned), one row per field
+    currency_ids = np.zeros((len(AMOUNT_FIELDS), count), dtype=np.int32)
+    registry = {None: 0}
+    for row, field in enumerate(AMOUNT_FIELDS):
+        values, invalid, text_index, texts = _split_column(
+            list(map(dict.get, records, repeat(field))))
+        if texts:
+            column = _TextColumn(texts)
+            parsed, text_invalid = _parse_texts(texts, decimal, column)
+            values[text_index] = parsed
+            invalid[text_index] = text_invalid
+            codes = _currency_codes(texts, column)
+            ids = {code: registry.setdefault(code, len(registry)) for code in set(codes)}
+            currency_ids[row, text_index] = [ids[code] for code in codes]
+        invalid_flag, missing_flag = _FIELD_FLAGS[field]
+        flags[invalid] |= invalid_flag
+        flags[np.isnan(values) & ~invalid] |= missing_flag
+        amounts[field] = values
+
+    # Flatten line items without allocating per-item objects (avoids GC churn)
+    line_items = [record_items if type(record_items) is list else ()
+                  for record_items in map(dict.get, records, repeat("LineItems"))]
+    items = list(chain.from_iterable(line_items))
+    if set(map(type, items)) - {dict}:
+        line_items = [[item for item in record_items if isinstance(item, dict)]
+                      for record_items in line_items]
+        items = list(chain.from_iterable(line_items))
+    item_record = np.repeat(np.arange(count, dtype=np.int64),
+                            np.fromiter(map(len, line_items), dtype=np.int64, count=count))
+    item_columns = {field: list(map(dict.get, items, repeat(field))) for field in LINE_ITEM_FIELDS}
+
+    item_amounts = {}
+    item_invalid = np.zeros(len(item_record), dtype=bool)
+    for field in LINE_ITEM_FIELDS:
+        values, invalid = parse_amounts(item_columns[field], decimal)
+        item_amounts[field] = values
+        item_invalid |= invalid
+
+    quantity = item_amounts["Quantity"]
+    expected_price = quantity * item_amounts["UnitPrice"]
+    price = item_amounts["TotalPrice"]
+    item_mismatch = (~np.isnan(price) & ~np.isnan(expected_price)
+                     & ~_close(price, expected_price, abs_tol, rel_tol))
+    price = np.where(np.isnan(price), expected_price, price)
+
+    line_counts = np.bincount(item_record, minlength=count)
+    line_sums = np.bincount(item_record, weights=np.nan_to_num(price), minlength=count)
+    priced = np.bincount(item_record, weights=~np.isnan(price), minlength=count)
+    flags[np.bincount(item_record, weights=item_invalid, minlength=count) > 0] |= (
+        FLAG_LINE_ITEM_INVALID)
+    flags[np.bincount(item_record, weights=item_mismatch, minlength=count) > 0] |= (
+        FLAG_LINE_ITEM_MISMATCH)
+
+    subtotal = amounts["Subtotal"]
+    tax = amounts["TaxAmount"]
+    total = amounts["TotalAmount"]
+
+    # Without a subtotal, reconcile the line items against total minus tax
+    reference = np.where(np.isnan(subtotal),
+                         np.where(np.isnan(tax), total, total - tax),
+                         subtotal)
+    check_lines = (line_counts > 0) & (priced == line_counts) & ~np.isnan(reference)
+    flags[check_lines & ~_close(line_sums, reference, abs_tol, rel_tol)] |= (
+        FLAG_LINE_SUM_MISMATCH)
+
+    check_total = ~np.isnan(subtotal) & ~np.isnan(tax) & ~np.isnan(total)
+    flags[check_total & ~_close(subtotal + tax, total, abs_tol, rel_tol)] |= FLAG_TOTAL_MISMATCH
+
+    with np.errstate(invalid="ignore"):
+        negative = (subtotal < 0) | (tax < 0) | (total < 0)
+    flags[negative] |= FLAG_NEGATIVE_AMOUNT
+
+    if len(registry) > 2:
+        highest = currency_ids.max(axis=0)
+        lowest = np.where(currency_ids > 0, currency_ids, highest).min(axis=0)
+        flags[lowest != highest] |= FLAG_CURRENCY_MISMATCH
+
+    return ValidationResult(amounts, line_sums, line_counts, flags, item_record, item_amounts)
+
+
+def _synthetic_records(count, seed=0):
+    """Generate records with mixed number formats for benchmarking."""
+    rng = random.Random(seed)
+    formats = [
+        lambda v: v,
+        lambda v: f"${v:,.2f}",
+        lambda v: f"{v:,.2f}".replace(",", " ").replace(".", ",") + " EUR",
+        lambda v: f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."),
+        lambda v: f"{v:.2f}",
+    ]
+    records = []
+    for _ in range(count):
+        fmt = rng.choice(formats)
+        prices = [round(rng.uniform(5, 500), 2) for _ in range(rng.randint(1, 4))]
+        subtotal = round(sum(prices), 2)
+        tax = round(subtotal * 0.12, 2)
+        records.append({
+            "Subtotal": fmt(subtotal),
+            "TaxAmount": fmt(tax),
+            "TotalAmount": fmt(round(subtotal + tax, 2)),
+            "LineItems": [
+                {"Description": "Item", "Quantity": 1, "UnitPrice": fmt(price),
+                 "TotalPrice": fmt(price)}
+                for price in prices
+            ],
+        })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch invoice amount validation")
+    parser.add_argument("--benchmark", type=int, default=100000,
+                        help="Number of synthetic records to validate")
+    args = parser.parse_args()
+
+    records = _synthetic_records(args.benchmark)
+    start = time.perf_counter()
+    result = validate_records(records)
+    elapsed = time.perf_counter() - start
+    print(f"Validated {len(records)} records in {elapsed:.3f}s "
+          f"({len(records) / elapsed:,.0f} records/s)")
+    print(f"Flagged records: {int(np.count_nonzero(result.flags))}")
+    for message, count in result.summary().items():
+        print(f"  {message}: {count}")
+
+
+if __name__ == "__main__":
+    main()
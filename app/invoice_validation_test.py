@@ -0,0 +1,165 @@
+"""Tests for invoice_validation."""
+
+import unittest
+
+import numpy as np
+
+from invoice_validation import (
+    FLAG_CURRENCY_MISMATCH,
+    FLAG_LINE_ITEM_INVALID,
+    FLAG_LINE_ITEM_MISMATCH,
+    FLAG_LINE_SUM_MISMATCH,
+    FLAG_NEGATIVE_AMOUNT,
+    FLAG_SUBTOTAL_INVALID,
+    FLAG_SUBTOTAL_MISSING,
+    FLAG_TAX_MISSING,
+    FLAG_TOTAL_INVALID,
+    FLAG_TOTAL_MISMATCH,
+    NULL_TOKENS,
+    detect_currencies,
+    parse_amounts,
+    validate_records,
+)
+
+
+def _record(subtotal="100.00", tax="10.00", total="110.00", items=None):
+    return {"Subtotal": subtotal, "TaxAmount": tax, "TotalAmount": total,
+            "LineItems": items if items is not None else []}
+
+
+class ParseAmountsTest(unittest.TestCase):
+
+    def assertParses(self, values, expected, decimal="auto"):
+        amounts, invalid = parse_amounts(values, decimal)
+        np.testing.assert_allclose(amounts, expected)
+        np.testing.assert_array_equal(invalid, [False] * len(values))
+
+    def test_dot_decimal_locale(self):
+        self.assertParses(
+            ["1,234.50", "1234.5", "$1,234,567.89", "1'234.50", "0.99", ".5", 7, 2.5],
+            [1234.5, 1234.5, 1234567.89, 1234.5, 0.99, 0.5, 7, 2.5])
+
+    def test_comma_decimal_locale(self):
+        self.assertParses(
+            ["1.234,50", "1 234,50", "12,5", "1.234.567,89", "1 234,50"],
+            [1234.5, 1234.5, 12.5, 1234567.89, 1234.5])
+
+    def test_forced_decimal_separator(self):
+        self.assertParses(["1.234", "1,5"], [1234, 1.5], decimal=",")
+        self.assertParses(["1,234", "1.5"], [1234, 1.5], decimal=".")
+        with self.assertRaises(ValueError):
+            parse_amounts(["1"], decimal=";")
+
+    def test_currency_symbols_and_codes(self):
+        self.assertParses(
+            ["$12.00", "EUR 12,50", "12.50 CHF", "1 234,50 EUR", "¥12", "-$3.00"],
+            [12, 12.5, 12.5, 1234.5, 12, -3])
+
+    def test_accounting_negatives(self):
+        self.assertParses(["(12.00)", "($1,234.50)", "-4"], [-12, -1234.5, -4])
+
+    def test_malformed_values_are_invalid(self):
+        values = ["12 to 15", "1e3", "12.5.3", "approx 40", "12 15", "1,234,50",
+                  "inf", "nan", "XYZ 12", "usd 12", "USD", "(12", "$"]
+        for value in values:
+            with self.subTest(value=value):
+                amounts, invalid = parse_amounts([value])
+                self.assertTrue(np.isnan(amounts[0]))
+                self.assertTrue(invalid[0])
+
+    def test_malformed_values_in_a_valid_column(self):
+        amounts, invalid = parse_amounts(["1,234.50", "12 to 15", "EUR 3", "1e3"])
+        np.testing.assert_array_equal(invalid, [False, True, False, True])
+        np.testing.assert_allclose(amounts, [1234.5, np.nan, 3, np.nan])
+
+    def test_null_tokens_are_missing_not_invalid(self):
+        for token in sorted(NULL_TOKENS):
+            for text in (token, token.upper(), f" {token} "):
+                with self.subTest(text=text):
+                    amounts, invalid = parse_amounts([text])
+                    self.assertTrue(np.isnan(amounts[0]))
+                    self.assertFalse(invalid[0])
+
+    def test_null_tokens_mixed_with_values(self):
+        amounts, invalid = parse_amounts(["n/a", "1,234.50", "--", "abc"])
+        np.testing.assert_array_equal(invalid, [False, False, False, True])
+        self.assertEqual(amounts[1], 1234.5)
+
+    def test_detect_currencies(self):
+        self.assertEqual(
+            detect_currencies(["$1", "12 EUR", "CHF 3", "XYZ 4", 5, "6"]).tolist(),
+            ["USD", "EUR", "CHF", None, None, None])
+
+
+class ValidateRecordsTest(unittest.TestCase):
+
+    def test_consistent_record_has_no_flags(self):
+        items = [{"Quantity": 2, "UnitPrice": "30.00", "TotalPrice": "60.00"},
+                 {"Quantity": "1", "UnitPrice": "40,00", "TotalPrice": "40,00"}]
+        result = validate_records([_record(items=items)])
+        self.assertEqual(int(result.flags[0]), 0)
+        self.assertEqual(result.line_sums[0], 100)
+        self.assertEqual(result.line_counts[0], 2)
+
+    def test_exact_field_flags(self):
+        result = validate_records([
+            _record(subtotal="12 to 15", tax=None, total="1e3"),
+            {"TaxAmount": "1.00", "TotalAmount": "approx 40"},
+        ])
+        self.assertEqual(int(result.flags[0]),
+                         FLAG_SUBTOTAL_INVALID | FLAG_TAX_MISSING | FLAG_TOTAL_INVALID)
+        self.assertEqual(int(result.flags[1]), FLAG_SUBTOTAL_MISSING | FLAG_TOTAL_INVALID)
+        # Unparseable values are left for the user to see
+        records = [_record(subtotal="12.5.3")]
+        validate_records(records).apply(records)
+        self.assertEqual(records[0]["Subtotal"], "12.5.3")
+        self.assertEqual(records[0]["TotalAmount"], 110.0)
+
+    def test_null_token_flags_missing(self):
+        result = validate_records([{"Subtotal": "N/A", "TaxAmount": "1.00",
+                                    "TotalAmount": "1.00"}])
+        self.assertTrue(result.flags[0] & FLAG_SUBTOTAL_MISSING)
+        self.assertFalse(result.flags[0] & FLAG_SUBTOTAL_INVALID)
+
+    def test_total_reconciliation_tolerance(self):
+        # The tolerance is max(abs_tol, rel_tol * total): 0.11 for a 110 total
+        result = validate_records([_record(total="110.10"), _record(total="110.20")])
+        self.assertEqual(result.flags.tolist(), [0, FLAG_TOTAL_MISMATCH])
+        result = validate_records([_record(total="110.10")], rel_tol=0)
+        self.assertEqual(result.flags.tolist(), [FLAG_TOTAL_MISMATCH])
+
+    def test_line_sum_reconciliation_tolerance(self):
+        def items(*prices):
+            return [{"Quantity": 1, "UnitPrice": p, "TotalPrice": p} for p in prices]
+
+        result = validate_records([
+            _record(items=items(60, 40.05)),
+            _record(items=items(60, 41)),
+            _record(subtotal=None, items=items(60, 40)),
+            _record(subtotal=None, items=items(60, 50)),
+        ])
+        self.assertEqual(result.flags.tolist(), [
+            0, FLAG_LINE_SUM_MISMATCH, FLAG_SUBTOTAL_MISSING,
+            FLAG_SUBTOTAL_MISSING | FLAG_LINE_SUM_MISMATCH])
+
+    def test_line_item_flags(self):
+        result = validate_records([
+            _record(items=[{"Quantity": 2, "UnitPrice": 5, "TotalPrice": 11},
+                           {"Quantity": 1, "UnitPrice": 89, "TotalPrice": 89}]),
+            _record(items=[{"Quantity": 1, "UnitPrice": "1e3", "TotalPrice": 100}]),
+        ])
+        self.assertEqual(result.flags.tolist(),
+                         [FLAG_LINE_ITEM_MISMATCH, FLAG_LINE_ITEM_INVALID])
+
+    def test_negative_and_currency_flags(self):
+        result = validate_records([
+            _record(subtotal="(100.00)", tax="10.00", total="-90.00"),
+            _record(subtotal="$100.00", tax="EUR 10.00", total="$110.00"),
+            _record(subtotal="$100.00", tax="10.00", total="USD 110.00"),
+        ])
+        self.assertEqual(result.flags.tolist(),
+                         [FLAG_NEGATIVE_AMOUNT, FLAG_CURRENCY_MISMATCH, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
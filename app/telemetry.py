@@ -0,0 +1,203 @@
+"""Lightweight per-stage tracing and metrics for the invoice pipeline.
+
+Spans record nested wall-clock timings for each pipeline stage (upload write,
+image decode, Gemini round trip, JSON parsing, box generation, rendering and
+export) and counters record discrete events (cache hits, fallbacks, retries,
+bytes sent). Collected data can be exported as Prometheus text exposition or
+as a JSON trace that loads in ``chrome://tracing`` / Perfetto.
+
+Tracing is off by default and enabled with ``INVOICE_TRACE=1``. When disabled,
+``span`` returns a shared no-op context manager and ``incr`` returns
+immediately, so instrumented code pays only a function call and a flag check.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+METRIC_PREFIX = "invoice"
+MAX_SPANS = 10000
+
+
+class _NoopSpan:
+    """Context manager returned by ``span`` while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        """Ignore span attributes."""
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """A timed pipeline stage, nested under the span active on entry."""
+
+    __slots__ = (
+        "tracer", "name", "attrs", "parent", "depth", "thread", "start", "duration"
+    )
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.depth = 0
+        self.thread = 0
+        self.start = 0.0
+        self.duration = 0.0
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        if stack:
+            self.parent = stack[-1].name
+            self.depth = len(stack)
+        stack.append(self)
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer._finish(self)
+        return False
+
+    def set(self, **attrs):
+        """Attach attributes (e.g. byte counts) to the span."""
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Collects spans and counters for the current process.
+
+    Args:
+        enabled (bool): Whether spans and counters are recorded.
+        max_spans (int): Number of finished spans kept for the JSON trace.
+            Aggregated stage timings are kept regardless of this limit.
+    """
+
+    def __init__(self, enabled=False, max_spans=MAX_SPANS):
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        """Drop all recorded spans and counters."""
+        with self._lock:
+            self._spans = []
+            self._counters = defaultdict(float)
+            self._stage_sum = defaultdict(float)
+            self._stage_count = defaultdict(int)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, finished):
+        with self._lock:
+            self._stage_sum[finished.name] += finished.duration
+            self._stage_count[finished.name] += 1
+            if len(self._spans) < self.max_spans:
+                self._spans.append(finished)
+
+    def span(self, name, **attrs):
+        """Return a context manager timing the stage ``name``."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, attrs)
+
+    def incr(self, name, value=1):
+        """Add ``value`` to the counter ``name``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] += value
+
+    def counters(self):
+        """Return a snapshot of all counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def stage_timings(self):
+        """Return ``{stage: (count, total_seconds)}`` for every finished span."""
+        with self._lock:
+            return {
+                name: (self._stage_count[name], self._stage_sum[name])
+                for name in self._stage_count
+            }
+
+    def export_prometheus(self):
+        """Render counters and stage timings in Prometheus text format.
+
+        Returns:
+            str: Exposition text suitable for a ``/metrics`` endpoint or a
+                node-exporter textfile collector.
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                metric = f"{METRIC_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {self._counters[name]:g}")
+            if self._stage_count:
+                metric = f"{METRIC_PREFIX}_stage_seconds"
+                lines.append(f"# TYPE {metric} summary")
+                for name in sorted(self._stage_count):
+                    lines.append(
+                        f'{metric}_sum{{stage="{name}"}} {self._stage_sum[name]:.6f}'
+                    )
+                    lines.append(
+                        f'{metric}_count{{stage="{name}"}} {self._stage_count[name]}'
+                    )
+        return "\n".join(lines) + "\n"
+
+    def export_trace(self):
+        """Render finished spans as a Chrome trace-event JSON document.
+
+        Returns:
+            str: JSON with complete ("X") events in microseconds plus the
+                current counter values.
+        """
+        with self._lock:
+            events = [
+                {
+                    "name": item.name,
+                    "ph": "X",
+                    "ts": round((item.start - self._origin) * 1e6, 1),
+                    "dur": round(item.duration * 1e6, 1),
+                    "pid": os.getpid(),
+                    "tid": item.thread,
+                    "args": dict(item.attrs, parent=item.parent, depth=item.depth),
+                }
+                for item in self._spans
+            ]
+            counters = dict(self._counters)
+        return json.dumps({"traceEvents": events, "counters": counters}, indent=2)
+
+
+def _env_enabled():
+    return os.getenv("INVOICE_TRACE", "").lower() in ("1", "true", "yes", "on")
+
+
+tracer = Tracer(enabled=_env_enabled())
+span = tracer.span
+incr = tracer.incr
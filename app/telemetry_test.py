@@ -0,0 +1,82 @@
+"""Tests for telemetry."""
+
+import json
+import threading
+import unittest
+
+from telemetry import Tracer
+
+
+class TracerTest(unittest.TestCase):
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span("stage", bytes=10) as stage:
+            stage.set(bytes=20)
+        tracer.incr("hits")
+        self.assertEqual(tracer.stage_timings(), {})
+        self.assertEqual(tracer.counters(), {})
+        self.assertEqual(tracer.export_prometheus(), "\n")
+
+    def test_spans_nest_and_aggregate(self):
+        tracer = Tracer(enabled=True)
+        for _ in range(2):
+            with tracer.span("outer"):
+                with tracer.span("inner", bytes=3) as inner:
+                    inner.set(rows=1)
+        timings = tracer.stage_timings()
+        self.assertEqual(timings["outer"][0], 2)
+        self.assertEqual(timings["inner"][0], 2)
+        self.assertGreaterEqual(timings["outer"][1], timings["inner"][1])
+
+        events = json.loads(tracer.export_trace())["traceEvents"]
+        inner_event = next(event for event in events if event["name"] == "inner")
+        self.assertEqual(inner_event["ph"], "X")
+        self.assertEqual(inner_event["args"],
+                         {"bytes": 3, "rows": 1, "parent": "outer", "depth": 1})
+
+    def test_span_records_errors(self):
+        tracer = Tracer(enabled=True)
+        with self.assertRaises(KeyError):
+            with tracer.span("parse"):
+                raise KeyError("Subtotal")
+        events = json.loads(tracer.export_trace())["traceEvents"]
+        self.assertEqual(events[0]["args"]["error"], "KeyError")
+
+    def test_counters_and_prometheus_export(self):
+        tracer = Tracer(enabled=True)
+        threads = [threading.Thread(target=lambda: [tracer.incr("hits") for _ in range(500)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        tracer.incr("bytes_sent", 1.5)
+        with tracer.span("export"):
+            pass
+
+        text = tracer.export_prometheus()
+        self.assertIn("# TYPE invoice_hits_total counter\ninvoice_hits_total 2000\n", text)
+        self.assertIn("invoice_bytes_sent_total 1.5\n", text)
+        self.assertIn('invoice_stage_seconds_count{stage="export"} 1\n', text)
+
+    def test_max_spans_limits_trace_not_timings(self):
+        tracer = Tracer(enabled=True, max_spans=2)
+        for _ in range(5):
+            with tracer.span("stage"):
+                pass
+        self.assertEqual(tracer.stage_timings()["stage"][0], 5)
+        self.assertEqual(len(json.loads(tracer.export_trace())["traceEvents"]), 2)
+
+    def test_reset(self):
+        tracer = Tracer(enabled=True)
+        tracer.incr("hits")
+        with tracer.span("stage"):
+            pass
+        tracer.reset()
+        self.assertEqual(tracer.counters(), {})
+        self.assertEqual(tracer.stage_timings(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,78 +1,167 @@
+import functools
 import os
+import re
+import sys
 import numpy as np
 import tensorflow as tf
 from PIL import Image
 import cv2
 
+try:
+    from telemetry import incr, span
+except ImportError:  # telemetry ships with the main app in app/
+    from contextlib import nullcontext
+
+    def span(name, **attrs):
+        return nullcontext()
+
+    def incr(name, value=1):
+        pass
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# label_map_util comes from the Object Detection API in models/research; it is
+# optional and only imported by label_names()
+RESEARCH_DIR = os.path.join(ROOT_DIR, 'models', 'research')
+
 # Path to the saved model
-MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                         'workspace', 'training_demo', 'exported-models', 'my_model', 'saved_model')
-
-# Label map
-LABEL_MAP = {
-    1: "CompanyName",
-    2: "CompanyAddress",
-    3: "CustomerAddress",
-    4: "Total",
-    5: "InvoiceNumber",
-    6: "Date"
-}
+MODEL_PATH = os.path.join(ROOT_DIR, 'workspace', 'training_demo', 'exported-models', 'my_model', 'saved_model')
+
+# Label map the model was trained with
+LABEL_MAP_PATH = os.path.join(ROOT_DIR, 'workspace', 'training_demo', 'annotations', 'label_map.pbtxt')
+
+# label_map_util module, False when the Object Detection API is not available
+_label_map_util = None
+
+
+def _get_label_map_util():
+    global _label_map_util
+    if _label_map_util is None:
+        if RESEARCH_DIR not in sys.path:
+            sys.path.append(RESEARCH_DIR)
+        try:
+            from object_detection.utils import label_map_util
+        except ImportError:
+            label_map_util = False
+        _label_map_util = label_map_util
+    return _label_map_util
+
+
+@functools.lru_cache(maxsize=8)
+def _read_label_map(path, mtime_ns, size):
+    """Minimal pbtxt reader: ``{id: name}`` of the flat ``item { id name }`` blocks."""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    names = {}
+    for item in re.findall(r'item\s*\{(.*?)\}', text, re.S):
+        class_id = re.search(r'\bid\s*:\s*(\d+)', item)
+        name = re.search(r'\bname\s*:\s*[\'"]([^\'"]*)[\'"]', item)
+        if class_id and name:
+            names[int(class_id.group(1))] = name.group(1)
+    return names
+
+
+def label_names(classes):
+    """Map an array of detector class ids to label names.
+
+    Uses the cached label map lookup of the Object Detection API when it is
+    importable, otherwise a minimal pbtxt reader; either way the pbtxt is
+    parsed once per process (and again only when it changes). Unknown ids map
+    to ``Unknown_<id>``.
+
+    Returns:
+        numpy.ndarray: Object array of names with the shape of ``classes``.
+    """
+    classes = np.asarray(classes).astype(np.int64)
+    label_map_util = _get_label_map_util()
+    if label_map_util:
+        names = label_map_util.get_label_map_lookup(LABEL_MAP_PATH).names_for_ids(classes)
+    else:
+        stat = os.stat(LABEL_MAP_PATH)
+        lookup = _read_label_map(LABEL_MAP_PATH, stat.st_mtime_ns, stat.st_size)
+        names = np.array([lookup.get(class_id) for class_id in classes.ravel().tolist()],
+                         dtype=object).reshape(classes.shape)
+    unknown = np.equal(names, None)
+    names[unknown] = [f"Unknown_{class_id}" for class_id in classes[unknown]]
+    return names
 
 # Load the model
 def load_model():
     try:
-        model = tf.saved_model.load(MODEL_PATH)
+        with span("detector_load"):
+            model = tf.saved_model.load(MODEL_PATH)
         return model
     except Exception as e:
         print(f"Error loading model: {str(e)}")
         return None
 
-# Detect objects in an image
-def detect_objects(image_path, model, min_score_thresh=0.5):
-    try:
-        # Read image
+# Run the detector and return its raw, normalized output
+def run_detector(image_path, model):
+    """Run the SSD detector on an image.
+
+    Returns:
+        dict: ``height``/``width`` of the image plus ``boxes`` (N x 4
+            normalized ymin, xmin, ymax, xmax), ``classes`` and ``scores``
+            for every detection, unfiltered.
+    """
+    # Read image
+    with span("image_decode"):
         image = cv2.imread(image_path)
         image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         input_tensor = tf.convert_to_tensor(np.expand_dims(image_rgb, 0), dtype=tf.uint8)
-        
-        # Run inference
+
+    # Run inference
+    with span("detector_inference"):
         detect_fn = model.signatures['serving_default']
         detections = detect_fn(input_tensor)
-        
-        # Process results
-        boxes = detections['detection_boxes'][0].numpy()
-        classes = detections['detection_classes'][0].numpy().astype(np.int32)
-        scores = detections['detection_scores'][0].numpy()
-        
-        # Filter by threshold
-        indices = np.where(scores >= min_score_thresh)[0]
-        
-        # Format results
-        results = []
-        height, width, _ = image.shape
-        
-        for i in indices:
-            label = LABEL_MAP.get(classes[i], f"Unknown_{classes[i]}")
-            ymin, xmin, ymax, xmax = boxes[i]
-            
-            # Convert normalized coordinates to pixel values
-            xmin_px = int(xmin * width)
-            xmax_px = int(xmax * width)
-            ymin_px = int(ymin * height)
-            ymax_px = int(ymax * height)
-            
-            results.append({
-                'label': label,
-                'xmin': xmin_px,
-                'ymin': ymin_px,
-                'xmax': xmax_px,
-                'ymax': ymax_px,
-                'score': float(scores[i])
-            })
-        
-        return results
+        incr("detector_runs")
+
+    height, width, _ = image.shape
+    return {
+        'height': height,
+        'width': width,
+        'boxes': detections['detection_boxes'][0].numpy(),
+        'classes': detections['detection_classes'][0].numpy().astype(np.int32),
+        'scores': detections['detection_scores'][0].numpy()
+    }
+
+# Convert raw detector output to labelled pixel boxes
+def format_detections(detections, min_score_thresh=0.5):
+    boxes = np.asarray(detections['boxes'])
+    classes = np.asarray(detections['classes'])
+    scores = np.asarray(detections['scores'])
+    height = detections['height']
+    width = detections['width']
+
+    # Filter by threshold
+    indices = np.where(scores >= min_score_thresh)[0]
+
+    # Format results
+    labels = label_names(classes[indices])
+    results = []
+    for label, i in zip(labels, indices):
+        ymin, xmin, ymax, xmax = boxes[i]
+
+        # Convert normalized coordinates to pixel values
+        results.append({
+            'label': label,
+            'xmin': int(xmin * width),
+            'ymin': int(ymin * height),
+            'xmax': int(xmax * width),
+            'ymax': int(ymax * height),
+            'score': float(scores[i])
+        })
+
+    return results
+
+# Detect objects in an image
+def detect_objects(image_path, model, min_score_thresh=0.5):
+    try:
+        detections = run_detector(image_path, model)
+        return format_detections(detections, min_score_thresh)
     except Exception as e:
         print(f"Error detecting objects: {str(e)}")
+        incr("detector_errors")
         return []
 
 # Extract text from detected regions
@@ -101,4 +190,4 @@ def extract_text_from_regions(image_path, boxes):
         return extracted_data
     except Exception as e:
         print(f"Error extracting text: {str(e)}")
-        return {}
\ No newline at end of file
+        return {}
@@ -51,6 +51,22 @@ class DataConfig(base_config.Config):
       dataset after applying the decode_fn and parse_fn. It can be used to avoid
       re-reading from disk, re-decoding and re-parsing the example on the second
       epoch, but it requires significant memory overhead.
+    snapshot_dir: An optional directory for a persistent `tf.data` snapshot of
+      the dataset after applying the decode_fn and parse_fn. The first run
+      writes the snapshot and later runs (and epochs) read the parsed examples
+      back instead of re-reading, re-decoding and re-parsing them. Snapshots
+      are stored in a subdirectory named after a fingerprint of the input files
+      (paths, sizes and modification times), this config and the settings the
+      task passes to the reader as `snapshot_context` (e.g. the model input
+      size and anchors), so they are invalidated automatically when any of
+      them changes. As with `cache`, random
+      augmentation in parse_fn is only applied once, when the snapshot is
+      written.
+    snapshot_key: An optional string mixed into the snapshot fingerprint. The
+      fingerprint covers this config (including task-specific decoder/parser
+      configs), the snapshot context, the input files and the names of the
+      pipeline functions, but not their code; change the key (e.g. a version) to invalidate snapshots
+      after changing the decoder or parser code.
     cycle_length: The number of files that will be processed concurrently when
       interleaving files.
     block_length: The number of consecutive elements to produce from each input
@@ -117,6 +133,8 @@ class DataConfig(base_config.Config):
   drop_remainder: bool = True
   shuffle_buffer_size: int = 100
   cache: bool = False
+  snapshot_dir: Optional[str] = None
+  snapshot_key: Optional[str] = None
   cycle_length: Optional[int] = None
   block_length: int = 1
   ram_budget: Optional[int] = None
@@ -14,6 +14,11 @@
 
 """A common dataset reader."""
 import dataclasses
+import functools
+import hashlib
+import inspect
+import json
+import os
 import random
 from typing import Any, Callable, Dict, List, Optional, Sequence, Text, Union
 
@@ -35,6 +40,86 @@ def _maybe_map_fn(dataset: tf.data.Dataset,
       fn, num_parallel_calls=tf.data.experimental.AUTOTUNE)
 
 
+# DataConfig fields that only affect the pipeline after the snapshot, so
+# changing them keeps the parsed examples valid.
+_POST_SNAPSHOT_FIELDS = (
+    'global_batch_size', 'drop_remainder', 'shuffle_buffer_size', 'cache',
+    'snapshot_dir', 'ram_budget', 'enable_tf_data_service',
+    'tf_data_service_address', 'tf_data_service_job_name',
+    'enable_shared_tf_data_service_between_parallel_trainers',
+    'apply_tf_data_service_before_batching', 'trainer_id',
+    'prefetch_buffer_size', 'autotune_algorithm')
+
+
+def _callable_name(fn: Any) -> Optional[str]:
+  """Returns the qualified name of a pipeline function, or of its class."""
+  if fn is None:
+    return None
+  if isinstance(fn, functools.partial):
+    return _callable_name(fn.func)
+  if inspect.ismethod(fn):
+    owner = fn.__self__
+    owner = owner if inspect.isclass(owner) else type(owner)
+    return '{}.{}.{}'.format(owner.__module__, owner.__qualname__,
+                             fn.__name__)
+  if not (inspect.isfunction(fn) or inspect.isclass(fn)):
+    fn = type(fn)
+  return '{}.{}'.format(fn.__module__, fn.__qualname__)
+
+
+def _file_fingerprint(files: Union[Dict[str, List[str]], List[str]]) -> Any:
+  """Returns the paths, sizes and mtimes of input files."""
+  if isinstance(files, dict):
+    return {k: _file_fingerprint(v) for k, v in files.items()}
+  fingerprint = []
+  for path in files:
+    stat = tf.io.gfile.stat(path)
+    fingerprint.append((path, stat.length, stat.mtime_nsec))
+  return fingerprint
+
+
+def snapshot_fingerprint(
+    params: cfg.DataConfig,
+    files: Optional[Union[Dict[str, List[str]], List[str]]] = None,
+    shard: Optional[Sequence[int]] = None,
+    functions: Sequence[Any] = (),
+    context: Optional[Dict[str, Any]] = None) -> str:
+  """Returns the fingerprint naming the snapshot of a reader's parsed examples.
+
+  Only explicit configuration is fingerprinted: the data config (including
+  task-specific fields such as the decoder and parser configs) without the
+  fields applied after the snapshot, the input files, the input pipeline shard,
+  the qualified names of the pipeline functions and `context`, the settings
+  the decoder and parser were built from outside the data config (e.g. the
+  model input size and anchors). Changes to the code of those functions or to
+  state that is in neither are not detected; set `params.snapshot_key` (e.g.
+  to a version) to invalidate the snapshot in that case.
+
+  Args:
+    params: The data config.
+    files: The matched input files, None when reading from TFDS.
+    shard: Optional (input_pipeline_id, num_input_pipelines).
+    functions: The dataset, decoder, combine, sample, parser and filter
+      functions.
+    context: Optional JSON-serializable settings of the decoder and parser
+      that are not part of `params`.
+
+  Returns:
+    A hex digest.
+  """
+  config = params.as_dict()
+  for name in _POST_SNAPSHOT_FIELDS:
+    config.pop(name, None)
+  key = json.dumps({
+      'config': config,
+      'files': _file_fingerprint(files) if files is not None else None,
+      'shard': list(shard) if shard else None,
+      'functions': [_callable_name(fn) for fn in functions],
+      'context': context,
+  }, sort_keys=True)
+  return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
 def match_files(input_path: Union[Sequence[str], str]) -> List[str]:
   """Matches files from an input_path."""
   matched_files = []
@@ -234,6 +319,7 @@ class InputReader:
           ]
       ] = None,
       postprocess_fn: Optional[Callable[..., Any]] = None,
+      snapshot_context: Optional[Dict[str, Any]] = None,
   ):
     """Initializes an InputReader instance.
 
@@ -262,6 +348,11 @@ class InputReader:
         batch size.
       postprocess_fn: A optional `callable` that processes batched tensors. It
         will be executed after batching.
+      snapshot_context: An optional JSON-serializable dict of the settings the
+        decoder_fn and parser_fn were built from that are not in `params`, such
+        as the model input size and anchors. It is part of the snapshot
+        fingerprint (see `snapshot_fingerprint`), so snapshots are rebuilt when
+        these settings change.
     """
     if params.input_path and params.tfds_name:
       raise ValueError('At most one of `input_path` and `tfds_name` can be '
@@ -291,6 +382,12 @@ class InputReader:
     self._drop_remainder = params.drop_remainder
     self._shuffle_buffer_size = params.shuffle_buffer_size
     self._cache = params.cache
+    self._snapshot_dir = params.snapshot_dir
+    self._params = params
+    self._snapshot_context = snapshot_context
+    # Cached and snapshotted datasets are read once in a fixed order, then
+    # repeated and shuffled after the cache/snapshot.
+    self._reuse_parsed = bool(params.cache or params.snapshot_dir)
     self._cycle_length = params.cycle_length
     self._block_length = params.block_length
     self._deterministic = params.deterministic
@@ -394,7 +491,7 @@ class InputReader:
               dataset_fn,
               input_context,
               sharding=self._sharding,
-              repeat=self._is_training and not self._cache)
+              repeat=self._is_training and not self._reuse_parsed)
         else:
           return _shard_files_then_read(
               files,
@@ -403,7 +500,7 @@ class InputReader:
               seed=self._seed,
               is_training=self._is_training,
               sharding=self._sharding,
-              cache=self._cache,
+              cache=self._reuse_parsed,
               cycle_length=self._cycle_length,
               block_length=self._block_length,
               deterministic=self._deterministic)
@@ -413,7 +510,7 @@ class InputReader:
             dataset_fn,
             input_context,
             sharding=self._sharding,
-            repeat=self._is_training and not self._cache)
+            repeat=self._is_training and not self._reuse_parsed)
       else:
         raise ValueError('It is unexpected that `tfds_builder` is None and '
                          'there is also no `files`.')
@@ -431,7 +528,7 @@ class InputReader:
               input_context=input_context,
               seed=self._seed,
               is_training=self._is_training,
-              cache=self._cache,
+              cache=self._reuse_parsed,
               cycle_length=self._cycle_length,
               block_length=self._block_length)
       else:
@@ -444,7 +541,7 @@ class InputReader:
             input_context=input_context,
             seed=self._seed,
             is_training=self._is_training,
-            cache=self._cache,
+            cache=self._reuse_parsed,
             cycle_length=self._cycle_length,
             block_length=self._block_length)
     elif isinstance(matched_files, (list, tuple)):
@@ -468,7 +565,7 @@ class InputReader:
 
     def _shuffle_and_decode(ds):
       # If cache is enabled, we will call `shuffle()` later after `cache()`.
-      if self._is_training and not self._cache:
+      if self._is_training and not self._reuse_parsed:
         ds = ds.shuffle(self._shuffle_buffer_size, seed=self._seed)
       # Decode
       ds = _maybe_map_fn(ds, self._decoder_fn)
@@ -485,8 +582,11 @@ class InputReader:
     if self._filter_fn is not None:
       dataset = dataset.filter(self._filter_fn)
 
-    if self._cache:
-      dataset = dataset.cache()
+    if self._reuse_parsed:
+      if self._snapshot_dir:
+        dataset = dataset.snapshot(self._snapshot_path(input_context))
+      if self._cache:
+        dataset = dataset.cache()
       if self._is_training:
         dataset = dataset.repeat()
         dataset = dataset.shuffle(self._shuffle_buffer_size, seed=self._seed)
@@ -514,6 +614,32 @@ class InputReader:
 
     return dataset
 
+  def _snapshot_path(
+      self, input_context: Optional[tf.distribute.InputContext] = None) -> str:
+    """Returns the snapshot directory of this reader's parsed examples.
+
+    The directory name is `snapshot_fingerprint` of the data config, input
+    files, input pipeline shard, pipeline functions and snapshot context.
+
+    Args:
+      input_context: The `tf.distribute.InputContext` of this input pipeline.
+
+    Returns:
+      A subdirectory of `snapshot_dir`.
+    """
+    shard = None
+    if input_context and self._sharding:
+      shard = (input_context.input_pipeline_id,
+               input_context.num_input_pipelines)
+    fingerprint = snapshot_fingerprint(
+        self._params, self._matched_files, shard,
+        [self._dataset_fn, self._decoder_fn, self._combine_fn,
+         self._sample_fn, self._parser_fn, self._filter_fn],
+        self._snapshot_context)
+    path = os.path.join(self._snapshot_dir, fingerprint)
+    logging.info('Using tf.data snapshot of parsed examples at %s.', path)
+    return path
+
   def _maybe_apply_data_service(
       self,
       dataset: tf.data.Dataset,
@@ -0,0 +1,132 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for input_reader."""
+
+import dataclasses
+import os
+
+import tensorflow as tf, tf_keras
+
+from official.core import config_definitions as cfg
+from official.core import input_reader
+
+
+@dataclasses.dataclass
+class _ParserConfig(cfg.base_config.Config):
+  output_size: int = 64
+  aug_rand_hflip: bool = True
+
+
+@dataclasses.dataclass
+class _DataConfig(cfg.DataConfig):
+  parser: _ParserConfig = dataclasses.field(default_factory=_ParserConfig)
+
+
+class _Decoder:
+  """A decoder holding state that cannot be fingerprinted by value."""
+
+  def __init__(self):
+    self._table = tf.lookup.StaticHashTable(
+        tf.lookup.KeyValueTensorInitializer(['a', 'b'], [1, 2]), -1)
+
+  def decode(self, serialized):
+    return serialized
+
+
+def _parse(decoded):
+  return decoded
+
+
+class SnapshotFingerprintTest(tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self._path = os.path.join(self.create_tempdir().full_path, 'train.record')
+    self._write(b'12345')
+    self._decoder = _Decoder()
+
+  def _write(self, data):
+    with tf.io.gfile.GFile(self._path, 'wb') as f:
+      f.write(data)
+
+  def _params(self, **overrides):
+    params = _DataConfig(input_path=self._path, is_training=True,
+                         snapshot_dir='/tmp/snapshots')
+    params.override(overrides, is_strict=False)
+    return params
+
+  def _fingerprint(self, shard=None, parser_fn=_parse, context=None,
+                   **overrides):
+    functions = [tf.data.TFRecordDataset, self._decoder.decode, parser_fn]
+    return input_reader.snapshot_fingerprint(
+        self._params(**overrides), input_reader.match_files(self._path), shard,
+        functions, context)
+
+  def test_fingerprint_is_stable(self):
+    self.assertEqual(self._fingerprint(), self._fingerprint())
+    self.assertEqual(self._fingerprint(), input_reader.snapshot_fingerprint(
+        _DataConfig(input_path=self._path, is_training=True,
+                    snapshot_dir='/tmp/snapshots'),
+        [self._path], None,
+        [tf.data.TFRecordDataset, _Decoder().decode, _parse]))
+
+  def test_fingerprint_ignores_fields_applied_after_snapshot(self):
+    self.assertEqual(
+        self._fingerprint(),
+        self._fingerprint(global_batch_size=32, shuffle_buffer_size=1000,
+                          snapshot_dir='/other', cache=True))
+
+  def test_fingerprint_changes_with_config(self):
+    base = self._fingerprint()
+    self.assertNotEqual(base, self._fingerprint(parser={'output_size': 32}))
+    self.assertNotEqual(base, self._fingerprint(is_training=False))
+    self.assertNotEqual(base, self._fingerprint(seed=7))
+    self.assertNotEqual(base, self._fingerprint(snapshot_key='v2'))
+    self.assertNotEqual(base, self._fingerprint(shard=(0, 2)))
+    self.assertNotEqual(base, self._fingerprint(parser_fn=len))
+
+  def test_fingerprint_changes_with_snapshot_context(self):
+    context = {'input_size': [640, 640, 3], 'anchor': {'num_scales': 3}}
+    base = self._fingerprint(context=context)
+    self.assertEqual(base, self._fingerprint(
+        context={'anchor': {'num_scales': 3}, 'input_size': [640, 640, 3]}))
+    self.assertNotEqual(base, self._fingerprint())
+    self.assertNotEqual(base, self._fingerprint(
+        context={'input_size': [512, 512, 3], 'anchor': {'num_scales': 3}}))
+    self.assertNotEqual(base, self._fingerprint(
+        context={'input_size': [640, 640, 3], 'anchor': {'num_scales': 4}}))
+
+  def test_snapshot_path_changes_with_parser_settings(self):
+
+    def snapshot_path(input_size):
+      reader = input_reader.InputReader(
+          self._params(), decoder_fn=self._decoder.decode, parser_fn=_parse,
+          snapshot_context={'input_size': input_size})
+      return reader._snapshot_path()
+
+    self.assertEqual(snapshot_path([640, 640, 3]), snapshot_path([640, 640, 3]))
+    self.assertNotEqual(snapshot_path([640, 640, 3]),
+                        snapshot_path([512, 512, 3]))
+    self.assertEqual(os.path.dirname(snapshot_path([640, 640, 3])),
+                     '/tmp/snapshots')
+
+  def test_fingerprint_changes_with_input_files(self):
+    base = self._fingerprint()
+    self._write(b'123456')
+    self.assertNotEqual(base, self._fingerprint())
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -219,6 +219,10 @@ class RetinaNetTask(cfg.TaskConfig):
 
   # Sets maximum number of boxes to be evaluated by coco eval api.
   max_num_eval_detections: int = 100
+  # If set, the COCO metrics are computed with StreamingCOCOEvaluator, which
+  # spills per-detection match results to disk instead of keeping all
+  # predictions in memory.
+  use_streaming_coco_metrics: bool = False
 
 
 @exp_factory.register_config_factory('retinanet')
@@ -75,6 +75,19 @@ _NUM_PROCESSES = flags.DEFINE_integer(
     'num_processes', None,
     ('Number of parallel processes to use. '
      'If set to 0, disables multi-processing.'))
+_WRITE_SHARDS_IN_WORKERS = flags.DEFINE_boolean(
+    'write_shards_in_workers', False,
+    'Whether each worker process writes its own shards instead of sending the '
+    'examples back to a single writer. At most --num_shards processes are '
+    'used.')
+_CHUNK_SIZE = flags.DEFINE_integer(
+    'chunk_size', 1,
+    'With --write_shards_in_workers, the number of consecutive images written '
+    'to the same shard.')
+_MANIFEST_PATH = flags.DEFINE_string(
+    'manifest_path', None,
+    'With --write_shards_in_workers, an optional path of a JSON manifest with '
+    'the number of examples in every shard.')
 
 
 FLAGS = flags.FLAGS
@@ -532,7 +545,10 @@ def _create_tf_record_from_coco_annotations(images_info_file,
 
   num_skipped = tfrecord_lib.write_tf_record_dataset(
       output_path, coco_annotations_iter, create_tf_example, num_shards,
-      multiple_processes=_NUM_PROCESSES.value)
+      multiple_processes=_NUM_PROCESSES.value,
+      write_shards_in_workers=_WRITE_SHARDS_IN_WORKERS.value,
+      chunk_size=_CHUNK_SIZE.value,
+      manifest_path=_MANIFEST_PATH.value)
 
   logging.info('Finished writing, skipped %d annotations.', num_skipped)
 
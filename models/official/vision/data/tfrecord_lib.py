@@ -17,6 +17,8 @@
 import hashlib
 import io
 import itertools
+import json
+import time
 
 from absl import logging
 import numpy as np
@@ -27,6 +29,10 @@ import multiprocessing as mp
 
 
 LOG_EVERY = 100
+REPORT_EVERY_SECONDS = 10
+
+# Examples written by the shard writers, shared with the parent process.
+_examples_written = None
 
 
 def convert_to_feature(value, value_type=None):
@@ -115,11 +121,116 @@ def encode_mask_as_png(mask):
   return output_io.getvalue()
 
 
+def _init_shard_writer(examples_written):
+  global _examples_written
+  _examples_written = examples_written
+
+
+def _write_shard(shard_path, annotations, process_func, unpack_arguments):
+  """Processes the annotations of one shard and writes them to `shard_path`.
+
+  Args:
+    shard_path: The TFRecord file of the shard.
+    annotations: A list with the annotations of the shard.
+    process_func: See `write_tf_record_dataset`.
+    unpack_arguments: See `write_tf_record_dataset`.
+
+  Returns:
+    A tuple (num_examples, num_annotations_skipped).
+  """
+  total_num_annotations_skipped = 0
+  with tf.io.TFRecordWriter(shard_path) as writer:
+    for annotation in annotations:
+      if unpack_arguments:
+        tf_example, num_annotations_skipped = process_func(*annotation)
+      else:
+        tf_example, num_annotations_skipped = process_func(annotation)
+      writer.write(tf_example.SerializeToString())
+      total_num_annotations_skipped += num_annotations_skipped
+      if _examples_written is not None:
+        with _examples_written.get_lock():
+          _examples_written.value += 1
+  return len(annotations), total_num_annotations_skipped
+
+
+def _write_shards_in_workers(shard_paths, annotation_iterator, process_func,
+                             multiple_processes, unpack_arguments, chunk_size,
+                             manifest_path):
+  """Writes every shard in a single worker; see `write_tf_record_dataset`."""
+  num_shards = len(shard_paths)
+  shard_annotations = [[] for _ in range(num_shards)]
+  for idx, annotation in enumerate(annotation_iterator):
+    shard_annotations[(idx // chunk_size) % num_shards].append(annotation)
+  tasks = [(shard_path, annotations, process_func, unpack_arguments)
+           for shard_path, annotations in zip(shard_paths, shard_annotations)]
+  num_annotations = sum(len(annotations) for annotations in shard_annotations)
+
+  examples_written = mp.Value('q', 0)
+  start = time.time()
+
+  def log_throughput():
+    elapsed = time.time() - start
+    logging.info('Wrote %d/%d examples (%.1f examples/sec).',
+                 examples_written.value, num_annotations,
+                 examples_written.value / max(elapsed, 1e-9))
+
+  if multiple_processes is None or multiple_processes > 0:
+    # Each task writes a whole shard, so processes beyond num_shards would
+    # only sit idle.
+    num_processes = min(multiple_processes or mp.cpu_count(), num_shards)
+    with mp.Pool(processes=num_processes, initializer=_init_shard_writer,
+                 initargs=(examples_written,)) as pool:
+      async_results = pool.starmap_async(_write_shard, tasks, chunksize=1)
+      while not async_results.ready():
+        async_results.wait(REPORT_EVERY_SECONDS)
+        log_throughput()
+      results = async_results.get()
+  else:
+    _init_shard_writer(examples_written)
+    try:
+      results = [_write_shard(*task) for task in tasks]
+    finally:
+      _init_shard_writer(None)
+    log_throughput()
+  elapsed = time.time() - start
+
+  total_num_annotations_skipped = sum(skipped for _, skipped in results)
+  if manifest_path:
+    manifest = {
+        'num_shards': num_shards,
+        'num_examples': num_annotations,
+        'num_annotations_skipped': total_num_annotations_skipped,
+        'chunk_size': chunk_size,
+        'seconds': elapsed,
+        'shards': [{
+            'path': shard_path,
+            'num_examples': num_examples,
+            'num_annotations_skipped': num_skipped,
+        } for shard_path, (num_examples, num_skipped) in zip(
+            shard_paths, results)],
+    }
+    with tf.io.gfile.GFile(manifest_path, 'w') as f:
+      json.dump(manifest, f, indent=2)
+    logging.info('Wrote manifest to %s.', manifest_path)
+  return total_num_annotations_skipped
+
+
 def write_tf_record_dataset(output_path, annotation_iterator,
                             process_func, num_shards,
-                            multiple_processes=None, unpack_arguments=True):
+                            multiple_processes=None, unpack_arguments=True,
+                            write_shards_in_workers=False, chunk_size=1,
+                            manifest_path=None):
   """Iterates over annotations, processes them and writes into TFRecords.
 
+  By default, workers return the serialized examples to this process, which
+  writes them to the shards in order. With `write_shards_in_workers`, each
+  worker instead processes and writes one whole shard, so writing scales with
+  the number of processes up to `num_shards`; at most `num_shards` processes
+  are started, so use at least as many shards as processes. Progress is logged
+  every `REPORT_EVERY_SECONDS`.
+  Annotation `i` is written to shard `(i // chunk_size) % num_shards`, so with
+  the default `chunk_size` of 1 both modes write the same shards.
+
   Args:
     output_path: The prefix path to create TF record files.
     annotation_iterator: An iterator of tuples containing details about the
@@ -136,10 +247,30 @@ def write_tf_record_dataset(output_path, annotation_iterator,
     unpack_arguments:
       Whether to unpack the tuples from annotation_iterator as individual
         arguments to the process func or to pass the returned value as it is.
+    write_shards_in_workers: Whether each worker writes its own shards. The
+      annotations (not the examples) are held in memory to assign them to
+      shards, so `process_func` should do the loading and encoding. The
+      number of processes is capped at `num_shards`.
+    chunk_size: With `write_shards_in_workers`, the number of consecutive
+      annotations assigned to the same shard.
+    manifest_path: With `write_shards_in_workers`, an optional path of a JSON
+      manifest listing every shard with its number of examples and skipped
+      annotations.
 
   Returns:
     num_skipped: The total number of skipped annotations.
+
+  Raises:
+    ValueError: If `chunk_size` is not positive.
   """
+  if write_shards_in_workers:
+    if chunk_size < 1:
+      raise ValueError('chunk_size must be positive, got %d.' % chunk_size)
+    return _write_shards_in_workers(
+        [output_path + '-%05d-of-%05d.tfrecord' % (i, num_shards)
+         for i in range(num_shards)],
+        annotation_iterator, process_func, multiple_processes,
+        unpack_arguments, chunk_size, manifest_path)
 
   writers = [
       tf.io.TFRecordWriter(
@@ -14,6 +14,7 @@
 
 """Tests for tfrecord_lib."""
 
+import json
 import os
 
 from absl import flags
@@ -59,6 +60,33 @@ class TfrecordLibTest(parameterized.TestCase):
     read_values = set(d['x'] for d in dataset.as_numpy_iterator())
     self.assertSetEqual(read_values, set(range(17)))
 
+  @parameterized.parameters((0, 1), (2, 4), (8, 1))
+  def test_write_tf_record_dataset_in_workers(self, multiple_processes,
+                                              chunk_size):
+    data = [(tfrecord_lib.convert_to_feature(i),) for i in range(17)]
+
+    path = os.path.join(FLAGS.test_tmpdir, 'workers_%d' % multiple_processes)
+    manifest_path = os.path.join(
+        FLAGS.test_tmpdir, 'manifest_%d.json' % multiple_processes)
+
+    num_skipped = tfrecord_lib.write_tf_record_dataset(
+        path, data, process_sample, 3, multiple_processes=multiple_processes,
+        write_shards_in_workers=True, chunk_size=chunk_size,
+        manifest_path=manifest_path)
+    self.assertEqual(num_skipped, 0)
+    self.assertLen(tf.io.gfile.glob(path + '*'), 3)
+
+    with tf.io.gfile.GFile(manifest_path) as f:
+      manifest = json.load(f)
+    self.assertEqual(manifest['num_examples'], 17)
+    self.assertLen(manifest['shards'], 3)
+    for shard_index, shard in enumerate(manifest['shards']):
+      dataset = tf.data.TFRecordDataset(shard['path']).map(parse_function)
+      values = [d['x'] for d in dataset.as_numpy_iterator()]
+      self.assertLen(values, shard['num_examples'])
+      self.assertEqual(
+          values, [i for i in range(17) if (i // chunk_size) % 3 == shard_index])
+
   def test_convert_to_feature_float(self):
 
     proto = tfrecord_lib.convert_to_feature(0.0)
@@ -14,7 +14,7 @@
 
 """Dataset reader for vision model garden."""
 
-from typing import Any, Callable, Mapping, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
 
 from absl import logging
 import tensorflow as tf, tf_keras
@@ -135,7 +135,8 @@ class CombinationDatasetInputReader(input_reader.InputReader):
                transform_and_batch_fn: Optional[Callable[
                    [tf.data.Dataset, Optional[tf.distribute.InputContext]],
                    tf.data.Dataset]] = None,
-               postprocess_fn: Optional[Callable[..., Any]] = None):
+               postprocess_fn: Optional[Callable[..., Any]] = None,
+               snapshot_context: Optional[Dict[str, Any]] = None):
     """Initializes an CombinationDatasetInputReader instance.
 
     This class mixes a labeled and pseudo-labeled dataset. The params
@@ -169,6 +170,7 @@ class CombinationDatasetInputReader(input_reader.InputReader):
         batch size.
       postprocess_fn: A optional `callable` that processes batched tensors. It
         will be executed after batching.
+      snapshot_context: See `input_reader.InputReader`.
 
     Raises:
       ValueError: If drop_remainder is False.
@@ -181,7 +183,8 @@ class CombinationDatasetInputReader(input_reader.InputReader):
         sample_fn=sample_fn,
         parser_fn=parser_fn,
         transform_and_batch_fn=transform_and_batch_fn,
-        postprocess_fn=postprocess_fn)
+        postprocess_fn=postprocess_fn,
+        snapshot_context=snapshot_context)
 
     self._pseudo_label_file_pattern = params.pseudo_label_data.input_path
     self._pseudo_label_dataset_fn = pseudo_label_dataset_fn
@@ -0,0 +1,469 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""The COCO-style box evaluator with bounded memory.
+
+COCOEvaluator keeps every groundtruth and prediction of the eval set in
+memory and builds COCO objects from all of them at the end. The streaming
+evaluator instead runs the per-image, per-category matching of
+`cocoeval.COCOeval.evaluateImg` in `update_state` and spills only the
+outcome of every detection (score, rank in its image and one match / ignore
+bit per IoU threshold and area range) to append-only column files. `evaluate`
+reads them back as memory-mapped arrays one category at a time and runs the
+`accumulate` / `summarize` steps of COCOeval, so the box metrics are the same
+as COCOEvaluator's while memory no longer grows with the number of images.
+
+The interface is the same as COCOEvaluator's:
+
+  evaluator = StreamingCOCOEvaluator(...)
+  for _ in range(num_evals):
+    for _ in range(num_batches_per_eval):
+      predictions, groundtruth = predictor.predict(...)  # pop a batch.
+      evaluator.update_state(groundtruths, predictions)
+    evaluator.result()  # finish one full eval and reset states.
+
+Groundtruths passed to `update_state` (when there is no annotation file) must
+describe the same images as the predictions of the same call.
+"""
+
+import atexit
+import collections
+import os
+import shutil
+import tempfile
+import types
+
+from absl import logging
+import numpy as np
+
+from official.vision.evaluation import coco_evaluator
+
+# COCOeval detection parameters (cocoeval.Params.setDetParams).
+_IOU_THRESHOLDS = np.linspace(
+    .5, 0.95, int(np.round((0.95 - .5) / .05)) + 1, endpoint=True)
+_RECALL_THRESHOLDS = np.linspace(
+    .0, 1.00, int(np.round((1.00 - .0) / .01)) + 1, endpoint=True)
+_AREA_RANGES = [[0 ** 2, 1e5 ** 2], [0 ** 2, 32 ** 2], [32 ** 2, 96 ** 2],
+                [96 ** 2, 1e5 ** 2]]
+_AREA_LABELS = ['all', 'small', 'medium', 'large']
+
+# One spilled row per evaluated detection. Bit `a * T + t` of `matched` and
+# `ignored` holds dtMatches / dtIgnore for area range `a` and IoU threshold
+# `t`.
+_COLUMNS = (('image_id', np.int64), ('rank', np.int32), ('score', np.float64),
+            ('matched', np.uint64), ('ignored', np.uint64))
+
+
+class _ColumnSpill(object):
+  """Append-only on-disk columns per category, read back with np.memmap."""
+
+  def __init__(self, spill_dir=None):
+    self._dir = tempfile.mkdtemp(prefix='coco_eval_spill_', dir=spill_dir)
+    atexit.register(shutil.rmtree, self._dir, True)
+    self._num_rows = collections.Counter()
+
+  def _path(self, category_id, column):
+    return os.path.join(self._dir, '{}.{}'.format(category_id, column))
+
+  def append(self, category_id, rows):
+    """Appends rows, a dict from column name to equally long arrays."""
+    for column, dtype in _COLUMNS:
+      with open(self._path(category_id, column), 'ab') as f:
+        f.write(np.ascontiguousarray(rows[column], dtype=dtype).tobytes())
+    self._num_rows[category_id] += len(rows['score'])
+
+  def read(self, category_id):
+    """Returns a dict of read-only memory-mapped columns of a category."""
+    num_rows = self._num_rows[category_id]
+    if not num_rows:
+      return {column: np.zeros(0, dtype) for column, dtype in _COLUMNS}
+    return {column: np.memmap(self._path(category_id, column), dtype=dtype,
+                              mode='r', shape=(num_rows,))
+            for column, dtype in _COLUMNS}
+
+  def close(self):
+    shutil.rmtree(self._dir, ignore_errors=True)
+
+
+def _box_iou(detections, groundtruths, is_crowd):
+  """IoU of xywh boxes exactly as pycocotools' bbIou computes it."""
+  dx, dy, dw, dh = [detections[:, i:i + 1] for i in range(4)]
+  gx, gy, gw, gh = [groundtruths[:, i] for i in range(4)]
+  widths = np.minimum(dw + dx, gw + gx) - np.maximum(dx, gx)
+  heights = np.minimum(dh + dy, gh + gy) - np.maximum(dy, gy)
+  intersections = widths * heights
+  detection_areas = dw * dh
+  unions = np.where(is_crowd, detection_areas,
+                    detection_areas + gw * gh - intersections)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    ious = intersections / unions
+  return np.where((widths > 0) & (heights > 0), ious, 0.0)
+
+
+def _match_detections(ious, groundtruth_ignore, is_crowd):
+  """Greedy matching of cocoeval.COCOeval.evaluateImg for one area range.
+
+  Args:
+    ious: [D, G] IoUs of the score-sorted detections and the groundtruths,
+      with the groundtruths already sorted to put ignored ones last.
+    groundtruth_ignore: [G] boolean ignore flags of the groundtruths.
+    is_crowd: [G] boolean crowd flags of the groundtruths.
+
+  Returns:
+    matched: [T, D] boolean, whether a detection matched at each threshold.
+    ignored: [T, D] boolean, whether the matched groundtruth is ignored.
+  """
+  num_detections, num_groundtruths = ious.shape
+  thresholds = np.minimum(_IOU_THRESHOLDS, 1 - 1e-10)[:, np.newaxis]
+  matched = np.zeros((len(thresholds), num_detections), dtype=bool)
+  ignored = np.zeros_like(matched)
+  if not num_groundtruths:
+    return matched, ignored
+  taken = np.zeros((len(thresholds), num_groundtruths), dtype=bool)
+  rows = np.arange(len(thresholds))
+  reversed_columns = np.arange(num_groundtruths)[::-1]
+  for d in range(num_detections):
+    candidates = (~taken | is_crowd) & (ious[d] >= thresholds)
+    # COCOeval keeps the last groundtruth with the highest IoU, and only
+    # falls back to ignored groundtruths when no regular one matches.
+    best = np.full(len(thresholds), -1)
+    for pool in (~groundtruth_ignore, groundtruth_ignore):
+      scores = np.where(candidates & pool, ious[d], -np.inf)[:, ::-1]
+      found = (best < 0) & np.isfinite(scores.max(axis=1))
+      best[found] = reversed_columns[np.argmax(scores[found], axis=1)]
+    hits = best >= 0
+    matched[hits, d] = True
+    ignored[hits, d] = groundtruth_ignore[best[hits]]
+    taken[rows[hits], best[hits]] = True
+  return matched, ignored
+
+
+def _evaluate_image_category(detection_boxes, detection_areas,
+                             groundtruth_boxes, groundtruth_areas, is_crowd):
+  """Runs evaluateImg of one image and category for all area ranges.
+
+  Args:
+    detection_boxes: [D, 4] float64 xywh boxes sorted by decreasing score.
+    detection_areas: [D] detection areas.
+    groundtruth_boxes: [G, 4] float64 xywh boxes.
+    groundtruth_areas: [G] groundtruth areas.
+    is_crowd: [G] boolean crowd flags.
+
+  Returns:
+    matched: [D] uint64 bit field of dtMatches, see _COLUMNS.
+    ignored: [D] uint64 bit field of dtIgnore.
+    num_positives: [A] number of non-ignored groundtruths per area range.
+  """
+  num_thresholds = len(_IOU_THRESHOLDS)
+  ious = _box_iou(detection_boxes, groundtruth_boxes, is_crowd)
+  matched_bits = np.zeros(len(detection_boxes), dtype=np.uint64)
+  ignored_bits = np.zeros_like(matched_bits)
+  num_positives = np.zeros(len(_AREA_RANGES), dtype=np.int64)
+  shifts = np.arange(num_thresholds, dtype=np.uint64)[:, np.newaxis]
+  for a, (low, high) in enumerate(_AREA_RANGES):
+    groundtruth_ignore = is_crowd | (groundtruth_areas < low) | (
+        groundtruth_areas > high)
+    num_positives[a] = np.count_nonzero(~groundtruth_ignore)
+    order = np.argsort(groundtruth_ignore, kind='mergesort')
+    matched, ignored = _match_detections(
+        ious[:, order], groundtruth_ignore[order], is_crowd[order])
+    out_of_range = (detection_areas < low) | (detection_areas > high)
+    ignored |= ~matched & out_of_range
+    offset = np.uint64(a * num_thresholds)
+    matched_bits |= np.bitwise_or.reduce(
+        matched.astype(np.uint64) << (shifts + offset), axis=0)
+    ignored_bits |= np.bitwise_or.reduce(
+        ignored.astype(np.uint64) << (shifts + offset), axis=0)
+  return matched_bits, ignored_bits, num_positives
+
+
+def _accumulate_category(columns, num_positives, max_dets):
+  """cocoeval.COCOeval.accumulate for one category.
+
+  Args:
+    columns: the spilled columns of the category.
+    num_positives: [A] non-ignored groundtruths per area range.
+    max_dets: sorted list of max detections per image.
+
+  Returns:
+    precision: [T, R, A, M] float array, -1 where undefined.
+    recall: [T, A, M] float array, -1 where undefined.
+  """
+  num_thresholds = len(_IOU_THRESHOLDS)
+  precision = -np.ones((num_thresholds, len(_RECALL_THRESHOLDS),
+                        len(_AREA_RANGES), len(max_dets)))
+  recall = -np.ones((num_thresholds, len(_AREA_RANGES), len(max_dets)))
+  shifts = np.arange(num_thresholds, dtype=np.uint64)
+  for m, max_det in enumerate(max_dets):
+    keep = np.flatnonzero(np.asarray(columns['rank']) < max_det)
+    score = np.asarray(columns['score'][keep])
+    # COCOeval concatenates images in id order, detections in rank order,
+    # and then stable-sorts by score.
+    order = keep[np.lexsort((np.asarray(columns['rank'][keep]),
+                             np.asarray(columns['image_id'][keep]), -score))]
+    matched_bits = np.asarray(columns['matched'][order])
+    ignored_bits = np.asarray(columns['ignored'][order])
+    for a in range(len(_AREA_RANGES)):
+      if not num_positives[a]:
+        continue
+      offset = np.uint64(a * num_thresholds)
+      matched = ((matched_bits[np.newaxis] >> (shifts + offset)[:, np.newaxis])
+                 & np.uint64(1)).astype(bool)
+      ignored = ((ignored_bits[np.newaxis] >> (shifts + offset)[:, np.newaxis])
+                 & np.uint64(1)).astype(bool)
+      tp_sum = np.cumsum(matched & ~ignored, axis=1).astype(dtype=float)
+      fp_sum = np.cumsum(~matched & ~ignored, axis=1).astype(dtype=float)
+      num_dets = tp_sum.shape[1]
+      for t in range(num_thresholds):
+        rc = tp_sum[t] / num_positives[a]
+        pr = tp_sum[t] / (fp_sum[t] + tp_sum[t] + np.spacing(1))
+        recall[t, a, m] = rc[-1] if num_dets else 0
+        pr = np.maximum.accumulate(pr[::-1])[::-1]
+        inds = np.searchsorted(rc, _RECALL_THRESHOLDS, side='left')
+        q = np.zeros(len(_RECALL_THRESHOLDS))
+        valid = inds < num_dets
+        q[valid] = pr[inds[valid]]
+        precision[t, :, a, m] = q
+  return precision, recall
+
+
+def _summarize(precision, recall, max_dets):
+  """cocoeval.COCOeval.summarize for boxes; returns the 12 stats."""
+
+  def mean(ap, iou_threshold=None, area='all', max_det=100):
+    a = [i for i, label in enumerate(_AREA_LABELS) if label == area]
+    m = [i for i, value in enumerate(max_dets) if value == max_det]
+    s = precision if ap else recall
+    if iou_threshold is not None:
+      s = s[np.where(iou_threshold == _IOU_THRESHOLDS)[0]]
+    s = s[:, :, :, a, m] if ap else s[:, :, a, m]
+    return -1 if not len(s[s > -1]) else np.mean(s[s > -1])
+
+  return np.array([
+      mean(1),
+      mean(1, iou_threshold=.5, max_det=max_dets[2]),
+      mean(1, iou_threshold=.75, max_det=max_dets[2]),
+      mean(1, area='small', max_det=max_dets[2]),
+      mean(1, area='medium', max_det=max_dets[2]),
+      mean(1, area='large', max_det=max_dets[2]),
+      mean(0, max_det=max_dets[0]),
+      mean(0, max_det=max_dets[1]),
+      mean(0, max_det=max_dets[2]),
+      mean(0, area='small', max_det=max_dets[2]),
+      mean(0, area='medium', max_det=max_dets[2]),
+      mean(0, area='large', max_det=max_dets[2]),
+  ])
+
+
+class StreamingCOCOEvaluator(coco_evaluator.COCOEvaluator):
+  """COCO box evaluation metric class with bounded memory."""
+
+  def __init__(self,
+               annotation_file,
+               include_mask=False,
+               include_keypoint=False,
+               need_rescale_bboxes=True,
+               per_category_metrics=False,
+               max_num_eval_detections=100,
+               spill_dir=None):
+    """Constructs the streaming COCO evaluation class.
+
+    Args:
+      annotation_file: a JSON file that stores annotations of the eval dataset.
+        If `annotation_file` is None, ground-truth annotations will be loaded
+        from the dataloader.
+      include_mask: must be False; only box evaluation is streamed.
+      include_keypoint: must be False; only box evaluation is streamed.
+      need_rescale_bboxes: If true bboxes in `predictions` will be rescaled back
+        to absolute values (`image_info` is needed in this case).
+      per_category_metrics: Whether to return per category metrics.
+      max_num_eval_detections: Maximum number of detections to evaluate in coco
+        eval api. Default at 100.
+      spill_dir: local directory for the temporary spill files. Defaults to
+        the system temporary directory.
+    Raises:
+      ValueError: if masks or keypoints are requested, or if
+        max_num_eval_detections is not an integer.
+    """
+    if include_mask or include_keypoint:
+      raise ValueError('StreamingCOCOEvaluator only supports box evaluation; '
+                       'use COCOEvaluator for masks and keypoints.')
+    self._spill_dir = spill_dir
+    self._spill = None
+    super(StreamingCOCOEvaluator, self).__init__(
+        annotation_file=annotation_file,
+        include_mask=False,
+        need_rescale_bboxes=need_rescale_bboxes,
+        per_category_metrics=per_category_metrics,
+        max_num_eval_detections=max_num_eval_detections)
+    self._max_dets = sorted([1, 10, max_num_eval_detections])
+
+  def reset_states(self):
+    """Resets internal states for a fresh run."""
+    if self._spill is not None:
+      self._spill.close()
+    self._spill = _ColumnSpill(self._spill_dir)
+    self._num_positives = collections.defaultdict(
+        lambda: np.zeros(len(_AREA_RANGES), dtype=np.int64))
+    self._groundtruth_category_ids = set()
+    self._image_ids = set()
+
+  def _annotation_groundtruths(self, image_id):
+    """Returns (category ids, xywh boxes, areas, crowd flags) from the file."""
+    if image_id not in self._coco_gt.imgs:
+      raise ValueError('Results do not correspond to the current dataset!')
+    annotations = self._coco_gt.imgToAnns[image_id]
+    return (np.array([ann['category_id'] for ann in annotations], np.int64),
+            np.array([ann['bbox'] for ann in annotations],
+                     np.float64).reshape([-1, 4]),
+            np.array([ann['area'] for ann in annotations], np.float64),
+            np.array([bool(ann.get('iscrowd', 0)) for ann in annotations],
+                     bool))
+
+  def _batch_groundtruths(self, groundtruths, index):
+    """Returns (category ids, xywh boxes, areas, crowd flags) of a batch."""
+    num_instances = min(int(groundtruths['num_detections'][index]),
+                        groundtruths['classes'].shape[1])
+    boxes = groundtruths['boxes'][index, :num_instances]
+    widths = boxes[:, 3] - boxes[:, 1]
+    heights = boxes[:, 2] - boxes[:, 0]
+    if 'areas' in groundtruths:
+      areas = groundtruths['areas'][index, :num_instances]
+    else:
+      areas = widths * heights
+    if 'is_crowds' in groundtruths:
+      is_crowd = groundtruths['is_crowds'][index, :num_instances] != 0
+    else:
+      is_crowd = np.zeros(num_instances, dtype=bool)
+    category_ids = groundtruths['classes'][index, :num_instances].astype(
+        np.int64)
+    self._groundtruth_category_ids.update(category_ids.tolist())
+    return (category_ids,
+            np.stack([boxes[:, 1], boxes[:, 0], widths, heights],
+                     axis=1).astype(np.float64),
+            areas.astype(np.float64), is_crowd)
+
+  def update_state(self, groundtruths, predictions):
+    """Matches a batch of detections and spills the results to disk.
+
+    Args:
+      groundtruths: a dictionary of Tensors, see COCOEvaluator.update_state.
+        Unused when there is an annotation file.
+      predictions: a dictionary of Tensors, see COCOEvaluator.update_state.
+    Raises:
+      ValueError: if the required prediction or ground-truth fields are not
+        present in the incoming `predictions` or `groundtruths`, or if an
+        image is not in the annotation file.
+    """
+    groundtruths, predictions = self._convert_to_numpy(groundtruths,
+                                                       predictions)
+    for k in self._required_prediction_fields:
+      if k not in predictions:
+        raise ValueError(
+            'Missing the required key `{}` in predictions!'.format(k))
+    if not self._annotation_file:
+      assert groundtruths
+      for k in self._required_groundtruth_fields:
+        if k not in groundtruths:
+          raise ValueError(
+              'Missing the required key `{}` in groundtruths!'.format(k))
+      groundtruth_index = {
+          int(source_id): i
+          for i, source_id in enumerate(groundtruths['source_id'])}
+    if self._need_rescale_bboxes:
+      self._process_bbox_predictions(predictions)
+
+    boxes = predictions['detection_boxes']
+    # Boxes and areas in the dtype COCOEvaluator's annotations use.
+    detection_boxes = np.stack(
+        [boxes[..., 1], boxes[..., 0], boxes[..., 3] - boxes[..., 1],
+         boxes[..., 2] - boxes[..., 0]], axis=-1)
+    detection_areas = detection_boxes[..., 2] * detection_boxes[..., 3]
+    rows = collections.defaultdict(lambda: collections.defaultdict(list))
+    for i, source_id in enumerate(predictions['source_id']):
+      image_id = int(source_id)
+      if image_id in self._image_ids:
+        logging.warning('Image %d was already evaluated; COCOEvaluator would '
+                        'pool its detections instead.', image_id)
+      self._image_ids.add(image_id)
+      if self._annotation_file:
+        groundtruth = self._annotation_groundtruths(image_id)
+      else:
+        groundtruth = self._batch_groundtruths(
+            groundtruths, groundtruth_index[image_id])
+      groundtruth_classes = groundtruth[0]
+      classes = predictions['detection_classes'][i].astype(np.int64)
+      scores = predictions['detection_scores'][i]
+      for category_id in np.union1d(classes, groundtruth_classes).tolist():
+        if self._annotation_file and category_id not in self._coco_gt.cats:
+          continue
+        dets = np.flatnonzero(classes == category_id)
+        dets = dets[np.argsort(-scores[dets], kind='mergesort')]
+        dets = dets[:self._max_dets[-1]]
+        gts = groundtruth_classes == category_id
+        matched, ignored, num_positives = _evaluate_image_category(
+            detection_boxes[i, dets].astype(np.float64),
+            detection_areas[i, dets].astype(np.float64),
+            groundtruth[1][gts], groundtruth[2][gts], groundtruth[3][gts])
+        self._num_positives[category_id] += num_positives
+        category_rows = rows[category_id]
+        category_rows['image_id'].append(np.full(len(dets), image_id))
+        category_rows['rank'].append(np.arange(len(dets)))
+        category_rows['score'].append(scores[dets])
+        category_rows['matched'].append(matched)
+        category_rows['ignored'].append(ignored)
+    for category_id, category_rows in rows.items():
+      self._spill.append(category_id, {
+          column: np.concatenate(values)
+          for column, values in category_rows.items()})
+
+  def evaluate(self):
+    """Evaluates the spilled detections like COCOEvaluator.evaluate.
+
+    Returns:
+      A dict with the 12 COCO box metrics and, if requested, the per
+      category metrics.
+    """
+    if self._annotation_file:
+      category_ids = sorted(self._coco_gt.getCatIds())
+    else:
+      category_ids = sorted(self._groundtruth_category_ids)
+    num_thresholds = len(_IOU_THRESHOLDS)
+    precision = -np.ones((num_thresholds, len(_RECALL_THRESHOLDS),
+                          len(category_ids), len(_AREA_RANGES),
+                          len(self._max_dets)))
+    recall = -np.ones((num_thresholds, len(category_ids), len(_AREA_RANGES),
+                       len(self._max_dets)))
+    for k, category_id in enumerate(category_ids):
+      precision[:, :, k], recall[:, k] = _accumulate_category(
+          self._spill.read(category_id), self._num_positives[category_id],
+          self._max_dets)
+
+    stats = _summarize(precision, recall, self._max_dets)
+    logging.info('COCO box metrics over %d images: %s', len(self._image_ids),
+                 stats)
+    metrics_dict = {}
+    for i, name in enumerate(self._metric_names):
+      metrics_dict[name] = np.float32(stats[i])
+
+    if self._per_category_metrics:
+      category_stats = np.array([
+          _summarize(precision[:, :, k:k + 1], recall[:, k:k + 1],
+                     self._max_dets)
+          for k in range(len(category_ids))]).reshape([-1, 12]).T
+      metrics_dict.update(self._retrieve_per_category_metrics(
+          types.SimpleNamespace(
+              params=types.SimpleNamespace(catIds=category_ids),
+              category_stats=category_stats)))
+    return metrics_dict
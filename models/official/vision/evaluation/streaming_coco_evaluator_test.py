@@ -0,0 +1,102 @@
+# Copyright 2024 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for streaming_coco_evaluator."""
+
+import numpy as np
+import tensorflow as tf, tf_keras
+
+from official.vision.evaluation import coco_evaluator
+from official.vision.evaluation import streaming_coco_evaluator
+
+
+def _batches(num_batches=4, batch_size=4, num_instances=6,
+             num_detections=12, num_classes=3, seed=0):
+  rng = np.random.RandomState(seed)
+  batches = []
+  for b in range(num_batches):
+    corners = rng.uniform(0, 300, size=(batch_size, num_instances, 2))
+    sizes = rng.uniform(5, 150, size=(batch_size, num_instances, 2))
+    boxes = np.concatenate([corners, corners + sizes], axis=-1)
+    source_id = np.arange(batch_size) + b * batch_size + 1
+    groundtruths = {
+        'source_id': source_id,
+        'height': np.full(batch_size, 500),
+        'width': np.full(batch_size, 500),
+        'num_detections': rng.randint(0, num_instances + 1, size=batch_size),
+        'boxes': boxes.astype(np.float32),
+        'classes': rng.randint(1, num_classes + 1,
+                               size=(batch_size, num_instances)),
+        'is_crowds': (rng.uniform(size=(batch_size, num_instances)) < 0.1
+                     ).astype(np.int32),
+    }
+    matched = boxes[np.arange(batch_size)[:, np.newaxis],
+                    rng.randint(num_instances,
+                                size=(batch_size, num_detections))]
+    detection_boxes = matched + rng.normal(0, 10, size=matched.shape)
+    predictions = {
+        'source_id': source_id,
+        'num_detections': np.full(batch_size, num_detections),
+        'detection_boxes': detection_boxes.astype(np.float32),
+        'detection_scores': rng.uniform(
+            size=(batch_size, num_detections)).astype(np.float32),
+        'detection_classes': rng.randint(
+            1, num_classes + 1,
+            size=(batch_size, num_detections)).astype(np.float32),
+    }
+    batches.append((groundtruths, predictions))
+  return batches
+
+
+def _evaluate(evaluator, batches):
+  for groundtruths, predictions in batches:
+    evaluator.update_state(
+        tf.nest.map_structure(tf.constant, groundtruths),
+        tf.nest.map_structure(tf.constant, predictions))
+  return evaluator.result()
+
+
+class StreamingCOCOEvaluatorTest(tf.test.TestCase):
+
+  def test_matches_coco_evaluator(self):
+    batches = _batches()
+    expected = _evaluate(
+        coco_evaluator.COCOEvaluator(
+            annotation_file=None, include_mask=False,
+            need_rescale_bboxes=False), batches)
+    actual = _evaluate(
+        streaming_coco_evaluator.StreamingCOCOEvaluator(
+            annotation_file=None, need_rescale_bboxes=False,
+            spill_dir=self.get_temp_dir()), batches)
+    self.assertEqual(set(actual), set(expected))
+    for name, value in expected.items():
+      self.assertEqual(actual[name], value, name)
+
+  def test_result_resets_spill(self):
+    evaluator = streaming_coco_evaluator.StreamingCOCOEvaluator(
+        annotation_file=None, need_rescale_bboxes=False,
+        per_category_metrics=True)
+    first = _evaluate(evaluator, _batches(seed=1))
+    second = _evaluate(evaluator, _batches(seed=1))
+    self.assertEqual(first, second)
+    self.assertIn('Precision mAP ByCategory/1', first)
+
+  def test_rejects_masks(self):
+    with self.assertRaises(ValueError):
+      streaming_coco_evaluator.StreamingCOCOEvaluator(
+          annotation_file=None, include_mask=True)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -158,6 +158,13 @@ class ImageClassificationTask(base_task.Task):
         sample_fn=(lambda ds: sample_fn(params.repeated_augment, ds))
         if is_repeated_augment
         else None,
+        snapshot_context={
+            'num_classes': num_classes,
+            'input_size': input_size,
+            'image_field_key': image_field_key,
+            'label_field_key': label_field_key,
+            'is_multilabel': is_multilabel,
+        },
     )
 
     dataset = reader.read(input_context=input_context)
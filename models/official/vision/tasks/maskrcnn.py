@@ -182,7 +182,15 @@ class MaskRCNNTask(base_task.Task):
         dataset_fn=dataset_fn,
         decoder_fn=decoder.decode,
         combine_fn=input_reader.create_combine_fn(params),
-        parser_fn=parser.parse_fn(params.is_training))
+        parser_fn=parser.parse_fn(params.is_training),
+        snapshot_context={
+            'input_size': self.task_config.model.input_size,
+            'min_level': self.task_config.model.min_level,
+            'max_level': self.task_config.model.max_level,
+            'anchor': self.task_config.model.anchor.as_dict(),
+            'include_mask': self.task_config.model.include_mask,
+            'outer_boxes_scale': self.task_config.model.outer_boxes_scale,
+        })
     dataset = reader.read(input_context=input_context)
 
     return dataset
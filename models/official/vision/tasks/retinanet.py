@@ -29,6 +29,7 @@ from official.vision.dataloaders import tf_example_decoder
 from official.vision.dataloaders import tfds_factory
 from official.vision.dataloaders import tf_example_label_map_decoder
 from official.vision.evaluation import coco_evaluator
+from official.vision.evaluation import streaming_coco_evaluator
 from official.vision.losses import focal_loss
 from official.vision.losses import loss_utils
 from official.vision.modeling import factory
@@ -146,7 +147,15 @@ class RetinaNetTask(base_task.Task):
         dataset_fn=dataset_fn.pick_dataset_fn(params.file_type),
         decoder_fn=decoder.decode,
         combine_fn=input_reader.create_combine_fn(params),
-        parser_fn=parser.parse_fn(params.is_training))
+        parser_fn=parser.parse_fn(params.is_training),
+        snapshot_context={
+            'input_size': self.task_config.model.input_size,
+            'min_level': self.task_config.model.min_level,
+            'max_level': self.task_config.model.max_level,
+            'anchor': self.task_config.model.anchor.as_dict(),
+            'box_coder_weights': (
+                self.task_config.model.detection_generator.box_coder_weights),
+        })
     dataset = reader.read(input_context=input_context)
 
     return dataset
@@ -282,7 +291,11 @@ class RetinaNetTask(base_task.Task):
             "Can't evaluate using annotation file when TFDS is used."
         )
       if self._task_config.use_coco_metrics:
-        self.coco_metric = coco_evaluator.COCOEvaluator(
+        if self._task_config.use_streaming_coco_metrics:
+          evaluator_cls = streaming_coco_evaluator.StreamingCOCOEvaluator
+        else:
+          evaluator_cls = coco_evaluator.COCOEvaluator
+        self.coco_metric = evaluator_cls(
             annotation_file=self.task_config.annotation_file,
             include_mask=False,
             per_category_metrics=self.task_config.per_category_metrics,
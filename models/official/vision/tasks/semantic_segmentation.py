@@ -122,7 +122,11 @@ class SemanticSegmentationTask(base_task.Task):
         dataset_fn=dataset_fn.pick_dataset_fn(params.file_type),
         decoder_fn=decoder.decode,
         combine_fn=input_reader.create_combine_fn(params),
-        parser_fn=parser.parse_fn(params.is_training))
+        parser_fn=parser.parse_fn(params.is_training),
+        snapshot_context={
+            'ignore_label': ignore_label,
+            'gt_is_matting_map': gt_is_matting_map,
+        })
 
     dataset = reader.read(input_context=input_context)
 
@@ -150,7 +150,11 @@ class VideoClassificationTask(base_task.Task):
         dataset_fn=self._get_dataset_fn(params),
         decoder_fn=self._get_decoder_fn(params),
         parser_fn=parser.parse_fn(params.is_training),
-        postprocess_fn=postprocess_fn)
+        postprocess_fn=postprocess_fn,
+        snapshot_context={
+            'output_audio': self.task_config.train_data.output_audio,
+            'audio_feature': self.task_config.train_data.audio_feature,
+        })
 
     dataset = reader.read(input_context=input_context)
 
@@ -20,6 +20,7 @@ from orbit import utils
 
 from orbit.controller import Action
 from orbit.controller import Controller
+from orbit.controller import LoopProfiler
 
 from orbit.runner import AbstractEvaluator
 from orbit.runner import AbstractTrainer
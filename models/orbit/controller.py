@@ -14,10 +14,13 @@
 
 """Provides a `Controller` class for managing the outer training loop."""
 
+import collections
+import contextlib
+import json
 import pprint
 import time
 
-from typing import Callable, Iterable, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
 
 from absl import logging
 
@@ -111,7 +114,9 @@ class Controller:
       # Evaluation related
       eval_summary_dir: Optional[str] = None,
       summary_manager: Optional[utils.SummaryManagerInterface] = None,
-      eval_summary_manager: Optional[utils.SummaryManagerInterface] = None):
+      eval_summary_manager: Optional[utils.SummaryManagerInterface] = None,
+      # Profiling related
+      loop_profiler: Optional["LoopProfiler"] = None):
     """Initializes a `Controller` instance.
 
     Note that if `checkpoint_manager` is provided and there are checkpoints in
@@ -172,6 +177,10 @@ class Controller:
         `eval_summary_dir` will be ignored. Otherwise the eval summary manager
         will be created internally for TensorBoard summaries by default from the
         `eval_summary_dir`.
+      loop_profiler: An optional `LoopProfiler`. If set, the time spent in each
+        phase of every training loop (training, output handling, summaries and
+        checkpointing) is recorded, and exported to its `export_path` at the
+        end of each `train` call.
 
     Raises:
       ValueError: If both `trainer` and `evaluator` are `None`.
@@ -215,6 +224,7 @@ class Controller:
 
     self.global_step = global_step
     self.checkpoint_manager = checkpoint_manager
+    self.loop_profiler = loop_profiler
     self._enable_async_checkpoint_saving = enable_async_checkpointing
     self._checkpoint_options = tf.train.CheckpointOptions(
         enable_async=enable_async_checkpointing
@@ -280,13 +290,20 @@ class Controller:
       # Calculates steps to run for the next train loop.
       num_steps = min(steps - current_step, self.steps_per_loop)
       self._train_n_steps(num_steps)
-      self._maybe_save_checkpoint()
+      with self._profile("checkpoint"):
+        self._maybe_save_checkpoint()
       current_step = self.global_step.numpy()
+      if self.loop_profiler:
+        self.loop_profiler.end_loop(current_step, num_steps)
 
-    if checkpoint_at_completion:
-      self._maybe_save_checkpoint(check_interval=False)
+    with self._profile("checkpoint"):
+      if checkpoint_at_completion:
+        self._maybe_save_checkpoint(check_interval=False)
+      self._sync_on_async_checkpointing()
 
-    self._sync_on_async_checkpointing()
+    if self.loop_profiler:
+      self.loop_profiler.end_loop(current_step, 0)
+      self.loop_profiler.export()
 
   def evaluate(self, steps: int = -1) -> Optional[runner.Output]:
     """Runs evaluation for the given number of steps.
@@ -512,7 +529,7 @@ class Controller:
         # Create a predicate to determine when summaries should be written.
         should_record = lambda: (self.global_step % self.summary_interval == 0)
       assert isinstance(self.trainer, runner.AbstractTrainer)
-      with tf.summary.record_if(should_record):
+      with tf.summary.record_if(should_record), self._profile("train"):
         num_steps_tensor = tf.convert_to_tensor(num_steps, dtype=tf.int32)
         train_output = self.trainer.train(num_steps_tensor)
 
@@ -525,10 +542,11 @@ class Controller:
           f"to be {expected_step}, but it was {self.global_step.numpy()}.")
       logging.warning(message)
 
-    train_output = train_output or {}
-    for action in self.train_actions:
-      action(train_output)
-    train_output = tf.nest.map_structure(utils.get_value, train_output)
+    with self._profile("output"):
+      train_output = train_output or {}
+      for action in self.train_actions:
+        action(train_output)
+      train_output = tf.nest.map_structure(utils.get_value, train_output)
 
     current_step = self.global_step.numpy()
     steps_per_second = self.step_timer.steps_per_second()
@@ -537,8 +555,9 @@ class Controller:
          f"output: {_format_output(train_output)}")
 
     train_output["steps_per_second"] = steps_per_second
-    self.summary_manager.write_summaries(train_output)
-    self.summary_manager.flush()
+    with self._profile("summary"):
+      self.summary_manager.write_summaries(train_output)
+      self.summary_manager.flush()
 
   def _maybe_save_checkpoint(self, check_interval: bool = True):
     """Conditionally saves a checkpoint.
@@ -566,6 +585,12 @@ class Controller:
         return True
     return False
 
+  def _profile(self, phase: str):
+    """Returns a context manager timing `phase` if profiling is enabled."""
+    if self.loop_profiler:
+      return self.loop_profiler.phase(phase)
+    return contextlib.nullcontext()
+
   def _require(self, attribute, for_method):
     """Utility method to raise an error if the given `attribute` is not set."""
     if getattr(self, attribute, None) is None:
@@ -598,3 +623,101 @@ class StepTimer:
     if restart:
       self.start()
     return value
+
+
+class LoopProfiler:
+  """Records where the wall-clock time of each training loop goes.
+
+  A `Controller` given a `LoopProfiler` times these phases of every loop of
+  `steps_per_loop` steps:
+
+    - "train": the call to `trainer.train`. The input pipeline and the step
+      computation both run inside the trainer's inner loop, so input wait is
+      included here (use the TensorFlow profiler to split the two).
+    - "output": running `train_actions` and fetching the train output to the
+      host. With asynchronous execution (e.g. on TPUs) this also includes
+      waiting for the steps to finish on device.
+    - "summary": writing and flushing the train summaries.
+    - "checkpoint": the time the loop is blocked by checkpoint saving. With
+      `enable_async_checkpointing`, this is only the time to snapshot the
+      variables; the write itself happens on a background thread and is only
+      waited on (and counted) at the end of `Controller.train`.
+
+  Each loop is recorded as a dictionary holding the global `step` after the
+  loop, its `num_steps`, `<phase>_seconds` for every phase and
+  `total_seconds`. The end of every `Controller.train` call adds a record with
+  `num_steps` 0 for the final checkpoint. Custom outer loops can use `phase`
+  and `end_loop` directly.
+  """
+
+  def __init__(self, export_path: Optional[str] = None):
+    """Initializes a `LoopProfiler` instance.
+
+    Args:
+      export_path: Optional path of a JSON file that `export` (re)writes with
+        all records and their summary.
+    """
+    self.export_path = export_path
+    self.records: List[Dict[str, Any]] = []
+    self._seconds = collections.defaultdict(float)
+    self._loop_start = None
+
+  @contextlib.contextmanager
+  def phase(self, name: str):
+    """Times the enclosed block as part of phase `name` of the current loop."""
+    start = time.perf_counter()
+    if self._loop_start is None:
+      self._loop_start = start
+    try:
+      yield
+    finally:
+      self._seconds[name] += time.perf_counter() - start
+
+  def end_loop(self, step: int, num_steps: int) -> Optional[Dict[str, Any]]:
+    """Records the phases timed since the previous loop ended.
+
+    Args:
+      step: The global step after the loop.
+      num_steps: The number of steps the loop ran.
+
+    Returns:
+      The new record, or `None` if no phase was timed since the previous loop.
+    """
+    if self._loop_start is None:
+      return None
+    record = {"step": int(step), "num_steps": int(num_steps)}
+    for name, seconds in self._seconds.items():
+      record[f"{name}_seconds"] = seconds
+    record["total_seconds"] = time.perf_counter() - self._loop_start
+    self.records.append(record)
+    self._seconds.clear()
+    self._loop_start = None
+    return record
+
+  def summary(self) -> Dict[str, float]:
+    """Returns the total steps and seconds (per phase) over all records."""
+    totals = collections.defaultdict(float)
+    for record in self.records:
+      for key, value in record.items():
+        if key != "step":
+          totals[key] += value
+    result = dict(totals)
+    result["num_steps"] = int(totals["num_steps"])
+    if totals["total_seconds"] > 0:
+      result["steps_per_second"] = (
+          totals["num_steps"] / totals["total_seconds"])
+    return result
+
+  def export(self, path: Optional[str] = None):
+    """Writes all records and their summary as JSON to `path`.
+
+    Args:
+      path: The file to write. Defaults to `export_path`; if both are `None`,
+        nothing is written.
+    """
+    path = path or self.export_path
+    if not path:
+      return
+    with tf.io.gfile.GFile(path, "w") as f:
+      json.dump({"summary": self.summary(), "loops": self.records}, f,
+                indent=2)
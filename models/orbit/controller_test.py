@@ -14,6 +14,7 @@
 
 """Tests for orbit.controller."""
 
+import json
 import os
 
 from absl import logging
@@ -470,6 +471,47 @@ class ControllerTest(tf.test.TestCase, parameterized.TestCase):
     self.assertFalse(
         tf.io.gfile.exists(os.path.join(self.model_dir, "summaries/eval")))
 
+  def test_loop_profiler(self):
+    test_runner = TestRunner()
+
+    checkpoint = tf.train.Checkpoint(
+        model=test_runner.model, optimizer=test_runner.optimizer)
+    checkpoint_manager = tf.train.CheckpointManager(
+        checkpoint,
+        self.model_dir,
+        max_to_keep=None,
+        step_counter=test_runner.global_step,
+        checkpoint_interval=4)
+    export_path = os.path.join(self.model_dir, "loop_profile.json")
+    profiler = controller.LoopProfiler(export_path)
+    test_controller = controller.Controller(
+        trainer=test_runner,
+        global_step=test_runner.global_step,
+        steps_per_loop=2,
+        summary_dir=os.path.join(self.model_dir, "summaries/train"),
+        checkpoint_manager=checkpoint_manager,
+        loop_profiler=profiler,
+    )
+    test_controller.train(steps=10)
+
+    # One record per loop, plus one for the final checkpoint.
+    self.assertEqual([record["num_steps"] for record in profiler.records],
+                     [2, 2, 2, 2, 2, 0])
+    for record in profiler.records[:-1]:
+      phase_seconds = [
+          record[f"{phase}_seconds"]
+          for phase in ("train", "output", "summary", "checkpoint")
+      ]
+      self.assertAllGreaterEqual(phase_seconds, 0.0)
+      self.assertLessEqual(sum(phase_seconds), record["total_seconds"])
+    self.assertIn("checkpoint_seconds", profiler.records[-1])
+
+    with tf.io.gfile.GFile(export_path) as f:
+      exported = json.load(f)
+    self.assertLen(exported["loops"], 6)
+    self.assertEqual(exported["summary"]["num_steps"], 10)
+    self.assertGreater(exported["summary"]["steps_per_second"], 0)
+
   def test_evaluate_only(self):
     test_runner = TestRunner()
 
@@ -25,14 +25,30 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import functools
 import math
 import tensorflow.compat.v1 as tf
 
 from object_detection.builders import decoder_builder
+from object_detection.core import standard_fields as fields
 from object_detection.protos import input_reader_pb2
 
 
+# Input pipeline tuning that is not part of the InputReader proto.
+#   cache_decoded: cache one pass of decoded examples in memory; shuffling and
+#     repetition then run over the cache, so later epochs skip reading and
+#     JPEG decoding. Only suitable for datasets that fit in memory.
+#   cache_image_max_dimension: optional bound on the longer image side of the
+#     cached examples. Boxes are normalized, so they are unaffected.
+#   num_threads: optional size of a private tf.data thread pool, which keeps
+#     input work from competing with the model's intra-op pool.
+InputPipelineOptions = collections.namedtuple(
+    'InputPipelineOptions',
+    ['cache_decoded', 'cache_image_max_dimension', 'num_threads'])
+InputPipelineOptions.__new__.__defaults__ = (False, None, None)
+
+
 def make_initializable_iterator(dataset):
   """Creates an iterator, and initializes tables.
 
@@ -164,6 +180,29 @@ def read_dataset(file_read_func, input_files, config, filename_shard_fn=None):
                                   config.num_readers, config, filename_shard_fn)
 
 
+def _downscale_image(tensor_dict, max_dimension):
+  """Resizes the decoded image so that its longer side is <= max_dimension."""
+  image = tensor_dict[fields.InputDataFields.image]
+  size = tf.shape(image)[:2]
+  scale = tf.minimum(
+      1.0, max_dimension / tf.cast(tf.reduce_max(size), tf.float32))
+  new_size = tf.cast(tf.round(tf.cast(size, tf.float32) * scale), tf.int32)
+  resized = tf.image.resize_images(image, new_size)
+  tensor_dict[fields.InputDataFields.image] = tf.cast(resized, image.dtype)
+  return tensor_dict
+
+
+def _dataset_options(num_threads):
+  """Returns tf.data options with a private thread pool of num_threads."""
+  options = tf.data.Options()
+  threading = getattr(options, 'threading', None)
+  if threading is None:
+    threading = options.experimental_threading
+  threading.private_threadpool_size = num_threads
+  threading.max_intra_op_parallelism = 1
+  return options
+
+
 def shard_function_for_context(input_context):
   """Returns a function that shards filenames based on the input context."""
 
@@ -178,7 +217,7 @@ def shard_function_for_context(input_context):
 
 
 def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
-          input_context=None, reduce_to_frame_fn=None):
+          input_context=None, reduce_to_frame_fn=None, pipeline_options=None):
   """Builds a tf.data.Dataset.
 
   Builds a tf.data.Dataset by applying the `transform_input_data_fn` on all
@@ -194,6 +233,8 @@ def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
       is being called per-replica.
     reduce_to_frame_fn: Function that extracts frames from tf.SequenceExample
       type input data.
+    pipeline_options: optional, an InputPipelineOptions. When given, maps are
+      parallelized with AUTOTUNE instead of the legacy fixed parallelism.
 
   Returns:
     A tf.data.Dataset based on the input_reader_config.
@@ -201,6 +242,8 @@ def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
   Raises:
     ValueError: On invalid input reader proto.
     ValueError: If no input paths are specified.
+    ValueError: If cached images are downscaled while instance masks are
+      loaded.
   """
   if not isinstance(input_reader_config, input_reader_pb2.InputReader):
     raise ValueError('input_reader_config not of type '
@@ -226,7 +269,8 @@ def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
       Returns:
         A tf.data.Dataset mapped with fn_to_map.
       """
-      if hasattr(dataset, 'map_with_legacy_function'):
+      if (hasattr(dataset, 'map_with_legacy_function') and
+          pipeline_options is None):
         if batch_size:
           num_parallel_calls = batch_size * (
               input_reader_config.num_parallel_batches)
@@ -240,15 +284,38 @@ def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
     shard_fn = shard_function_for_context(input_context)
     if input_context is not None:
       batch_size = input_context.get_per_replica_batch_size(batch_size)
+    cache_decoded = pipeline_options and pipeline_options.cache_decoded
+    read_config = input_reader_config
+    if cache_decoded:
+      # Read a single ordered pass; shuffling and repetition are applied to
+      # the cached examples below.
+      read_config = input_reader_pb2.InputReader()
+      read_config.CopyFrom(input_reader_config)
+      read_config.num_epochs = 1
+      read_config.shuffle = False
     dataset = read_dataset(
         functools.partial(tf.data.TFRecordDataset, buffer_size=8 * 1000 * 1000),
-        config.input_path[:], input_reader_config, filename_shard_fn=shard_fn)
+        config.input_path[:], read_config, filename_shard_fn=shard_fn)
     if input_reader_config.sample_1_of_n_examples > 1:
       dataset = dataset.shard(input_reader_config.sample_1_of_n_examples, 0)
     # TODO(rathodv): make batch size a required argument once the old binaries
     # are deleted.
     dataset = dataset_map_fn(dataset, decoder.decode, batch_size,
                              input_reader_config)
+    if cache_decoded:
+      max_dimension = pipeline_options.cache_image_max_dimension
+      if max_dimension:
+        if input_reader_config.load_instance_masks:
+          raise ValueError('cache_image_max_dimension does not support '
+                           'instance masks.')
+        dataset = dataset_map_fn(
+            dataset, functools.partial(_downscale_image,
+                                       max_dimension=max_dimension),
+            batch_size, input_reader_config)
+      dataset = dataset.cache()
+      if input_reader_config.shuffle:
+        dataset = dataset.shuffle(input_reader_config.shuffle_buffer_size)
+      dataset = dataset.repeat(input_reader_config.num_epochs or None)
     if reduce_to_frame_fn:
       dataset = reduce_to_frame_fn(dataset, dataset_map_fn, batch_size,
                                    input_reader_config)
@@ -259,6 +326,9 @@ def build(input_reader_config, batch_size=None, transform_input_data_fn=None,
       dataset = dataset.batch(batch_size,
                               drop_remainder=input_reader_config.drop_remainder)
     dataset = dataset.prefetch(input_reader_config.num_prefetch_batches)
+    if pipeline_options and pipeline_options.num_threads:
+      dataset = dataset.with_options(
+          _dataset_options(pipeline_options.num_threads))
     return dataset
 
   raise ValueError('Unsupported input_reader_config.')
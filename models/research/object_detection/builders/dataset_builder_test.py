@@ -419,6 +419,35 @@ class DatasetBuilderTest(test_case.TestCase):
     self.assertAllEqual([b'0'], output_dict1[fields.InputDataFields.source_id])
     self.assertEqual([b'2'], output_dict2[fields.InputDataFields.source_id])
 
+  def test_cache_decoded_repeats_and_downscales(self):
+    tf_record_path = self.create_tf_record(num_examples_per_shard=2)
+
+    input_reader_text_proto = """
+      shuffle: false
+      num_readers: 1
+      tf_record_input_reader {{
+        input_path: '{0}'
+      }}
+    """.format(tf_record_path)
+    input_reader_proto = input_reader_pb2.InputReader()
+    text_format.Merge(input_reader_text_proto, input_reader_proto)
+    pipeline_options = dataset_builder.InputPipelineOptions(
+        cache_decoded=True, cache_image_max_dimension=2, num_threads=2)
+
+    def graph_fn():
+      dataset = dataset_builder.build(
+          input_reader_proto, batch_size=3, pipeline_options=pipeline_options)
+      return get_iterator_next_for_testing(dataset, self.is_tf2())
+
+    output_dict = self.execute(graph_fn, [])
+    self.assertAllEqual([b'0', b'1', b'0'],
+                        output_dict[fields.InputDataFields.source_id])
+    self.assertEqual((3, 2, 2, 3),
+                     output_dict[fields.InputDataFields.image].shape)
+    self.assertAllEqual(
+        [0.0, 0.0, 1.0, 1.0],
+        output_dict[fields.InputDataFields.groundtruth_boxes][0][0])
+
   def test_no_input_context(self):
     """Test that all samples are read with no input context given."""
     tf_record_path = self.create_tf_record(num_examples_per_shard=16,
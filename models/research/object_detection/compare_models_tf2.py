@@ -0,0 +1,104 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Compares exported detection models on accuracy and CPU latency.
+
+Every SavedModel (exported by `exporter_main_v2.py` with the image_tensor
+input type) is evaluated on the same TFRecord (mAP@0.5IOU) and timed on CPU
+(batch-1 latency and batched throughput). Speedup and mAP change are reported
+against the --baseline model and written to `--output_path`.
+
+Example Usage:
+--------------
+python object_detection/compare_models_tf2.py \
+    --saved_models resnet50_fpn=exported-models/my_model/saved_model,\
+mobilenet_v2_fpnlite=exported-models/my_mobilenet_fpnlite/saved_model \
+    --baseline resnet50_fpn \
+    --eval_record_path annotations/test.record \
+    --label_map_path annotations/label_map.pbtxt \
+    --output_path exported-models/model_comparison.json
+"""
+import json
+
+from absl import app
+from absl import flags
+
+import tensorflow.compat.v2 as tf
+from object_detection import model_benchmark_lib_tf2
+
+tf.enable_v2_behavior()
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list('saved_models', None,
+                  'Comma separated name=saved_model_dir pairs.')
+flags.DEFINE_string('baseline', None,
+                    'Name of the reference model; defaults to the first one.')
+flags.DEFINE_string('eval_record_path', None, 'Evaluation TFRecord.')
+flags.DEFINE_string('label_map_path', None,
+                    'Label map used for evaluation categories.')
+flags.DEFINE_string('output_path', None,
+                    'Optional JSON file for the comparison results.')
+flags.DEFINE_integer('max_eval_examples', None,
+                     'Optional cap on the number of evaluated images.')
+flags.DEFINE_integer('batch_size', 8, 'Batch size of the throughput run.')
+flags.DEFINE_integer('intra_op_threads', None, 'TF intra-op thread pool size.')
+flags.DEFINE_integer('inter_op_threads', None, 'TF inter-op thread pool size.')
+
+
+def main(argv):
+  del argv  # Unused.
+  flags.mark_flag_as_required('saved_models')
+  flags.mark_flag_as_required('eval_record_path')
+  flags.mark_flag_as_required('label_map_path')
+  model_benchmark_lib_tf2.configure_cpu_threads(FLAGS.intra_op_threads,
+                                                FLAGS.inter_op_threads)
+
+  saved_models = {}
+  for entry in FLAGS.saved_models:
+    name, sep, path = entry.partition('=')
+    if not sep:
+      raise ValueError('Expected name=saved_model_dir, got {}.'.format(entry))
+    saved_models[name] = path
+  baseline = FLAGS.baseline or next(iter(saved_models))
+  if baseline not in saved_models:
+    raise ValueError('Unknown baseline {}.'.format(baseline))
+
+  examples = model_benchmark_lib_tf2.load_eval_examples(
+      FLAGS.eval_record_path, FLAGS.max_eval_examples)
+  # Batched timing needs equal shapes; each exported graph resizes anyway.
+  first_shape = examples[0]['image'].shape[:2]
+  images = [tf.cast(tf.image.resize(example['image'], first_shape),
+                    tf.uint8).numpy() for example in examples]
+
+  results = {}
+  for name, saved_model_dir in saved_models.items():
+    detect_fn = tf.saved_model.load(saved_model_dir)
+    result = model_benchmark_lib_tf2.evaluate_saved_model(
+        detect_fn, examples, FLAGS.label_map_path)
+    result.update(model_benchmark_lib_tf2.benchmark_saved_model(
+        detect_fn, images, batch_size=FLAGS.batch_size))
+    results[name] = result
+    print('{}: mAP@0.5={:.4f} p50={:.1f} ms'.format(
+        name, result['map'], result['latency_p50_ms']))
+
+  model_benchmark_lib_tf2.add_relative_metrics(results, baseline)
+  print(model_benchmark_lib_tf2.format_pareto_table(results))
+  if FLAGS.output_path:
+    with tf.io.gfile.GFile(FLAGS.output_path, 'w') as f:
+      f.write(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,94 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Exports one trained SSD checkpoint at several input resolutions.
+
+SSD feature extractors are fully convolutional and the multiscale anchor
+generator derives anchors from the feature map sizes, so the same checkpoint
+can be exported with a different `fixed_shape_resizer`. Each resolution gets
+its own `exporter_lib_v2` export directory (`<output>/<height>x<width>`).
+"""
+import copy
+import os
+
+from object_detection import exporter_lib_v2
+
+
+def config_for_resolution(pipeline_config, height, width=None):
+  """Returns a copy of an SSD pipeline config with a new input resolution.
+
+  When the resolution is not a multiple of the coarsest top-down FPN stride,
+  the feature extractor is told to zero-pad its input to that multiple so the
+  FPN feature maps line up. The Keras FPN extractors only run the top-down
+  path up to level 5 and build higher levels with stride-2 convolutions, so
+  the stride is 2**min(max_level, 5).
+
+  Args:
+    pipeline_config: pipeline_pb2.TrainEvalPipelineConfig proto.
+    height: Input height in pixels.
+    width: Input width in pixels; defaults to `height`.
+
+  Returns:
+    A new pipeline_pb2.TrainEvalPipelineConfig.
+
+  Raises:
+    ValueError: if the model is not SSD with a fixed_shape_resizer.
+  """
+  width = width or height
+  config = copy.deepcopy(pipeline_config)
+  if config.model.WhichOneof('model') != 'ssd':
+    raise ValueError('Only SSD models are supported, found {}.'.format(
+        config.model.WhichOneof('model')))
+  ssd = config.model.ssd
+  if ssd.image_resizer.WhichOneof('image_resizer_oneof') != (
+      'fixed_shape_resizer'):
+    raise ValueError('Expected a fixed_shape_resizer in the SSD config.')
+  ssd.image_resizer.fixed_shape_resizer.height = height
+  ssd.image_resizer.fixed_shape_resizer.width = width
+
+  feature_extractor = ssd.feature_extractor
+  if feature_extractor.HasField('fpn'):
+    stride = 2 ** min(feature_extractor.fpn.max_level, 5)
+    if height % stride or width % stride:
+      feature_extractor.pad_to_multiple = max(
+          feature_extractor.pad_to_multiple, stride)
+  return config
+
+
+def export_resolutions(pipeline_config, trained_checkpoint_dir,
+                       output_directory, resolutions):
+  """Exports the checkpoint once per resolution.
+
+  Args:
+    pipeline_config: pipeline_pb2.TrainEvalPipelineConfig proto.
+    trained_checkpoint_dir: Directory containing the trained checkpoint.
+    output_directory: Parent directory of the per-resolution exports.
+    resolutions: Iterable of square sizes or (height, width) pairs.
+
+  Returns:
+    A dict mapping 'HxW' to the exported SavedModel directory.
+  """
+  saved_models = {}
+  for resolution in resolutions:
+    if isinstance(resolution, int):
+      height, width = resolution, resolution
+    else:
+      height, width = resolution
+    name = '{}x{}'.format(height, width)
+    export_dir = os.path.join(output_directory, name)
+    exporter_lib_v2.export_inference_graph(
+        'image_tensor', config_for_resolution(pipeline_config, height, width),
+        trained_checkpoint_dir, export_dir)
+    saved_models[name] = os.path.join(export_dir, 'saved_model')
+  return saved_models
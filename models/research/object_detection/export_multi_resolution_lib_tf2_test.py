@@ -0,0 +1,87 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Test for export_multi_resolution_lib_tf2.py."""
+import unittest
+
+import tensorflow.compat.v2 as tf
+
+from google.protobuf import text_format
+from object_detection import export_multi_resolution_lib_tf2
+from object_detection.protos import pipeline_pb2
+from object_detection.utils import tf_version
+
+_SSD_FPN_CONFIG = """
+model {
+  ssd {
+    num_classes: 6
+    image_resizer {
+      fixed_shape_resizer {
+        height: 640
+        width: 640
+      }
+    }
+    feature_extractor {
+      type: "ssd_resnet50_v1_fpn_keras"
+      fpn {
+        min_level: 3
+        max_level: 7
+      }
+    }
+  }
+}
+"""
+
+
+@unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
+class ConfigForResolutionTest(tf.test.TestCase):
+
+  def _config(self):
+    return text_format.Parse(_SSD_FPN_CONFIG,
+                             pipeline_pb2.TrainEvalPipelineConfig())
+
+  def test_sets_resolution_without_modifying_input(self):
+    pipeline_config = self._config()
+    config = export_multi_resolution_lib_tf2.config_for_resolution(
+        pipeline_config, 512)
+    resizer = config.model.ssd.image_resizer.fixed_shape_resizer
+    self.assertEqual((resizer.height, resizer.width), (512, 512))
+    self.assertEqual(config.model.ssd.feature_extractor.pad_to_multiple, 1)
+    self.assertEqual(
+        pipeline_config.model.ssd.image_resizer.fixed_shape_resizer.height,
+        640)
+
+  def test_pads_to_fpn_stride(self):
+    for resolution, pad_to_multiple in ((320, 1), (448, 1), (300, 32)):
+      config = export_multi_resolution_lib_tf2.config_for_resolution(
+          self._config(), resolution)
+      self.assertEqual(config.model.ssd.feature_extractor.pad_to_multiple,
+                       pad_to_multiple)
+
+    pipeline_config = self._config()
+    pipeline_config.model.ssd.feature_extractor.fpn.max_level = 4
+    config = export_multi_resolution_lib_tf2.config_for_resolution(
+        pipeline_config, 328)
+    self.assertEqual(config.model.ssd.feature_extractor.pad_to_multiple, 16)
+
+  def test_rejects_non_ssd_models(self):
+    pipeline_config = pipeline_pb2.TrainEvalPipelineConfig()
+    pipeline_config.model.faster_rcnn.num_classes = 1
+    with self.assertRaises(ValueError):
+      export_multi_resolution_lib_tf2.config_for_resolution(pipeline_config,
+                                                            320)
+
+
+if __name__ == '__main__':
+  tf.test.main()
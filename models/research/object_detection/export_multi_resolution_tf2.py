@@ -0,0 +1,121 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Exports an SSD checkpoint at several resolutions and benchmarks them.
+
+For every resolution the checkpoint is exported with `exporter_lib_v2`
+(image_tensor input), evaluated on the evaluation TFRecord (mAP@0.5IOU) and
+timed on CPU (batch-1 latency and batched throughput). The result is printed
+as a table with the Pareto-optimal (accuracy vs latency) resolutions marked,
+and written to `<output_directory>/resolution_report.json`.
+
+Example Usage:
+--------------
+python object_detection/export_multi_resolution_tf2.py \
+    --pipeline_config_path models/my_ssd_resnet50_v1_fpn/pipeline.config \
+    --trained_checkpoint_dir models/my_ssd_resnet50_v1_fpn \
+    --output_directory exported-models/resolutions \
+    --eval_record_path annotations/test.record \
+    --label_map_path annotations/label_map.pbtxt \
+    --resolutions 320,448,512,640
+"""
+import json
+import os
+
+from absl import app
+from absl import flags
+
+import tensorflow.compat.v2 as tf
+from google.protobuf import text_format
+from object_detection import export_multi_resolution_lib_tf2
+from object_detection import model_benchmark_lib_tf2
+from object_detection.protos import pipeline_pb2
+
+tf.enable_v2_behavior()
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string(
+    'pipeline_config_path', None,
+    'Path to a pipeline_pb2.TrainEvalPipelineConfig config '
+    'file.')
+flags.DEFINE_string('trained_checkpoint_dir', None,
+                    'Path to trained checkpoint directory')
+flags.DEFINE_string('output_directory', None, 'Path to write outputs.')
+flags.DEFINE_list('resolutions', ['320', '448', '512', '640'],
+                  'Comma separated square input sizes to export.')
+flags.DEFINE_string('eval_record_path', None, 'Evaluation TFRecord.')
+flags.DEFINE_string('label_map_path', None,
+                    'Label map used for evaluation categories.')
+flags.DEFINE_integer('max_eval_examples', None,
+                     'Optional cap on the number of evaluated images.')
+flags.DEFINE_integer('batch_size', 8, 'Batch size of the throughput run.')
+flags.DEFINE_integer('intra_op_threads', None, 'TF intra-op thread pool size.')
+flags.DEFINE_integer('inter_op_threads', None, 'TF inter-op thread pool size.')
+flags.DEFINE_bool('skip_export', False,
+                  'Benchmark existing exports in output_directory.')
+
+
+def main(argv):
+  del argv  # Unused.
+  flags.mark_flag_as_required('pipeline_config_path')
+  flags.mark_flag_as_required('trained_checkpoint_dir')
+  flags.mark_flag_as_required('output_directory')
+  flags.mark_flag_as_required('eval_record_path')
+  flags.mark_flag_as_required('label_map_path')
+  model_benchmark_lib_tf2.configure_cpu_threads(FLAGS.intra_op_threads,
+                                                FLAGS.inter_op_threads)
+
+  pipeline_config = pipeline_pb2.TrainEvalPipelineConfig()
+  with tf.io.gfile.GFile(FLAGS.pipeline_config_path, 'r') as f:
+    text_format.Parse(f.read(), pipeline_config)
+
+  resolutions = [int(size) for size in FLAGS.resolutions]
+  if FLAGS.skip_export:
+    saved_models = {
+        '{0}x{0}'.format(size): os.path.join(
+            FLAGS.output_directory, '{0}x{0}'.format(size), 'saved_model')
+        for size in resolutions}
+  else:
+    saved_models = export_multi_resolution_lib_tf2.export_resolutions(
+        pipeline_config, FLAGS.trained_checkpoint_dir, FLAGS.output_directory,
+        resolutions)
+
+  examples = model_benchmark_lib_tf2.load_eval_examples(
+      FLAGS.eval_record_path, FLAGS.max_eval_examples)
+  # Batched timing needs equal shapes; the exported graph resizes anyway.
+  first_shape = examples[0]['image'].shape[:2]
+  images = [tf.cast(tf.image.resize(example['image'], first_shape),
+                    tf.uint8).numpy() for example in examples]
+
+  results = {}
+  for name, saved_model_dir in saved_models.items():
+    detect_fn = tf.saved_model.load(saved_model_dir)
+    result = model_benchmark_lib_tf2.evaluate_saved_model(
+        detect_fn, examples, FLAGS.label_map_path)
+    result.update(model_benchmark_lib_tf2.benchmark_saved_model(
+        detect_fn, images, batch_size=FLAGS.batch_size))
+    results[name] = result
+    print('{}: mAP@0.5={:.4f} p50={:.1f} ms'.format(
+        name, result['map'], result['latency_p50_ms']))
+
+  print(model_benchmark_lib_tf2.format_pareto_table(results))
+  with tf.io.gfile.GFile(
+      os.path.join(FLAGS.output_directory, 'resolution_report.json'),
+      'w') as f:
+    f.write(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,429 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Post-training quantized TFLite export and CPU evaluation harness.
+
+Builds on `export_tflite_graph_lib_tf2.export_tflite_model`: the intermediate
+TFLite-friendly SavedModel is converted into one TFLite flatbuffer per
+quantization mode:
+
+  float32:        no quantization (baseline).
+  float16:        float16 weights, float32 compute.
+  dynamic_range:  int8 weights, activations quantized on the fly.
+  full_integer:   int8 weights and activations, calibrated on a
+                  representative dataset drawn from a training TFRecord.
+                  Float input/output are kept and ops without an int8 kernel
+                  (e.g. the TFLite_Detection_PostProcess custom op) stay float.
+
+`evaluate_tflite_model` runs a flatbuffer on CPU over an evaluation TFRecord
+and reports Pascal VOC mAP@0.5IOU, per-image latency percentiles, model size
+and peak resident memory. Each evaluation runs in a fresh process so the
+memory numbers of different variants do not contaminate each other.
+"""
+import multiprocessing
+import os
+import queue as queue_lib
+import time
+import traceback
+
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+from object_detection import export_tflite_graph_lib_tf2
+from object_detection.builders import model_builder
+from object_detection.core import standard_fields as fields
+from object_detection.data_decoders import tf_example_decoder
+from object_detection.utils import label_map_util
+from object_detection.utils import object_detection_evaluation
+
+FLOAT32 = 'float32'
+FLOAT16 = 'float16'
+DYNAMIC_RANGE = 'dynamic_range'
+FULL_INTEGER = 'full_integer'
+QUANTIZATION_MODES = (FLOAT32, FLOAT16, DYNAMIC_RANGE, FULL_INTEGER)
+
+# How often the parent checks that an isolated evaluation is still alive.
+_POLL_SECONDS = 5.0
+
+# Output tensor names of the TFLite SSD model produced from the SavedModel
+# written by export_tflite_graph_lib_tf2: the module returns
+# [num_detections, scores, classes, boxes] (the post-processing outputs,
+# reversed), which become StatefulPartitionedCall:0..3.
+_OUTPUT_NAME_SUFFIXES = {
+    ':0': 'num_detections',
+    ':1': 'detection_scores',
+    ':2': 'detection_classes',
+    ':3': 'detection_boxes',
+}
+
+
+def build_preprocess_fn(pipeline_config):
+  """Returns a function mapping a uint8 [H, W, 3] image to model input.
+
+  The detection model's own `preprocess` is used, so resizing and
+  normalization match what the exported TFLite graph expects.
+
+  Args:
+    pipeline_config: pipeline_pb2.TrainEvalPipelineConfig proto.
+
+  Returns:
+    A tf.function returning a float32 [1, height, width, 3] tensor.
+  """
+  detection_model = model_builder.build(pipeline_config.model,
+                                        is_training=False)
+
+  @tf.function
+  def preprocess(image):
+    image = tf.cast(image[tf.newaxis], tf.float32)
+    preprocessed, _ = detection_model.preprocess(image)
+    return preprocessed
+
+  return preprocess
+
+
+def _decoded_dataset(record_path):
+  decoder = tf_example_decoder.TfExampleDecoder()
+  files = tf.io.gfile.glob(record_path) or [record_path]
+  return tf.data.TFRecordDataset(files).map(
+      decoder.decode, num_parallel_calls=tf.data.AUTOTUNE)
+
+
+def representative_dataset(record_path, preprocess_fn, num_samples=100,
+                           seed=0):
+  """Builds a representative dataset generator for full-integer calibration.
+
+  Args:
+    record_path: Path or glob of the training TFRecord(s).
+    preprocess_fn: Function from a uint8 image to a float32 model input, e.g.
+      the result of `build_preprocess_fn`.
+    num_samples: Number of calibration images.
+    seed: Shuffle seed, so calibration is reproducible.
+
+  Returns:
+    A zero-argument generator function suitable for
+    `TFLiteConverter.representative_dataset`.
+  """
+  def generator():
+    dataset = _decoded_dataset(record_path).shuffle(
+        buffer_size=max(num_samples * 4, 256), seed=seed,
+        reshuffle_each_iteration=False).take(num_samples)
+    for tensor_dict in dataset:
+      yield [preprocess_fn(tensor_dict[fields.InputDataFields.image])]
+
+  return generator
+
+
+def validate_modes(modes):
+  """Raises ValueError if any of `modes` is not in QUANTIZATION_MODES."""
+  unknown = [mode for mode in modes if mode not in QUANTIZATION_MODES]
+  if unknown:
+    raise ValueError('Unknown quantization mode(s) {}; expected one of {}'
+                     .format(', '.join(unknown), QUANTIZATION_MODES))
+
+
+def convert_saved_model(saved_model_dir, mode, representative_dataset_fn=None):
+  """Converts a TFLite-friendly SavedModel with the given quantization mode.
+
+  Args:
+    saved_model_dir: SavedModel written by
+      `export_tflite_graph_lib_tf2.export_tflite_model`.
+    mode: One of QUANTIZATION_MODES.
+    representative_dataset_fn: Required for FULL_INTEGER.
+
+  Returns:
+    The serialized TFLite flatbuffer (bytes).
+
+  Raises:
+    ValueError: on an unknown mode or a missing representative dataset.
+  """
+  validate_modes([mode])
+  converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+  # The SSD post-processing is the TFLite_Detection_PostProcess custom op.
+  converter.allow_custom_ops = True
+  if mode == FLOAT16:
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+  elif mode == DYNAMIC_RANGE:
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+  elif mode == FULL_INTEGER:
+    if representative_dataset_fn is None:
+      raise ValueError('full_integer quantization needs a representative '
+                       'dataset.')
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset_fn
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+        tf.lite.OpsSet.TFLITE_BUILTINS,
+    ]
+  return converter.convert()
+
+
+def export_quantized_models(pipeline_config, trained_checkpoint_dir,
+                            output_directory, train_record_path,
+                            modes=QUANTIZATION_MODES,
+                            num_calibration_samples=100, max_detections=10,
+                            use_regular_nms=False):
+  """Exports the TFLite SavedModel and one .tflite file per quantization mode.
+
+  Args:
+    pipeline_config: pipeline_pb2.TrainEvalPipelineConfig proto.
+    trained_checkpoint_dir: Directory containing the trained checkpoint.
+    output_directory: Receives `saved_model/` and `model_<mode>.tflite`.
+    train_record_path: Training TFRecord (or glob) used for calibration.
+    modes: Iterable of QUANTIZATION_MODES to export.
+    num_calibration_samples: Representative images for FULL_INTEGER.
+    max_detections: Max detections of the TFLite model.
+    use_regular_nms: Use the (slower) multi-class NMS in the TFLite model.
+
+  Returns:
+    A dict mapping each mode to the path of its .tflite file.
+
+  Raises:
+    ValueError: on an unknown mode, before anything is exported.
+  """
+  validate_modes(modes)
+  export_tflite_graph_lib_tf2.export_tflite_model(
+      pipeline_config, trained_checkpoint_dir, output_directory,
+      max_detections, use_regular_nms)
+  saved_model_dir = os.path.join(output_directory, 'saved_model')
+
+  representative_dataset_fn = None
+  if FULL_INTEGER in modes:
+    representative_dataset_fn = representative_dataset(
+        train_record_path, build_preprocess_fn(pipeline_config),
+        num_calibration_samples)
+
+  paths = {}
+  for mode in modes:
+    tflite_model = convert_saved_model(saved_model_dir, mode,
+                                       representative_dataset_fn)
+    path = os.path.join(output_directory, 'model_{}.tflite'.format(mode))
+    with tf.io.gfile.GFile(path, 'wb') as f:
+      f.write(tflite_model)
+    paths[mode] = path
+  return paths
+
+
+def output_indices(output_details):
+  """Maps detection output names to TFLite output tensor indices.
+
+  Args:
+    output_details: `Interpreter.get_output_details()`.
+
+  Returns:
+    A dict with detection_boxes, detection_classes, detection_scores and
+    num_detections tensor indices.
+
+  Raises:
+    ValueError: if the outputs cannot be identified.
+  """
+  indices = {}
+  for detail in output_details:
+    for suffix, key in _OUTPUT_NAME_SUFFIXES.items():
+      if detail['name'].endswith(suffix):
+        indices[key] = detail['index']
+  if len(indices) == len(_OUTPUT_NAME_SUFFIXES):
+    return indices
+
+  # Older converters keep the post-processing op's own output order.
+  if len(output_details) == 4:
+    ordered = sorted(output_details, key=lambda detail: detail['index'])
+    keys = ('detection_boxes', 'detection_classes', 'detection_scores',
+            'num_detections')
+    if len(ordered[0]['shape']) == 3 and ordered[0]['shape'][-1] == 4:
+      return {key: detail['index'] for key, detail in zip(keys, ordered)}
+  raise ValueError('Could not identify the detection outputs in {}'.format(
+      [detail['name'] for detail in output_details]))
+
+
+class TFLiteDetector(object):
+  """Runs a TFLite SSD model on single images."""
+
+  def __init__(self, tflite_path, num_threads=None):
+    self._interpreter = tf.lite.Interpreter(model_path=tflite_path,
+                                            num_threads=num_threads)
+    self._interpreter.allocate_tensors()
+    self._input = self._interpreter.get_input_details()[0]
+    self._outputs = output_indices(self._interpreter.get_output_details())
+
+  @property
+  def input_shape(self):
+    return tuple(self._input['shape'])
+
+  def __call__(self, preprocessed_image):
+    """Returns detections for a float32 [1, H, W, 3] preprocessed image.
+
+    Returns:
+      A tuple (detections, seconds) where detections holds normalized
+      [ymin, xmin, ymax, xmax] boxes, 1-based classes and scores, and seconds
+      is the wall time of `invoke()` alone.
+    """
+    self._interpreter.set_tensor(self._input['index'], preprocessed_image)
+    start = time.perf_counter()
+    self._interpreter.invoke()
+    seconds = time.perf_counter() - start
+    get = self._interpreter.get_tensor
+    num = int(get(self._outputs['num_detections']).reshape(-1)[0])
+    detections = {
+        'detection_boxes': get(self._outputs['detection_boxes'])[0][:num],
+        # The TFLite post-processing op emits 0-based class ids.
+        'detection_classes':
+            get(self._outputs['detection_classes'])[0][:num].astype(
+                np.int32) + 1,
+        'detection_scores': get(self._outputs['detection_scores'])[0][:num],
+    }
+    return detections, seconds
+
+
+def _peak_rss_mb():
+  try:
+    import resource  # pylint: disable=g-import-not-at-top
+  except ImportError:  # Not available on Windows.
+    return float('nan')
+  return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _evaluate(tflite_path, pipeline_config, eval_record_path, label_map_path,
+              num_threads, max_examples, warmup):
+  """Evaluation body; see `evaluate_tflite_model`."""
+  rss_before = _peak_rss_mb()
+  detector = TFLiteDetector(tflite_path, num_threads=num_threads)
+  preprocess_fn = build_preprocess_fn(pipeline_config)
+  categories = label_map_util.create_categories_from_labelmap(label_map_path)
+  evaluator = object_detection_evaluation.PascalDetectionEvaluator(categories)
+
+  dataset = _decoded_dataset(eval_record_path)
+  if max_examples:
+    dataset = dataset.take(max_examples)
+  latencies = []
+  for image_id, tensor_dict in enumerate(dataset):
+    image = preprocess_fn(tensor_dict[fields.InputDataFields.image]).numpy()
+    if image_id == 0:
+      for _ in range(warmup):
+        detector(image)
+    detections, seconds = detector(image)
+    latencies.append(seconds)
+    evaluator.add_single_ground_truth_image_info(image_id, {
+        fields.InputDataFields.groundtruth_boxes:
+            tensor_dict[fields.InputDataFields.groundtruth_boxes].numpy(),
+        fields.InputDataFields.groundtruth_classes:
+            tensor_dict[fields.InputDataFields.groundtruth_classes].numpy(),
+        fields.InputDataFields.groundtruth_difficult:
+            np.zeros_like(tensor_dict[
+                fields.InputDataFields.groundtruth_classes].numpy(), bool),
+    })
+    evaluator.add_single_detected_image_info(image_id, {
+        fields.DetectionResultFields.detection_boxes:
+            detections['detection_boxes'],
+        fields.DetectionResultFields.detection_scores:
+            detections['detection_scores'],
+        fields.DetectionResultFields.detection_classes:
+            detections['detection_classes'],
+    })
+
+  metrics = evaluator.evaluate()
+  latencies_ms = np.array(latencies) * 1000.0
+  return {
+      'model': tflite_path,
+      'map': float(metrics['PascalBoxes_Precision/mAP@0.5IOU']),
+      'num_images': len(latencies),
+      'latency_mean_ms': float(latencies_ms.mean()) if len(latencies) else 0.,
+      'latency_p50_ms':
+          float(np.percentile(latencies_ms, 50)) if len(latencies) else 0.,
+      'latency_p90_ms':
+          float(np.percentile(latencies_ms, 90)) if len(latencies) else 0.,
+      'model_size_mb': os.path.getsize(tflite_path) / (1024.0 * 1024.0),
+      'peak_rss_mb': _peak_rss_mb(),
+      'peak_rss_delta_mb': _peak_rss_mb() - rss_before,
+  }
+
+
+def _evaluate_worker(queue, args):
+  try:
+    queue.put(('ok', _evaluate(*args)))
+  except BaseException:  # pylint: disable=broad-except
+    queue.put(('error', traceback.format_exc()))
+
+
+def evaluate_tflite_model(tflite_path, pipeline_config, eval_record_path,
+                          label_map_path, num_threads=None, max_examples=None,
+                          warmup=3, isolate=True):
+  """Evaluates a TFLite detector on CPU.
+
+  Args:
+    tflite_path: Path to the .tflite model.
+    pipeline_config: pipeline_pb2.TrainEvalPipelineConfig proto, used for
+      preprocessing.
+    eval_record_path: Evaluation TFRecord (or glob).
+    label_map_path: Label map for the evaluator categories.
+    num_threads: Interpreter threads; None lets TFLite decide.
+    max_examples: Optional cap on the number of evaluated images.
+    warmup: Untimed invocations before the first timed one.
+    isolate: Run in a fresh process so peak memory is per model. An exception
+      in the child or the child dying (e.g. OOM-killed) raises RuntimeError.
+
+  Returns:
+    A dict with map, latency_mean_ms, latency_p50_ms, latency_p90_ms,
+    model_size_mb, peak_rss_mb and peak_rss_delta_mb.
+  """
+  args = (tflite_path, pipeline_config, eval_record_path, label_map_path,
+          num_threads, max_examples, warmup)
+  if not isolate:
+    return _evaluate(*args)
+  context = multiprocessing.get_context('spawn')
+  queue = context.Queue()
+  process = context.Process(target=_evaluate_worker, args=(queue, args))
+  process.start()
+  try:
+    while True:
+      try:
+        status, payload = queue.get(timeout=_POLL_SECONDS)
+        break
+      except queue_lib.Empty:
+        if process.is_alive():
+          continue
+      # The child exited; its message may have been flushed just before.
+      try:
+        status, payload = queue.get(timeout=_POLL_SECONDS)
+        break
+      except queue_lib.Empty:
+        raise RuntimeError(
+            'Evaluation of {} died with exit code {} without a result '
+            '(killed, e.g. out of memory?)'.format(tflite_path,
+                                                   process.exitcode))
+  finally:
+    process.join(_POLL_SECONDS)
+    if process.is_alive():
+      process.terminate()
+      process.join()
+  if status == 'error':
+    raise RuntimeError('Evaluation of {} failed in the worker process:\n{}'
+                       .format(tflite_path, payload))
+  return payload
+
+
+def format_results_table(results):
+  """Formats evaluation results as a plain-text table, one row per model."""
+  header = ('model', 'mAP@0.5', 'p50 ms', 'p90 ms', 'size MB', 'peak RSS MB')
+  rows = [header]
+  for name, result in results.items():
+    rows.append((name,
+                 '{:.4f}'.format(result['map']),
+                 '{:.1f}'.format(result['latency_p50_ms']),
+                 '{:.1f}'.format(result['latency_p90_ms']),
+                 '{:.1f}'.format(result['model_size_mb']),
+                 '{:.0f}'.format(result['peak_rss_mb'])))
+  widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+  return '\n'.join('  '.join(cell.ljust(width) for cell, width in
+                             zip(row, widths)) for row in rows)
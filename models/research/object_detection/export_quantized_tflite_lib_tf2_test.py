@@ -0,0 +1,126 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Test for export_quantized_tflite_lib_tf2.py."""
+import os
+import unittest
+
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+from object_detection import export_quantized_tflite_lib_tf2 as lib
+from object_detection.utils import dataset_util
+from object_detection.utils import tf_version
+
+
+def _write_record(path, num_examples, height=8, width=8):
+  with tf.io.TFRecordWriter(path) as writer:
+    for i in range(num_examples):
+      image = np.full((height, width, 3), i, dtype=np.uint8)
+      encoded = tf.io.encode_jpeg(tf.constant(image)).numpy()
+      example = tf.train.Example(features=tf.train.Features(feature={
+          'image/encoded': dataset_util.bytes_feature(encoded),
+          'image/format': dataset_util.bytes_feature(b'jpeg'),
+          'image/height': dataset_util.int64_feature(height),
+          'image/width': dataset_util.int64_feature(width),
+          'image/object/bbox/xmin': dataset_util.float_list_feature([0.1]),
+          'image/object/bbox/xmax': dataset_util.float_list_feature([0.5]),
+          'image/object/bbox/ymin': dataset_util.float_list_feature([0.2]),
+          'image/object/bbox/ymax': dataset_util.float_list_feature([0.6]),
+          'image/object/class/label': dataset_util.int64_list_feature([1]),
+      }))
+      writer.write(example.SerializeToString())
+
+
+@unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
+class ExportQuantizedTfLiteTest(tf.test.TestCase):
+
+  def test_representative_dataset_yields_preprocessed_images(self):
+    record_path = os.path.join(self.get_temp_dir(), 'train.record')
+    _write_record(record_path, num_examples=5)
+
+    def preprocess(image):
+      return tf.cast(image[tf.newaxis], tf.float32) / 255.0
+
+    samples = list(lib.representative_dataset(record_path, preprocess,
+                                              num_samples=3)())
+    self.assertLen(samples, 3)
+    for sample in samples:
+      self.assertLen(sample, 1)
+      self.assertEqual(sample[0].shape, (1, 8, 8, 3))
+      self.assertEqual(sample[0].dtype, tf.float32)
+
+  def test_dynamic_range_conversion_shrinks_model(self):
+    module = tf.Module()
+    module.kernel = tf.Variable(tf.random.normal([64, 64]))
+
+    @tf.function(input_signature=[tf.TensorSpec([1, 64], tf.float32)])
+    def call(x):
+      return tf.matmul(x, module.kernel)
+
+    module.call = call
+    saved_model_dir = os.path.join(self.get_temp_dir(), 'saved_model')
+    tf.saved_model.save(module, saved_model_dir, signatures=call)
+
+    float_model = lib.convert_saved_model(saved_model_dir, lib.FLOAT32)
+    quantized_model = lib.convert_saved_model(saved_model_dir,
+                                              lib.DYNAMIC_RANGE)
+    self.assertLess(len(quantized_model), len(float_model))
+
+  def test_convert_rejects_bad_arguments(self):
+    with self.assertRaises(ValueError):
+      lib.convert_saved_model('unused', 'int4')
+    with self.assertRaises(ValueError):
+      lib.convert_saved_model('unused', lib.FULL_INTEGER)
+
+  def test_export_rejects_unknown_mode_before_exporting(self):
+    with self.assertRaisesRegex(ValueError, 'int4'):
+      lib.export_quantized_models(None, 'unused', self.get_temp_dir(), None,
+                                  modes=[lib.FLOAT32, 'int4'])
+    self.assertEmpty(tf.io.gfile.listdir(self.get_temp_dir()))
+
+  def test_isolated_evaluation_raises_on_worker_error(self):
+    missing = os.path.join(self.get_temp_dir(), 'missing.tflite')
+    with self.assertRaisesRegex(RuntimeError, 'failed in the worker'):
+      lib.evaluate_tflite_model(missing, None, 'unused', 'unused',
+                                isolate=True)
+
+  def test_output_indices_by_name(self):
+    details = [
+        {'name': 'StatefulPartitionedCall:1', 'index': 7, 'shape': [1, 10]},
+        {'name': 'StatefulPartitionedCall:3', 'index': 5, 'shape': [1, 10, 4]},
+        {'name': 'StatefulPartitionedCall:0', 'index': 8, 'shape': [1]},
+        {'name': 'StatefulPartitionedCall:2', 'index': 6, 'shape': [1, 10]},
+    ]
+    self.assertEqual(lib.output_indices(details), {
+        'num_detections': 8,
+        'detection_scores': 7,
+        'detection_classes': 6,
+        'detection_boxes': 5,
+    })
+
+  def test_format_results_table(self):
+    table = lib.format_results_table({
+        'dynamic_range': {'map': 0.5, 'latency_p50_ms': 12.0,
+                          'latency_p90_ms': 15.0, 'model_size_mb': 9.5,
+                          'peak_rss_mb': 210.0},
+    })
+    lines = table.splitlines()
+    self.assertLen(lines, 2)
+    self.assertIn('dynamic_range', lines[1])
+    self.assertIn('0.5000', lines[1])
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,125 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Exports post-training quantized TFLite SSD models and evaluates them on CPU.
+
+Runs the `export_tflite_graph_tf2.py` export, converts the resulting SavedModel
+once per quantization mode (float32, float16, dynamic_range, full_integer) and,
+when --eval_record_path is given, reports mAP@0.5IOU, latency and memory for
+each variant.
+
+Example Usage:
+--------------
+python object_detection/export_quantized_tflite_tf2.py \
+    --pipeline_config_path path/to/ssd_model/pipeline.config \
+    --trained_checkpoint_dir path/to/ssd_model/checkpoint \
+    --output_directory path/to/exported_tflite \
+    --train_record_path annotations/train.record \
+    --eval_record_path annotations/test.record \
+    --label_map_path annotations/label_map.pbtxt \
+    --modes dynamic_range,full_integer \
+    --num_threads 4
+"""
+import json
+import os
+
+from absl import app
+from absl import flags
+
+import tensorflow.compat.v2 as tf
+from google.protobuf import text_format
+from object_detection import export_quantized_tflite_lib_tf2
+from object_detection.protos import pipeline_pb2
+
+tf.enable_v2_behavior()
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string(
+    'pipeline_config_path', None,
+    'Path to a pipeline_pb2.TrainEvalPipelineConfig config '
+    'file.')
+flags.DEFINE_string('trained_checkpoint_dir', None,
+                    'Path to trained checkpoint directory')
+flags.DEFINE_string('output_directory', None, 'Path to write outputs.')
+flags.DEFINE_string(
+    'config_override', '', 'pipeline_pb2.TrainEvalPipelineConfig '
+    'text proto to override pipeline_config_path.')
+flags.DEFINE_integer('max_detections', 10,
+                     'Maximum number of detections (boxes) to return.')
+flags.DEFINE_bool(
+    'ssd_use_regular_nms', False,
+    'Flag to set postprocessing op to use Regular NMS instead of Fast NMS '
+    '(Default false).')
+flags.DEFINE_list(
+    'modes', list(export_quantized_tflite_lib_tf2.QUANTIZATION_MODES),
+    'Comma separated quantization modes to export.')
+flags.DEFINE_string('train_record_path', None,
+                    'Training TFRecord (or glob) used as representative '
+                    'dataset for full_integer quantization.')
+flags.DEFINE_integer('num_calibration_samples', 100,
+                     'Number of representative images for calibration.')
+flags.DEFINE_string('eval_record_path', None,
+                    'Evaluation TFRecord. If set, every exported variant is '
+                    'evaluated.')
+flags.DEFINE_string('label_map_path', None,
+                    'Label map used for evaluation categories.')
+flags.DEFINE_integer('num_threads', None, 'TFLite interpreter threads.')
+flags.DEFINE_integer('max_eval_examples', None,
+                     'Optional cap on the number of evaluated images.')
+
+
+def main(argv):
+  del argv  # Unused.
+  flags.mark_flag_as_required('pipeline_config_path')
+  flags.mark_flag_as_required('trained_checkpoint_dir')
+  flags.mark_flag_as_required('output_directory')
+  # Check the arguments before the (slow) export.
+  export_quantized_tflite_lib_tf2.validate_modes(FLAGS.modes)
+  if FLAGS.eval_record_path and not FLAGS.label_map_path:
+    raise ValueError('--label_map_path is required for evaluation.')
+  if (export_quantized_tflite_lib_tf2.FULL_INTEGER in FLAGS.modes and
+      not FLAGS.train_record_path):
+    raise ValueError('--train_record_path is required for full_integer.')
+
+  pipeline_config = pipeline_pb2.TrainEvalPipelineConfig()
+  with tf.io.gfile.GFile(FLAGS.pipeline_config_path, 'r') as f:
+    text_format.Parse(f.read(), pipeline_config)
+  override_config = pipeline_pb2.TrainEvalPipelineConfig()
+  text_format.Parse(FLAGS.config_override, override_config)
+  pipeline_config.MergeFrom(override_config)
+
+  paths = export_quantized_tflite_lib_tf2.export_quantized_models(
+      pipeline_config, FLAGS.trained_checkpoint_dir, FLAGS.output_directory,
+      FLAGS.train_record_path, FLAGS.modes, FLAGS.num_calibration_samples,
+      FLAGS.max_detections, FLAGS.ssd_use_regular_nms)
+  for mode, path in paths.items():
+    print('{}: {}'.format(mode, path))
+
+  if FLAGS.eval_record_path:
+    results = {}
+    for mode, path in paths.items():
+      results[mode] = export_quantized_tflite_lib_tf2.evaluate_tflite_model(
+          path, pipeline_config, FLAGS.eval_record_path, FLAGS.label_map_path,
+          num_threads=FLAGS.num_threads,
+          max_examples=FLAGS.max_eval_examples)
+    print(export_quantized_tflite_lib_tf2.format_results_table(results))
+    with tf.io.gfile.GFile(
+        os.path.join(FLAGS.output_directory, 'quantization_report.json'),
+        'w') as f:
+      f.write(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,559 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Offline batch inference of an exported TF2 detection SavedModel.
+
+The input (TFRecords of tf.Examples and/or image folders) is split into work
+units: a TFRecord file, a contiguous byte range of records when there are
+fewer files than units, or a chunk of image files. Each unit only reads its own
+bytes, so splitting one large archive across workers does not multiply the
+I/O. Record offsets come from the RECORD.idx sidecar of
+scripts/record_index.py when it is up to date, otherwise from a scan of the
+12-byte record headers.
+Units are processed by a pool of worker processes, each holding one copy of
+the SavedModel and running a parallel tf.data pipeline (read, decode, resize,
+batch, prefetch) into batched inference. Every unit writes its own part file
+under the output directory, so nothing large is sent between processes and an
+interrupted run resumes with the missing parts:
+
+  part-NNNNN.parquet  one row per detected box (requires pyarrow).
+  part-NNNNN.jsonl    one line per image, {"filename", "detections": [{label,
+                      xmin, ymin, xmax, ymax, score}]} in pixels, the format
+                      read by visualize_annotations.py --predictions.
+  part-NNNNN.done     per-unit counts and the settings the unit was computed
+                      with, written after its part files.
+  manifest.json       model fingerprint, settings and per-unit counts,
+                      written when every unit is done.
+
+All files are written through a temporary name and renamed. A unit is only
+reused when its .done file matches the current SavedModel fingerprint, unit
+plan and score threshold, so re-scoring an archive after a model update
+redoes every unit. Part files of units that are not in the current plan are
+deleted.
+"""
+import concurrent.futures
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import re
+import struct
+import time
+
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+from object_detection.utils import label_map_util
+
+try:
+  import pyarrow as pa  # pylint: disable=g-import-not-at-top
+  import pyarrow.parquet as pq  # pylint: disable=g-import-not-at-top
+except ImportError:
+  pa = None
+  pq = None
+
+try:
+  from crc32c import crc32c as _crc32c  # pylint: disable=g-import-not-at-top
+except ImportError:
+  _crc32c = None
+
+PARQUET = 'parquet'
+JSONL = 'jsonl'
+OUTPUT_FORMATS = (PARQUET, JSONL)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+
+MANIFEST_NAME = 'manifest.json'
+_DONE = 'done'
+_PART_PATTERN = re.compile(r'^part-(\d{5})\.(\w+)(\.tmp)?$')
+
+_TFRECORD = 'tfrecord'
+_IMAGES = 'images'
+
+# TFRecord framing: uint64 length and uint32 masked CRC, data, uint32 CRC.
+_HEADER_SIZE = 12
+_FOOTER_SIZE = 4
+# First row of a record_index.py sidecar: (marker, record file size).
+_INDEX_MARKER = -1
+
+# Per-process state, set by _init_worker.
+_detect_fn = None
+_category_index = None
+
+
+def model_fingerprint(saved_model_dir):
+  """Returns a digest of the SavedModel graph and variable files."""
+  digest = hashlib.sha256()
+  for root, _, files in sorted(tf.io.gfile.walk(saved_model_dir)):
+    for name in sorted(files):
+      path = os.path.join(root, name)
+      stat = tf.io.gfile.stat(path)
+      digest.update('{}:{}:{}'.format(
+          os.path.relpath(path, saved_model_dir), stat.length,
+          stat.mtime_nsec).encode('utf8'))
+  return digest.hexdigest()[:16]
+
+
+def _masked_crc(data):
+  crc = _crc32c(data)
+  return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+
+def record_offsets(path):
+  """Returns the start offsets of the records of a TFRecord file.
+
+  Uses the sidecar index written by scripts/record_index.py when it was built
+  for the current file, otherwise reads the record headers.
+
+  Args:
+    path: A TFRecord file.
+
+  Returns:
+    An int64 array of the start offset of every record followed by the end
+    offset of the last one.
+  """
+  stat = tf.io.gfile.stat(path)
+  index_path = path + '.idx'
+  if tf.io.gfile.exists(index_path):
+    index_stat = tf.io.gfile.stat(index_path)
+    if index_stat.mtime_nsec >= stat.mtime_nsec:
+      with tf.io.gfile.GFile(index_path, 'rb') as f:
+        index = np.load(f)
+      if (index.ndim == 2 and index.shape[1] == 2 and len(index) and
+          tuple(index[0]) == (_INDEX_MARKER, stat.length)):
+        entries = index[1:]
+        end = (entries[-1, 0] + entries[-1, 1] + _HEADER_SIZE + _FOOTER_SIZE
+               if len(entries) else 0)
+        return np.append(entries[:, 0], end).astype(np.int64)
+
+  offsets = [0]
+  with tf.io.gfile.GFile(path, 'rb') as f:
+    while offsets[-1] + _HEADER_SIZE <= stat.length:
+      f.seek(offsets[-1])
+      length, = struct.unpack('<Q', f.read(8))
+      end = offsets[-1] + _HEADER_SIZE + length + _FOOTER_SIZE
+      if end > stat.length:
+        break
+      offsets.append(end)
+  return np.array(offsets, dtype=np.int64)
+
+
+def read_record_range(path, start, end):
+  """Yields the serialized records stored between two byte offsets.
+
+  CRCs are checked when the crc32c package is installed.
+
+  Raises:
+    tf.errors.DataLossError: on a truncated or corrupt record.
+  """
+  with tf.io.gfile.GFile(path, 'rb') as f:
+    f.seek(start)
+    offset = start
+    while offset < end:
+      header = f.read(_HEADER_SIZE)
+      if len(header) != _HEADER_SIZE:
+        raise tf.errors.DataLossError(
+            None, None, 'Truncated record in {} at {}'.format(path, offset))
+      length, length_crc = struct.unpack('<QI', header)
+      data = f.read(length)
+      footer = f.read(_FOOTER_SIZE)
+      if len(data) != length or len(footer) != _FOOTER_SIZE:
+        raise tf.errors.DataLossError(
+            None, None, 'Truncated record in {} at {}'.format(path, offset))
+      if _crc32c is not None and (
+          length_crc != _masked_crc(header[:8]) or
+          struct.unpack('<I', footer)[0] != _masked_crc(data)):
+        raise tf.errors.DataLossError(
+            None, None, 'Corrupt record in {} at {}'.format(path, offset))
+      offset += _HEADER_SIZE + length + _FOOTER_SIZE
+      yield data
+
+
+def plan_units(input_paths, num_workers, images_per_unit=256):
+  """Splits the inputs into work units.
+
+  Args:
+    input_paths: TFRecord paths/globs and image directories.
+    num_workers: Number of worker processes; when there are fewer TFRecord
+      files than two per worker, each file is split into byte ranges of
+      consecutive records so that there are at least two units per worker.
+    images_per_unit: Number of image files per unit.
+
+  Returns:
+    A list of (kind, source, start, end) tuples. For TFRecords, source is the
+    path and [start, end) the byte range of the unit's records, (0, None) for
+    the whole file. For images, source is a list of image paths and start, end
+    are unused.
+
+  Raises:
+    ValueError: if an input path matches nothing.
+  """
+  records, images = [], []
+  for input_path in input_paths:
+    if tf.io.gfile.isdir(input_path):
+      found = [os.path.join(input_path, name)
+               for name in sorted(tf.io.gfile.listdir(input_path))
+               if name.lower().endswith(IMAGE_EXTENSIONS)]
+      images.extend(found)
+    else:
+      found = sorted(tf.io.gfile.glob(input_path))
+      records.extend(found)
+    if not found:
+      raise ValueError('No input found for {}.'.format(input_path))
+
+  units = []
+  if records:
+    splits = max(1, int(math.ceil(2.0 * num_workers / len(records))))
+    for path in records:
+      if splits == 1:
+        units.append((_TFRECORD, path, 0, None))
+        continue
+      offsets = record_offsets(path).tolist()
+      bounds = np.linspace(0, len(offsets) - 1, splits + 1).round().astype(int)
+      units.extend((_TFRECORD, path, offsets[first], offsets[last])
+                   for first, last in zip(bounds[:-1], bounds[1:])
+                   if last > first)
+  for start in range(0, len(images), images_per_unit):
+    units.append((_IMAGES, images[start:start + images_per_unit], 0, 1))
+  return units
+
+
+def _decode(encoded, resize_to):
+  image = tf.io.decode_image(encoded, channels=3, expand_animations=False)
+  size = tf.shape(image)[:2]
+  if resize_to:
+    image = tf.cast(tf.image.resize(image, resize_to), tf.uint8)
+  return image, size
+
+
+def build_dataset(unit, batch_size, resize_to=None):
+  """Returns a dataset of (filenames, images, original sizes) batches.
+
+  Args:
+    unit: A work unit from `plan_units`.
+    batch_size: Images per inference call. Images of different sizes can
+      only be batched when `resize_to` is set.
+    resize_to: Optional (height, width). The exported models resize
+      internally, so resizing to the model input size here keeps the
+      results while allowing batches and shrinking the decoded images early.
+  """
+  kind, source, start, end = unit
+  if kind == _TFRECORD:
+    features = {
+        'image/encoded': tf.io.FixedLenFeature((), tf.string),
+        'image/filename': tf.io.FixedLenFeature((), tf.string, ''),
+        'image/source_id': tf.io.FixedLenFeature((), tf.string, ''),
+    }
+
+    def parse(serialized):
+      example = tf.io.parse_single_example(serialized, features)
+      filename = tf.where(tf.strings.length(example['image/filename']) > 0,
+                          example['image/filename'],
+                          example['image/source_id'])
+      return (filename,) + _decode(example['image/encoded'], resize_to)
+
+    if end is None:
+      dataset = tf.data.TFRecordDataset(source)
+    else:
+      dataset = tf.data.Dataset.from_generator(
+          lambda: read_record_range(source, start, end),
+          output_signature=tf.TensorSpec((), tf.string))
+    dataset = dataset.map(parse, num_parallel_calls=tf.data.AUTOTUNE)
+  else:
+    dataset = tf.data.Dataset.from_tensor_slices(source)
+    dataset = dataset.map(
+        lambda path: (path,) + _decode(tf.io.read_file(path), resize_to),
+        num_parallel_calls=tf.data.AUTOTUNE)
+  return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def detections_to_records(filenames, sizes, detections, category_index,
+                          min_score_thresh):
+  """Converts one batch of model outputs to per-image records.
+
+  Args:
+    filenames: [batch] array of bytes filenames.
+    sizes: [batch, 2] array of original (height, width).
+    detections: Dict of numpy model outputs with normalized boxes.
+    category_index: Dict of category id to {'id', 'name'}.
+    min_score_thresh: Detections below this score are dropped.
+
+  Returns:
+    A list of {'filename', 'width', 'height', 'detections'} dicts with pixel
+    box coordinates.
+  """
+  records = []
+  for i, filename in enumerate(filenames):
+    height, width = (int(value) for value in sizes[i])
+    num = int(detections['num_detections'][i])
+    scores = detections['detection_scores'][i][:num]
+    keep = scores >= min_score_thresh
+    boxes = detections['detection_boxes'][i][:num][keep]
+    classes = detections['detection_classes'][i][:num][keep].astype(np.int64)
+    boxes = boxes * np.array([height, width, height, width], np.float32)
+    boxes = np.round(boxes, 1)
+    records.append({
+        'filename': os.path.basename(filename.decode('utf8')),
+        'width': width,
+        'height': height,
+        'detections': [{
+            'label': category_index.get(class_id, {}).get(
+                'name', str(class_id)),
+            'class_id': int(class_id),
+            'xmin': float(box[1]),
+            'ymin': float(box[0]),
+            'xmax': float(box[3]),
+            'ymax': float(box[2]),
+            'score': round(float(score), 4),
+        } for class_id, box, score in zip(classes, boxes, scores[keep])],
+    })
+  return records
+
+
+def write_jsonl(path, records):
+  with tf.io.gfile.GFile(path + '.tmp', 'w') as f:
+    for record in records:
+      f.write(json.dumps({'filename': record['filename'],
+                          'detections': record['detections']}) + '\n')
+  tf.io.gfile.rename(path + '.tmp', path, overwrite=True)
+
+
+def write_parquet(path, records, source):
+  """Writes one row per detected box."""
+  rows = [(record, detection) for record in records
+          for detection in record['detections']]
+  columns = {
+      'filename': [record['filename'] for record, _ in rows],
+      'source': [source] * len(rows),
+      'image_width': np.array([r['width'] for r, _ in rows], np.int32),
+      'image_height': np.array([r['height'] for r, _ in rows], np.int32),
+      'label': [d['label'] for _, d in rows],
+      'class_id': np.array([d['class_id'] for _, d in rows], np.int32),
+      'score': np.array([d['score'] for _, d in rows], np.float32),
+  }
+  for key in ('xmin', 'ymin', 'xmax', 'ymax'):
+    columns[key] = np.array([d[key] for _, d in rows], np.float32)
+  pq.write_table(pa.table(columns), path + '.tmp')
+  tf.io.gfile.rename(path + '.tmp', path, overwrite=True)
+
+
+def _part_paths(output_dir, unit_id, output_formats):
+  return {output_format: os.path.join(
+      output_dir, 'part-{:05d}.{}'.format(unit_id, output_format))
+          for output_format in output_formats}
+
+
+def _write_json(path, value, indent=None):
+  with tf.io.gfile.GFile(path + '.tmp', 'w') as f:
+    f.write(json.dumps(value, indent=indent))
+  tf.io.gfile.rename(path + '.tmp', path, overwrite=True)
+
+
+def _read_done(path):
+  try:
+    with tf.io.gfile.GFile(path) as f:
+      return json.load(f)
+  except (tf.errors.NotFoundError, ValueError):
+    return None
+
+
+def _remove_stale_parts(output_dir, num_units, output_formats):
+  """Deletes part files of units outside the plan or of unused formats."""
+  for name in tf.io.gfile.listdir(output_dir):
+    match = _PART_PATTERN.match(name)
+    if not match:
+      continue
+    unit_id, extension, tmp = int(match.group(1)), match.group(2), match.group(3)
+    if (tmp or unit_id >= num_units or
+        extension not in output_formats + (_DONE,)):
+      tf.io.gfile.remove(os.path.join(output_dir, name))
+
+
+def _init_worker(saved_model_dir, label_map_path, num_threads):
+  global _detect_fn, _category_index
+  if num_threads:
+    tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+  _detect_fn = tf.saved_model.load(saved_model_dir)
+  _category_index = (
+      label_map_util.create_category_index_from_labelmap(label_map_path)
+      if label_map_path else {})
+
+
+def run_unit(task):
+  """Runs inference over one unit and writes its part files.
+
+  The unit's .done file is written last, so a unit interrupted while writing
+  is recomputed by the next run.
+
+  Args:
+    task: (unit_id, unit, output_dir, output_formats, batch_size, resize_to,
+      min_score_thresh, settings), where settings identify the model and plan
+      and are stored in the .done file.
+
+  Returns:
+    A dict with the unit id, source, image and box counts and seconds.
+  """
+  (unit_id, unit, output_dir, output_formats, batch_size, resize_to,
+   min_score_thresh, settings) = task
+  start = time.time()
+  records = []
+  for filenames, images, sizes in build_dataset(unit, batch_size, resize_to):
+    detections = _detect_fn(images)
+    detections = {key: value.numpy() for key, value in detections.items()}
+    records.extend(detections_to_records(
+        filenames.numpy(), sizes.numpy(), detections, _category_index,
+        min_score_thresh))
+
+  source = unit[1] if unit[0] == _TFRECORD else os.path.dirname(unit[1][0])
+  paths = _part_paths(output_dir, unit_id, output_formats)
+  if JSONL in paths:
+    write_jsonl(paths[JSONL], records)
+  if PARQUET in paths:
+    write_parquet(paths[PARQUET], records, source)
+  result = {
+      'unit': unit_id,
+      'source': source,
+      'images': len(records),
+      'boxes': sum(len(record['detections']) for record in records),
+      'seconds': round(time.time() - start, 3),
+  }
+  _write_json(_part_paths(output_dir, unit_id, (_DONE,))[_DONE],
+              dict(result, settings=settings))
+  return result
+
+
+def run_inference(saved_model_dir, input_paths, output_dir,
+                  label_map_path=None, output_formats=(PARQUET,),
+                  num_workers=None, batch_size=8, resize_to=None,
+                  min_score_thresh=0.05, images_per_unit=256,
+                  overwrite=False):
+  """Runs batched inference over all inputs with a pool of processes.
+
+  Args:
+    saved_model_dir: SavedModel exported with the image_tensor input type.
+    input_paths: TFRecord paths/globs and image directories.
+    output_dir: Directory for the part files and the manifest.
+    label_map_path: Optional label map used to name the classes.
+    output_formats: Subset of OUTPUT_FORMATS.
+    num_workers: Worker processes; defaults to one per 4 cores.
+    batch_size: Images per inference call.
+    resize_to: Optional (height, width); required when batch_size > 1 and
+      the images differ in size.
+    min_score_thresh: Detections below this score are not written.
+    images_per_unit: Number of image files per work unit.
+    overwrite: Recompute units whose part files already exist.
+
+  Returns:
+    The manifest dict.
+
+  Raises:
+    ValueError: on an unknown output format, or Parquet without pyarrow.
+  """
+  output_formats = tuple(output_formats)
+  unknown = set(output_formats) - set(OUTPUT_FORMATS)
+  if unknown or not output_formats:
+    raise ValueError('Output formats must be in {}, got {}.'.format(
+        OUTPUT_FORMATS, output_formats))
+  if PARQUET in output_formats and pq is None:
+    raise ValueError('Parquet output requires pyarrow; use --output_formats '
+                     'jsonl or install pyarrow.')
+  cores = os.cpu_count() or 1
+  num_workers = num_workers or max(1, cores // 4)
+  tf.io.gfile.makedirs(output_dir)
+
+  fingerprint = model_fingerprint(saved_model_dir)
+  manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+  units = plan_units(input_paths, num_workers, images_per_unit)
+  plan = hashlib.sha256(repr(units).encode('utf8')).hexdigest()[:16]
+  settings = {
+      'model_fingerprint': fingerprint,
+      'plan_fingerprint': plan,
+      'min_score_thresh': min_score_thresh,
+  }
+  _remove_stale_parts(output_dir, len(units), output_formats)
+  if tf.io.gfile.exists(manifest_path):
+    tf.io.gfile.remove(manifest_path)
+
+  done = {}
+  tasks = []
+  for unit_id, unit in enumerate(units):
+    paths = _part_paths(output_dir, unit_id, output_formats + (_DONE,))
+    entry = None if overwrite else _read_done(paths[_DONE])
+    if (entry is not None and entry.pop('settings', None) == settings and
+        all(tf.io.gfile.exists(path) for path in paths.values())):
+      done[unit_id] = entry
+      continue
+    tasks.append((unit_id, unit, output_dir, output_formats, batch_size,
+                  resize_to, min_score_thresh, settings))
+
+  start = time.time()
+  stats = dict(done)
+  if tasks:
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(num_workers, len(tasks)), mp_context=context,
+        initializer=_init_worker,
+        initargs=(saved_model_dir, label_map_path,
+                  max(1, cores // num_workers))) as executor:
+      for result in executor.map(run_unit, tasks):
+        stats[result['unit']] = result
+        tf.get_logger().info('unit %d: %d images, %d boxes in %.1fs',
+                             result['unit'], result['images'],
+                             result['boxes'], result['seconds'])
+  seconds = time.time() - start
+
+  unit_stats = [stats[unit_id] for unit_id in sorted(stats)]
+  num_images = sum(entry['images'] for entry in unit_stats)
+  manifest = {
+      'saved_model_dir': saved_model_dir,
+      'model_fingerprint': fingerprint,
+      'plan_fingerprint': plan,
+      'inputs': list(input_paths),
+      'output_formats': list(output_formats),
+      'min_score_thresh': min_score_thresh,
+      'images': num_images,
+      'boxes': sum(entry['boxes'] for entry in unit_stats),
+      'recomputed_units': len(tasks),
+      'seconds': round(seconds, 3),
+      'images_per_second': round(
+          sum(stats[task[0]]['images'] for task in tasks) / max(seconds, 1e-9),
+          2),
+      'units': unit_stats,
+  }
+  _write_json(manifest_path, manifest, indent=2)
+  return manifest
+
+
+def read_jsonl_parts(output_dir):
+  """Yields the per-image records of the JSONL parts listed in the manifest.
+
+  Raises:
+    ValueError: if the run has not completed or did not write JSONL.
+  """
+  manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+  if not tf.io.gfile.exists(manifest_path):
+    raise ValueError('No {} in {}; the run has not completed.'.format(
+        MANIFEST_NAME, output_dir))
+  with tf.io.gfile.GFile(manifest_path) as f:
+    manifest = json.load(f)
+  if JSONL not in manifest['output_formats']:
+    raise ValueError('{} has no JSONL parts.'.format(output_dir))
+  for entry in manifest['units']:
+    path = _part_paths(output_dir, entry['unit'], (JSONL,))[JSONL]
+    with tf.io.gfile.GFile(path) as f:
+      for line in f:
+        if line.strip():
+          yield json.loads(line)
@@ -0,0 +1,189 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for batch_inference_lib_tf2."""
+import os
+import unittest
+
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+from object_detection.inference import batch_inference_lib_tf2 as lib
+from object_detection.utils import dataset_util
+from object_detection.utils import tf_version
+
+
+def _encoded_jpeg(height, width):
+  image = np.zeros((height, width, 3), dtype=np.uint8)
+  return tf.io.encode_jpeg(tf.constant(image)).numpy()
+
+
+def _write_records(path, records):
+  with tf.io.TFRecordWriter(path) as writer:
+    for record in records:
+      writer.write(record)
+
+
+@unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
+class BatchInferenceTest(tf.test.TestCase):
+
+  def test_plan_units_splits_records_and_chunks_images(self):
+    record_path = os.path.join(self.get_temp_dir(), 'test.record')
+    records = [b'x' * (i + 1) for i in range(5)]
+    _write_records(record_path, records)
+    image_dir = os.path.join(self.get_temp_dir(), 'images')
+    os.makedirs(image_dir)
+    for i in range(5):
+      with open(os.path.join(image_dir, '{}.jpg'.format(i)), 'wb') as f:
+        f.write(_encoded_jpeg(4, 4))
+    with open(os.path.join(image_dir, 'notes.txt'), 'w') as f:
+      f.write('not an image')
+
+    units = lib.plan_units([record_path, image_dir], num_workers=2,
+                           images_per_unit=2)
+    self.assertEqual([unit[0] for unit in units],
+                     ['tfrecord'] * 4 + ['images'] * 3)
+    # Contiguous byte ranges covering the file, so no record is read twice.
+    ranges = [unit[2:] for unit in units[:4]]
+    self.assertEqual(ranges[0][0], 0)
+    self.assertEqual(ranges[-1][1], os.path.getsize(record_path))
+    for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]):
+      self.assertEqual(end, start)
+    read = [record for start, end in ranges
+            for record in lib.read_record_range(record_path, start, end)]
+    self.assertEqual(read, records)
+    self.assertLen(units[-1][1], 1)
+
+    # With enough files per worker, every file is a single unit.
+    units = lib.plan_units([record_path], num_workers=0)
+    self.assertEqual(units, [('tfrecord', record_path, 0, None)])
+    with self.assertRaises(ValueError):
+      lib.plan_units([os.path.join(self.get_temp_dir(), 'missing-*')], 1)
+
+  def test_record_offsets_uses_up_to_date_sidecar(self):
+    record_path = os.path.join(self.get_temp_dir(), 'indexed.record')
+    _write_records(record_path, [b'a', b'bcd'])
+    offsets = lib.record_offsets(record_path)
+    self.assertAllEqual(offsets, [0, 17, 36])
+
+    # The sidecar of scripts/record_index.py: (-1, file size), then
+    # (offset, length) per record.
+    with open(record_path + '.idx', 'wb') as f:
+      np.save(f, np.array([[-1, 36], [0, 1]], dtype=np.int64))
+    self.assertAllEqual(lib.record_offsets(record_path), [0, 17])
+    with open(record_path + '.idx', 'wb') as f:
+      np.save(f, np.array([[-1, 35], [0, 1]], dtype=np.int64))
+    self.assertAllEqual(lib.record_offsets(record_path), offsets)
+
+  def test_read_record_range_rejects_truncated_records(self):
+    record_path = os.path.join(self.get_temp_dir(), 'truncated.record')
+    _write_records(record_path, [b'abc', b'defg'])
+    with open(record_path, 'rb') as f:
+      data = f.read()
+    with open(record_path, 'wb') as f:
+      f.write(data[:-3])
+    with self.assertRaises(tf.errors.DataLossError):
+      list(lib.read_record_range(record_path, 0, len(data)))
+    self.assertAllEqual(lib.record_offsets(record_path), [0, 19])
+
+  def test_build_dataset_reads_filenames_and_sizes(self):
+    record_path = os.path.join(self.get_temp_dir(), 'test.record')
+    with tf.io.TFRecordWriter(record_path) as writer:
+      for i, (height, width) in enumerate([(8, 6), (4, 10), (6, 6)]):
+        example = tf.train.Example(features=tf.train.Features(feature={
+            'image/encoded': dataset_util.bytes_feature(
+                _encoded_jpeg(height, width)),
+            'image/filename': dataset_util.bytes_feature(
+                'invoice_{}.jpg'.format(i).encode('utf8')),
+        }))
+        writer.write(example.SerializeToString())
+
+    unit = ('tfrecord', record_path, 0, None)
+    batches = list(lib.build_dataset(unit, batch_size=2, resize_to=(5, 5)))
+    self.assertLen(batches, 2)
+    filenames, images, sizes = batches[0]
+    self.assertAllEqual(filenames, [b'invoice_0.jpg', b'invoice_1.jpg'])
+    self.assertEqual(images.shape, (2, 5, 5, 3))
+    self.assertEqual(images.dtype, tf.uint8)
+    self.assertAllEqual(sizes, [[8, 6], [4, 10]])
+
+    offsets = lib.record_offsets(record_path)
+    unit = ('tfrecord', record_path, int(offsets[1]), int(offsets[3]))
+    batches = list(lib.build_dataset(unit, batch_size=2, resize_to=(5, 5)))
+    self.assertLen(batches, 1)
+    self.assertAllEqual(batches[0][0], [b'invoice_1.jpg', b'invoice_2.jpg'])
+    self.assertAllEqual(batches[0][2], [[4, 10], [6, 6]])
+
+  def test_detections_to_records(self):
+    detections = {
+        'num_detections': np.array([2.0]),
+        'detection_boxes': np.array([[[0.1, 0.2, 0.5, 0.6],
+                                      [0.0, 0.0, 1.0, 1.0]]], np.float32),
+        'detection_scores': np.array([[0.9, 0.01]], np.float32),
+        'detection_classes': np.array([[3.0, 1.0]], np.float32),
+    }
+    category_index = {3: {'id': 3, 'name': 'Total'}}
+    records = lib.detections_to_records(
+        [b'/archive/invoice.jpg'], np.array([[100, 200]]), detections,
+        category_index, min_score_thresh=0.05)
+    self.assertEqual(records, [{
+        'filename': 'invoice.jpg',
+        'width': 200,
+        'height': 100,
+        'detections': [{'label': 'Total', 'class_id': 3, 'xmin': 40.0,
+                        'ymin': 10.0, 'xmax': 120.0, 'ymax': 50.0,
+                        'score': 0.9}],
+    }])
+
+  def test_jsonl_parts_round_trip(self):
+    output_dir = self.get_temp_dir()
+    with self.assertRaises(ValueError):
+      list(lib.read_jsonl_parts(output_dir))
+    for unit_id in range(3):
+      records = [{'filename': '{}.jpg'.format(unit_id), 'width': 10,
+                  'height': 10, 'detections': []}]
+      lib.write_jsonl(
+          os.path.join(output_dir, 'part-{:05d}.jsonl'.format(unit_id)),
+          records)
+    # Part 2 is left over from an earlier run and not in the manifest.
+    lib._write_json(os.path.join(output_dir, lib.MANIFEST_NAME), {
+        'output_formats': [lib.JSONL],
+        'units': [{'unit': 0}, {'unit': 1}],
+    })
+    self.assertEqual(list(lib.read_jsonl_parts(output_dir)),
+                     [{'filename': '0.jpg', 'detections': []},
+                      {'filename': '1.jpg', 'detections': []}])
+
+  def test_remove_stale_parts(self):
+    output_dir = self.get_temp_dir()
+    names = ['part-00000.jsonl', 'part-00000.parquet', 'part-00000.done',
+             'part-00001.jsonl.tmp', 'part-00002.jsonl', 'part-00002.done',
+             'manifest.json', 'notes.txt']
+    for name in names:
+      with open(os.path.join(output_dir, name), 'w') as f:
+        f.write('')
+    lib._remove_stale_parts(output_dir, num_units=2,
+                            output_formats=(lib.JSONL,))
+    self.assertCountEqual(
+        os.listdir(output_dir),
+        ['part-00000.jsonl', 'part-00000.done', 'manifest.json', 'notes.txt'])
+
+  def test_run_inference_rejects_unknown_format(self):
+    with self.assertRaises(ValueError):
+      lib.run_inference('unused', ['unused'], self.get_temp_dir(),
+                        output_formats=('csv',))
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,97 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Runs a TF2 SavedModel detector offline over TFRecords or image folders.
+
+TF2 counterpart of infer_detections.py. Instead of copying every tf.Example
+with its detections into a new TFRecord, the detections are written as
+columnar part files (Parquet, one row per box, and/or JSON Lines, one line
+per image) by a pool of worker processes. See batch_inference_lib_tf2.py.
+
+Example usage:
+  python object_detection/inference/infer_detections_tf2.py \
+    --saved_model_dir=exported-models/my_model/saved_model \
+    --input_paths=annotations/train.record,images/archive \
+    --output_dir=detections/my_model \
+    --label_map_path=annotations/label_map.pbtxt \
+    --output_formats=parquet,jsonl \
+    --resize_to=640,640 --batch_size=8 --num_workers=4
+"""
+from absl import app
+from absl import flags
+
+import tensorflow.compat.v2 as tf
+from object_detection.inference import batch_inference_lib_tf2
+
+tf.enable_v2_behavior()
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string('saved_model_dir', None,
+                    'SavedModel exported with the image_tensor input type.')
+flags.DEFINE_list('input_paths', None,
+                  'Comma separated TFRecord paths/globs and image folders.')
+flags.DEFINE_string('output_dir', None,
+                    'Directory for the part files and manifest.json.')
+flags.DEFINE_string('label_map_path', None,
+                    'Optional label map used to name the classes.')
+flags.DEFINE_list('output_formats', [batch_inference_lib_tf2.PARQUET],
+                  'Any of parquet, jsonl.')
+flags.DEFINE_integer('num_workers', None, 'Worker processes. Defaults to one '
+                     'per 4 cores; the cores are split between workers.')
+flags.DEFINE_integer('batch_size', 8, 'Images per inference call.')
+flags.DEFINE_list('resize_to', None, 'height,width the images are resized to '
+                  'before batching; required for batch_size > 1 when image '
+                  'sizes differ. Use the model input size.')
+flags.DEFINE_float('min_score_thresh', 0.05,
+                   'Detections below this score are not written.')
+flags.DEFINE_integer('images_per_unit', 256,
+                     'Image files per work unit (image folders only).')
+flags.DEFINE_bool('overwrite', False,
+                  'Recompute part files left by a previous run.')
+
+
+def main(argv):
+  del argv  # Unused.
+  flags.mark_flag_as_required('saved_model_dir')
+  flags.mark_flag_as_required('input_paths')
+  flags.mark_flag_as_required('output_dir')
+  resize_to = None
+  if FLAGS.resize_to:
+    if len(FLAGS.resize_to) != 2:
+      raise ValueError('--resize_to expects height,width.')
+    resize_to = tuple(int(value) for value in FLAGS.resize_to)
+  elif FLAGS.batch_size > 1:
+    tf.get_logger().warning('Batching without --resize_to only works when '
+                            'all images have the same size.')
+
+  manifest = batch_inference_lib_tf2.run_inference(
+      FLAGS.saved_model_dir, FLAGS.input_paths, FLAGS.output_dir,
+      label_map_path=FLAGS.label_map_path,
+      output_formats=FLAGS.output_formats,
+      num_workers=FLAGS.num_workers,
+      batch_size=FLAGS.batch_size,
+      resize_to=resize_to,
+      min_score_thresh=FLAGS.min_score_thresh,
+      images_per_unit=FLAGS.images_per_unit,
+      overwrite=FLAGS.overwrite)
+  print('{} images, {} boxes, {} of {} units recomputed in {:.1f}s '
+        '({} images/s)'.format(
+            manifest['images'], manifest['boxes'],
+            manifest['recomputed_units'], len(manifest['units']),
+            manifest['seconds'], manifest['images_per_second']))
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -773,7 +773,8 @@ def create_train_input_fn(train_config, train_input_config,
 
 
 def train_input(train_config, train_input_config,
-                model_config, model=None, params=None, input_context=None):
+                model_config, model=None, params=None, input_context=None,
+                pipeline_options=None):
   """Returns `features` and `labels` tensor dictionaries for training.
 
   Args:
@@ -786,6 +787,8 @@ def train_input(train_config, train_input_config,
     input_context: optional, A tf.distribute.InputContext object used to
       shard filenames and compute per-replica batch_size when this function
       is being called per-replica.
+    pipeline_options: optional, a dataset_builder.InputPipelineOptions with
+      caching and threading settings for the input pipeline.
 
   Returns:
     A tf.data.Dataset that holds (features, labels) tuple.
@@ -910,7 +913,8 @@ def train_input(train_config, train_input_config,
       transform_input_data_fn=transform_and_pad_input_data_fn,
       batch_size=params['batch_size'] if params else train_config.batch_size,
       input_context=input_context,
-      reduce_to_frame_fn=reduce_to_frame_fn)
+      reduce_to_frame_fn=reduce_to_frame_fn,
+      pipeline_options=pipeline_options)
   return dataset
 
 
@@ -43,8 +43,10 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+from collections import namedtuple
 from collections import OrderedDict
 import copy
+import json
 import time
 import numpy as np
 
@@ -141,6 +143,42 @@ class COCOWrapper(coco.COCO):
     results.createIndex()
     return results
 
+  def LoadDetectionColumns(self, columns):
+    """Loads DetectionColumns into a COCO datastructure, without JSON.
+
+    Equivalent to LoadAnnotations on the list ExportDetectionsToCOCO returns
+    for the same detections, but the annotation fields (including area, id
+    and iscrowd) are computed on whole arrays.
+
+    Args:
+      columns: a DetectionColumns tuple, see ExportDetectionsToColumns.
+
+    Returns:
+      a coco.COCO datastructure holding object detection annotations results
+
+    Raises:
+      ValueError: if the wrapper does not hold bbox annotations.
+      ValueError: if columns do not correspond to the images contained
+        in self.
+    """
+    if self._detection_type != 'bbox':
+      raise ValueError('LoadDetectionColumns only supports bbox detections.')
+    image_ids = columns.image_ids.tolist()
+    if not set(image_ids) <= set(self.getImgIds()):
+      raise ValueError('Results do not correspond to current coco set')
+    results = coco.COCO()
+    results.dataset['images'] = [img for img in self.dataset['images']]
+    results.dataset['categories'] = copy.deepcopy(self.dataset['categories'])
+    boxes = columns.boxes
+    results.dataset['annotations'] = [
+        {'image_id': image_id, 'category_id': category_id, 'bbox': bbox,
+         'score': score, 'area': area, 'id': idx + 1, 'iscrowd': 0}
+        for idx, (image_id, category_id, bbox, score, area) in enumerate(zip(
+            image_ids, columns.category_ids.tolist(), boxes.tolist(),
+            columns.scores.tolist(), (boxes[:, 2] * boxes[:, 3]).tolist()))]
+    results.createIndex()
+    return results
+
 
 COCO_METRIC_NAMES_AND_INDEX = (
     ('Precision/mAP', 0),
@@ -373,6 +411,22 @@ def _ConvertBoxToCOCOFormat(box):
           float(box[2] - box[0])]
 
 
+def _ConvertBoxesToCOCOFormat(boxes):
+  """Vectorized _ConvertBoxToCOCOFormat.
+
+  Args:
+    boxes: a [N, 4] numpy array of [ymin, xmin, ymax, xmax] boxes.
+
+  Returns:
+    a [N, 4] float64 numpy array of [xmin, ymin, width, height] boxes. The
+    widths and heights are computed in the dtype of `boxes`, as in
+    _ConvertBoxToCOCOFormat.
+  """
+  boxes = np.reshape(boxes, [-1, 4])
+  return np.stack([boxes[:, 1], boxes[:, 0], boxes[:, 3] - boxes[:, 1],
+                   boxes[:, 2] - boxes[:, 0]], axis=1).astype(np.float64)
+
+
 def _RleCompress(masks):
   """Compresses mask using Run-length encoding provided by pycocotools.
 
@@ -646,35 +700,29 @@ def ExportSingleImageDetectionBoxesToCoco(image_id,
                          detection_classes.shape[0], detection_boxes.shape[0],
                          detection_scores.shape[0]
                      ))
-  detections_list = []
-  for i in range(num_boxes):
-    if detection_classes[i] in category_id_set:
-      export_dict = {
-          'image_id':
-              image_id,
-          'category_id':
-              int(detection_classes[i]),
-          'bbox':
-              list(_ConvertBoxToCOCOFormat(detection_boxes[i, :])),
-          'score':
-              float(detection_scores[i]),
-      }
-      if detection_keypoints is not None:
-        keypoints = detection_keypoints[i]
-        num_keypoints = keypoints.shape[0]
-        if detection_keypoint_visibilities is None:
-          detection_keypoint_visibilities = np.full((num_boxes, num_keypoints),
-                                                    2)
-        visibilities = np.reshape(detection_keypoint_visibilities[i], [-1])
-        coco_keypoints = []
-        for keypoint, visibility in zip(keypoints, visibilities):
-          # Convert from [y, x] to [x, y] as mandated by COCO.
-          coco_keypoints.append(float(keypoint[1]))
-          coco_keypoints.append(float(keypoint[0]))
-          coco_keypoints.append(int(visibility))
-        export_dict['keypoints'] = coco_keypoints
-        export_dict['num_keypoints'] = num_keypoints
-      detections_list.append(export_dict)
+  keep = np.flatnonzero(np.isin(detection_classes, list(category_id_set)))
+  detections_list = [
+      {'image_id': image_id, 'category_id': category_id, 'bbox': bbox,
+       'score': score}
+      for category_id, bbox, score in zip(
+          detection_classes[keep].astype(np.int64).tolist(),
+          _ConvertBoxesToCOCOFormat(detection_boxes[keep]).tolist(),
+          detection_scores[keep].astype(np.float64).tolist())]
+  if detection_keypoints is not None:
+    num_keypoints = detection_keypoints.shape[1]
+    if detection_keypoint_visibilities is None:
+      detection_keypoint_visibilities = np.full((num_boxes, num_keypoints), 2)
+    for i, export_dict in zip(keep, detections_list):
+      keypoints = detection_keypoints[i]
+      visibilities = np.reshape(detection_keypoint_visibilities[i], [-1])
+      coco_keypoints = []
+      for keypoint, visibility in zip(keypoints, visibilities):
+        # Convert from [y, x] to [x, y] as mandated by COCO.
+        coco_keypoints.append(float(keypoint[1]))
+        coco_keypoints.append(float(keypoint[0]))
+        coco_keypoints.append(int(visibility))
+      export_dict['keypoints'] = coco_keypoints
+      export_dict['num_keypoints'] = num_keypoints
 
   return detections_list
 
@@ -801,6 +849,127 @@ def ExportDetectionsToCOCO(image_ids,
   return detections_export_list
 
 
+DetectionColumns = namedtuple(
+    'DetectionColumns', ['image_ids', 'category_ids', 'boxes', 'scores'])
+DetectionColumns.__doc__ = """Detections of many images as parallel arrays.
+
+Attributes:
+  image_ids: object numpy array [N] with the image id of every detection.
+  category_ids: int64 numpy array [N].
+  boxes: float64 numpy array [N, 4] of [xmin, ymin, width, height] boxes.
+  scores: float64 numpy array [N].
+"""
+
+
+def ExportDetectionsToColumns(image_ids,
+                              detection_boxes,
+                              detection_scores,
+                              detection_classes,
+                              categories):
+  """Columnar counterpart of ExportDetectionsToCOCO.
+
+  Converts the detections of all images at once instead of building one
+  dictionary per box. The result can be written with
+  WriteDetectionColumnsToJson or evaluated directly through
+  COCOWrapper.LoadDetectionColumns.
+
+  Args:
+    image_ids: a list of unique image identifier either of type integer or
+      string.
+    detection_boxes: list of numpy arrays with shape [num_detection_boxes, 4]
+    detection_scores: list of numpy arrays (float) with shape
+      [num_detection_boxes].
+    detection_classes: list of numpy arrays (int) with shape
+      [num_detection_boxes].
+    categories: a list of dictionaries representing all possible categories.
+      Each dict in this list must have an integer 'id' key uniquely identifying
+      this category. Detections of other classes are dropped.
+
+  Returns:
+    a DetectionColumns tuple holding the same detections, in the same order,
+    as the list ExportDetectionsToCOCO returns.
+
+  Raises:
+    ValueError: if the input lists do not have the same length, or the
+      boxes, scores and classes of an image do not agree on their number.
+  """
+  if not (len(image_ids) == len(detection_boxes) == len(detection_scores) ==
+          len(detection_classes)):
+    raise ValueError('Input lists must have the same length')
+  counts = [np.shape(classes)[0] for classes in detection_classes]
+  for count, boxes, scores in zip(counts, detection_boxes, detection_scores):
+    if not count == np.shape(boxes)[0] == np.shape(scores)[0]:
+      raise ValueError('Corresponding entries in detection_classes, '
+                       'detection_scores and detection_boxes should have '
+                       'compatible shapes (i.e., agree on the 0th dimension).')
+  if not image_ids:
+    return DetectionColumns(np.zeros(0, dtype=object),
+                            np.zeros(0, dtype=np.int64),
+                            np.zeros((0, 4)), np.zeros(0))
+  classes = np.concatenate([np.reshape(c, [-1]) for c in detection_classes])
+  keep = np.isin(classes, [cat['id'] for cat in categories])
+  image_id_array = np.empty(len(image_ids), dtype=object)
+  image_id_array[:] = image_ids
+  # Boxes are converted per image so the widths and heights are computed in
+  # the input dtype, as in ExportSingleImageDetectionBoxesToCoco.
+  boxes = np.concatenate([_ConvertBoxesToCOCOFormat(b)
+                          for b in detection_boxes])
+  scores = np.concatenate([np.reshape(s, [-1]).astype(np.float64)
+                           for s in detection_scores])
+  return DetectionColumns(
+      image_ids=np.repeat(image_id_array, counts)[keep],
+      category_ids=classes[keep].astype(np.int64),
+      boxes=boxes[keep],
+      scores=scores[keep])
+
+
+def WriteDetectionColumnsToJson(columns, output_path, float_digits=4,
+                                chunk_size=10000):
+  """Writes DetectionColumns as a COCO results JSON file.
+
+  The file is encoded and written chunk by chunk, so neither the annotation
+  dictionaries nor the whole JSON string are ever held in memory. It loads to
+  the same list as the file ExportDetectionsToCOCO writes, except that values
+  json.dumps would print in exponent notation are rounded as well.
+
+  Args:
+    columns: a DetectionColumns tuple.
+    output_path: path of the JSON file.
+    float_digits: digits of precision of the boxes and scores; -1 writes the
+      shortest exact representation.
+    chunk_size: number of detections encoded per write.
+  """
+  if float_digits > -1:
+    float_format = '{:.%df}' % float_digits
+  else:
+    float_format = '{!r}'
+  row_format = ('{{"image_id": {}, "category_id": {}, "bbox": [' +
+                ', '.join([float_format] * 4) + '], "score": ' +
+                float_format + '}}')
+  encoded_ids = {}
+
+  def EncodeId(image_id):
+    if image_id not in encoded_ids:
+      encoded_ids[image_id] = json.dumps(
+          image_id.item() if isinstance(image_id, np.generic) else image_id)
+    return encoded_ids[image_id]
+
+  num_detections = len(columns.scores)
+  with tf.gfile.GFile(output_path, 'w') as fid:
+    fid.write('[')
+    for start in range(0, num_detections, chunk_size):
+      end = min(start + chunk_size, num_detections)
+      rows = [row_format.format(EncodeId(image_id), category_id, *bbox_score)
+              for image_id, category_id, bbox_score in zip(
+                  columns.image_ids[start:end].tolist(),
+                  columns.category_ids[start:end].tolist(),
+                  np.concatenate([columns.boxes[start:end],
+                                  columns.scores[start:end, np.newaxis]],
+                                 axis=1).tolist())]
+      fid.write((',\n' if start else '\n') + ',\n'.join(rows))
+    fid.write('\n]\n')
+
+
 def ExportSegmentsToCOCO(image_ids,
                          detection_masks,
                          detection_scores,
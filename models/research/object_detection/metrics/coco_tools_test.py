@@ -128,6 +128,58 @@ class CocoToolsTest(tf.test.TestCase):
       written_result = json.loads(written_result)
       self.assertAlmostEqual(result, written_result)
 
+  def testExportDetectionsToColumns(self):
+    image_ids = ['first', 'second', 'third']
+    detections_boxes = [np.array([[100, 100, 200, 200]], float),
+                        np.array([[50, 50, 100, 100], [0, 0, 10, 10]], float),
+                        np.zeros((0, 4), float)]
+    detections_scores = [np.array([.8], float), np.array([.7, .6], float),
+                         np.zeros(0, float)]
+    detections_classes = [np.array([1], np.int32), np.array([1, 5], np.int32),
+                          np.zeros(0, np.int32)]
+    categories = [{'id': 0, 'name': 'person'},
+                  {'id': 1, 'name': 'cat'},
+                  {'id': 2, 'name': 'dog'}]
+    columns = coco_tools.ExportDetectionsToColumns(
+        image_ids, detections_boxes, detections_scores, detections_classes,
+        categories)
+    self.assertListEqual(columns.image_ids.tolist(), ['first', 'second'])
+    self.assertAllEqual(columns.category_ids, [1, 1])
+    self.assertAllClose(columns.boxes, [[100., 100., 100., 100.],
+                                        [50., 50., 50., 50.]])
+    self.assertAllClose(columns.scores, [.8, .7])
+
+    output_path = os.path.join(tf.test.get_temp_dir(), 'columns.json')
+    coco_tools.WriteDetectionColumnsToJson(columns, output_path, chunk_size=1)
+    with tf.gfile.GFile(output_path, 'r') as f:
+      self.assertListEqual(json.loads(f.read()), self._detections_list)
+
+  def testLoadDetectionColumnsMatchesLoadAnnotations(self):
+    groundtruth = coco_tools.COCOWrapper(self._groundtruth_dict)
+    columns = coco_tools.ExportDetectionsToColumns(
+        ['first', 'second'],
+        [np.array([[100, 100, 200, 200]], float),
+         np.array([[50, 50, 100, 100]], float)],
+        [np.array([.8], float), np.array([.7], float)],
+        [np.array([1], np.int32), np.array([1], np.int32)],
+        self._groundtruth_dict['categories'])
+    detections = groundtruth.LoadDetectionColumns(columns)
+    expected = groundtruth.LoadAnnotations(self._detections_list)
+    self.assertListEqual(detections.dataset['annotations'],
+                         expected.dataset['annotations'])
+    evaluator = coco_tools.COCOEvalWrapper(groundtruth, detections)
+    summary_metrics, _ = evaluator.ComputeMetrics()
+    self.assertAlmostEqual(1.0, summary_metrics['Precision/mAP'])
+
+  def testLoadDetectionColumnsRejectsUnknownImages(self):
+    groundtruth = coco_tools.COCOWrapper(self._groundtruth_dict)
+    columns = coco_tools.ExportDetectionsToColumns(
+        ['third'], [np.array([[0, 0, 10, 10]], float)],
+        [np.array([.5], float)], [np.array([1], np.int32)],
+        self._groundtruth_dict['categories'])
+    with self.assertRaises(ValueError):
+      groundtruth.LoadDetectionColumns(columns)
+
   def testExportSegmentsToCOCO(self):
     image_ids = ['first', 'second']
     detection_masks = [np.array(
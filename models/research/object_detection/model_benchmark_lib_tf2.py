@@ -0,0 +1,232 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Accuracy and CPU speed benchmarks for exported detection SavedModels.
+
+Works on SavedModels written by `exporter_lib_v2` with the `image_tensor`
+input type (uint8 [batch, height, width, 3] in, post-processed detections
+out). Used to compare export variants (input resolutions, backbones) on the
+same evaluation TFRecord:
+
+  evaluate_saved_model:   Pascal VOC mAP@0.5IOU on an evaluation TFRecord.
+  benchmark_saved_model:  batch-1 latency percentiles and batched throughput
+                          on pre-decoded images, so only the model is timed.
+  pareto_front:           variants not dominated in (accuracy, latency).
+  add_relative_metrics:   speedup and mAP change against a baseline variant.
+"""
+import time
+
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+from object_detection.core import standard_fields as fields
+from object_detection.data_decoders import tf_example_decoder
+from object_detection.utils import label_map_util
+from object_detection.utils import object_detection_evaluation
+
+
+def configure_cpu_threads(intra_op_threads=None, inter_op_threads=None):
+  """Sets TF CPU thread pools; must run before any op executes."""
+  if intra_op_threads:
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+  if inter_op_threads:
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def load_eval_examples(eval_record_path, max_examples=None):
+  """Decodes an evaluation TFRecord into a list of numpy tensor dicts.
+
+  Args:
+    eval_record_path: TFRecord path or glob.
+    max_examples: Optional cap on the number of examples.
+
+  Returns:
+    A list of dicts with the uint8 image, normalized groundtruth boxes and
+    groundtruth classes.
+  """
+  decoder = tf_example_decoder.TfExampleDecoder()
+  files = tf.io.gfile.glob(eval_record_path) or [eval_record_path]
+  dataset = tf.data.TFRecordDataset(files).map(
+      decoder.decode, num_parallel_calls=tf.data.AUTOTUNE)
+  if max_examples:
+    dataset = dataset.take(max_examples)
+  examples = []
+  for tensor_dict in dataset:
+    examples.append({
+        fields.InputDataFields.image:
+            tensor_dict[fields.InputDataFields.image].numpy(),
+        fields.InputDataFields.groundtruth_boxes:
+            tensor_dict[fields.InputDataFields.groundtruth_boxes].numpy(),
+        fields.InputDataFields.groundtruth_classes:
+            tensor_dict[fields.InputDataFields.groundtruth_classes].numpy(),
+    })
+  return examples
+
+
+def evaluate_saved_model(detect_fn, examples, label_map_path):
+  """Computes Pascal VOC mAP@0.5IOU of a detection function.
+
+  Args:
+    detect_fn: Loaded SavedModel (callable on a uint8 image batch).
+    examples: Output of `load_eval_examples`.
+    label_map_path: Label map for the evaluator categories.
+
+  Returns:
+    A dict with `map` and the per-category AP values reported by the
+    evaluator.
+  """
+  categories = label_map_util.create_categories_from_labelmap(label_map_path)
+  evaluator = object_detection_evaluation.PascalDetectionEvaluator(categories)
+  for image_id, example in enumerate(examples):
+    image = example[fields.InputDataFields.image]
+    detections = detect_fn(tf.constant(image[np.newaxis]))
+    num = int(detections['num_detections'][0])
+    evaluator.add_single_ground_truth_image_info(image_id, {
+        fields.InputDataFields.groundtruth_boxes:
+            example[fields.InputDataFields.groundtruth_boxes],
+        fields.InputDataFields.groundtruth_classes:
+            example[fields.InputDataFields.groundtruth_classes],
+    })
+    evaluator.add_single_detected_image_info(image_id, {
+        fields.DetectionResultFields.detection_boxes:
+            detections['detection_boxes'][0][:num].numpy(),
+        fields.DetectionResultFields.detection_scores:
+            detections['detection_scores'][0][:num].numpy(),
+        fields.DetectionResultFields.detection_classes:
+            detections['detection_classes'][0][:num].numpy().astype(np.int32),
+    })
+  metrics = evaluator.evaluate()
+  result = {'map': float(metrics['PascalBoxes_Precision/mAP@0.5IOU'])}
+  result.update({key: float(value) for key, value in metrics.items()})
+  return result
+
+
+def benchmark_saved_model(detect_fn, images, batch_size=8, warmup=3,
+                          iterations=None):
+  """Times a detection function on CPU.
+
+  Args:
+    detect_fn: Loaded SavedModel (callable on a uint8 image batch).
+    images: List of uint8 [height, width, 3] arrays of identical shape.
+    batch_size: Batch size of the throughput run.
+    warmup: Untimed calls before each timed run.
+    iterations: Number of batch-1 calls; defaults to len(images).
+
+  Returns:
+    A dict with batch-1 latency mean/p50/p90 in milliseconds and
+    `throughput_ips` (images per second) at `batch_size`.
+  """
+  iterations = iterations or len(images)
+  for i in range(warmup):
+    detect_fn(tf.constant(images[i % len(images)][np.newaxis]))
+  latencies = []
+  for i in range(iterations):
+    image = tf.constant(images[i % len(images)][np.newaxis])
+    start = time.perf_counter()
+    detections = detect_fn(image)
+    # Outputs are eager tensors; reading one forces completion.
+    detections['num_detections'].numpy()
+    latencies.append(time.perf_counter() - start)
+  latencies_ms = np.array(latencies) * 1000.0
+
+  batches = [np.stack([images[(start + j) % len(images)]
+                       for j in range(batch_size)])
+             for start in range(0, max(len(images), batch_size), batch_size)]
+  for i in range(warmup):
+    detect_fn(tf.constant(batches[i % len(batches)]))
+  start = time.perf_counter()
+  for batch in batches:
+    detect_fn(tf.constant(batch))['num_detections'].numpy()
+  seconds = time.perf_counter() - start
+
+  return {
+      'latency_mean_ms': float(latencies_ms.mean()),
+      'latency_p50_ms': float(np.percentile(latencies_ms, 50)),
+      'latency_p90_ms': float(np.percentile(latencies_ms, 90)),
+      'batch_size': batch_size,
+      'throughput_ips': len(batches) * batch_size / seconds,
+  }
+
+
+def pareto_front(results, quality_key='map', cost_key='latency_p50_ms'):
+  """Returns the names of variants not dominated by any other variant.
+
+  A variant is dominated when another one has at least its quality at no more
+  than its cost, and is strictly better in one of the two.
+
+  Args:
+    results: Dict mapping variant name to a metrics dict.
+    quality_key: Metric where higher is better.
+    cost_key: Metric where lower is better.
+
+  Returns:
+    A list of names on the Pareto front, sorted by increasing cost.
+  """
+  front = []
+  for name, result in results.items():
+    quality, cost = result[quality_key], result[cost_key]
+    dominated = any(
+        other[quality_key] >= quality and other[cost_key] <= cost and
+        (other[quality_key] > quality or other[cost_key] < cost)
+        for other_name, other in results.items() if other_name != name)
+    if not dominated:
+      front.append(name)
+  return sorted(front, key=lambda name: results[name][cost_key])
+
+
+def add_relative_metrics(results, baseline):
+  """Adds `speedup` and `map_delta` relative to `baseline` to every result.
+
+  Args:
+    results: Dict mapping variant name to a metrics dict; updated in place.
+    baseline: Name of the reference variant.
+
+  Returns:
+    `results`.
+  """
+  reference = results[baseline]
+  for result in results.values():
+    result['speedup'] = (reference['latency_p50_ms'] /
+                         max(result['latency_p50_ms'], 1e-9))
+    result['map_delta'] = result['map'] - reference['map']
+  return results
+
+
+def format_pareto_table(results, quality_key='map', cost_key='latency_p50_ms'):
+  """Formats benchmark results as a plain-text table sorted by latency.
+
+  Rows on the Pareto front are marked with `*`. Speedup and mAP change
+  columns are included once `add_relative_metrics` has been applied.
+  """
+  front = set(pareto_front(results, quality_key, cost_key))
+  relative = all('speedup' in result for result in results.values())
+  header = ('variant', 'mAP@0.5', 'p50 ms', 'p90 ms', 'img/s')
+  if relative:
+    header += ('speedup', 'dmAP')
+  header += ('pareto',)
+  rows = [header]
+  for name in sorted(results, key=lambda name: results[name][cost_key]):
+    result = results[name]
+    row = (str(name),
+           '{:.4f}'.format(result['map']),
+           '{:.1f}'.format(result['latency_p50_ms']),
+           '{:.1f}'.format(result['latency_p90_ms']),
+           '{:.1f}'.format(result.get('throughput_ips', 0.0)))
+    if relative:
+      row += ('{:.1f}x'.format(result['speedup']),
+              '{:+.4f}'.format(result['map_delta']))
+    rows.append(row + ('*' if name in front else '',))
+  widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+  return '\n'.join('  '.join(cell.ljust(width) for cell, width in
+                             zip(row, widths)).rstrip() for row in rows)
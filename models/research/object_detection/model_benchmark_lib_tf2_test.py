@@ -0,0 +1,75 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Test for model_benchmark_lib_tf2.py."""
+import unittest
+
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+from object_detection import model_benchmark_lib_tf2
+from object_detection.utils import tf_version
+
+
+def _fake_detect_fn(images):
+  batch = tf.shape(images)[0]
+  return {
+      'num_detections': tf.fill([batch], 1.0),
+      'detection_boxes': tf.tile([[[0.1, 0.1, 0.5, 0.5]]], [batch, 1, 1]),
+      'detection_scores': tf.fill([batch, 1], 0.9),
+      'detection_classes': tf.fill([batch, 1], 1.0),
+  }
+
+
+@unittest.skipIf(tf_version.is_tf1(), 'Skipping TF2.X only test.')
+class ModelBenchmarkTest(tf.test.TestCase):
+
+  def test_pareto_front(self):
+    results = {
+        '320x320': {'map': 0.80, 'latency_p50_ms': 40.0},
+        '448x448': {'map': 0.86, 'latency_p50_ms': 70.0},
+        '512x512': {'map': 0.85, 'latency_p50_ms': 90.0},
+        '640x640': {'map': 0.88, 'latency_p50_ms': 140.0},
+    }
+    self.assertEqual(model_benchmark_lib_tf2.pareto_front(results),
+                     ['320x320', '448x448', '640x640'])
+    table = model_benchmark_lib_tf2.format_pareto_table(results)
+    self.assertIn('*', table.splitlines()[1])
+    self.assertNotIn('*', [line for line in table.splitlines()
+                           if line.startswith('512x512')][0])
+
+  def test_add_relative_metrics(self):
+    results = {
+        'resnet50_fpn': {'map': 0.90, 'latency_p50_ms': 400.0,
+                         'latency_p90_ms': 420.0},
+        'mobilenet_v2_fpnlite': {'map': 0.87, 'latency_p50_ms': 40.0,
+                                 'latency_p90_ms': 45.0},
+    }
+    model_benchmark_lib_tf2.add_relative_metrics(results, 'resnet50_fpn')
+    self.assertAllClose(results['mobilenet_v2_fpnlite']['speedup'], 10.0)
+    self.assertAllClose(results['mobilenet_v2_fpnlite']['map_delta'], -0.03)
+    self.assertAllClose(results['resnet50_fpn']['speedup'], 1.0)
+    self.assertIn('10.0x', model_benchmark_lib_tf2.format_pareto_table(results))
+
+  def test_benchmark_reports_latency_and_throughput(self):
+    images = [np.zeros((16, 16, 3), np.uint8) for _ in range(5)]
+    result = model_benchmark_lib_tf2.benchmark_saved_model(
+        _fake_detect_fn, images, batch_size=2, warmup=1)
+    self.assertEqual(result['batch_size'], 2)
+    self.assertGreater(result['throughput_ips'], 0)
+    self.assertLessEqual(result['latency_p50_ms'], result['latency_p90_ms'])
+
+
+if __name__ == '__main__':
+  tf.test.main()
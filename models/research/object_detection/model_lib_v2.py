@@ -33,6 +33,7 @@ from object_detection.builders import optimizer_builder
 from object_detection.core import standard_fields as fields
 from object_detection.protos import train_pb2
 from object_detection.utils import config_util
+from object_detection.utils import cpu_training_util
 from object_detection.utils import label_map_util
 from object_detection.utils import ops
 from object_detection.utils import variables_helper
@@ -453,6 +454,9 @@ def train_loop(
     record_summaries=True,
     performance_summary_exporter=None,
     num_steps_per_iteration=NUM_STEPS_PER_ITERATION,
+    use_bfloat16=None,
+    pipeline_options=None,
+    log_input_stats=False,
     **kwargs):
   """Trains a model using eager + functions.
 
@@ -491,6 +495,13 @@ def train_loop(
     performance_summary_exporter: function for exporting performance metrics.
     num_steps_per_iteration: int, The number of training steps to perform
       in each iteration.
+    use_bfloat16: Boolean, whether to train with the mixed_bfloat16 policy.
+      If None, the config's `use_bfloat16` is honoured on TPU only.
+    pipeline_options: optional, a dataset_builder.InputPipelineOptions for
+      the training input pipeline.
+    log_input_stats: Boolean, whether to fetch every batch outside the train
+      step function and log the time spent waiting for input vs computing.
+      Slightly slower than fetching inside the function; meant for tuning.
     **kwargs: Additional keyword arguments for configuration override.
   """
   ## Parse the configs
@@ -504,9 +515,11 @@ def train_loop(
 
   configs = get_configs_from_pipeline_file(
       pipeline_config_path, config_override=config_override)
+  if use_bfloat16 is None:
+    use_bfloat16 = configs['train_config'].use_bfloat16 and use_tpu
   kwargs.update({
       'train_steps': train_steps,
-      'use_bfloat16': configs['train_config'].use_bfloat16 and use_tpu
+      'use_bfloat16': use_bfloat16
   })
   configs = merge_external_params_with_configs(
       configs, None, kwargs_dict=kwargs)
@@ -556,7 +569,8 @@ def train_loop(
           train_input_config=train_input_config,
           model_config=model_config,
           model=detection_model,
-          input_context=input_context)
+          input_context=input_context,
+          pipeline_options=pipeline_options)
       train_input = train_input.repeat()
       return train_input
 
@@ -645,8 +659,7 @@ def train_loop(
           global_step.assign_add(1)
           return losses_dict
 
-        def _sample_and_train(strategy, train_step_fn, data_iterator):
-          features, labels = data_iterator.next()
+        def _train_on_inputs(strategy, train_step_fn, features, labels):
           if hasattr(tf.distribute.Strategy, 'run'):
             per_replica_losses_dict = strategy.run(
                 train_step_fn, args=(features, labels))
@@ -658,6 +671,10 @@ def train_loop(
           return reduce_dict(
               strategy, per_replica_losses_dict, tf.distribute.ReduceOp.SUM)
 
+        def _sample_and_train(strategy, train_step_fn, data_iterator):
+          features, labels = data_iterator.next()
+          return _train_on_inputs(strategy, train_step_fn, features, labels)
+
         @tf.function
         def _dist_train_step(data_iterator):
           """A distributed train step."""
@@ -670,7 +687,13 @@ def train_loop(
 
           return _sample_and_train(strategy, train_step_fn, data_iterator)
 
+        @tf.function
+        def _dist_train_step_on_inputs(features, labels):
+          """A distributed train step on an already fetched batch."""
+          return _train_on_inputs(strategy, train_step_fn, features, labels)
+
         train_input_iter = iter(train_input)
+        step_timer = cpu_training_util.StepTimer()
 
         if int(global_step.value()) == 0:
           manager.save()
@@ -682,7 +705,16 @@ def train_loop(
         for _ in range(global_step.value(), train_steps,
                        num_steps_per_iteration):
 
-          losses_dict = _dist_train_step(train_input_iter)
+          if log_input_stats:
+            for _ in range(num_steps_per_iteration):
+              with step_timer.time_input():
+                features, labels = next(train_input_iter)
+              with step_timer.time_compute():
+                losses_dict = _dist_train_step_on_inputs(features, labels)
+                # Reading the loss blocks until the step has finished.
+                losses_dict['Loss/total_loss'].numpy()
+          else:
+            losses_dict = _dist_train_step(train_input_iter)
 
           time_taken = time.time() - last_step_time
           last_step_time = time.time()
@@ -706,6 +738,20 @@ def train_loop(
                 'Step {} per-step time {:.3f}s'.format(
                     global_step.value(), time_taken / num_steps_per_iteration))
             tf.logging.info(pprint.pformat(logged_dict_np, width=40))
+            if log_input_stats:
+              input_stats = step_timer.summary()
+              tf.logging.info(
+                  'Step {} input {:.1f} ms, compute {:.1f} ms per step '
+                  '({:.0%} waiting for input, {}-bound)'.format(
+                      global_step.value(), input_stats['input_ms_per_step'],
+                      input_stats['compute_ms_per_step'],
+                      input_stats['input_fraction'], input_stats['bound']))
+              for key in ('input_ms_per_step', 'compute_ms_per_step',
+                          'input_fraction'):
+                tf.compat.v2.summary.scalar(
+                    'input_pipeline/' + key, input_stats[key],
+                    step=global_step)
+              step_timer.reset()
             logged_step = global_step.value()
 
           if ((int(global_step.value()) - checkpointed_step) >=
@@ -0,0 +1,119 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Helpers for training detection models on CPU-only machines.
+
+On CPU the tf.data pipeline (JPEG decoding, augmentation, resizing) and the
+model share the same cores. These helpers size the thread pools, detect
+bfloat16 support and split step time into input wait and compute so that
+`model_lib_v2.train_loop` can report whether training is input-bound.
+"""
+import contextlib
+import os
+import time
+
+# A step counts as input-bound when at least this fraction of its wall time
+# is spent waiting for the next batch.
+INPUT_BOUND_FRACTION = 0.2
+
+_BFLOAT16_CPU_FLAGS = ('avx512_bf16', 'amx_bf16')
+
+
+def default_thread_split(num_cores=None):
+  """Splits CPU cores between the model and the tf.data pipeline.
+
+  A quarter of the cores (at least one) go to a private tf.data thread pool,
+  the rest to the intra-op pool. The inter-op pool is kept small because a
+  detection train step is one large graph with little op-level parallelism.
+
+  Args:
+    num_cores: Number of cores to split; defaults to os.cpu_count().
+
+  Returns:
+    A (intra_op_threads, inter_op_threads, input_threads) tuple.
+  """
+  num_cores = max(num_cores or os.cpu_count() or 1, 1)
+  input_threads = max(1, num_cores // 4)
+  intra_op_threads = max(1, num_cores - input_threads)
+  inter_op_threads = min(2, num_cores)
+  return intra_op_threads, inter_op_threads, input_threads
+
+
+def cpu_supports_bfloat16(cpuinfo_path='/proc/cpuinfo'):
+  """Whether the CPU has native bfloat16 instructions (AVX512_BF16 or AMX).
+
+  Without them bfloat16 math is emulated and slower than float32. Returns
+  False when the CPU flags cannot be read (e.g. outside Linux).
+  """
+  try:
+    with open(cpuinfo_path) as f:
+      for line in f:
+        if line.startswith('flags'):
+          flags = line.split(':', 1)[1].split()
+          return any(flag in flags for flag in _BFLOAT16_CPU_FLAGS)
+  except (IOError, OSError):
+    pass
+  return False
+
+
+class StepTimer(object):
+  """Accumulates per-step input wait and compute wall time.
+
+  Usage:
+    timer = StepTimer()
+    with timer.time_input():
+      features, labels = next(iterator)
+    with timer.time_compute():
+      train_step(features, labels)  # Must block until the step finished.
+  """
+
+  def __init__(self):
+    self.reset()
+
+  def reset(self):
+    self.input_seconds = 0.0
+    self.compute_seconds = 0.0
+    self.steps = 0
+
+  @contextlib.contextmanager
+  def time_input(self):
+    start = time.perf_counter()
+    yield
+    self.input_seconds += time.perf_counter() - start
+
+  @contextlib.contextmanager
+  def time_compute(self):
+    start = time.perf_counter()
+    yield
+    self.compute_seconds += time.perf_counter() - start
+    self.steps += 1
+
+  def summary(self):
+    """Returns per-step input/compute milliseconds since the last reset.
+
+    Returns:
+      A dict with `input_ms_per_step`, `compute_ms_per_step`,
+      `input_fraction` (share of step time spent waiting for input) and
+      `bound` ('input' or 'compute').
+    """
+    steps = max(self.steps, 1)
+    total = self.input_seconds + self.compute_seconds
+    input_fraction = self.input_seconds / total if total else 0.0
+    return {
+        'input_ms_per_step': 1000.0 * self.input_seconds / steps,
+        'compute_ms_per_step': 1000.0 * self.compute_seconds / steps,
+        'input_fraction': input_fraction,
+        'bound': ('input' if input_fraction >= INPUT_BOUND_FRACTION
+                  else 'compute'),
+    }
@@ -0,0 +1,60 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for object_detection.utils.cpu_training_util."""
+import os
+
+import tensorflow.compat.v1 as tf
+from object_detection.utils import cpu_training_util
+
+
+class CpuTrainingUtilTest(tf.test.TestCase):
+
+  def test_default_thread_split(self):
+    self.assertEqual(cpu_training_util.default_thread_split(16), (12, 2, 4))
+    self.assertEqual(cpu_training_util.default_thread_split(2), (1, 2, 1))
+    self.assertEqual(cpu_training_util.default_thread_split(1), (1, 1, 1))
+
+  def test_cpu_supports_bfloat16(self):
+    path = os.path.join(self.get_temp_dir(), 'cpuinfo')
+    with open(path, 'w') as f:
+      f.write('processor\t: 0\nflags\t\t: fpu sse avx512f avx512_bf16\n')
+    self.assertTrue(cpu_training_util.cpu_supports_bfloat16(path))
+    with open(path, 'w') as f:
+      f.write('processor\t: 0\nflags\t\t: fpu sse avx2\n')
+    self.assertFalse(cpu_training_util.cpu_supports_bfloat16(path))
+    self.assertFalse(cpu_training_util.cpu_supports_bfloat16(
+        os.path.join(self.get_temp_dir(), 'missing')))
+
+  def test_step_timer_summary(self):
+    timer = cpu_training_util.StepTimer()
+    for _ in range(2):
+      with timer.time_input():
+        pass
+      with timer.time_compute():
+        pass
+    timer.input_seconds, timer.compute_seconds = 0.3, 0.7
+    summary = timer.summary()
+    self.assertEqual(timer.steps, 2)
+    self.assertAlmostEqual(summary['input_ms_per_step'], 150.0)
+    self.assertAlmostEqual(summary['compute_ms_per_step'], 350.0)
+    self.assertAlmostEqual(summary['input_fraction'], 0.3)
+    self.assertEqual(summary['bound'], 'input')
+
+    timer.reset()
+    self.assertEqual(timer.summary()['bound'], 'compute')
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -20,6 +20,7 @@ from __future__ import print_function
 
 import collections
 import logging
+import threading
 
 import numpy as np
 from six import string_types
@@ -30,6 +31,11 @@ from object_detection.protos import string_int_label_map_pb2
 
 _LABEL_OFFSET = 1
 
+# Parsed label maps, keyed by (path, use_display_name) and holding the file's
+# (mtime, size) they were parsed at.
+_LABEL_MAP_LOOKUP_CACHE = {}
+_LABEL_MAP_LOOKUP_LOCK = threading.Lock()
+
 
 def _validate_label_map(label_map):
   """Checks if a label map is valid.
@@ -208,7 +214,7 @@ def get_label_map_dict(label_map_path_or_proto,
     negative values.
   """
   if isinstance(label_map_path_or_proto, string_types):
-    label_map = load_labelmap(label_map_path_or_proto)
+    label_map = get_label_map_lookup(label_map_path_or_proto).label_map
   else:
     if validator is None:
       validator = _validate_label_map
@@ -336,6 +342,122 @@ def get_label_map_hierarchy_lut(label_map_path_or_proto,
   return ancestors_lut, descendants_lut
 
 
+class LabelMapLookup(object):
+  """Dense numpy lookup tables of a label map.
+
+  Maps whole arrays of class ids to names (and back) with array indexing
+  instead of one dictionary lookup per detection. All arrays are read-only
+  and the object is shared by every caller of get_label_map_lookup, so
+  label_map and label_map_dict must not be modified either.
+
+  Attributes:
+    label_map: the StringIntLabelMap proto the tables were built from.
+    ids: sorted int64 array of the label map ids.
+    names: object array with the name of every id in `ids`.
+    id_to_name: object array of size max(id) + 1 holding the name of every
+      id, None for ids missing from the label map.
+    label_map_dict: a dictionary mapping label names to id, as returned by
+      get_label_map_dict.
+  """
+
+  def __init__(self, label_map, use_display_name=False):
+    """Builds the lookup tables.
+
+    Args:
+      label_map: a StringIntLabelMap proto.
+      use_display_name: whether to use the label map items' display names as
+        names.
+    """
+    self.label_map = label_map
+    self.label_map_dict = get_label_map_dict(
+        label_map, use_display_name=use_display_name)
+    id_to_name = {}
+    for item in label_map.item:
+      id_to_name[item.id] = item.display_name if use_display_name else item.name
+    self.ids = np.array(sorted(id_to_name), dtype=np.int64)
+    self.names = np.array([id_to_name[i] for i in self.ids.tolist()],
+                          dtype=object)
+    self.id_to_name = np.full(self.ids[-1] + 1 if self.ids.size else 0, None,
+                              dtype=object)
+    self.id_to_name[self.ids] = self.names
+    sorted_names = sorted(self.label_map_dict)
+    self._sorted_names = np.array(sorted_names, dtype=np.str_)
+    self._sorted_name_ids = np.array(
+        [self.label_map_dict[name] for name in sorted_names], dtype=np.int64)
+    for array in (self.ids, self.names, self.id_to_name, self._sorted_names,
+                  self._sorted_name_ids):
+      array.setflags(write=False)
+
+  def names_for_ids(self, class_ids, default=None):
+    """Returns the names of an array of class ids.
+
+    Args:
+      class_ids: an array (of any shape) of class ids, e.g. the float
+        detection_classes of a detector.
+      default: the name of ids missing from the label map.
+
+    Returns:
+      an object array with the shape of class_ids.
+    """
+    class_ids = np.asarray(class_ids).astype(np.int64)
+    known = (class_ids >= 0) & (class_ids < self.id_to_name.size)
+    names = np.full(class_ids.shape, default, dtype=object)
+    names[known] = self.id_to_name[class_ids[known]]
+    unknown = known & np.equal(names, None)
+    names[unknown] = default
+    return names
+
+  def ids_for_names(self, names, default=-1):
+    """Returns the ids of an array of label names.
+
+    Args:
+      names: an array (of any shape) of label names.
+      default: the id of names missing from the label map.
+
+    Returns:
+      an int64 array with the shape of names.
+    """
+    names = np.asarray(names, dtype=np.str_)
+    if not self._sorted_names.size:
+      return np.full(names.shape, default, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(self._sorted_names, names),
+                           self._sorted_names.size - 1)
+    found = self._sorted_names[positions] == names
+    return np.where(found, self._sorted_name_ids[positions],
+                    default).astype(np.int64)
+
+
+def get_label_map_lookup(label_map_path, use_display_name=False):
+  """Returns the LabelMapLookup of a label map file, parsing it only once.
+
+  Lookups are cached per process by path and re-parsed when the file's
+  contents change. get_label_map_dict, create_categories_from_labelmap and
+  create_category_index_from_labelmap read label map files through this cache
+  as well.
+
+  Args:
+    label_map_path: path to StringIntLabelMap proto text file.
+    use_display_name: whether to use the label map items' display names as
+      names.
+
+  Returns:
+    a LabelMapLookup, shared with other callers.
+  """
+  # Reading the file is cheap next to parsing it; comparing the contents
+  # also catches rewrites that keep the size within one mtime tick.
+  with tf.io.gfile.GFile(label_map_path, 'rb') as fid:
+    version = fid.read()
+  key = (label_map_path, use_display_name)
+  with _LABEL_MAP_LOOKUP_LOCK:
+    cached = _LABEL_MAP_LOOKUP_CACHE.get(key)
+  if cached is not None and cached[0] == version:
+    return cached[1]
+  lookup = LabelMapLookup(load_labelmap(label_map_path), use_display_name)
+  with _LABEL_MAP_LOOKUP_LOCK:
+    _LABEL_MAP_LOOKUP_CACHE[key] = (version, lookup)
+  return lookup
+
+
 def create_categories_from_labelmap(label_map_path, use_display_name=True):
   """Reads a label map and returns categories list compatible with eval.
 
@@ -355,7 +477,7 @@ def create_categories_from_labelmap(label_map_path, use_display_name=True):
   Returns:
     categories: a list of dictionaries representing all possible categories.
   """
-  label_map = load_labelmap(label_map_path)
+  label_map = get_label_map_lookup(label_map_path).label_map
   max_num_classes = max(item.id for item in label_map.item)
   return convert_label_map_to_categories(label_map, max_num_classes,
                                          use_display_name)
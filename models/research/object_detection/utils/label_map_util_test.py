@@ -19,6 +19,7 @@ from __future__ import division
 from __future__ import print_function
 
 import os
+from unittest import mock
 import numpy as np
 from six.moves import range
 import tensorflow.compat.v1 as tf
@@ -571,5 +572,62 @@ class LabelMapUtilTest(tf.test.TestCase):
                                   descendants_lut)
 
 
+  def test_label_map_lookup(self):
+    label_map_proto = string_int_label_map_pb2.StringIntLabelMap()
+    for class_id, name in [(3, 'cat'), (1, 'dog')]:
+      item = label_map_proto.item.add()
+      item.id = class_id
+      item.name = name
+      item.display_name = name.upper()
+    lookup = label_map_util.LabelMapLookup(label_map_proto)
+    self.assertAllEqual(lookup.ids, [1, 3])
+    self.assertListEqual(lookup.id_to_name.tolist(), [None, 'dog', None, 'cat'])
+    self.assertListEqual(
+        lookup.names_for_ids(np.array([3., 1., 2., 7., -1.]),
+                             default='N/A').tolist(),
+        ['cat', 'dog', 'N/A', 'N/A', 'N/A'])
+    self.assertAllEqual(
+        lookup.ids_for_names([['dog', 'bird'], ['cat', 'dog']]),
+        [[1, -1], [3, 1]])
+    display_lookup = label_map_util.LabelMapLookup(
+        label_map_proto, use_display_name=True)
+    self.assertListEqual(display_lookup.names_for_ids([1, 3]).tolist(),
+                         ['DOG', 'CAT'])
+    self.assertEqual(display_lookup.label_map_dict, {'DOG': 1, 'CAT': 3})
+
+  def test_get_label_map_lookup_is_cached_until_file_changes(self):
+    label_map_path = os.path.join(self.get_temp_dir(), 'lookup_map.pbtxt')
+    with tf.gfile.Open(label_map_path, 'wb') as f:
+      f.write("item { id: 1 name: 'dog' }")
+    lookup = label_map_util.get_label_map_lookup(label_map_path)
+    self.assertIs(label_map_util.get_label_map_lookup(label_map_path), lookup)
+
+    with tf.gfile.Open(label_map_path, 'wb') as f:
+      f.write("item { id: 1 name: 'dog' } item { id: 2 name: 'cat' }")
+    lookup = label_map_util.get_label_map_lookup(label_map_path)
+    self.assertDictEqual(lookup.label_map_dict, {'dog': 1, 'cat': 2})
+
+  def test_label_map_readers_share_the_lookup_cache(self):
+    label_map_path = os.path.join(self.get_temp_dir(), 'shared_map.pbtxt')
+    with tf.gfile.Open(label_map_path, 'wb') as f:
+      f.write("item { id: 1 name: 'dog' } item { id: 2 name: 'cat' }")
+    with mock.patch.object(label_map_util, 'load_labelmap',
+                           wraps=label_map_util.load_labelmap) as load:
+      self.assertDictEqual(label_map_util.get_label_map_dict(label_map_path),
+                           {'dog': 1, 'cat': 2})
+      self.assertLen(
+          label_map_util.create_categories_from_labelmap(label_map_path), 2)
+      self.assertLen(
+          label_map_util.create_category_index_from_labelmap(label_map_path),
+          2)
+      self.assertEqual(load.call_count, 1)
+
+      with tf.gfile.Open(label_map_path, 'wb') as f:
+        f.write("item { id: 1 name: 'cow' } item { id: 2 name: 'cat' }")
+      self.assertDictEqual(label_map_util.get_label_map_dict(label_map_path),
+                           {'cow': 1, 'cat': 2})
+      self.assertEqual(load.call_count, 2)
+
+
 if __name__ == '__main__':
   tf.test.main()
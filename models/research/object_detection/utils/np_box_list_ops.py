@@ -30,6 +30,11 @@ from object_detection.utils import np_box_list
 from object_detection.utils import np_box_ops
 
 
+# Number of score-sorted boxes whose IoU rows are computed together by
+# non_max_suppression. Bounds the temporary [block, N] IoU matrices.
+_NMS_BLOCK_SIZE = 128
+
+
 class SortOrder(object):
   """Enum class for sort order.
 
@@ -166,7 +171,8 @@ def sort_by_field(boxlist, field, order=SortOrder.DESCEND):
 def non_max_suppression(boxlist,
                         max_output_size=10000,
                         iou_threshold=1.0,
-                        score_threshold=-10.0):
+                        score_threshold=-10.0,
+                        soft_nms_sigma=0.0):
   """Non maximum suppression.
 
   This op greedily selects a subset of detection bounding boxes, pruning
@@ -174,6 +180,12 @@ def non_max_suppression(boxlist,
   with already selected boxes. In each iteration, the detected bounding box with
   highest score in the available pool is selected.
 
+  With soft_nms_sigma > 0, Soft-NMS is used instead (as in
+  tf.image.non_max_suppression_with_scores): overlapping boxes are not removed
+  but their scores are decayed by exp(-0.5 * iou^2 / soft_nms_sigma), boxes
+  with IOU > iou_threshold are still removed, and boxes whose decayed score
+  drops to score_threshold or below are discarded.
+
   Args:
     boxlist: BoxList holding N boxes.  Must contain a 'scores' field
       representing detection scores. All scores belong to the same class.
@@ -183,13 +195,16 @@ def non_max_suppression(boxlist,
                      less than this value. Default value is set to -10. A very
                      low threshold to pass pretty much all the boxes, unless
                      the user sets a different score threshold.
+    soft_nms_sigma: Soft-NMS sigma; 0 (default) is standard hard NMS.
 
   Returns:
-    a BoxList holding M boxes where M <= max_output_size
+    a BoxList holding M boxes where M <= max_output_size. With Soft-NMS its
+    'scores' field holds the decayed scores.
   Raises:
     ValueError: if 'scores' field does not exist
     ValueError: if threshold is not in [0, 1]
     ValueError: if max_output_size < 0
+    ValueError: if soft_nms_sigma < 0
   """
   if not boxlist.has_field('scores'):
     raise ValueError('Field scores does not exist')
@@ -197,6 +212,8 @@ def non_max_suppression(boxlist,
     raise ValueError('IOU threshold must be in [0, 1]')
   if max_output_size < 0:
     raise ValueError('max_output_size must be bigger than 0.')
+  if soft_nms_sigma < 0:
+    raise ValueError('soft_nms_sigma must be non-negative.')
 
   boxlist = filter_scores_greater_than(boxlist, score_threshold)
   if boxlist.num_boxes() == 0:
@@ -204,6 +221,17 @@ def non_max_suppression(boxlist,
 
   boxlist = sort_by_field(boxlist, 'scores')
 
+  if soft_nms_sigma > 0:
+    selected_indices, selected_scores = _soft_nms(
+        boxlist.get(), boxlist.get_field('scores'), max_output_size,
+        iou_threshold, score_threshold, soft_nms_sigma)
+    fields = [field for field in boxlist.get_extra_fields()
+              if field != 'scores']
+    selected = gather(boxlist, selected_indices, fields=fields)
+    selected.add_field(
+        'scores', selected_scores.astype(boxlist.get_field('scores').dtype))
+    return selected
+
   # Prevent further computation if NMS is disabled.
   if iou_threshold == 1.0:
     if boxlist.num_boxes() > max_output_size:
@@ -212,33 +240,13 @@ def non_max_suppression(boxlist,
     else:
       return boxlist
 
-  boxes = boxlist.get()
-  num_boxes = boxlist.num_boxes()
-  # is_index_valid is True only for all remaining valid boxes,
-  is_index_valid = np.full(num_boxes, 1, dtype=bool)
-  selected_indices = []
-  num_output = 0
-  for i in range(num_boxes):
-    if num_output < max_output_size:
-      if is_index_valid[i]:
-        num_output += 1
-        selected_indices.append(i)
-        is_index_valid[i] = False
-        valid_indices = np.where(is_index_valid)[0]
-        if valid_indices.size == 0:
-          break
-
-        intersect_over_union = np_box_ops.iou(
-            np.expand_dims(boxes[i, :], axis=0), boxes[valid_indices, :])
-        intersect_over_union = np.squeeze(intersect_over_union, axis=0)
-        is_index_valid[valid_indices] = np.logical_and(
-            is_index_valid[valid_indices],
-            intersect_over_union <= iou_threshold)
+  selected_indices = _greedy_nms(boxlist.get(), max_output_size,
+                                 iou_threshold)
   return gather(boxlist, np.array(selected_indices))
 
 
 def multi_class_non_max_suppression(boxlist, score_thresh, iou_thresh,
-                                    max_output_size):
+                                    max_output_size, soft_nms_sigma=0.0):
   """Multi-class version of non maximum suppression.
 
   This op greedily selects a subset of detection bounding boxes, pruning
@@ -260,6 +268,8 @@ def multi_class_non_max_suppression(boxlist, score_thresh, iou_thresh,
     iou_thresh: scalar threshold for IOU (boxes that that high IOU overlap
       with previously selected boxes are removed).
     max_output_size: maximum number of retained boxes per class.
+    soft_nms_sigma: Soft-NMS sigma, see `non_max_suppression`; 0 (default)
+      is standard hard NMS.
 
   Returns:
     a BoxList holding M boxes with a rank-1 scores field representing
@@ -291,21 +301,55 @@ def multi_class_non_max_suppression(boxlist, score_thresh, iou_thresh,
   if num_boxes != num_scores:
     raise ValueError('Incorrect scores field length: actual vs expected.')
 
-  selected_boxes_list = []
+  if max_output_size < 0:
+    raise ValueError('max_output_size must be bigger than 0.')
+  if soft_nms_sigma < 0:
+    raise ValueError('soft_nms_sigma must be non-negative.')
+
+  # Gather the (box, class) candidates of all classes into one array, grouped
+  # by class and sorted by decreasing score within each class, then run a
+  # single suppression pass in which boxes only suppress boxes of their own
+  # class.
+  box_indices = []
+  class_ids = []
   for class_idx in range(num_classes):
-    boxlist_and_class_scores = np_box_list.BoxList(boxlist.get())
-    class_scores = np.reshape(scores[0:num_scores, class_idx], [-1])
-    boxlist_and_class_scores.add_field('scores', class_scores)
-    boxlist_filt = filter_scores_greater_than(boxlist_and_class_scores,
-                                              score_thresh)
-    nms_result = non_max_suppression(boxlist_filt,
-                                     max_output_size=max_output_size,
-                                     iou_threshold=iou_thresh,
-                                     score_threshold=score_thresh)
-    nms_result.add_field(
-        'classes', np.zeros_like(nms_result.get_field('scores')) + class_idx)
-    selected_boxes_list.append(nms_result)
-  selected_boxes = concatenate(selected_boxes_list)
+    class_scores = scores[:, class_idx]
+    above = np.flatnonzero(class_scores > score_thresh)
+    order = np.argsort(class_scores[above])[::-1]
+    box_indices.append(above[order])
+    class_ids.append(np.full(above.size, class_idx, dtype=np.int64))
+  box_indices = np.concatenate(box_indices)
+  class_ids = np.concatenate(class_ids)
+  candidate_boxes = boxlist.get()[box_indices]
+  candidate_scores = scores[box_indices, class_ids]
+
+  if soft_nms_sigma > 0:
+    selected = []
+    selected_scores = []
+    for start, end in _class_segments(class_ids):
+      indices, decayed_scores = _soft_nms(
+          candidate_boxes[start:end], candidate_scores[start:end],
+          max_output_size, iou_thresh, score_thresh, soft_nms_sigma)
+      selected.append(start + indices)
+      selected_scores.append(decayed_scores)
+    selected = np.concatenate(selected).astype(np.int64)
+    selected_scores = np.concatenate(selected_scores).astype(scores.dtype)
+  elif iou_thresh == 1.0:
+    selected = np.concatenate(
+        [np.arange(start, min(end, start + max_output_size))
+         for start, end in _class_segments(class_ids)] or
+        [np.zeros(0, dtype=np.int64)])
+    selected_scores = candidate_scores[selected]
+  else:
+    selected = np.array(
+        _greedy_nms(candidate_boxes, max_output_size, iou_thresh,
+                    class_ids=class_ids), dtype=np.int64)
+    selected_scores = candidate_scores[selected]
+
+  selected_boxes = np_box_list.BoxList(candidate_boxes[selected])
+  selected_boxes.add_field('scores', selected_scores)
+  selected_boxes.add_field(
+      'classes', class_ids[selected].astype(selected_scores.dtype))
   sorted_boxes = sort_by_field(selected_boxes, 'scores')
   return sorted_boxes
 
@@ -557,6 +601,139 @@ def _copy_extra_fields(boxlist_to_copy_to, boxlist_to_copy_from):
   return boxlist_to_copy_to
 
 
+def _class_segments(class_ids):
+  """Returns (start, end) pairs of the runs of equal values in class_ids."""
+  if not class_ids.size:
+    return []
+  starts = np.concatenate([[0], np.flatnonzero(np.diff(class_ids)) + 1])
+  ends = np.append(starts[1:], class_ids.size)
+  return list(zip(starts, ends))
+
+
+def _suppression_mask(coordinates, areas, rows, columns, iou_threshold):
+  """Returns a [R, C] mask of the box pairs with IOU > iou_threshold.
+
+  Uses the same arithmetic as np_box_ops.iou, so the IOU values are bitwise
+  identical, but on precomputed coordinate columns with fewer temporaries.
+  Degenerate pairs (NaN IOU) count as overlapping, as in the sequential
+  algorithm.
+
+  Args:
+    coordinates: tuple of contiguous y_min, x_min, y_max, x_max arrays.
+    areas: np_box_ops.area of the boxes.
+    rows: [R] indices of the suppressing boxes.
+    columns: [C] indices of the candidate boxes.
+    iou_threshold: IOU threshold.
+  """
+  y_min, x_min, y_max, x_max = coordinates
+  heights = np.minimum(y_max[rows, np.newaxis], y_max[columns])
+  heights -= np.maximum(y_min[rows, np.newaxis], y_min[columns])
+  intersect = np.maximum(heights, 0.0, dtype=np.float64)
+  widths = np.minimum(x_max[rows, np.newaxis], x_max[columns])
+  widths -= np.maximum(x_min[rows, np.newaxis], x_min[columns])
+  intersect *= np.maximum(widths, 0.0, dtype=np.float64)
+  union = np.subtract(areas[rows, np.newaxis] + areas[columns], intersect)
+  np.divide(intersect, union, out=intersect)
+  return np.logical_not(intersect <= iou_threshold)
+
+
+def _greedy_nms(boxes, max_output_size, iou_threshold, class_ids=None,
+                block_size=_NMS_BLOCK_SIZE):
+  """Greedy hard NMS over boxes sorted by decreasing score.
+
+  The boxes are visited in blocks of up to `block_size` not yet suppressed
+  boxes. The IOU of a block with all later unsuppressed boxes is computed in
+  one vectorized call and thresholded into a suppression mask, so
+  selecting a box only ORs its mask row into the suppressed set. A box
+  suppresses exactly the boxes the sequential algorithm would remove (IOU >
+  iou_threshold, or NaN for degenerate boxes).
+
+  Args:
+    boxes: [N, 4] array, sorted by decreasing score.
+    max_output_size: maximum number of selected boxes (per class).
+    iou_threshold: IOU threshold.
+    class_ids: optional [N] array grouping the boxes by class (each class
+      contiguous, sorted by decreasing score within the class). Boxes only
+      suppress boxes of their own class.
+    block_size: maximum number of boxes per block.
+
+  Returns:
+    A list of selected row indices in selection order.
+  """
+  num_boxes = boxes.shape[0]
+  if class_ids is None:
+    segments = [(0, num_boxes)]
+  else:
+    segments = _class_segments(class_ids)
+  coordinates = tuple(np.ascontiguousarray(boxes[:, i]) for i in range(4))
+  areas = np_box_ops.area(boxes)
+  suppressed = np.zeros(num_boxes, dtype=bool)
+  selected_indices = []
+  for segment_start, segment_end in segments:
+    num_output = 0
+    position = segment_start
+    while position < segment_end and num_output < max_output_size:
+      columns = position + np.flatnonzero(
+          ~suppressed[position:segment_end])
+      if not columns.size:
+        break
+      # Never compute more rows than can still be selected.
+      num_rows = min(block_size, max_output_size - num_output, columns.size)
+      rows = columns[:num_rows]
+      overlaps = _suppression_mask(coordinates, areas, rows, columns,
+                                   iou_threshold)
+      block_suppressed = np.zeros(columns.size, dtype=bool)
+      for k in range(num_rows):
+        if block_suppressed[k]:
+          continue
+        selected_indices.append(rows[k])
+        num_output += 1
+        if num_output >= max_output_size:
+          break
+        block_suppressed |= overlaps[k]
+      suppressed[columns] |= block_suppressed
+      position = rows[-1] + 1
+  return selected_indices
+
+
+def _soft_nms(boxes, scores, max_output_size, iou_threshold, score_threshold,
+              sigma):
+  """Gaussian Soft-NMS over boxes sorted by decreasing score.
+
+  Args:
+    boxes: [N, 4] array.
+    scores: [N] array.
+    max_output_size: maximum number of selected boxes.
+    iou_threshold: boxes with a higher IOU than this with a selected box are
+      removed instead of decayed.
+    score_threshold: boxes whose decayed score is <= this are removed.
+    sigma: Gaussian decay parameter.
+
+  Returns:
+    A tuple of the selected row indices in selection order and their decayed
+    scores.
+  """
+  scores = np.array(scores, dtype=np.float64)
+  remaining = np.arange(boxes.shape[0])
+  selected_indices = []
+  selected_scores = []
+  scale = -0.5 / sigma
+  while remaining.size and len(selected_indices) < max_output_size:
+    best = np.argmax(scores[remaining])
+    index = remaining[best]
+    selected_indices.append(index)
+    selected_scores.append(scores[index])
+    remaining = np.delete(remaining, best)
+    if not remaining.size:
+      break
+    overlaps = np_box_ops.iou(boxes[index:index + 1], boxes[remaining])[0]
+    scores[remaining] *= np.where(overlaps <= iou_threshold,
+                                  np.exp(scale * overlaps * overlaps), 0.0)
+    remaining = remaining[scores[remaining] > score_threshold]
+  return (np.array(selected_indices, dtype=np.int64),
+          np.array(selected_scores, dtype=np.float64))
+
+
 def _update_valid_indices_by_removing_high_iou_boxes(
     selected_indices, is_index_valid, intersect_over_union, threshold):
   max_iou = np.max(intersect_over_union[:, selected_indices], axis=1)
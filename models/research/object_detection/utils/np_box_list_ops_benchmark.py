@@ -0,0 +1,176 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Benchmarks np_box_list_ops NMS against the previous per-box loop.
+
+The reference implementations below are the sequential algorithms that
+np_box_list_ops used before the blocked suppression-mask version; every run
+also checks that both produce identical outputs.
+
+Example usage:
+  python object_detection/utils/np_box_list_ops_benchmark.py \
+    --num_boxes=1000,5000,20000 --num_classes=6
+"""
+import time
+
+from absl import app
+from absl import flags
+import numpy as np
+
+from object_detection.utils import np_box_list
+from object_detection.utils import np_box_list_ops
+from object_detection.utils import np_box_ops
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_list('num_boxes', ['1000', '2000', '5000', '10000', '20000'],
+                  'Comma separated numbers of boxes.')
+flags.DEFINE_integer('num_classes', 6, 'Classes for the multi-class run.')
+flags.DEFINE_float('iou_threshold', 0.5, 'NMS IOU threshold.')
+flags.DEFINE_integer('max_output_size', 100,
+                     'Maximum number of boxes kept (per class).')
+flags.DEFINE_integer('repeats', 3, 'Timed repetitions; the best is kept.')
+
+
+def reference_non_max_suppression(boxlist, max_output_size, iou_threshold,
+                                  score_threshold=-10.0):
+  """Sequential single-class NMS: one IOU row per selected box."""
+  boxlist = np_box_list_ops.filter_scores_greater_than(boxlist,
+                                                       score_threshold)
+  if boxlist.num_boxes() == 0:
+    return boxlist
+  boxlist = np_box_list_ops.sort_by_field(boxlist, 'scores')
+  if iou_threshold == 1.0:
+    return np_box_list_ops.gather(
+        boxlist, np.arange(min(max_output_size, boxlist.num_boxes())))
+  boxes = boxlist.get()
+  num_boxes = boxlist.num_boxes()
+  is_index_valid = np.full(num_boxes, 1, dtype=bool)
+  selected_indices = []
+  num_output = 0
+  for i in range(num_boxes):
+    if num_output < max_output_size:
+      if is_index_valid[i]:
+        num_output += 1
+        selected_indices.append(i)
+        is_index_valid[i] = False
+        valid_indices = np.where(is_index_valid)[0]
+        if valid_indices.size == 0:
+          break
+        intersect_over_union = np_box_ops.iou(
+            np.expand_dims(boxes[i, :], axis=0), boxes[valid_indices, :])
+        intersect_over_union = np.squeeze(intersect_over_union, axis=0)
+        is_index_valid[valid_indices] = np.logical_and(
+            is_index_valid[valid_indices],
+            intersect_over_union <= iou_threshold)
+  return np_box_list_ops.gather(boxlist, np.array(selected_indices))
+
+
+def reference_multi_class_non_max_suppression(boxlist, score_thresh,
+                                              iou_thresh, max_output_size):
+  """Per-class loop over reference_non_max_suppression."""
+  scores = boxlist.get_field('scores')
+  if len(scores.shape) == 1:
+    scores = np.reshape(scores, [-1, 1])
+  selected_boxes_list = []
+  for class_idx in range(scores.shape[1]):
+    boxlist_and_class_scores = np_box_list.BoxList(boxlist.get())
+    boxlist_and_class_scores.add_field('scores', scores[:, class_idx])
+    boxlist_filt = np_box_list_ops.filter_scores_greater_than(
+        boxlist_and_class_scores, score_thresh)
+    nms_result = reference_non_max_suppression(
+        boxlist_filt, max_output_size, iou_thresh, score_thresh)
+    nms_result.add_field(
+        'classes', np.zeros_like(nms_result.get_field('scores')) + class_idx)
+    selected_boxes_list.append(nms_result)
+  selected_boxes = np_box_list_ops.concatenate(selected_boxes_list)
+  return np_box_list_ops.sort_by_field(selected_boxes, 'scores')
+
+
+def dense_detections(num_boxes, num_classes=1, num_clusters=None, seed=0):
+  """Returns a BoxList of clustered boxes, like raw dense detector output."""
+  rng = np.random.RandomState(seed)
+  num_clusters = num_clusters or max(1, num_boxes // 50)
+  centers = rng.uniform(0.05, 0.95, size=(num_clusters, 2))
+  sizes = rng.uniform(0.02, 0.2, size=(num_clusters, 2))
+  cluster = rng.randint(num_clusters, size=num_boxes)
+  center = centers[cluster] + rng.normal(0.0, 0.01, size=(num_boxes, 2))
+  size = sizes[cluster] * rng.uniform(0.8, 1.2, size=(num_boxes, 2))
+  boxes = np.concatenate([center - size / 2, center + size / 2], axis=1)
+  boxlist = np_box_list.BoxList(boxes.astype(np.float32))
+  scores = rng.uniform(size=(num_boxes, num_classes)).astype(np.float32)
+  boxlist.add_field('scores', scores[:, 0] if num_classes == 1 else scores)
+  return boxlist
+
+
+def _best_time(fn, repeats):
+  best = float('inf')
+  for _ in range(repeats):
+    start = time.perf_counter()
+    result = fn()
+    best = min(best, time.perf_counter() - start)
+  return best, result
+
+
+def _same(boxlist1, boxlist2):
+  if not np.array_equal(boxlist1.get(), boxlist2.get()):
+    return False
+  return all(np.array_equal(boxlist1.get_field(field),
+                            boxlist2.get_field(field))
+             for field in boxlist1.get_extra_fields())
+
+
+def run_benchmark(num_boxes_list, num_classes, iou_threshold,
+                  max_output_size, repeats):
+  """Returns rows of (case, num_boxes, reference ms, new ms, identical)."""
+  rows = []
+  for num_boxes in num_boxes_list:
+    boxlist = dense_detections(num_boxes)
+    reference_time, expected = _best_time(
+        lambda: reference_non_max_suppression(  # pylint: disable=cell-var-from-loop
+            boxlist, max_output_size, iou_threshold), repeats)
+    new_time, actual = _best_time(
+        lambda: np_box_list_ops.non_max_suppression(  # pylint: disable=cell-var-from-loop
+            boxlist, max_output_size, iou_threshold), repeats)
+    rows.append(('single-class', num_boxes, 1000 * reference_time,
+                 1000 * new_time, _same(expected, actual)))
+
+    boxlist = dense_detections(num_boxes, num_classes)
+    reference_time, expected = _best_time(
+        lambda: reference_multi_class_non_max_suppression(  # pylint: disable=cell-var-from-loop
+            boxlist, 0.05, iou_threshold, max_output_size), repeats)
+    new_time, actual = _best_time(
+        lambda: np_box_list_ops.multi_class_non_max_suppression(  # pylint: disable=cell-var-from-loop
+            boxlist, 0.05, iou_threshold, max_output_size), repeats)
+    rows.append(('{}-class'.format(num_classes), num_boxes,
+                 1000 * reference_time, 1000 * new_time,
+                 _same(expected, actual)))
+  return rows
+
+
+def main(argv):
+  del argv  # Unused.
+  rows = run_benchmark([int(n) for n in FLAGS.num_boxes], FLAGS.num_classes,
+                       FLAGS.iou_threshold, FLAGS.max_output_size,
+                       FLAGS.repeats)
+  print('{:<14}{:>8}{:>14}{:>10}{:>9}{:>11}'.format(
+      'case', 'boxes', 'reference ms', 'new ms', 'speedup', 'identical'))
+  for case, num_boxes, reference_ms, new_ms, identical in rows:
+    print('{:<14}{:>8}{:>14.1f}{:>10.1f}{:>8.1f}x{:>11}'.format(
+        case, num_boxes, reference_ms, new_ms, reference_ms / new_ms,
+        str(identical)))
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -24,6 +24,7 @@ import tensorflow.compat.v1 as tf
 
 from object_detection.utils import np_box_list
 from object_detection.utils import np_box_list_ops
+from object_detection.utils import np_box_list_ops_benchmark
 
 
 class AreaRelatedTest(tf.test.TestCase):
@@ -413,6 +414,59 @@ class NonMaximumSuppressionTest(tf.test.TestCase):
     self.assertAllClose(classes_clean, expected_classes)
     self.assertAllClose(boxes, expected_boxes)
 
+  def test_multiclass_nms_limits_output_per_class(self):
+    boxlist = np_box_list.BoxList(self._boxes)
+    boxlist.add_field('scores', np.array([[.9, .1], [.75, .8], [.6, .7],
+                                          [.95, .2], [.5, .6], [.3, .85]]))
+    boxlist_clean = np_box_list_ops.multi_class_non_max_suppression(
+        boxlist, score_thresh=0.25, iou_thresh=0.5, max_output_size=2)
+    self.assertAllClose(boxlist_clean.get_field('scores'),
+                        [.95, .9, .85, .8])
+    self.assertAllClose(boxlist_clean.get_field('classes'), [0, 0, 1, 1])
+
+  def test_soft_nms_decays_overlapping_scores(self):
+    boxlist = np_box_list.BoxList(self._boxes)
+    boxlist.add_field('scores',
+                      np.array([.9, .75, .6, .95, .5, .3], dtype=float))
+    nms_boxlist = np_box_list_ops.non_max_suppression(
+        boxlist, max_output_size=10, iou_threshold=1.0, score_threshold=0.001,
+        soft_nms_sigma=0.5)
+    # The second box of each cluster decays by exp(-iou^2), not removed.
+    decayed = .75 * np.exp(-(0.9 / 1.1) ** 2)
+    self.assertAllClose(nms_boxlist.get_field('scores')[:3],
+                        [.95, .9, decayed])
+    self.assertEqual(nms_boxlist.num_boxes(), 6)
+
+    hard_boxlist = np_box_list_ops.non_max_suppression(
+        boxlist, max_output_size=10, iou_threshold=0.5, score_threshold=0.001,
+        soft_nms_sigma=0.5)
+    self.assertAllClose(hard_boxlist.get(), [[0, 10, 1, 11],
+                                             [0, 0, 1, 1],
+                                             [0, 100, 1, 101]])
+
+  def test_matches_sequential_nms_on_dense_boxes(self):
+    for max_output_size in (20, 10000):
+      boxlist = np_box_list_ops_benchmark.dense_detections(3000)
+      expected = np_box_list_ops_benchmark.reference_non_max_suppression(
+          boxlist, max_output_size, 0.5)
+      actual = np_box_list_ops.non_max_suppression(
+          boxlist, max_output_size, 0.5)
+      self.assertAllEqual(actual.get(), expected.get())
+      self.assertAllEqual(actual.get_field('scores'),
+                          expected.get_field('scores'))
+
+      boxlist = np_box_list_ops_benchmark.dense_detections(3000, 4)
+      expected = (
+          np_box_list_ops_benchmark.reference_multi_class_non_max_suppression(
+              boxlist, 0.05, 0.5, max_output_size))
+      actual = np_box_list_ops.multi_class_non_max_suppression(
+          boxlist, 0.05, 0.5, max_output_size)
+      self.assertAllEqual(actual.get(), expected.get())
+      self.assertAllEqual(actual.get_field('scores'),
+                          expected.get_field('scores'))
+      self.assertAllEqual(actual.get_field('classes'),
+                          expected.get_field('classes'))
+
 
 if __name__ == '__main__':
   tf.test.main()
@@ -18,6 +18,10 @@
 Example box operations that are supported:
   * Areas: compute bounding box areas
   * IOU: pairwise intersection-over-union scores
+
+The pairwise ops tile over the columns (boxes2) so that their temporaries stay
+within memory_budget_bytes; iou_pairs and ioa_pairs additionally avoid the
+dense [N, M] result and return only the pairs above a threshold.
 """
 
 from __future__ import absolute_import
@@ -26,6 +30,9 @@ from __future__ import print_function
 
 import numpy as np
 
+# Bytes of [N, block] temporaries a pairwise op may hold at once.
+DEFAULT_MEMORY_BUDGET_BYTES = 64 * 1024 * 1024
+
 
 def area(boxes):
   """Computes area of boxes.
@@ -39,51 +46,141 @@ def area(boxes):
   return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
 
 
-def intersection(boxes1, boxes2):
+def _block_size(num_rows, dtype, memory_budget_bytes):
+  """Returns how many columns fit in the budget (four [N, block] arrays)."""
+  bytes_per_column = 4 * max(num_rows, 1) * np.dtype(dtype).itemsize
+  return max(1, int(memory_budget_bytes // bytes_per_column))
+
+
+def _column_blocks(boxes1, boxes2, dtype, memory_budget_bytes):
+  """Yields (start, end) column ranges of boxes2 that fit in the budget."""
+  block_size = _block_size(boxes1.shape[0], dtype, memory_budget_bytes)
+  for start in range(0, boxes2.shape[0], block_size):
+    yield start, min(start + block_size, boxes2.shape[0])
+
+
+def _prepare(boxes1, boxes2, dtype):
+  """Casts the boxes to dtype when a narrower output is requested."""
+  dtype = np.dtype(dtype)
+  if dtype.itemsize < np.result_type(boxes1, boxes2).itemsize:
+    boxes1 = boxes1.astype(dtype, copy=False)
+    boxes2 = boxes2.astype(dtype, copy=False)
+  return boxes1, boxes2
+
+
+def _intersection_into(boxes1, boxes2, out, scratch):
+  """Writes the pairwise intersection areas of the boxes into out.
+
+  The side lengths are computed in the dtype of the boxes and only then
+  written to out, which gives the same values as the unblocked formula.
+
+  Args:
+    boxes1: a numpy array with shape [N, 4].
+    boxes2: a numpy array with shape [M, 4].
+    out: a float array with shape [N, M] receiving the intersections.
+    scratch: a list of two arrays with shape [N, M] and the boxes' dtype.
+  """
+  side, lower = scratch
+  np.minimum(boxes1[:, 2:3], boxes2[:, 2], out=side)
+  np.maximum(boxes1[:, 0:1], boxes2[:, 0], out=lower)
+  side -= lower
+  np.maximum(side, 0, out=out)
+  np.minimum(boxes1[:, 3:4], boxes2[:, 3], out=side)
+  np.maximum(boxes1[:, 1:2], boxes2[:, 1], out=lower)
+  side -= lower
+  np.maximum(side, 0, out=side)
+  out *= side
+
+
+def _pairwise(boxes1, boxes2, dtype, memory_budget_bytes, block_fn):
+  """Fills an [N, M] array block by block with block_fn(start, end, out)."""
+  result = np.empty((boxes1.shape[0], boxes2.shape[0]), dtype=dtype)
+  for start, end in _column_blocks(boxes1, boxes2, dtype,
+                                   memory_budget_bytes):
+    block_fn(start, end, result[:, start:end])
+  return result
+
+
+def _scratch(boxes1, boxes2, num_columns):
+  """Returns the two [N, num_columns] buffers used by _intersection_into."""
+  compute_dtype = np.result_type(boxes1, boxes2)
+  return [np.empty((boxes1.shape[0], num_columns), dtype=compute_dtype)
+          for _ in range(2)]
+
+
+def intersection(boxes1, boxes2, dtype=np.float64,
+                 memory_budget_bytes=DEFAULT_MEMORY_BUDGET_BYTES):
   """Compute pairwise intersection areas between boxes.
 
   Args:
     boxes1: a numpy array with shape [N, 4] holding N boxes
     boxes2: a numpy array with shape [M, 4] holding M boxes
+    dtype: dtype of the result. np.float32 halves memory use; the boxes are
+      then cast to float32 as well.
+    memory_budget_bytes: approximate bound on the temporaries held besides
+      the result; the computation is tiled over boxes2 to stay within it.
 
   Returns:
     a numpy array with shape [N*M] representing pairwise intersection area
   """
-  [y_min1, x_min1, y_max1, x_max1] = np.split(boxes1, 4, axis=1)
-  [y_min2, x_min2, y_max2, x_max2] = np.split(boxes2, 4, axis=1)
-
-  all_pairs_min_ymax = np.minimum(y_max1, np.transpose(y_max2))
-  all_pairs_max_ymin = np.maximum(y_min1, np.transpose(y_min2))
-  intersect_heights = np.maximum(
-      np.zeros(all_pairs_max_ymin.shape),
-      all_pairs_min_ymax - all_pairs_max_ymin)
-  all_pairs_min_xmax = np.minimum(x_max1, np.transpose(x_max2))
-  all_pairs_max_xmin = np.maximum(x_min1, np.transpose(x_min2))
-  intersect_widths = np.maximum(
-      np.zeros(all_pairs_max_xmin.shape),
-      all_pairs_min_xmax - all_pairs_max_xmin)
-  return intersect_heights * intersect_widths
-
-
-def iou(boxes1, boxes2):
+  boxes1, boxes2 = _prepare(boxes1, boxes2, dtype)
+
+  def block_fn(start, end, out):
+    _intersection_into(boxes1, boxes2[start:end], out,
+                       _scratch(boxes1, boxes2, end - start))
+
+  return _pairwise(boxes1, boxes2, dtype, memory_budget_bytes, block_fn)
+
+
+def _iou_block_fn(boxes1, boxes2):
+  """Returns a block_fn writing pairwise iou into its out argument."""
+  area1 = np.expand_dims(area(boxes1), axis=1)
+  area2 = area(boxes2)
+
+  def block_fn(start, end, out):
+    scratch = _scratch(boxes1, boxes2, end - start)
+    _intersection_into(boxes1, boxes2[start:end], out, scratch)
+    union = np.empty_like(out)
+    np.add(area1, area2[start:end], out=union)
+    union -= out
+    out /= union
+
+  return block_fn
+
+
+def _ioa_block_fn(boxes1, boxes2):
+  """Returns a block_fn writing pairwise ioa into its out argument."""
+  area2 = area(boxes2)
+
+  def block_fn(start, end, out):
+    _intersection_into(boxes1, boxes2[start:end], out,
+                       _scratch(boxes1, boxes2, end - start))
+    out /= area2[start:end]
+
+  return block_fn
+
+
+def iou(boxes1, boxes2, dtype=np.float64,
+        memory_budget_bytes=DEFAULT_MEMORY_BUDGET_BYTES):
   """Computes pairwise intersection-over-union between box collections.
 
   Args:
     boxes1: a numpy array with shape [N, 4] holding N boxes.
     boxes2: a numpy array with shape [M, 4] holding M boxes.
+    dtype: dtype of the result, see intersection.
+    memory_budget_bytes: approximate bound on the temporaries, see
+      intersection.
 
   Returns:
     a numpy array with shape [N, M] representing pairwise iou scores.
   """
-  intersect = intersection(boxes1, boxes2)
-  area1 = area(boxes1)
-  area2 = area(boxes2)
-  union = np.expand_dims(area1, axis=1) + np.expand_dims(
-      area2, axis=0) - intersect
-  return intersect / union
+  boxes1, boxes2 = _prepare(boxes1, boxes2, dtype)
+  return _pairwise(boxes1, boxes2, dtype, memory_budget_bytes,
+                   _iou_block_fn(boxes1, boxes2))
 
 
-def ioa(boxes1, boxes2):
+def ioa(boxes1, boxes2, dtype=np.float64,
+        memory_budget_bytes=DEFAULT_MEMORY_BUDGET_BYTES):
   """Computes pairwise intersection-over-area between box collections.
 
   Intersection-over-area (ioa) between two boxes box1 and box2 is defined as
@@ -93,10 +190,104 @@ def ioa(boxes1, boxes2):
   Args:
     boxes1: a numpy array with shape [N, 4] holding N boxes.
     boxes2: a numpy array with shape [M, 4] holding M boxes.
+    dtype: dtype of the result, see intersection.
+    memory_budget_bytes: approximate bound on the temporaries, see
+      intersection.
 
   Returns:
     a numpy array with shape [N, M] representing pairwise ioa scores.
   """
-  intersect = intersection(boxes1, boxes2)
-  areas = np.expand_dims(area(boxes2), axis=0)
-  return intersect / areas
+  boxes1, boxes2 = _prepare(boxes1, boxes2, dtype)
+  return _pairwise(boxes1, boxes2, dtype, memory_budget_bytes,
+                   _ioa_block_fn(boxes1, boxes2))
+
+
+def _top_k_per_row(rows, columns, values, top_k):
+  """Keeps the top_k largest values of every row, ties by lower column."""
+  order = np.lexsort((columns, -values, rows))
+  rows, columns, values = rows[order], columns[order], values[order]
+  first = np.searchsorted(rows, rows, side='left')
+  keep = np.arange(rows.size) - first < top_k
+  return rows[keep], columns[keep], values[keep]
+
+
+def _sparse_pairs(boxes1, boxes2, threshold, top_k, dtype,
+                  memory_budget_bytes, block_fn):
+  """Runs block_fn over column blocks and keeps the entries > threshold."""
+  rows, columns, values = [], [], []
+  num_columns = _block_size(boxes1.shape[0], dtype, memory_budget_bytes)
+  buffer = np.empty((boxes1.shape[0], min(num_columns, boxes2.shape[0])),
+                    dtype=dtype)
+  for start, end in _column_blocks(boxes1, boxes2, dtype,
+                                   memory_budget_bytes):
+    block = buffer[:, :end - start]
+    block_fn(start, end, block)
+    block_rows, block_columns = np.nonzero(block > threshold)
+    rows.append(block_rows)
+    columns.append(block_columns + start)
+    values.append(block[block_rows, block_columns])
+    if top_k is not None:
+      rows, columns, values = [
+          [array] for array in _top_k_per_row(
+              np.concatenate(rows), np.concatenate(columns),
+              np.concatenate(values), top_k)]
+  if not rows:
+    return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=dtype))
+  rows = np.concatenate(rows).astype(np.int64, copy=False)
+  columns = np.concatenate(columns).astype(np.int64, copy=False)
+  values = np.concatenate(values)
+  order = np.lexsort((columns, rows))
+  return rows[order], columns[order], values[order]
+
+
+def iou_pairs(boxes1, boxes2, threshold=0.0, top_k=None, dtype=np.float64,
+              memory_budget_bytes=DEFAULT_MEMORY_BUDGET_BYTES):
+  """Computes the sparse pairwise iou entries above a threshold.
+
+  Unlike iou, the [N, M] matrix is never materialized: memory stays within
+  memory_budget_bytes plus the size of the returned pairs.
+
+  Args:
+    boxes1: a numpy array with shape [N, 4] holding N boxes.
+    boxes2: a numpy array with shape [M, 4] holding M boxes.
+    threshold: only pairs with iou strictly greater than this are returned.
+    top_k: if set, at most top_k pairs with the highest iou are kept for every
+      box in boxes1.
+    dtype: dtype of the iou values, see intersection.
+    memory_budget_bytes: approximate bound on the temporaries, see
+      intersection.
+
+  Returns:
+    indices1: int64 numpy array with the boxes1 index of every pair.
+    indices2: int64 numpy array with the boxes2 index of every pair.
+    values: numpy array with the iou of every pair.
+    The pairs are sorted by indices1, then indices2.
+  """
+  boxes1, boxes2 = _prepare(boxes1, boxes2, dtype)
+  return _sparse_pairs(boxes1, boxes2, threshold, top_k, dtype,
+                       memory_budget_bytes, _iou_block_fn(boxes1, boxes2))
+
+
+def ioa_pairs(boxes1, boxes2, threshold=0.0, top_k=None, dtype=np.float64,
+              memory_budget_bytes=DEFAULT_MEMORY_BUDGET_BYTES):
+  """Computes the sparse pairwise ioa entries above a threshold.
+
+  See iou_pairs; ioa is defined as in ioa.
+
+  Args:
+    boxes1: a numpy array with shape [N, 4] holding N boxes.
+    boxes2: a numpy array with shape [M, 4] holding M boxes.
+    threshold: only pairs with ioa strictly greater than this are returned.
+    top_k: if set, at most top_k pairs with the highest ioa are kept for every
+      box in boxes1.
+    dtype: dtype of the ioa values, see intersection.
+    memory_budget_bytes: approximate bound on the temporaries, see
+      intersection.
+
+  Returns:
+    indices1, indices2, values as in iou_pairs.
+  """
+  boxes1, boxes2 = _prepare(boxes1, boxes2, dtype)
+  return _sparse_pairs(boxes1, boxes2, threshold, top_k, dtype,
+                       memory_budget_bytes, _ioa_block_fn(boxes1, boxes2))
@@ -67,6 +67,39 @@ class BoxOpsTests(tf.test.TestCase):
                               dtype=np.float32)
     self.assertAllClose(ioa21, expected_ioa21)
 
+  def testBlockedMatchesSingleBlock(self):
+    for function in (np_box_ops.intersection, np_box_ops.iou, np_box_ops.ioa):
+      expected = function(self.boxes1, self.boxes2)
+      # A budget of one byte forces one column per block.
+      blocked = function(self.boxes1, self.boxes2, memory_budget_bytes=1)
+      self.assertAllEqual(blocked, expected)
+
+  def testFloat32Output(self):
+    iou = np_box_ops.iou(self.boxes1, self.boxes2, dtype=np.float32)
+    self.assertEqual(iou.dtype, np.float32)
+    self.assertAllClose(iou, np_box_ops.iou(self.boxes1, self.boxes2))
+
+  def testIOUPairs(self):
+    indices1, indices2, values = np_box_ops.iou_pairs(
+        self.boxes1, self.boxes2, threshold=0.01, memory_budget_bytes=1)
+    self.assertAllEqual(indices1, [0, 0, 1, 1])
+    self.assertAllEqual(indices2, [0, 2, 0, 2])
+    self.assertAllClose(values, [2.0 / 16.0, 6.0 / 400.0,
+                                 1.0 / 16.0, 5.0 / 400.0])
+
+    indices1, indices2, values = np_box_ops.iou_pairs(
+        self.boxes1, self.boxes2, top_k=1, memory_budget_bytes=1)
+    self.assertAllEqual(indices1, [0, 1])
+    self.assertAllEqual(indices2, [0, 0])
+    self.assertAllClose(values, [2.0 / 16.0, 1.0 / 16.0])
+
+  def testIOAPairs(self):
+    indices1, indices2, values = np_box_ops.ioa_pairs(
+        self.boxes2, self.boxes1, threshold=0.25)
+    self.assertAllEqual(indices1, [0, 2, 2])
+    self.assertAllEqual(indices2, [0, 0, 1])
+    self.assertAllClose(values, [2.0 / 6.0, 1.0, 1.0])
+
 
 if __name__ == '__main__':
   tf.test.main()
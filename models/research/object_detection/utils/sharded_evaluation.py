@@ -0,0 +1,167 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Sharded, multi-process evaluation for ObjectDetectionEvaluator.
+
+ObjectDetectionEvaluator matches detections to groundtruth image by image
+(PerImageEvaluation), which is the expensive part of computing mAP, and only
+keeps per-class scores and tp/fp labels afterwards. This module splits the
+images into contiguous shards, runs one evaluator per shard in worker
+processes and merges the shards' internal states into a single evaluator
+with `merge_internal_state`.
+
+Shards are merged in input order, so the merged state (and therefore every
+metric) is identical to adding all images to one evaluator serially. As in
+serial evaluation, an image id that was already added is skipped with a
+warning; ids are checked before sharding, since a shard's compacted state
+cannot be split per image afterwards.
+
+Example usage:
+  evaluator_fn = functools.partial(
+      object_detection_evaluation.PascalDetectionEvaluator, categories)
+  examples = ((image_id, groundtruth_dict, detections_dict)
+              for image_id, ... in ...)
+  metrics = sharded_evaluation.evaluate_sharded(
+      evaluator_fn, examples, num_workers=8).evaluate()
+"""
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+
+from object_detection.utils import object_detection_evaluation
+
+
+def compact_state(state):
+  """Concatenates the per-image arrays of an evaluation state per class.
+
+  Evaluators keep one scores and one tp/fp array per image and class; a
+  single array per class is much cheaper to pickle and merge.
+
+  Args:
+    state: an object_detection_evaluation.ObjectDetectionEvaluationState.
+
+  Returns:
+    An ObjectDetectionEvaluationState with at most one array per class in
+    scores_per_class and tp_fp_labels_per_class.
+  """
+  def concatenate(arrays_per_class):
+    return [[np.concatenate(arrays)] if arrays else []
+            for arrays in arrays_per_class]
+
+  return state._replace(
+      scores_per_class=concatenate(state.scores_per_class),
+      tp_fp_labels_per_class=concatenate(state.tp_fp_labels_per_class))
+
+
+def evaluate_shard(task):
+  """Evaluates one shard of images.
+
+  Args:
+    task: a tuple (evaluator_fn, examples) where examples is a list of
+      (image_id, groundtruth_dict, detections_dict) tuples.
+
+  Returns:
+    A tuple (image_ids, state) with the shard's image ids and its compacted
+    ObjectDetectionEvaluationState.
+  """
+  evaluator_fn, examples = task
+  evaluator = evaluator_fn()
+  for image_id, groundtruth_dict, detections_dict in examples:
+    evaluator.add_single_ground_truth_image_info(image_id, groundtruth_dict)
+    evaluator.add_single_detected_image_info(image_id, detections_dict)
+  state, image_ids = evaluator.get_internal_state()
+  return list(image_ids), compact_state(state)
+
+
+def _unique_examples(examples):
+  """Yields the examples whose image id was not seen before."""
+  image_ids = set()
+  for example in examples:
+    image_id = example[0]
+    if image_id in image_ids:
+      logging.warning('Image with id %s already added; skipping it.', image_id)
+      continue
+    image_ids.add(image_id)
+    yield example
+
+
+def _shards(examples, images_per_shard):
+  """Yields lists of at most images_per_shard consecutive examples."""
+  examples = iter(examples)
+  while True:
+    shard = list(itertools.islice(examples, images_per_shard))
+    if not shard:
+      return
+    yield shard
+
+
+def evaluate_sharded(evaluator_fn, examples, num_workers=None,
+                     images_per_shard=256):
+  """Evaluates detections with a pool of worker processes.
+
+  Args:
+    evaluator_fn: a picklable callable without arguments returning a fresh
+      ObjectDetectionEvaluator (or subclass), e.g. a functools.partial of the
+      evaluator class and its categories. Called once per shard and once for
+      the returned evaluator.
+    examples: an iterable of (image_id, groundtruth_dict, detections_dict)
+      tuples, in the format of add_single_ground_truth_image_info and
+      add_single_detected_image_info. It is consumed lazily: at most two
+      shards per worker are held in memory at a time. Repeated image ids are
+      skipped with a warning.
+    num_workers: number of worker processes. Defaults to the number of cores;
+      0 or 1 evaluates the shards in this process.
+    images_per_shard: images evaluated by a worker per task.
+
+  Returns:
+    An evaluator holding the merged state of all shards; call evaluate() on
+    it for the metrics.
+
+  Raises:
+    ValueError: if evaluator_fn does not build an ObjectDetectionEvaluator or
+      images_per_shard is not positive.
+  """
+  evaluator = evaluator_fn()
+  if not isinstance(evaluator,
+                    object_detection_evaluation.ObjectDetectionEvaluator):
+    raise ValueError('Sharded evaluation needs an ObjectDetectionEvaluator, '
+                     'got {}.'.format(type(evaluator).__name__))
+  if images_per_shard < 1:
+    raise ValueError('images_per_shard must be positive.')
+  if num_workers is None:
+    num_workers = os.cpu_count() or 1
+  shards = _shards(_unique_examples(examples), images_per_shard)
+  tasks = ((evaluator_fn, shard) for shard in shards)
+
+  if num_workers <= 1:
+    for task in tasks:
+      evaluator.merge_internal_state(*evaluate_shard(task))
+    return evaluator
+
+  context = multiprocessing.get_context('spawn')
+  with concurrent.futures.ProcessPoolExecutor(
+      max_workers=num_workers, mp_context=context) as executor:
+    pending = [executor.submit(evaluate_shard, task)
+               for task in itertools.islice(tasks, 2 * num_workers)]
+    while pending:
+      # Merging the oldest shard first keeps the merged state in input order.
+      image_ids, state = pending.pop(0).result()
+      evaluator.merge_internal_state(image_ids, state)
+      for task in itertools.islice(tasks, 1):
+        pending.append(executor.submit(evaluate_shard, task))
+  return evaluator
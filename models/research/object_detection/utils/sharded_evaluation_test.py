@@ -0,0 +1,102 @@
+# Copyright 2026 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for object_detection.utils.sharded_evaluation."""
+import functools
+
+import numpy as np
+import tensorflow.compat.v1 as tf
+
+from object_detection.core import standard_fields
+from object_detection.utils import object_detection_evaluation
+from object_detection.utils import sharded_evaluation
+
+_CATEGORIES = [{'id': 1, 'name': 'Total'}, {'id': 2, 'name': 'Date'},
+               {'id': 3, 'name': 'Vendor'}]
+
+
+def _examples(num_images, seed=0):
+  rng = np.random.RandomState(seed)
+  examples = []
+  for image_id in range(num_images):
+    num_gt = rng.randint(1, 5)
+    corner = rng.uniform(0, 50, size=(num_gt, 2))
+    gt_boxes = np.concatenate([corner, corner + 20], axis=1)
+    gt_classes = rng.randint(1, 4, size=num_gt)
+    num_det = rng.randint(0, 8)
+    det_boxes = gt_boxes[rng.randint(num_gt, size=num_det)] + rng.normal(
+        0, 3, size=(num_det, 4))
+    examples.append((image_id, {
+        standard_fields.InputDataFields.groundtruth_boxes:
+            gt_boxes.astype(np.float32),
+        standard_fields.InputDataFields.groundtruth_classes: gt_classes,
+    }, {
+        standard_fields.DetectionResultFields.detection_boxes:
+            det_boxes.astype(np.float32),
+        standard_fields.DetectionResultFields.detection_scores:
+            rng.uniform(size=num_det).astype(np.float32),
+        standard_fields.DetectionResultFields.detection_classes:
+            rng.randint(1, 4, size=num_det),
+    }))
+  return examples
+
+
+class ShardedEvaluationTest(tf.test.TestCase):
+
+  def setUp(self):
+    super(ShardedEvaluationTest, self).setUp()
+    self._evaluator_fn = functools.partial(
+        object_detection_evaluation.PascalDetectionEvaluator, _CATEGORIES)
+    self._examples = _examples(50)
+    evaluator = self._evaluator_fn()
+    for image_id, groundtruth_dict, detections_dict in self._examples:
+      evaluator.add_single_ground_truth_image_info(image_id, groundtruth_dict)
+      evaluator.add_single_detected_image_info(image_id, detections_dict)
+    self._expected_metrics = evaluator.evaluate()
+
+  def test_in_process_shards_match_serial_evaluation(self):
+    evaluator = sharded_evaluation.evaluate_sharded(
+        self._evaluator_fn, iter(self._examples), num_workers=1,
+        images_per_shard=7)
+    self.assertEqual(evaluator.evaluate(), self._expected_metrics)
+
+  def test_worker_processes_match_serial_evaluation(self):
+    evaluator = sharded_evaluation.evaluate_sharded(
+        self._evaluator_fn, self._examples, num_workers=2,
+        images_per_shard=4)
+    self.assertEqual(evaluator.evaluate(), self._expected_metrics)
+
+  def test_repeated_image_ids_are_skipped(self):
+    # Image 3 again, with the groundtruth and detections of image 10, in a
+    # later shard than the first one.
+    examples = self._examples + [(3,) + self._examples[10][1:]]
+    for num_workers in (1, 2):
+      evaluator = sharded_evaluation.evaluate_sharded(
+          self._evaluator_fn, examples, num_workers=num_workers,
+          images_per_shard=7)
+      self.assertEqual(evaluator.evaluate(), self._expected_metrics)
+
+  def test_compact_state_keeps_one_array_per_class(self):
+    _, state = sharded_evaluation.evaluate_shard(
+        (self._evaluator_fn, self._examples))
+    for arrays in state.scores_per_class + state.tp_fp_labels_per_class:
+      self.assertLessEqual(len(arrays), 1)
+
+  def test_rejects_evaluators_without_internal_state(self):
+    with self.assertRaises(ValueError):
+      sharded_evaluation.evaluate_sharded(lambda: object(), [])
+
+
+if __name__ == '__main__':
+  tf.test.main()
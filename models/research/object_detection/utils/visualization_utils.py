@@ -25,6 +25,8 @@ from __future__ import print_function
 
 import abc
 import collections
+import concurrent.futures
+import functools
 # Set headless-friendly backend.
 import matplotlib; matplotlib.use('Agg')  # pylint: disable=multiple-statements
 import matplotlib.pyplot as plt  # pylint: disable=g-import-not-at-top
@@ -128,6 +130,63 @@ def encode_image_array_as_png_str(image):
   return png_string
 
 
+@functools.lru_cache(maxsize=None)
+def _load_font():
+  """Returns the font of the display strings, loading it once per process."""
+  try:
+    return ImageFont.truetype('arial.ttf', 24)
+  except IOError:
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=4096)
+def _text_size(font, display_str):
+  """Returns the (width, height) of display_str rendered with font."""
+  bbox = font.getbbox(display_str)
+  return bbox[2], bbox[3]
+
+
+@functools.lru_cache(maxsize=None)
+def _color_to_rgb(color):
+  return np.array(ImageColor.getrgb(color)[:3], dtype=np.uint8)
+
+
+@functools.lru_cache(maxsize=4096)
+def _display_str_patch(display_str, color):
+  """Renders a display string label once per (display_str, color).
+
+  Args:
+    display_str: the string to render.
+    color: fill color of the label background.
+
+  Returns:
+    A read-only uint8 numpy array with shape [height, width, 3] holding
+    display_str in black on a rectangle filled with color, laid out as
+    draw_bounding_box_on_image lays out a single label.
+  """
+  font = _load_font()
+  text_width, text_height = _text_size(font, display_str)
+  margin = int(np.ceil(0.05 * text_height))
+  patch = Image.new('RGB', (text_width + 1, text_height + 2 * margin + 1),
+                    color)
+  ImageDraw.Draw(patch).text((margin, margin), display_str, fill='black',
+                             font=font)
+  patch = np.array(patch)
+  patch.setflags(write=False)
+  return patch
+
+
+def _paste_patch(image, patch, top, left):
+  """Copies patch into image at (top, left), clipped to the image."""
+  im_height, im_width = image.shape[:2]
+  patch_height, patch_width = patch.shape[:2]
+  y0, x0 = max(top, 0), max(left, 0)
+  y1 = min(top + patch_height, im_height)
+  x1 = min(left + patch_width, im_width)
+  if y1 > y0 and x1 > x0:
+    image[y0:y1, x0:x1, :3] = patch[y0 - top:y1 - top, x0 - left:x1 - left]
+
+
 def draw_bounding_box_on_image_array(image,
                                      ymin,
                                      xmin,
@@ -208,15 +267,12 @@ def draw_bounding_box_on_image(image,
                (left, top)],
               width=thickness,
               fill=color)
-  try:
-    font = ImageFont.truetype('arial.ttf', 24)
-  except IOError:
-    font = ImageFont.load_default()
+  font = _load_font()
 
   # If the total height of the display strings added to the top of the bounding
   # box exceeds the top of the image, stack the strings below the bounding box
   # instead of above.
-  display_str_heights = [font.getbbox(ds)[3] for ds in display_str_list]
+  display_str_heights = [_text_size(font, ds)[1] for ds in display_str_list]
   # Each display_str has a top and bottom margin of 0.05x.
   total_display_str_height = (1 + 2 * 0.05) * sum(display_str_heights)
 
@@ -226,8 +282,7 @@ def draw_bounding_box_on_image(image,
     text_bottom = bottom + total_display_str_height
   # Reverse list and print from bottom to top.
   for display_str in display_str_list[::-1]:
-    bbox = font.getbbox(display_str)
-    text_width, text_height = bbox[2], bbox[3]
+    text_width, text_height = _text_size(font, display_str)
     margin = np.ceil(0.05 * text_height)
     draw.rectangle(
         [(left, text_bottom - text_height - 2 * margin), (left + text_width,
@@ -241,6 +296,83 @@ def draw_bounding_box_on_image(image,
     text_bottom -= text_height - 2 * margin
 
 
+def draw_bounding_boxes_on_image_array_fast(image,
+                                            boxes,
+                                            colors,
+                                            thickness=4,
+                                            display_str_list_list=(),
+                                            use_normalized_coordinates=True):
+  """Draws bounding boxes and their labels directly into a numpy image.
+
+  Unlike draw_bounding_boxes_on_image_array, the image is never converted to
+  PIL: box edges are written as numpy slices (square corners, edges centered
+  on the box coordinates) and every label is rendered once per
+  (string, color) and then copied into place. Labels are laid out as in
+  draw_bounding_box_on_image, so the output closely matches the PIL version.
+
+  Args:
+    image: a numpy array with shape [height, width, 3], modified in place.
+    boxes: a 2 dimensional numpy array of [N, 4]: (ymin, xmin, ymax, xmax).
+    colors: a list of N colors, or a single color for all boxes.
+    thickness: line thickness. Default value is 4.
+    display_str_list_list: list of N lists of strings to display in each box,
+      or empty to draw no labels.
+    use_normalized_coordinates: If True (default), treat coordinates
+      ymin, xmin, ymax, xmax as relative to the image.  Otherwise treat
+      coordinates as absolute.
+
+  Raises:
+    ValueError: if boxes is not a [N, 4] array
+  """
+  boxes = np.asarray(boxes, dtype=np.float64)
+  if boxes.size == 0:
+    return
+  if len(boxes.shape) != 2 or boxes.shape[1] != 4:
+    raise ValueError('Input must be of size [N, 4]')
+  if isinstance(colors, six.string_types):
+    colors = [colors] * boxes.shape[0]
+  im_height, im_width = image.shape[:2]
+  if use_normalized_coordinates:
+    boxes = boxes * [im_height, im_width, im_height, im_width]
+  top, left, bottom, right = np.round(boxes).astype(np.int64).T
+  # Outer and inner bounds of the edges of every box, clipped to the image.
+  outer_top = np.clip(top - thickness // 2, 0, im_height)
+  outer_left = np.clip(left - thickness // 2, 0, im_width)
+  outer_bottom = np.clip(bottom - thickness // 2 + thickness, 0, im_height)
+  outer_right = np.clip(right - thickness // 2 + thickness, 0, im_width)
+  inner_top = np.clip(top - thickness // 2 + thickness, 0, im_height)
+  inner_left = np.clip(left - thickness // 2 + thickness, 0, im_width)
+  inner_bottom = np.clip(bottom - thickness // 2, 0, im_height)
+  inner_right = np.clip(right - thickness // 2, 0, im_width)
+  font = _load_font()
+  for i, color in enumerate(colors):
+    rgb = _color_to_rgb(color)
+    if thickness > 0:
+      image[outer_top[i]:inner_top[i], outer_left[i]:outer_right[i], :3] = rgb
+      image[inner_bottom[i]:outer_bottom[i],
+            outer_left[i]:outer_right[i], :3] = rgb
+      image[outer_top[i]:outer_bottom[i],
+            outer_left[i]:inner_left[i], :3] = rgb
+      image[outer_top[i]:outer_bottom[i],
+            inner_right[i]:outer_right[i], :3] = rgb
+    if i >= len(display_str_list_list):
+      continue
+    display_str_list = display_str_list_list[i]
+    total_display_str_height = (1 + 2 * 0.05) * sum(
+        _text_size(font, ds)[1] for ds in display_str_list)
+    if boxes[i, 0] > total_display_str_height:
+      text_bottom = boxes[i, 0]
+    else:
+      text_bottom = boxes[i, 2] + total_display_str_height
+    for display_str in display_str_list[::-1]:
+      text_height = _text_size(font, display_str)[1]
+      margin = np.ceil(0.05 * text_height)
+      _paste_patch(image, _display_str_patch(display_str, color),
+                   int(round(text_bottom - text_height - 2 * margin)),
+                   int(round(boxes[i, 1])))
+      text_bottom -= text_height - 2 * margin
+
+
 def draw_bounding_boxes_on_image_array(image,
                                        boxes,
                                        color='red',
@@ -1121,7 +1253,8 @@ def visualize_boxes_and_labels_on_image_array(
     skip_boxes=False,
     skip_scores=False,
     skip_labels=False,
-    skip_track_ids=False):
+    skip_track_ids=False,
+    fast_rendering=False):
   """Overlay labeled boxes on an image with formatted scores and label names.
 
   This function groups boxes that correspond to the same location
@@ -1169,6 +1302,8 @@ def visualize_boxes_and_labels_on_image_array(
     skip_scores: whether to skip score when drawing a single detection
     skip_labels: whether to skip label when drawing a single detection
     skip_track_ids: whether to skip track id when drawing a single detection
+    fast_rendering: whether to draw boxes and labels with
+      draw_bounding_boxes_on_image_array_fast instead of PIL.
 
   Returns:
     uint8 numpy array with shape (img_height, img_width, 3) with overlaid boxes.
@@ -1231,6 +1366,38 @@ def visualize_boxes_and_labels_on_image_array(
           box_to_color_map[box] = STANDARD_COLORS[
               classes[i] % len(STANDARD_COLORS)]
 
+  thickness = 0 if skip_boxes else line_thickness
+  if (instance_masks is None and instance_boundaries is None and
+      keypoints is None):
+    # Nothing is drawn between the boxes, so they are all drawn in one pass.
+    if not box_to_color_map:
+      return image
+    if fast_rendering:
+      draw_bounding_boxes_on_image_array_fast(
+          image,
+          np.array(list(box_to_color_map.keys())),
+          list(box_to_color_map.values()),
+          thickness=thickness,
+          display_str_list_list=[
+              box_to_display_str_map[box] for box in box_to_color_map],
+          use_normalized_coordinates=use_normalized_coordinates)
+    else:
+      image_pil = Image.fromarray(np.uint8(image)).convert('RGB')
+      for box, color in box_to_color_map.items():
+        ymin, xmin, ymax, xmax = box
+        draw_bounding_box_on_image(
+            image_pil,
+            ymin,
+            xmin,
+            ymax,
+            xmax,
+            color=color,
+            thickness=thickness,
+            display_str_list=box_to_display_str_map[box],
+            use_normalized_coordinates=use_normalized_coordinates)
+      np.copyto(image, np.array(image_pil))
+    return image
+
   # Draw all boxes onto image.
   for box, color in box_to_color_map.items():
     ymin, xmin, ymax, xmax = box
@@ -1248,16 +1415,25 @@ def visualize_boxes_and_labels_on_image_array(
           color='red',
           alpha=1.0
       )
-    draw_bounding_box_on_image_array(
-        image,
-        ymin,
-        xmin,
-        ymax,
-        xmax,
-        color=color,
-        thickness=0 if skip_boxes else line_thickness,
-        display_str_list=box_to_display_str_map[box],
-        use_normalized_coordinates=use_normalized_coordinates)
+    if fast_rendering:
+      draw_bounding_boxes_on_image_array_fast(
+          image,
+          np.array([box]),
+          [color],
+          thickness=thickness,
+          display_str_list_list=[box_to_display_str_map[box]],
+          use_normalized_coordinates=use_normalized_coordinates)
+    else:
+      draw_bounding_box_on_image_array(
+          image,
+          ymin,
+          xmin,
+          ymax,
+          xmax,
+          color=color,
+          thickness=thickness,
+          display_str_list=box_to_display_str_map[box],
+          use_normalized_coordinates=use_normalized_coordinates)
     if keypoints is not None:
       keypoint_scores_for_box = None
       if box_to_keypoint_scores_map:
@@ -1277,6 +1453,56 @@ def visualize_boxes_and_labels_on_image_array(
   return image
 
 
+def visualize_boxes_and_labels_on_image_batch(images,
+                                              boxes,
+                                              classes,
+                                              scores,
+                                              category_index,
+                                              num_threads=None,
+                                              fast_rendering=True,
+                                              **kwargs):
+  """Runs visualize_boxes_and_labels_on_image_array over a batch of images.
+
+  The images are drawn in a thread pool; fonts and rendered labels are cached
+  per process and shared by all threads.
+
+  Args:
+    images: a list of uint8 numpy arrays with shape (img_height, img_width, 3),
+      or a uint8 numpy array of shape [batch, img_height, img_width, 3]. Each
+      image is modified in place.
+    boxes: a list of numpy arrays of shape [N, 4], one per image.
+    classes: a list of numpy arrays of shape [N], one per image.
+    scores: a list of numpy arrays of shape [N], one per image, or None to
+      draw all boxes as groundtruth.
+    category_index: a dict containing category dictionaries (each holding
+      category index `id` and category name `name`) keyed by category indices.
+    num_threads: number of drawing threads. Defaults to the number of cores.
+    fast_rendering: whether to draw with draw_bounding_boxes_on_image_array_fast
+      (default) instead of PIL.
+    **kwargs: additional arguments of visualize_boxes_and_labels_on_image_array
+      shared by all images, e.g. min_score_thresh or line_thickness.
+
+  Returns:
+    a list with the drawn images.
+
+  Raises:
+    ValueError: if images, boxes, classes and scores differ in length.
+  """
+  if scores is None:
+    scores = [None] * len(images)
+  if not len(images) == len(boxes) == len(classes) == len(scores):
+    raise ValueError('images, boxes, classes and scores must have the same '
+                     'length.')
+
+  def visualize(args):
+    return visualize_boxes_and_labels_on_image_array(
+        *args, category_index=category_index, fast_rendering=fast_rendering,
+        **kwargs)
+
+  with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as pool:
+    return list(pool.map(visualize, zip(images, boxes, classes, scores)))
+
+
 def add_cdf_image_summary(values, name):
   """Adds a tf.summary.image for a CDF plot of the values.
 
@@ -614,5 +614,40 @@ class VisualizationUtilsTest(test_case.TestCase):
     self.assertGreater(np.abs(np.sum(test_image - ori_image)), 0)
 
 
+  def test_draw_bounding_boxes_on_image_array_fast(self):
+    test_image = np.full([100, 200, 3], 255, dtype=np.uint8)
+    boxes = np.array([[0.25, 0.2, 0.75, 0.6],
+                      [0.1, 0.1, 0.9, 0.9]])
+
+    visualization_utils.draw_bounding_boxes_on_image_array_fast(
+        test_image, boxes, ['red', 'blue'], thickness=2,
+        display_str_list_list=[['cat: 90%'], []])
+    self.assertAllEqual(test_image[50, 40], [255, 0, 0])
+    self.assertAllEqual(test_image[50, 20], [0, 0, 255])
+    self.assertAllEqual(test_image[50, 100], [255, 255, 255])
+
+  def test_visualize_boxes_and_labels_on_image_batch(self):
+    images = [np.full([60, 80, 3], 255, dtype=np.uint8) for _ in range(3)]
+    expected = [image.copy() for image in images]
+    boxes = [np.array([[0.1, 0.2, 0.5, 0.6]]), np.zeros((0, 4)),
+             np.array([[0.2, 0.2, 0.8, 0.8], [0.1, 0.1, 0.3, 0.3]])]
+    classes = [np.array([1]), np.zeros(0, np.int32), np.array([2, 1])]
+    scores = [np.array([0.9]), np.zeros(0), np.array([0.8, 0.7])]
+    labelmap = {1: {'id': 1, 'name': 'cat'}, 2: {'id': 2, 'name': 'dog'}}
+    for image, image_boxes, image_classes, image_scores in zip(
+        expected, boxes, classes, scores):
+      visualization_utils.visualize_boxes_and_labels_on_image_array(
+          image, image_boxes, image_classes, image_scores, labelmap,
+          use_normalized_coordinates=True, fast_rendering=True)
+
+    results = visualization_utils.visualize_boxes_and_labels_on_image_batch(
+        images, boxes, classes, scores, labelmap, num_threads=2,
+        use_normalized_coordinates=True)
+    for result, expected_image in zip(results, expected):
+      self.assertAllEqual(result, expected_image)
+    self.assertEqual(np.sum(255 - results[1]), 0)
+    self.assertGreater(np.sum(255 - results[2]), 0)
+
+
 if __name__ == '__main__':
   tf.test.main()
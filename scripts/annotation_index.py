@@ -0,0 +1,414 @@
+""" Cached index of Pascal VOC (labelImg) annotations
+
+usage: annotation_index.py [-h] -x XML_DIR [-c CSV_PATH] [--cache_path CACHE_PATH] [-j NUM_WORKERS]
+                           [--stats]
+
+One place to read the XML annotations under images/train_images and
+images/test_images. Files are parsed in parallel with a streaming iterparse
+and the result is stored as a columnar table:
+
+  images   filename, width, height, xml file name, xml size and mtime
+  objects  image index, class id, xmin, ymin, xmax, ymax (int32)
+
+The table is cached next to the XML files (XML_DIR/.annotation_index.parquet
+when pyarrow is installed, XML_DIR/.annotation_index.npz otherwise). On load,
+every XML file is stat()ed and only files that were added or whose size or
+mtime changed are parsed again, so reopening an unchanged index costs one
+directory listing.
+
+The record builders, the annotation visualizer and the evaluation tools all
+query the same AnnotationIndex:
+
+  index = AnnotationIndex.load('images/test_images')
+  index.image('Invoice_1.jpg')          # boxes and class names for one image
+  index.boxes_for_class('Total')        # (image filenames, N x 4 boxes)
+  index.class_counts()                  # {'CompanyName': 1000, ...}
+  index.groundtruth('Invoice_1.jpg', label_map_dict)   # evaluator input
+"""
+
+import os
+import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+CSV_COLUMNS = ['filename', 'width', 'height', 'class', 'xmin', 'ymin', 'xmax', 'ymax']
+BOX_COLUMNS = ('xmin', 'ymin', 'xmax', 'ymax')
+INDEX_VERSION = 1
+
+# Parsing a handful of files is faster than starting a process pool
+PARALLEL_MIN_FILES = 64
+
+
+def parse_annotation(xml_file):
+    """Stream a labelImg XML file and return its image record.
+
+    Parameters:
+    ----------
+    xml_file : str
+        Path to a Pascal VOC .xml file
+    Returns
+    -------
+    tuple
+        (filename, width, height, objects) where objects is a list of
+        (class, xmin, ymin, xmax, ymax) tuples. width/height are 0 when the
+        annotation has no <size> element.
+    """
+    filename = None
+    width = height = 0
+    objects = []
+    name = None
+    box = {}
+    for _, elem in ET.iterparse(xml_file, events=('end',)):
+        tag = elem.tag
+        if tag == 'filename':
+            filename = elem.text
+        elif tag == 'width':
+            width = int(float(elem.text))
+        elif tag == 'height':
+            height = int(float(elem.text))
+        elif tag == 'name':
+            name = elem.text
+        elif tag in BOX_COLUMNS:
+            box[tag] = int(float(elem.text))
+        elif tag == 'object':
+            objects.append((name, box['xmin'], box['ymin'], box['xmax'], box['ymax']))
+            name = None
+            box = {}
+            elem.clear()
+    return filename, width, height, objects
+
+
+def parse_annotations(xml_files, num_workers=None):
+    """Parse many XML files, in a process pool when there are enough of them."""
+    if len(xml_files) < PARALLEL_MIN_FILES or num_workers == 1:
+        return [parse_annotation(xml_file) for xml_file in xml_files]
+    num_workers = num_workers or os.cpu_count() or 1
+    chunksize = max(1, len(xml_files) // (num_workers * 4))
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        return list(pool.map(parse_annotation, xml_files, chunksize=chunksize))
+
+
+def _default_cache_path(xml_dir):
+    suffix = '.parquet' if pq is not None else '.npz'
+    return os.path.join(xml_dir, '.annotation_index' + suffix)
+
+
+class AnnotationIndex(object):
+    """Columnar, queryable view of a directory of labelImg annotations.
+
+    Image-level columns are indexed by image position; object-level columns
+    are sorted by image and addressed through ``offsets`` (objects of image i
+    are ``offsets[i]:offsets[i + 1]``).
+    """
+
+    def __init__(self, xml_dir, filenames, widths, heights, xml_names, xml_stats,
+                 class_names, object_classes, boxes, offsets):
+        self.xml_dir = xml_dir
+        self.filenames = np.asarray(filenames, dtype=object)
+        self.widths = np.asarray(widths, dtype=np.int32)
+        self.heights = np.asarray(heights, dtype=np.int32)
+        self.xml_names = np.asarray(xml_names, dtype=object)
+        self.xml_stats = np.asarray(xml_stats, dtype=np.int64).reshape(-1, 2)
+        self.class_names = list(class_names)
+        self.object_classes = np.asarray(object_classes, dtype=np.int32)
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._by_filename = {name: i for i, name in enumerate(self.filenames)}
+        self._class_ids = {name: i for i, name in enumerate(self.class_names)}
+
+    def __len__(self):
+        return len(self.filenames)
+
+    @property
+    def object_images(self):
+        """Image position of every object."""
+        return np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.offsets))
+
+    # ---------------------------------------------------------------- build
+
+    @classmethod
+    def from_records(cls, xml_dir, xml_names, xml_stats, records):
+        """Build an index from parse_annotation() records."""
+        class_ids = {}
+        object_classes = []
+        boxes = []
+        offsets = [0]
+        for _, _, _, objects in records:
+            for label, xmin, ymin, xmax, ymax in objects:
+                object_classes.append(class_ids.setdefault(label, len(class_ids)))
+                boxes.append((xmin, ymin, xmax, ymax))
+            offsets.append(len(boxes))
+        return cls(xml_dir,
+                   [record[0] for record in records],
+                   [record[1] for record in records],
+                   [record[2] for record in records],
+                   xml_names, xml_stats, list(class_ids),
+                   object_classes, boxes, offsets)
+
+    @classmethod
+    def build(cls, xml_dir, num_workers=None):
+        """Parse every XML file in xml_dir (no cache)."""
+        xml_names = sorted(name for name in os.listdir(xml_dir) if name.endswith('.xml'))
+        xml_stats = [_stat(os.path.join(xml_dir, name)) for name in xml_names]
+        records = parse_annotations([os.path.join(xml_dir, name) for name in xml_names],
+                                    num_workers)
+        return cls.from_records(xml_dir, xml_names, xml_stats, records)
+
+    @classmethod
+    def load(cls, xml_dir, cache_path=None, num_workers=None):
+        """Open the cached index for xml_dir, re-parsing only changed files.
+
+        Parameters:
+        ----------
+        xml_dir : str
+            Directory containing the .xml files
+        cache_path : str
+            Cache file; defaults to XML_DIR/.annotation_index.parquet (or .npz
+            without pyarrow). Pass an empty string to disable caching.
+        num_workers : int
+            Parser processes; defaults to the number of CPUs
+        Returns
+        -------
+        AnnotationIndex
+        """
+        if cache_path is None:
+            cache_path = _default_cache_path(xml_dir)
+        xml_names = sorted(name for name in os.listdir(xml_dir) if name.endswith('.xml'))
+        xml_stats = [_stat(os.path.join(xml_dir, name)) for name in xml_names]
+
+        cached = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                cached = cls._read(xml_dir, cache_path)
+            except (OSError, KeyError, ValueError):
+                cached = None
+
+        if cached is not None:
+            position = {name: i for i, name in enumerate(cached.xml_names)}
+            if (len(position) == len(xml_names)
+                    and all(position.get(name) == i and
+                            tuple(cached.xml_stats[i]) == stat
+                            for i, (name, stat) in enumerate(zip(xml_names, xml_stats)))):
+                return cached
+        else:
+            position = {}
+
+        # Reuse records of unchanged files, parse the rest
+        stale = [name for name, stat in zip(xml_names, xml_stats)
+                 if name not in position or tuple(cached.xml_stats[position[name]]) != stat]
+        parsed = dict(zip(stale, parse_annotations(
+            [os.path.join(xml_dir, name) for name in stale], num_workers)))
+        records = [parsed[name] if name in parsed else cached.record(position[name])
+                   for name in xml_names]
+        index = cls.from_records(xml_dir, xml_names, xml_stats, records)
+        if cache_path:
+            index.save(cache_path)
+        return index
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, cache_path):
+        """Write the index atomically as Parquet (or .npz without pyarrow)."""
+        tmp_path = cache_path + '.tmp'
+        counts = np.diff(self.offsets)
+        if cache_path.endswith('.parquet'):
+            if pq is None:
+                raise ImportError('pyarrow is required to write {}'.format(cache_path))
+            offsets = pa.array(self.offsets.astype(np.int32))
+            columns = {
+                'filename': pa.array(list(self.filenames), pa.string()),
+                'width': pa.array(self.widths),
+                'height': pa.array(self.heights),
+                'xml_name': pa.array(list(self.xml_names), pa.string()),
+                'xml_size': pa.array(self.xml_stats[:, 0]),
+                'xml_mtime_ns': pa.array(self.xml_stats[:, 1]),
+                'class': pa.ListArray.from_arrays(offsets, pa.DictionaryArray.from_arrays(
+                    pa.array(self.object_classes), pa.array(self.class_names, pa.string()))),
+            }
+            for column, name in enumerate(BOX_COLUMNS):
+                columns[name] = pa.ListArray.from_arrays(
+                    offsets, pa.array(self.boxes[:, column]))
+            table = pa.table(columns).replace_schema_metadata(
+                {'annotation_index_version': str(INDEX_VERSION)})
+            pq.write_table(table, tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f,
+                         version=np.int32(INDEX_VERSION),
+                         filenames=np.array(self.filenames, dtype=str),
+                         widths=self.widths, heights=self.heights,
+                         xml_names=np.array(self.xml_names, dtype=str),
+                         xml_stats=self.xml_stats,
+                         class_names=np.array(self.class_names, dtype=str),
+                         object_classes=self.object_classes,
+                         boxes=self.boxes, counts=counts)
+        os.replace(tmp_path, cache_path)
+
+    @classmethod
+    def _read(cls, xml_dir, cache_path):
+        if cache_path.endswith('.parquet'):
+            if pq is None:
+                return None
+            table = pq.read_table(cache_path)
+            metadata = table.schema.metadata or {}
+            if metadata.get(b'annotation_index_version') != str(INDEX_VERSION).encode():
+                return None
+            classes = table.column('class').combine_chunks()
+            offsets = classes.offsets.to_numpy()
+            values = classes.flatten()
+            boxes = np.stack([table.column(name).combine_chunks().flatten().to_numpy()
+                              for name in BOX_COLUMNS], axis=1)
+            return cls(xml_dir,
+                       table.column('filename').to_pylist(),
+                       table.column('width').to_numpy(),
+                       table.column('height').to_numpy(),
+                       table.column('xml_name').to_pylist(),
+                       np.stack([table.column('xml_size').to_numpy(),
+                                 table.column('xml_mtime_ns').to_numpy()], axis=1),
+                       values.dictionary.to_pylist(),
+                       values.indices.to_numpy(),
+                       boxes, offsets)
+        with np.load(cache_path) as data:
+            if int(data['version']) != INDEX_VERSION:
+                return None
+            offsets = np.concatenate([[0], np.cumsum(data['counts'])])
+            return cls(xml_dir,
+                       data['filenames'].tolist(), data['widths'], data['heights'],
+                       data['xml_names'].tolist(), data['xml_stats'],
+                       data['class_names'].tolist(), data['object_classes'],
+                       data['boxes'], offsets)
+
+    # ---------------------------------------------------------------- queries
+
+    def record(self, i):
+        """parse_annotation()-style tuple for the image at position i."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        objects = [(self.class_names[class_id], int(xmin), int(ymin), int(xmax), int(ymax))
+                   for class_id, (xmin, ymin, xmax, ymax)
+                   in zip(self.object_classes[start:end], self.boxes[start:end])]
+        return self.filenames[i], int(self.widths[i]), int(self.heights[i]), objects
+
+    def records(self):
+        """All images as (filename, width, height, objects) tuples."""
+        return [self.record(i) for i in range(len(self))]
+
+    def xml_path(self, i):
+        return os.path.join(self.xml_dir, self.xml_names[i])
+
+    def image(self, filename):
+        """Annotation of one image.
+
+        Returns
+        -------
+        dict
+            filename, width, height, classes (list of names) and boxes
+            (N x 4 int32 xmin, ymin, xmax, ymax in pixels)
+        """
+        i = self._by_filename[filename]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return {
+            'filename': filename,
+            'width': int(self.widths[i]),
+            'height': int(self.heights[i]),
+            'classes': [self.class_names[c] for c in self.object_classes[start:end]],
+            'boxes': self.boxes[start:end],
+        }
+
+    def boxes_for_class(self, class_name):
+        """All boxes of one class.
+
+        Returns
+        -------
+        tuple
+            (filenames, boxes): object array of image filenames and an
+            N x 4 int32 array of xmin, ymin, xmax, ymax
+        """
+        class_id = self._class_ids.get(class_name)
+        if class_id is None:
+            return np.empty(0, dtype=object), np.empty((0, 4), dtype=np.int32)
+        mask = self.object_classes == class_id
+        return self.filenames[self.object_images[mask]], self.boxes[mask]
+
+    def class_counts(self):
+        """Number of boxes per class name."""
+        counts = np.bincount(self.object_classes, minlength=len(self.class_names))
+        return {name: int(count) for name, count in zip(self.class_names, counts)}
+
+    def normalized_boxes(self):
+        """Object boxes as float32 [ymin, xmin, ymax, xmax] in [0, 1]."""
+        images = self.object_images
+        width = self.widths[images].astype(np.float32)
+        height = self.heights[images].astype(np.float32)
+        boxes = self.boxes.astype(np.float32)
+        return np.stack([boxes[:, 1] / height, boxes[:, 0] / width,
+                         boxes[:, 3] / height, boxes[:, 2] / width], axis=1)
+
+    def groundtruth(self, filename, label_map_dict):
+        """Ground truth for ObjectDetectionEvaluator.add_single_ground_truth_image_info.
+
+        Returns
+        -------
+        dict
+            groundtruth_boxes (float32 [ymin, xmin, ymax, xmax] in pixels) and
+            groundtruth_classes (int32 label map ids)
+        """
+        i = self._by_filename[filename]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        boxes = self.boxes[start:end]
+        classes = np.array([label_map_dict[self.class_names[c]]
+                            for c in self.object_classes[start:end]], dtype=np.int32)
+        return {
+            'groundtruth_boxes': boxes[:, [1, 0, 3, 2]].astype(np.float32),
+            'groundtruth_classes': classes,
+        }
+
+    def to_csv(self, csv_path):
+        """Write the legacy xml_to_csv layout (one row per box)."""
+        import csv
+        with open(csv_path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(CSV_COLUMNS)
+            for filename, width, height, objects in self.records():
+                for label, xmin, ymin, xmax, ymax in objects:
+                    writer.writerow([filename, width, height, label, xmin, ymin, xmax, ymax])
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the annotation index")
+    parser.add_argument("-x", "--xml_dir", required=True, type=str,
+                        help="Path to the folder where the input .xml files are stored.")
+    parser.add_argument("-c", "--csv_path", type=str, default=None,
+                        help="Write the annotations in the xml_to_csv layout.")
+    parser.add_argument("--cache_path", type=str, default=None,
+                        help="Index cache file. Defaults to XML_DIR/.annotation_index.parquet")
+    parser.add_argument("-j", "--num_workers", type=int, default=None,
+                        help="Number of parser processes. Defaults to the number of CPUs.")
+    parser.add_argument("--stats", action="store_true", help="Print per-class box counts.")
+    args = parser.parse_args()
+
+    index = AnnotationIndex.load(args.xml_dir, args.cache_path, args.num_workers)
+    print('{} images, {} boxes'.format(len(index), len(index.boxes)))
+    if args.stats:
+        for name, count in sorted(index.class_counts().items()):
+            print('  {}: {}'.format(name, count))
+    if args.csv_path is not None:
+        index.to_csv(args.csv_path)
+        print('Successfully created the CSV file: {}'.format(args.csv_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Tests for annotation_index."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import annotation_index
+from annotation_index import AnnotationIndex
+
+
+def _voc_xml(filename, objects, width=800, height=600):
+    boxes = ''.join(
+        '<object><name>{}</name><pose>Unspecified</pose><truncated>0</truncated>'
+        '<difficult>0</difficult><bndbox><xmin>{}</xmin><ymin>{}</ymin>'
+        '<xmax>{}</xmax><ymax>{}</ymax></bndbox></object>'.format(*obj)
+        for obj in objects)
+    return ('<annotation><folder>images</folder><filename>{}</filename>'
+            '<size><width>{}</width><height>{}</height><depth>3</depth></size>'
+            '<segmented>0</segmented>{}</annotation>').format(filename, width, height, boxes)
+
+
+class AnnotationIndexTest(unittest.TestCase):
+
+    ANNOTATIONS = {
+        'Invoice_1.xml': ('Invoice_1.jpg', [('Total', 10, 20, 110, 40),
+                                            ('CompanyName', 5, 5, 200, 30)]),
+        'Invoice_2.xml': ('Invoice_2.jpg', [('Total', 50, 60, 150, 80)]),
+        'Invoice_3.xml': ('Invoice_3.jpg', []),
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.xml_dir = self.tmp.name
+        for name, (filename, objects) in self.ANNOTATIONS.items():
+            self._write(name, filename, objects)
+        self.cache_path = os.path.join(self.xml_dir, '.annotation_index.npz')
+
+    def _write(self, name, filename, objects, width=800, height=600):
+        with open(os.path.join(self.xml_dir, name), 'w') as f:
+            f.write(_voc_xml(filename, objects, width, height))
+
+    def _touch(self, name, seconds=10):
+        path = os.path.join(self.xml_dir, name)
+        mtime = os.stat(path).st_mtime_ns + seconds * 10 ** 9
+        os.utime(path, ns=(mtime, mtime))
+
+    def _load(self, cache_path=None):
+        """Load the index and return it with the XML names that were parsed."""
+        with mock.patch.object(annotation_index, 'parse_annotations',
+                               wraps=annotation_index.parse_annotations) as parse:
+            index = AnnotationIndex.load(
+                self.xml_dir, self.cache_path if cache_path is None else cache_path)
+        parsed = [os.path.basename(path) for call in parse.call_args_list
+                  for path in call.args[0]]
+        return index, parsed
+
+    def assertMatchesBuild(self, index):
+        expected = AnnotationIndex.build(self.xml_dir)
+        self.assertEqual(index.records(), expected.records())
+        self.assertEqual(index.xml_names.tolist(), expected.xml_names.tolist())
+        np.testing.assert_array_equal(index.xml_stats, expected.xml_stats)
+
+    def test_parse_annotation(self):
+        record = annotation_index.parse_annotation(os.path.join(self.xml_dir, 'Invoice_1.xml'))
+        self.assertEqual(record, ('Invoice_1.jpg', 800, 600,
+                                  [('Total', 10, 20, 110, 40),
+                                   ('CompanyName', 5, 5, 200, 30)]))
+
+    def test_unchanged_directory_parses_nothing(self):
+        index, parsed = self._load()
+        self.assertEqual(parsed, ['Invoice_1.xml', 'Invoice_2.xml', 'Invoice_3.xml'])
+        self.assertTrue(os.path.exists(self.cache_path))
+
+        index, parsed = self._load()
+        self.assertEqual(parsed, [])
+        self.assertMatchesBuild(index)
+        self.assertEqual(index.class_counts(), {'Total': 2, 'CompanyName': 1})
+        self.assertEqual(index.image('Invoice_3.jpg')['classes'], [])
+
+    def test_only_touched_file_is_reparsed(self):
+        self._load()
+        self._touch('Invoice_2.xml')
+        index, parsed = self._load()
+        self.assertEqual(parsed, ['Invoice_2.xml'])
+        self.assertMatchesBuild(index)
+
+        # The refreshed cache is used on the next load
+        index, parsed = self._load()
+        self.assertEqual(parsed, [])
+
+    def test_edited_file_is_reparsed(self):
+        self._load()
+        self._write('Invoice_1.xml', 'Invoice_1.jpg', [('Date', 1, 2, 3, 4)], width=400)
+        self._touch('Invoice_1.xml')
+        index, parsed = self._load()
+        self.assertEqual(parsed, ['Invoice_1.xml'])
+        self.assertEqual(index.image('Invoice_1.jpg')['width'], 400)
+        self.assertEqual(index.class_counts(), {'Date': 1, 'Total': 1})
+        np.testing.assert_array_equal(index.boxes_for_class('Total')[1], [[50, 60, 150, 80]])
+        self.assertMatchesBuild(index)
+
+    def test_added_and_deleted_files(self):
+        self._load()
+        os.remove(os.path.join(self.xml_dir, 'Invoice_1.xml'))
+        index, parsed = self._load()
+        self.assertEqual(parsed, [])
+        self.assertEqual(index.filenames.tolist(), ['Invoice_2.jpg', 'Invoice_3.jpg'])
+        self.assertEqual(index.class_counts(), {'Total': 1})
+        self.assertMatchesBuild(index)
+
+        self._write('Invoice_0.xml', 'Invoice_0.jpg', [('Total', 1, 1, 2, 2)])
+        index, parsed = self._load()
+        self.assertEqual(parsed, ['Invoice_0.xml'])
+        self.assertEqual(index.filenames.tolist(),
+                         ['Invoice_0.jpg', 'Invoice_2.jpg', 'Invoice_3.jpg'])
+        self.assertMatchesBuild(index)
+
+    def test_unreadable_cache_is_rebuilt(self):
+        with open(self.cache_path, 'wb') as f:
+            f.write(b'not an npz file')
+        index, parsed = self._load()
+        self.assertEqual(len(parsed), 3)
+        self.assertMatchesBuild(index)
+
+    def test_empty_cache_path_disables_caching(self):
+        self._load(cache_path='')
+        _, parsed = self._load(cache_path='')
+        self.assertEqual(len(parsed), 3)
+        self.assertEqual([name for name in os.listdir(self.xml_dir)
+                          if name.startswith('.annotation_index')], [])
+
+    def test_npz_fallback_without_pyarrow(self):
+        with mock.patch.object(annotation_index, 'pq', None), \
+                mock.patch.object(annotation_index, 'pa', None):
+            self.assertEqual(annotation_index._default_cache_path(self.xml_dir),
+                             self.cache_path)
+            # A Parquet cache left behind by an install with pyarrow is ignored
+            with open(os.path.join(self.xml_dir, '.annotation_index.parquet'), 'wb') as f:
+                f.write(b'PAR1')
+            index = AnnotationIndex.load(self.xml_dir)
+            self.assertTrue(os.path.exists(self.cache_path))
+            self.assertMatchesBuild(index)
+            self.assertIsNone(AnnotationIndex._read(
+                self.xml_dir, os.path.join(self.xml_dir, '.annotation_index.parquet')))
+
+        with mock.patch.object(annotation_index, 'pq', None):
+            with self.assertRaises(ImportError):
+                index.save(os.path.join(self.xml_dir, 'index.parquet'))
+
+    @unittest.skipIf(annotation_index.pq is None, 'pyarrow is not installed')
+    def test_parquet_round_trip(self):
+        cache_path = os.path.join(self.xml_dir, '.annotation_index.parquet')
+        self.assertEqual(annotation_index._default_cache_path(self.xml_dir), cache_path)
+        self._load(cache_path)
+        self._touch('Invoice_3.xml')
+        index, parsed = self._load(cache_path)
+        self.assertEqual(parsed, ['Invoice_3.xml'])
+        self.assertMatchesBuild(index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,263 @@
+""" Incremental XML-to-TFRecord dataset builder
+
+usage: build_dataset.py [-h] -x XML_DIR -l LABELS_PATH -o OUTPUT_PATH [-i IMAGE_DIR] [-c CSV_PATH]
+                        [-n NUM_SHARDS] [-j NUM_WORKERS] [--cache_dir CACHE_DIR] [--force]
+
+Builds the same records as generate_train_record.py, but keeps a cache next to
+the output so that relabeling a few invoices does not force a full rebuild:
+
+  CACHE_DIR/manifest.json   one entry per XML file: content hashes of the XML
+                            and its image, their stat signatures, the parsed
+                            annotation and the cached Example it produced
+  CACHE_DIR/examples/       serialized tf.Examples, named by content hash
+
+Annotations are read through the cached AnnotationIndex (annotation_index.py).
+On each run, files whose size and mtime match the manifest are trusted without
+reading them; other files are re-hashed, and only pairs whose XML or image
+content actually changed are re-encoded (in a process pool). The shards are
+then re-packed from the cached Examples, which is a sequential copy. A change
+of label map invalidates the whole cache; --force does the same. As in
+generate_train_record.py, annotations without any <object> are cached but not
+written to the shards.
+"""
+
+import os
+import json
+import hashlib
+import contextlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'    # Suppress TensorFlow logging (1)
+import tensorflow.compat.v1 as tf
+
+import generate_train_record as records_lib
+from annotation_index import AnnotationIndex
+
+MANIFEST_VERSION = 1
+
+parser = argparse.ArgumentParser(
+    description="Incremental TensorFlow XML-to-TFRecord dataset builder")
+parser.add_argument("-x", "--xml_dir", required=True, type=str,
+                    help="Path to the folder where the input .xml files are stored.")
+parser.add_argument("-l", "--labels_path", required=True, type=str,
+                    help="Path to the labels (.pbtxt) file.")
+parser.add_argument("-o", "--output_path", required=True, type=str,
+                    help="Path of output TFRecord (.record) file.")
+parser.add_argument("-i", "--image_dir", type=str, default=None,
+                    help="Path to the folder where the input image files are stored. "
+                         "Defaults to the same directory as XML_DIR.")
+parser.add_argument("-c", "--csv_path", type=str, default=None,
+                    help="Path of output .csv file. If none provided, then no file will be "
+                         "written.")
+parser.add_argument("-n", "--num_shards", type=int, default=1,
+                    help="Number of output TFRecord shards.")
+parser.add_argument("-j", "--num_workers", type=int, default=None,
+                    help="Number of worker processes. Defaults to the number of CPUs.")
+parser.add_argument("--cache_dir", type=str, default=None,
+                    help="Cache directory. Defaults to OUTPUT_PATH.cache")
+parser.add_argument("--force", action="store_true",
+                    help="Ignore the cache and re-encode every example.")
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stat_signature(path):
+    """Cheap change detector: [size, mtime_ns], or None if the file is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_manifest(cache_dir, labels_digest):
+    path = os.path.join(cache_dir, 'manifest.json')
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    if (not manifest or manifest.get('version') != MANIFEST_VERSION
+            or manifest.get('labels') != labels_digest):
+        manifest = {'version': MANIFEST_VERSION, 'labels': labels_digest,
+                    'output': None, 'entries': {}}
+    return manifest
+
+
+def save_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, 'manifest.json')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def example_path(cache_dir, entry):
+    return os.path.join(cache_dir, 'examples', entry['example'] + '.tfexample')
+
+
+class Scan(object):
+    """Result of comparing the XML/image files on disk with the manifest."""
+
+    def __init__(self):
+        self.unchanged = []   # XML names whose entry is still valid
+        self.touched = []     # (name, xml_sha, image_name, image_sha): same content, new stat
+        self.dirty = []       # (name, xml_sha, image_name, image_sha): needs re-encoding
+
+
+def scan(xml_files, image_dir, entries, records, num_threads):
+    """Classify each XML file as unchanged, touched or dirty.
+
+    records maps XML file names to their current AnnotationIndex record.
+    """
+    result = Scan()
+    suspects = []
+    for xml_file in xml_files:
+        name = os.path.basename(xml_file)
+        entry = entries.get(name)
+        if (entry is not None
+                and entry['xml_stat'] == stat_signature(xml_file)
+                and entry['image_stat'] == stat_signature(
+                    os.path.join(image_dir, entry['record'][0]))):
+            result.unchanged.append(name)
+        else:
+            suspects.append(xml_file)
+
+    def _hash(xml_file):
+        name = os.path.basename(xml_file)
+        entry = entries.get(name)
+        xml_sha = file_digest(xml_file)
+        if entry is not None and entry['xml_sha'] == xml_sha:
+            image_name = entry['record'][0]
+        else:
+            image_name = records[name][0]
+        image_path = os.path.join(image_dir, image_name)
+        image_sha = file_digest(image_path) if os.path.exists(image_path) else None
+        return name, xml_sha, image_name, image_sha
+
+    # hashlib releases the GIL, so threads are enough for hashing
+    with ThreadPoolExecutor(max_workers=num_threads) as pool:
+        for item in pool.map(_hash, suspects):
+            name, xml_sha, image_name, image_sha = item
+            entry = entries.get(name)
+            if (entry is not None and entry['xml_sha'] == xml_sha
+                    and entry['image_sha'] == image_sha):
+                result.touched.append(item)
+            else:
+                result.dirty.append(item)
+    return result
+
+
+def encode(dirty, records, image_dir, labels_path, num_workers):
+    """Re-encode changed pairs in a process pool; yields (item, record, serialized)."""
+    if not dirty:
+        return
+    dirty_records = [records[item[0]] for item in dirty]
+    chunksize = max(1, len(dirty_records) // (num_workers * 4))
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=records_lib.init_worker,
+                             initargs=(labels_path, image_dir)) as pool:
+        results = pool.map(records_lib.process_record, dirty_records, chunksize=chunksize)
+        for item, record, serialized in zip(dirty, dirty_records, results):
+            yield item, record, serialized
+
+
+def repack(output_path, num_shards, cache_dir, entries, names):
+    """Write the shards from cached Examples in sorted XML order."""
+    with contextlib.ExitStack() as tf_record_close_stack:
+        writers = records_lib.open_writers(tf_record_close_stack, output_path, num_shards)
+        for index, name in enumerate(names):
+            with open(example_path(cache_dir, entries[name]), 'rb') as f:
+                writers[index % len(writers)].write(f.read())
+
+
+def outputs_exist(output_path, num_shards):
+    if num_shards > 1:
+        return all(os.path.exists('{}-{:05d}-of-{:05d}'.format(output_path, idx, num_shards))
+                   for idx in range(num_shards))
+    return os.path.exists(output_path)
+
+
+def main(_):
+    cache_dir = args.cache_dir or args.output_path + '.cache'
+    os.makedirs(os.path.join(cache_dir, 'examples'), exist_ok=True)
+    num_workers = args.num_workers or os.cpu_count() or 1
+
+    labels_digest = file_digest(args.labels_path)
+    manifest = load_manifest(cache_dir, labels_digest)
+    if args.force:
+        manifest['entries'] = {}
+    entries = manifest['entries']
+
+    annotations = AnnotationIndex.load(args.xml_dir, num_workers=num_workers)
+    names = list(annotations.xml_names)
+    xml_files = [os.path.join(args.xml_dir, name) for name in names]
+    records = {name: annotations.record(i) for i, name in enumerate(names)}
+    result = scan(xml_files, args.image_dir, entries, records, num_workers)
+
+    for name, xml_sha, image_name, image_sha in result.touched:
+        image_path = os.path.join(args.image_dir, image_name)
+        entries[name]['xml_stat'] = stat_signature(os.path.join(args.xml_dir, name))
+        entries[name]['image_stat'] = stat_signature(image_path)
+
+    for item, record, serialized in encode(result.dirty, records, args.image_dir,
+                                           args.labels_path, num_workers):
+        name, xml_sha, image_name, image_sha = item
+        key = hashlib.sha256((xml_sha + (image_sha or '')).encode('ascii')).hexdigest()[:32]
+        entry = {
+            'xml_sha': xml_sha,
+            'image_sha': image_sha,
+            'xml_stat': stat_signature(os.path.join(args.xml_dir, name)),
+            'image_stat': stat_signature(os.path.join(args.image_dir, image_name)),
+            'record': list(record),
+            'example': key,
+        }
+        path = example_path(cache_dir, entry)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(serialized)
+        os.replace(path + '.tmp', path)
+        entries[name] = entry
+
+    present = set(names)
+    removed = [name for name in entries if name not in present]
+    for name in removed:
+        del entries[name]
+    referenced = {entry['example'] for entry in entries.values()}
+    for cached in os.listdir(os.path.join(cache_dir, 'examples')):
+        if os.path.splitext(cached)[0] not in referenced:
+            os.remove(os.path.join(cache_dir, 'examples', cached))
+
+    written = [name for name in names if entries[name]['record'][3]]
+    output = {'path': os.path.abspath(args.output_path), 'num_shards': args.num_shards,
+              'examples': [entries[name]['example'] for name in written]}
+    if (result.dirty or removed or manifest['output'] != output
+            or not outputs_exist(args.output_path, args.num_shards)):
+        repack(args.output_path, args.num_shards, cache_dir, entries, written)
+        manifest['output'] = output
+        print('Re-packed {} examples into {} shard(s): {}'.format(
+            len(written), args.num_shards, args.output_path))
+    else:
+        print('TFRecord is up to date: {}'.format(args.output_path))
+    save_manifest(cache_dir, manifest)
+
+    print('{} unchanged, {} re-encoded, {} removed, {} without objects skipped'.format(
+        len(result.unchanged) + len(result.touched), len(result.dirty), len(removed),
+        len(names) - len(written)))
+    if args.csv_path is not None:
+        annotations.to_csv(args.csv_path)
+        print('Successfully created the CSV file: {}'.format(args.csv_path))
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    if args.image_dir is None:
+        args.image_dir = args.xml_dir
+    tf.app.run()
@@ -1,6 +1,7 @@
 """ Sample TensorFlow XML-to-TFRecord converter
 
 usage: generate_tfrecord.py [-h] [-x XML_DIR] [-l LABELS_PATH] [-o OUTPUT_PATH] [-i IMAGE_DIR] [-c CSV_PATH]
+                            [-n NUM_SHARDS] [-j NUM_WORKERS]
 
 optional arguments:
   -h, --help            show this help message and exit
@@ -14,20 +15,32 @@ optional arguments:
                         Path to the folder where the input image files are stored. Defaults to the same directory as XML_DIR.
   -c CSV_PATH, --csv_path CSV_PATH
                         Path of output .csv file. If none provided, then no file will be written.
+  -n NUM_SHARDS, --num_shards NUM_SHARDS
+                        Number of output shards. With more than one shard the files are named
+                        OUTPUT_PATH-00000-of-0000N. Defaults to 1 (a single OUTPUT_PATH file).
+  -j NUM_WORKERS, --num_workers NUM_WORKERS
+                        Number of worker processes. Defaults to the number of CPUs.
+
+Annotations come from the cached AnnotationIndex (annotation_index.py) and
+tf.Examples are built in a process pool; image sizes come from the <size>
+element of each annotation (falling back to a header-only read when it is
+missing), so JPEGs are never decoded. Examples are written in sorted XML order
+and assigned to shards round-robin, so output is deterministic. Annotations
+without any <object> are skipped, as with the original pandas converter.
 """
 
 import os
-import glob
-import pandas as pd
-import io
-import xml.etree.ElementTree as ET
+import contextlib
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'    # Suppress TensorFlow logging (1)
 import tensorflow.compat.v1 as tf
 from PIL import Image
+from object_detection.dataset_tools import tf_record_creation_util
 from object_detection.utils import dataset_util, label_map_util
-from collections import namedtuple
+
+from annotation_index import AnnotationIndex
 
 # Initiate argument parser
 parser = argparse.ArgumentParser(
@@ -52,73 +65,49 @@ parser.add_argument("-c",
                     help="Path of output .csv file. If none provided, then no file will be "
                          "written.",
                     type=str, default=None)
+parser.add_argument("-n",
+                    "--num_shards",
+                    help="Number of output TFRecord shards.",
+                    type=int, default=1)
+parser.add_argument("-j",
+                    "--num_workers",
+                    help="Number of worker processes. Defaults to the number of CPUs.",
+                    type=int, default=None)
 
-args = parser.parse_args()
-
-if args.image_dir is None:
-    args.image_dir = args.xml_dir
-
-label_map = label_map_util.load_labelmap(args.labels_path)
-label_map_dict = label_map_util.get_label_map_dict(label_map)
-
-
-def xml_to_csv(path):
-    """Iterates through all .xml files (generated by labelImg) in a given directory and combines
-    them in a single Pandas dataframe.
-
-    Parameters:
-    ----------
-    path : str
-        The path containing the .xml files
-    Returns
-    -------
-    Pandas DataFrame
-        The produced dataframe
-    """
-
-    xml_list = []
-    for xml_file in glob.glob(path + '/*.xml'):
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        filename = root.find('filename').text
-        width = int(root.find('size').find('width').text)
-        height = int(root.find('size').find('height').text)
-        for member in root.findall('object'):
-            bndbox = member.find('bndbox')
-            value = (filename,
-                     width,
-                     height,
-                     member.find('name').text,
-                     int(bndbox.find('xmin').text),
-                     int(bndbox.find('ymin').text),
-                     int(bndbox.find('xmax').text),
-                     int(bndbox.find('ymax').text),
-                     )
-            xml_list.append(value)
-    column_name = ['filename', 'width', 'height',
-                   'class', 'xmin', 'ymin', 'xmax', 'ymax']
-    xml_df = pd.DataFrame(xml_list, columns=column_name)
-    return xml_df
+# Parsed command line, set by run()
+args = None
 
+# Per-process state, set by init_worker
+label_map_dict = None
+image_dir = None
 
-def class_text_to_int(row_label):
-    return label_map_dict[row_label]
+
+def init_worker(labels_path, images_path):
+    """Load the label map once per worker process (cached by path and mtime)."""
+    global label_map_dict, image_dir
+    label_map_dict = label_map_util.get_label_map_lookup(labels_path).label_map_dict
+    image_dir = images_path
 
 
-def split(df, group):
-    data = namedtuple('data', ['filename', 'object'])
-    gb = df.groupby(group)
-    return [data(filename, gb.get_group(x)) for filename, x in zip(gb.groups.keys(), gb.groups)]
+def image_size(image_path):
+    """Read (width, height) from the image header without decoding pixels."""
+    with Image.open(image_path) as image:
+        return image.size
+
+
+def class_text_to_int(row_label):
+    return label_map_dict[row_label]
 
 
-def create_tf_example(group, path):
-    with tf.gfile.GFile(os.path.join(path, '{}'.format(group.filename)), 'rb') as fid:
+def create_tf_example(record, path):
+    filename, width, height, objects = record
+    image_path = os.path.join(path, '{}'.format(filename))
+    with tf.gfile.GFile(image_path, 'rb') as fid:
         encoded_jpg = fid.read()
-    encoded_jpg_io = io.BytesIO(encoded_jpg)
-    image = Image.open(encoded_jpg_io)
-    width, height = image.size
+    if not width or not height:
+        width, height = image_size(image_path)
 
-    filename = group.filename.encode('utf8')
+    filename = filename.encode('utf8')
     image_format = b'jpg'
     xmins = []
     xmaxs = []
@@ -127,13 +116,13 @@ def create_tf_example(group, path):
     classes_text = []
     classes = []
 
-    for index, row in group.object.iterrows():
-        xmins.append(row['xmin'] / width)
-        xmaxs.append(row['xmax'] / width)
-        ymins.append(row['ymin'] / height)
-        ymaxs.append(row['ymax'] / height)
-        classes_text.append(row['class'].encode('utf8'))
-        classes.append(class_text_to_int(row['class']))
+    for label, xmin, ymin, xmax, ymax in objects:
+        xmins.append(xmin / width)
+        xmaxs.append(xmax / width)
+        ymins.append(ymin / height)
+        ymaxs.append(ymax / height)
+        classes_text.append(label.encode('utf8'))
+        classes.append(class_text_to_int(label))
 
     tf_example = tf.train.Example(features=tf.train.Features(feature={
         'image/height': dataset_util.int64_feature(height),
@@ -152,21 +141,51 @@ def create_tf_example(group, path):
     return tf_example
 
 
-def main(_):
+def process_record(record):
+    """Worker task: serialize the tf.Example of one annotation record."""
+    return create_tf_example(record, image_dir).SerializeToString()
+
+
+def open_writers(exit_stack, output_path, num_shards):
+    """Open OUTPUT_PATH, or num_shards sharded files when num_shards > 1."""
+    if num_shards > 1:
+        return tf_record_creation_util.open_sharded_output_tfrecords(
+            exit_stack, output_path, num_shards)
+    return [exit_stack.enter_context(tf.python_io.TFRecordWriter(output_path))]
+
 
-    writer = tf.python_io.TFRecordWriter(args.output_path)
-    path = os.path.join(args.image_dir)
-    examples = xml_to_csv(args.xml_dir)
-    grouped = split(examples, 'filename')
-    for group in grouped:
-        tf_example = create_tf_example(group, path)
-        writer.write(tf_example.SerializeToString())
-    writer.close()
-    print('Successfully created the TFRecord file: {}'.format(args.output_path))
+def main(_):
+    num_workers = args.num_workers or os.cpu_count() or 1
+    annotations = AnnotationIndex.load(args.xml_dir, num_workers=num_workers)
+    records = [record for record in annotations.records() if record[3]]
+    skipped = len(annotations) - len(records)
+    chunksize = max(1, len(records) // (num_workers * 4))
+
+    with contextlib.ExitStack() as tf_record_close_stack:
+        writers = open_writers(tf_record_close_stack, args.output_path, args.num_shards)
+        with ProcessPoolExecutor(max_workers=num_workers,
+                                 initializer=init_worker,
+                                 initargs=(args.labels_path, args.image_dir)) as pool:
+            results = pool.map(process_record, records, chunksize=chunksize)
+            for index, serialized in enumerate(results):
+                writers[index % len(writers)].write(serialized)
+
+    print('Successfully created the TFRecord file: {} ({} examples, {} shard(s))'.format(
+        args.output_path, len(records), args.num_shards))
+    if skipped:
+        print('Skipped {} annotation(s) without objects'.format(skipped))
     if args.csv_path is not None:
-        examples.to_csv(args.csv_path, index=None)
+        annotations.to_csv(args.csv_path)
         print('Successfully created the CSV file: {}'.format(args.csv_path))
 
 
+def run():
+    global args
+    args = parser.parse_args()
+    if args.image_dir is None:
+        args.image_dir = args.xml_dir
+    tf.app.run(main)
+
+
 if __name__ == '__main__':
-    tf.app.run()
\ No newline at end of file
+    run()
@@ -0,0 +1,349 @@
+""" Random access and statistics for TFRecord files
+
+usage: record_index.py [-h] [--stats] [--show K] [--rebuild] [-j NUM_WORKERS] RECORD [RECORD ...]
+
+Builds a sidecar offset index (RECORD.idx) for each TFRecord shard so that
+example k can be read with a single seek instead of a scan, and computes
+dataset statistics in parallel:
+
+  per-class box counts, box area and aspect-ratio histograms, image size
+  distribution, and records whose length or data CRC does not match
+
+RECORD may be a glob (e.g. annotations/train.record-*). Indexing only reads the
+12-byte record headers; statistics split every shard into chunks of the index
+and process the chunks in a process pool, so a single large shard is still
+parallel.
+
+The sidecar is a .npy array of int64 pairs: a header row (-1, file size)
+followed by one (offset, length) row per record. It is rebuilt when it is older
+than the record or was built for a different file size. Indexing stops at a
+truncated record or a record whose length CRC does not match; the bytes after
+it are reported by --stats.
+
+Examples:
+  python record_index.py ../workspace/training_demo/annotations/test.record --stats
+  python record_index.py ../workspace/training_demo/annotations/test.record --show 17
+"""
+
+import os
+import glob
+import struct
+import argparse
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from crc32c import crc32c as _crc32c
+except ImportError:
+    try:
+        from google_crc32c import value as _crc32c
+    except ImportError:
+        _crc32c = None
+
+HEADER_SIZE = 12    # uint64 length + uint32 masked CRC of the length
+FOOTER_SIZE = 4     # uint32 masked CRC of the data
+INDEX_MARKER = -1   # first column of the sidecar header row; offsets are never negative
+CHUNK_RECORDS = 256
+
+# Fixed histogram edges so per-chunk histograms can simply be summed
+AREA_BINS = np.logspace(-4, 0, 17)          # box area as a fraction of the image
+ASPECT_BINS = np.logspace(-4, 4, 17, base=2)  # box width / height in pixels
+
+
+def _make_crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc32c(data):
+    """CRC-32C (Castagnoli); uses the crc32c/google-crc32c extension if installed."""
+    if _crc32c is not None:
+        return _crc32c(data)
+    crc = 0xFFFFFFFF
+    table = _CRC_TABLE
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def masked_crc(data):
+    crc = crc32c(data)
+    return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+
+def index_path(record_path):
+    return record_path + '.idx'
+
+
+def build_index(record_path):
+    """Scan the record headers and return an (N, 2) int64 array of (offset, length).
+
+    Indexing stops at a truncated record or at a header whose length CRC does
+    not match, since the offsets after a corrupt length cannot be trusted.
+    """
+    entries = []
+    file_size = os.path.getsize(record_path)
+    with open(record_path, 'rb') as f:
+        offset = 0
+        while offset + HEADER_SIZE <= file_size:
+            f.seek(offset)
+            header = f.read(HEADER_SIZE)
+            length, length_crc = struct.unpack('<QI', header)
+            if length_crc != masked_crc(header[:8]):
+                break
+            end = offset + HEADER_SIZE + length + FOOTER_SIZE
+            if end > file_size:
+                break
+            entries.append((offset, length))
+            offset = end
+    return np.array(entries, dtype=np.int64).reshape(-1, 2)
+
+
+def indexed_bytes(entries):
+    """Number of bytes at the start of the shard covered by the index."""
+    if not len(entries):
+        return 0
+    return int(entries[-1, 0] + entries[-1, 1]) + HEADER_SIZE + FOOTER_SIZE
+
+
+def _load_sidecar(record_path, idx_path):
+    """Return the indexed entries, or None if the sidecar is missing or stale."""
+    try:
+        if os.path.getmtime(idx_path) < os.path.getmtime(record_path):
+            return None
+        sidecar = np.load(idx_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if sidecar.ndim != 2 or sidecar.shape[1] != 2 or not len(sidecar):
+        return None
+    marker, file_size = sidecar[0]
+    if marker != INDEX_MARKER or file_size != os.path.getsize(record_path):
+        return None
+    return sidecar[1:]
+
+
+def load_index(record_path, rebuild=False):
+    """Return the (offset, length) index of a shard, building the sidecar if needed."""
+    idx_path = index_path(record_path)
+    entries = None if rebuild else _load_sidecar(record_path, idx_path)
+    if entries is None:
+        file_size = os.path.getsize(record_path)
+        entries = build_index(record_path)
+        sidecar = np.concatenate([[[INDEX_MARKER, file_size]], entries]).astype(np.int64)
+        # A unique temporary name, since stats workers may race to rebuild the same shard
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(idx_path) + '.',
+                                        suffix='.tmp', dir=os.path.dirname(idx_path) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, sidecar)
+            os.replace(tmp_path, idx_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return entries
+
+
+class CorruptRecordError(ValueError):
+    """Raised when a record's length or data CRC does not match."""
+
+
+class IndexedRecord(object):
+    """O(1) random access to the serialized examples of one TFRecord shard.
+
+    Usage:
+        with IndexedRecord('test.record') as records:
+            example = tf.train.Example.FromString(records[17])
+    """
+
+    def __init__(self, record_path, verify=True):
+        self.path = record_path
+        self.verify = verify
+        self.entries = load_index(record_path)
+        self._file = open(record_path, 'rb')
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, k):
+        offset, length = self.entries[k]
+        self._file.seek(int(offset))
+        buf = self._file.read(HEADER_SIZE + int(length) + FOOTER_SIZE)
+        data = buf[HEADER_SIZE:HEADER_SIZE + length]
+        if self.verify:
+            length_crc, = struct.unpack('<I', buf[8:HEADER_SIZE])
+            data_crc, = struct.unpack('<I', buf[HEADER_SIZE + length:])
+            if length_crc != masked_crc(buf[:8]) or data_crc != masked_crc(data):
+                raise CorruptRecordError(
+                    'CRC mismatch in {} at record {} (offset {})'.format(self.path, k, offset))
+        return data
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _chunk_stats(task):
+    """Worker task: statistics for records [start, end) of one shard."""
+    from tensorflow.core.example import example_pb2
+
+    record_path, start, end = task
+    class_counts = Counter()
+    image_sizes = Counter()
+    area_hist = np.zeros(len(AREA_BINS) - 1, dtype=np.int64)
+    aspect_hist = np.zeros(len(ASPECT_BINS) - 1, dtype=np.int64)
+    failures = []
+    with IndexedRecord(record_path) as records:
+        for k in range(start, end):
+            try:
+                example = example_pb2.Example.FromString(records[k])
+            except Exception as e:  # CorruptRecordError or a protobuf DecodeError
+                failures.append((record_path, k, str(e)))
+                continue
+            feature = example.features.feature
+            width = feature['image/width'].int64_list.value
+            height = feature['image/height'].int64_list.value
+            width = width[0] if width else 0
+            height = height[0] if height else 0
+            image_sizes[(width, height)] += 1
+            class_counts.update(v.decode('utf8') for v in
+                                feature['image/object/class/text'].bytes_list.value)
+            xmin = np.array(feature['image/object/bbox/xmin'].float_list.value)
+            xmax = np.array(feature['image/object/bbox/xmax'].float_list.value)
+            ymin = np.array(feature['image/object/bbox/ymin'].float_list.value)
+            ymax = np.array(feature['image/object/bbox/ymax'].float_list.value)
+            box_w = np.clip(xmax - xmin, 0, None)
+            box_h = np.clip(ymax - ymin, 0, None)
+            area_hist += np.histogram(np.clip(box_w * box_h, AREA_BINS[0], AREA_BINS[-1]),
+                                      AREA_BINS)[0]
+            valid = (box_h > 0) & (height > 0)
+            aspect = box_w[valid] * width / (box_h[valid] * height)
+            aspect_hist += np.histogram(np.clip(aspect, ASPECT_BINS[0], ASPECT_BINS[-1]),
+                                        ASPECT_BINS)[0]
+    return end - start, class_counts, image_sizes, area_hist, aspect_hist, failures
+
+
+def dataset_stats(record_paths, num_workers=None, chunk_records=CHUNK_RECORDS):
+    """Compute statistics over many shards in parallel.
+
+    Returns
+    -------
+    dict
+        examples, class_counts, image_sizes, area_hist, aspect_hist (with the
+        module-level bin edges) and failures as (path, k, reason) tuples
+    """
+    tasks = []
+    unindexed = []
+    for record_path in record_paths:
+        entries = load_index(record_path)
+        count = len(entries)
+        tasks.extend((record_path, start, min(start + chunk_records, count))
+                     for start in range(0, count, chunk_records))
+        covered = indexed_bytes(entries)
+        trailing = os.path.getsize(record_path) - covered
+        if trailing:
+            unindexed.append((record_path, count, 'truncated record or corrupt length at '
+                              'offset {}, {} trailing bytes not indexed'.format(covered, trailing)))
+
+    totals = {
+        'examples': 0,
+        'class_counts': Counter(),
+        'image_sizes': Counter(),
+        'area_hist': np.zeros(len(AREA_BINS) - 1, dtype=np.int64),
+        'aspect_hist': np.zeros(len(ASPECT_BINS) - 1, dtype=np.int64),
+        'failures': unindexed,
+    }
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        for examples, classes, sizes, area, aspect, failures in pool.map(_chunk_stats, tasks):
+            totals['examples'] += examples
+            totals['class_counts'].update(classes)
+            totals['image_sizes'].update(sizes)
+            totals['area_hist'] += area
+            totals['aspect_hist'] += aspect
+            totals['failures'].extend(failures)
+    return totals
+
+
+def _print_histogram(title, edges, counts, fmt):
+    print(title)
+    peak = max(int(counts.max()), 1) if len(counts) else 1
+    for lo, hi, count in zip(edges[:-1], edges[1:], counts):
+        bar = '#' * int(round(40 * count / peak))
+        print('  [{} - {}) {:>7} {}'.format(fmt.format(lo), fmt.format(hi), count, bar))
+
+
+def print_stats(stats):
+    print('Examples: {}'.format(stats['examples']))
+    print('Corrupt records: {}'.format(len(stats['failures'])))
+    for record_path, k, reason in stats['failures']:
+        print('  {} #{}: {}'.format(record_path, k, reason))
+    print('Boxes per class:')
+    for name, count in sorted(stats['class_counts'].items()):
+        print('  {}: {}'.format(name, count))
+    print('Image sizes (width x height):')
+    for (width, height), count in stats['image_sizes'].most_common():
+        print('  {}x{}: {}'.format(width, height, count))
+    _print_histogram('Box area (fraction of image):', AREA_BINS, stats['area_hist'], '{:.4f}')
+    _print_histogram('Box aspect ratio (w/h):', ASPECT_BINS, stats['aspect_hist'], '{:.3f}')
+
+
+def show_example(record_path, k):
+    from tensorflow.core.example import example_pb2
+
+    with IndexedRecord(record_path) as records:
+        example = example_pb2.Example.FromString(records[k])
+    feature = example.features.feature
+    print('{} #{} of {}'.format(record_path, k, len(records)))
+    for key in sorted(feature):
+        value = feature[key]
+        kind = value.WhichOneof('kind')
+        values = list(getattr(value, kind).value) if kind else []
+        if key == 'image/encoded':
+            print('  {}: <{} bytes>'.format(key, len(values[0]) if values else 0))
+        else:
+            print('  {}: {}'.format(key, values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index TFRecord shards and compute statistics")
+    parser.add_argument("records", nargs="+", help="TFRecord files or glob patterns")
+    parser.add_argument("--stats", action="store_true", help="Print dataset statistics")
+    parser.add_argument("--show", type=int, default=None, metavar="K",
+                        help="Print example K of the first record file")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the sidecar indexes")
+    parser.add_argument("-j", "--num_workers", type=int, default=None,
+                        help="Number of worker processes. Defaults to the number of CPUs.")
+    args = parser.parse_args()
+
+    record_paths = []
+    for pattern in args.records:
+        record_paths.extend(sorted(path for path in glob.glob(pattern)
+                                   if not path.endswith('.idx')) or [pattern])
+
+    for record_path in record_paths:
+        entries = load_index(record_path, rebuild=args.rebuild)
+        print('{}: {} records, index {}'.format(record_path, len(entries),
+                                                index_path(record_path)))
+    if args.show is not None:
+        show_example(record_paths[0], args.show)
+    if args.stats:
+        print_stats(dataset_stats(record_paths, args.num_workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+"""Tests for record_index."""
+
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import record_index
+from record_index import (
+    FOOTER_SIZE,
+    HEADER_SIZE,
+    INDEX_MARKER,
+    CorruptRecordError,
+    IndexedRecord,
+    build_index,
+    crc32c,
+    index_path,
+    indexed_bytes,
+    load_index,
+    masked_crc,
+)
+
+
+def _framed(data):
+    header = struct.pack('<Q', len(data))
+    return (header + struct.pack('<I', masked_crc(header)) + data +
+            struct.pack('<I', masked_crc(data)))
+
+
+def _write_records(path, records):
+    with open(path, 'wb') as f:
+        for data in records:
+            f.write(_framed(data))
+
+
+class Crc32cTest(unittest.TestCase):
+
+    # Check values from RFC 3720 (iSCSI), appendix B.4, and the CRC catalogue
+    VECTORS = [
+        (b'', 0x00000000),
+        (b'123456789', 0xE3069283),
+        (b'\x00' * 32, 0x8A9136AA),
+        (b'\xff' * 32, 0x62A8AB43),
+        (bytes(range(32)), 0x46DD794E),
+        (bytes(range(31, -1, -1)), 0x113FDB5C),
+    ]
+
+    def test_pure_python_fallback(self):
+        with mock.patch.object(record_index, '_crc32c', None):
+            for data, expected in self.VECTORS:
+                with self.subTest(data=data):
+                    self.assertEqual(crc32c(data), expected)
+
+    def test_extension_matches_fallback(self):
+        if record_index._crc32c is None:
+            self.skipTest('no crc32c extension installed')
+        for data, expected in self.VECTORS:
+            with self.subTest(data=data):
+                self.assertEqual(crc32c(data), expected)
+
+    def test_masked_crc(self):
+        with mock.patch.object(record_index, '_crc32c', None):
+            # rotate right by 15 bits of 0xE3069283, plus 0xA282EAD8
+            self.assertEqual(masked_crc(b'123456789'), 0xC78AB0E5)
+
+
+class LoadIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.record_path = os.path.join(self.tmp.name, 'test.record')
+        self.records = [b'a', b'bcd', b'', b'efgh' * 10]
+        _write_records(self.record_path, self.records)
+
+    def _expected_entries(self, records):
+        entries, offset = [], 0
+        for data in records:
+            entries.append([offset, len(data)])
+            offset += HEADER_SIZE + len(data) + FOOTER_SIZE
+        return entries
+
+    def test_build_index(self):
+        entries = build_index(self.record_path)
+        self.assertEqual(entries.dtype, np.int64)
+        self.assertEqual(entries.tolist(), self._expected_entries(self.records))
+        self.assertEqual(indexed_bytes(entries), os.path.getsize(self.record_path))
+        self.assertEqual(indexed_bytes(build_index(os.devnull)), 0)
+
+    def test_sidecar_is_written_and_reused(self):
+        entries = load_index(self.record_path)
+        sidecar = np.load(index_path(self.record_path))
+        self.assertEqual(sidecar[0].tolist(), [INDEX_MARKER, os.path.getsize(self.record_path)])
+        self.assertEqual(sidecar[1:].tolist(), entries.tolist())
+        # No temporary files are left behind
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['test.record', 'test.record.idx'])
+
+        with mock.patch.object(record_index, 'build_index') as build:
+            self.assertEqual(load_index(self.record_path).tolist(), entries.tolist())
+        build.assert_not_called()
+
+    def test_stale_sidecar_is_rebuilt(self):
+        load_index(self.record_path)
+        idx_path = index_path(self.record_path)
+
+        # Record appended to: the size no longer matches
+        self.records.append(b'ijk')
+        _write_records(self.record_path, self.records)
+        os.utime(idx_path, ns=(os.stat(idx_path).st_atime_ns,
+                               os.stat(self.record_path).st_mtime_ns + 10 ** 9))
+        self.assertEqual(load_index(self.record_path).tolist(),
+                         self._expected_entries(self.records))
+
+        # Same size, but the record is newer than the sidecar
+        self.records[0] = b'z'
+        _write_records(self.record_path, self.records)
+        mtime = os.stat(self.record_path).st_mtime_ns - 10 ** 9
+        os.utime(idx_path, ns=(mtime, mtime))
+        with mock.patch.object(record_index, 'build_index',
+                               wraps=record_index.build_index) as build:
+            load_index(self.record_path)
+        build.assert_called_once_with(self.record_path)
+        self.assertGreaterEqual(os.stat(idx_path).st_mtime_ns,
+                                os.stat(self.record_path).st_mtime_ns)
+
+    def test_rebuild_and_unreadable_sidecar(self):
+        load_index(self.record_path)
+        idx_path = index_path(self.record_path)
+        with open(idx_path, 'wb') as f:
+            np.save(f, np.array([[INDEX_MARKER, os.path.getsize(self.record_path)],
+                                 [0, 1]], dtype=np.int64))
+        self.assertEqual(load_index(self.record_path).tolist(), [[0, 1]])
+        self.assertEqual(load_index(self.record_path, rebuild=True).tolist(),
+                         self._expected_entries(self.records))
+
+        with open(idx_path, 'wb') as f:
+            f.write(b'not an npy file')
+        self.assertEqual(load_index(self.record_path).tolist(),
+                         self._expected_entries(self.records))
+
+    def test_indexing_stops_at_truncated_record(self):
+        with open(self.record_path, 'ab') as f:
+            f.write(_framed(b'lost')[:-2])
+        entries = load_index(self.record_path)
+        self.assertEqual(entries.tolist(), self._expected_entries(self.records))
+        self.assertEqual(os.path.getsize(self.record_path) - indexed_bytes(entries),
+                         HEADER_SIZE + len(b'lost') + FOOTER_SIZE - 2)
+        # The sidecar is kept, so the truncated shard is not rescanned every time
+        with mock.patch.object(record_index, 'build_index') as build:
+            load_index(self.record_path)
+        build.assert_not_called()
+
+    def test_indexing_stops_at_corrupt_length(self):
+        with open(self.record_path, 'r+b') as f:
+            f.seek(self._expected_entries(self.records)[2][0] + 8)
+            f.write(b'\x00\x00\x00\x00')
+        self.assertEqual(build_index(self.record_path).tolist(),
+                         self._expected_entries(self.records[:2]))
+
+
+class IndexedRecordTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.record_path = os.path.join(self.tmp.name, 'test.record')
+        self.records = [b'first', b'second', b'third']
+        _write_records(self.record_path, self.records)
+
+    def test_random_access(self):
+        with IndexedRecord(self.record_path) as records:
+            self.assertEqual(len(records), 3)
+            self.assertEqual([records[k] for k in (2, 0, 1)],
+                             [b'third', b'first', b'second'])
+            self.assertEqual(records[-1], b'third')
+
+    def test_flipped_byte_raises(self):
+        with open(self.record_path, 'r+b') as f:
+            f.seek(HEADER_SIZE + len(b'first') + FOOTER_SIZE + HEADER_SIZE + 2)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0x01]))
+
+        with IndexedRecord(self.record_path) as records:
+            self.assertEqual(records[0], b'first')
+            with self.assertRaises(CorruptRecordError):
+                records[1]
+            self.assertEqual(records[2], b'third')
+        with IndexedRecord(self.record_path, verify=False) as records:
+            self.assertEqual(records[1], b'sebond')
+
+
+if __name__ == '__main__':
+    unittest.main()
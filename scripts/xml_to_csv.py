@@ -1,35 +1,32 @@
+""" Convert a folder of labelImg XML annotations to the CSV layout used by the record scripts
+
+usage: xml_to_csv.py [-h] [-x XML_DIR] [-o CSV_PATH]
+
+Reads the annotations through the cached AnnotationIndex (annotation_index.py),
+so re-running it on an unchanged folder does not parse any XML.
+"""
+
 import os
-import glob
-import pandas as pd
-import xml.etree.ElementTree as ET
-
-
-def xml_to_csv(path):
-    xml_list = []
-    for xml_file in glob.glob(path + '/*.xml'):
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        for member in root.findall('object'):
-            value = (root.find('filename').text,
-                     int(root.find('size')[0].text),
-                     int(root.find('size')[1].text),
-                     member[0].text,
-                     int(member[4][0].text),
-                     int(member[4][1].text),
-                     int(member[4][2].text),
-                     int(member[4][3].text)
-                     )
-            xml_list.append(value)
-    column_name = ['filename', 'width', 'height', 'class', 'xmin', 'ymin', 'xmax', 'ymax']
-    xml_df = pd.DataFrame(xml_list, columns=column_name)
-    return xml_df
+import argparse
+
+from annotation_index import AnnotationIndex
+
+TRAINING_DEMO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'workspace', 'training_demo')
 
 
 def main():
-    image_path = os.path.join(os.getcwd(), 'D:/final_invoice/workspace/training_demo/images/test_images')
-    xml_df = xml_to_csv(image_path)
-    xml_df.to_csv('test_labels_final.csv', index=None)
+    parser = argparse.ArgumentParser(description="Convert labelImg XML annotations to CSV")
+    parser.add_argument("-x", "--xml_dir", type=str,
+                        default=os.path.join(TRAINING_DEMO, 'images', 'test_images'),
+                        help="Path to the folder where the input .xml files are stored.")
+    parser.add_argument("-o", "--csv_path", type=str, default='test_labels_final.csv',
+                        help="Path of output .csv file.")
+    args = parser.parse_args()
+
+    AnnotationIndex.load(args.xml_dir).to_csv(args.csv_path)
     print('Successfully converted xml to csv.')
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,37 @@
+"""Render ground-truth annotations (and optional predictions) for review.
+
+Annotations are read once through the cached AnnotationIndex
+(scripts/annotation_index.py). Images are decoded, drawn and downscaled in a
+process pool; with --predictions each tile shows ground truth on the left and
+detections on the right. Tiles are assembled into contact sheets (grids of
+many invoices per image) so hundreds of annotations can be scanned quickly.
+
+Predictions are JSON Lines with one object per image:
+    {"filename": "Invoice_1.jpg",
+     "detections": [{"label": "Total", "xmin": 446, "ymin": 492,
+                     "xmax": 543, "ymax": 518, "score": 0.93}, ...]}
+
+Usage:
+    python visualize_annotations.py
+    python visualize_annotations.py --predictions preds.jsonl --columns 8 --full
+"""
+
 import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
 import cv2
-import glob
-import xml.etree.ElementTree as ET
+import numpy as np
+
+IMG_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.abspath(os.path.join(IMG_DIR, "..", "..", "..", ".."))
+sys.path.append(os.path.join(REPO_DIR, "scripts"))
+
+from annotation_index import AnnotationIndex  # noqa: E402
 
-# Paths
-IMG_DIR = "workspace/training_demo/images/test_images/"
 OUT_DIR = os.path.join(IMG_DIR, "visualized")
-os.makedirs(OUT_DIR, exist_ok=True)
 
 # Colors for each class (BGR)
 COLORS = {
@@ -18,32 +43,148 @@ COLORS = {
     "Date": (0, 255, 255),
 }
 
-def draw_boxes(image, xml_path):
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-    for obj in root.findall("object"):
-        name = obj.find("name").text
-        bndbox = obj.find("bndbox")
-        xmin = int(bndbox.find("xmin").text)
-        ymin = int(bndbox.find("ymin").text)
-        xmax = int(bndbox.find("xmax").text)
-        ymax = int(bndbox.find("ymax").text)
+
+def _read_image(img_path, scale):
+    """Decode an image, letting libjpeg downscale by 2/4/8 when possible."""
+    flags = cv2.IMREAD_COLOR
+    if scale <= 0.125:
+        flags, factor = cv2.IMREAD_REDUCED_COLOR_8, 8
+    elif scale <= 0.25:
+        flags, factor = cv2.IMREAD_REDUCED_COLOR_4, 4
+    elif scale <= 0.5:
+        flags, factor = cv2.IMREAD_REDUCED_COLOR_2, 2
+    else:
+        factor = 1
+    image = cv2.imread(img_path, flags)
+    return image, factor
+
+
+def draw_boxes(image, labels, boxes, scale=1.0, scores=None):
+    """Draw labelled boxes (xmin, ymin, xmax, ymax in source pixels) in place."""
+    thickness = max(1, int(round(2 * scale)))
+    font_scale = max(0.3, 0.7 * scale)
+    for i, (name, box) in enumerate(zip(labels, boxes)):
+        xmin, ymin, xmax, ymax = (int(round(v * scale)) for v in box)
         color = COLORS.get(name, (0, 0, 0))
-        cv2.rectangle(image, (xmin, ymin), (xmax, ymax), color, 2)
-        cv2.putText(image, name, (xmin, ymin - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        cv2.rectangle(image, (xmin, ymin), (xmax, ymax), color, thickness)
+        text = name if scores is None else "{} {:.2f}".format(name, scores[i])
+        cv2.putText(image, text, (xmin, max(0, ymin - 4)), cv2.FONT_HERSHEY_SIMPLEX,
+                    font_scale, color, thickness)
     return image
 
-# Process all XML files in the directory
-for xml_file in glob.glob(os.path.join(IMG_DIR, "*.xml")):
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-    filename = root.find("filename").text
-    img_path = os.path.join(IMG_DIR, filename)
+
+def render(task):
+    """Worker task: draw one image and return its downscaled tile.
+
+    task is (img_path, out_path, width, gt_labels, gt_boxes, predictions,
+    tile_width, full). out_path receives the full-resolution rendering when
+    full is set.
+    """
+    img_path, out_path, width, gt_labels, gt_boxes, predictions, tile_width, full = task
     if not os.path.exists(img_path):
-        print(f"Image not found: {img_path}")
-        continue
-    image = cv2.imread(img_path)
-    image = draw_boxes(image, xml_file)
-    out_path = os.path.join(OUT_DIR, filename)
-    cv2.imwrite(out_path, image)
-    print(f"Saved: {out_path}") 
\ No newline at end of file
+        return img_path, None
+
+    if full:
+        image, factor = cv2.imread(img_path), 1
+    else:
+        # Decode at the smallest libjpeg reduction that still covers the tile
+        panel_width = tile_width / (2 if predictions is not None else 1)
+        image, factor = _read_image(img_path, panel_width / max(width, 1))
+    if image is None:
+        return img_path, None
+
+    panels = [draw_boxes(image.copy() if predictions is not None else image,
+                         gt_labels, gt_boxes, 1.0 / factor)]
+    if predictions is not None:
+        panels.append(draw_boxes(
+            image, [d["label"] for d in predictions],
+            [(d["xmin"], d["ymin"], d["xmax"], d["ymax"]) for d in predictions],
+            1.0 / factor, [d.get("score", 1.0) for d in predictions]))
+    canvas = np.hstack(panels)
+
+    if full:
+        cv2.imwrite(out_path, canvas)
+    tile_height = int(round(canvas.shape[0] * tile_width / canvas.shape[1]))
+    tile = cv2.resize(canvas, (tile_width, tile_height), interpolation=cv2.INTER_AREA)
+    cv2.putText(tile, os.path.basename(img_path), (4, tile_height - 6),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1)
+    return img_path, tile
+
+
+def contact_sheets(tiles, columns, rows, out_dir):
+    """Paste tiles into columns x rows grids and write them as JPEGs."""
+    per_sheet = columns * rows
+    paths = []
+    for sheet, start in enumerate(range(0, len(tiles), per_sheet)):
+        batch = tiles[start:start + per_sheet]
+        tile_w = max(tile.shape[1] for tile in batch)
+        tile_h = max(tile.shape[0] for tile in batch)
+        used_rows = (len(batch) + columns - 1) // columns
+        canvas = np.full((used_rows * tile_h, columns * tile_w, 3), 255, dtype=np.uint8)
+        for i, tile in enumerate(batch):
+            y, x = (i // columns) * tile_h, (i % columns) * tile_w
+            canvas[y:y + tile.shape[0], x:x + tile.shape[1]] = tile
+        path = os.path.join(out_dir, "contact_sheet_{:03d}.jpg".format(sheet))
+        cv2.imwrite(path, canvas, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        paths.append(path)
+    return paths
+
+
+def load_predictions(path):
+    predictions = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                predictions[os.path.basename(item["filename"])] = item.get("detections", [])
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Visualize labelImg annotations")
+    parser.add_argument("--img_dir", default=IMG_DIR, help="Folder with images and .xml files")
+    parser.add_argument("--out_dir", default=OUT_DIR)
+    parser.add_argument("--predictions", default=None,
+                        help="JSON Lines detections to draw next to the ground truth")
+    parser.add_argument("--full", action="store_true",
+                        help="Also write a full-resolution rendering per image")
+    parser.add_argument("--tile_width", type=int, default=320)
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--rows", type=int, default=5)
+    parser.add_argument("-j", "--num_workers", type=int, default=None)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    index = AnnotationIndex.load(args.img_dir, num_workers=args.num_workers)
+    predictions = load_predictions(args.predictions) if args.predictions else None
+
+    tasks = []
+    for filename in index.filenames:
+        annotation = index.image(filename)
+        tasks.append((
+            os.path.join(args.img_dir, filename),
+            os.path.join(args.out_dir, filename),
+            annotation["width"],
+            annotation["classes"],
+            annotation["boxes"].tolist(),
+            predictions.get(filename, []) if predictions is not None else None,
+            args.tile_width,
+            args.full,
+        ))
+
+    tiles = []
+    with ProcessPoolExecutor(max_workers=args.num_workers) as pool:
+        for img_path, tile in pool.map(render, tasks, chunksize=8):
+            if tile is None:
+                print(f"Image not found: {img_path}")
+                continue
+            tiles.append(tile)
+
+    for path in contact_sheets(tiles, args.columns, args.rows, args.out_dir):
+        print(f"Saved: {path}")
+    if args.full:
+        print(f"Saved {len(tiles)} full-size renderings to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()